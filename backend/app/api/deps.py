@@ -6,9 +6,9 @@ from typing import AsyncGenerator, Optional, List
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.db.session import get_db
 from app.core.security import decode_access_token
+from app.core.user_cache import get_cached_user
 from app.models.user import User, UserRole
 
 # OAuth2密码流（Token从Header的Authorization: Bearer <token>获取）
@@ -45,7 +45,10 @@ async def get_current_user(
     user_id: int = Depends(get_current_user_id)
 ) -> User:
     """
-    依赖注入：获取当前用户完整对象
+    依赖注入：获取当前用户（读取用户缓存，见 app/core/user_cache.py）
+
+    返回的 User 对象不在数据库会话中且不含密码哈希，
+    需要修改当前用户时应通过 db.get(User, current_user.id) 重新加载
 
     Args:
         db: 数据库会话
@@ -57,8 +60,7 @@ async def get_current_user(
     Raises:
         HTTPException: 用户不存在或未激活时抛出错误
     """
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    user = await get_cached_user(db, user_id)
 
     if not user:
         raise HTTPException(
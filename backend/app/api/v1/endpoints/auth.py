@@ -10,11 +10,20 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import Token, LoginRequest
 from app.schemas.response import success_response, error_response
-from app.core.security import verify_password, create_access_token
+from app.core.security import (
+    verify_password_async, get_password_hash_async, password_needs_rehash, create_access_token
+)
 
 router = APIRouter()
 
 
+async def _upgrade_password_hash(db: AsyncSession, user: User, password: str) -> None:
+    """BCRYPT_ROUNDS 调整后，登录成功时按新的成本因子重新哈希密码"""
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(password)
+        await db.commit()
+
+
 @router.post("/login", response_model=dict, summary="用户登录")
 async def login(
     login_data: LoginRequest,
@@ -33,13 +42,15 @@ async def login(
     user = result.scalar_one_or_none()
 
     # 验证用户存在且密码正确
-    if not user or not verify_password(login_data.password, user.hashed_password):
+    if not user or not await verify_password_async(login_data.password, user.hashed_password):
         return error_response("用户名或密码错误", code=401)
 
     # 检查用户是否激活
     if not user.is_active:
         return error_response("用户已被禁用", code=403)
 
+    await _upgrade_password_hash(db, user, login_data.password)
+
     # 生成Token
     access_token = create_access_token(data={"sub": str(user.id)})
 
@@ -68,7 +79,7 @@ async def login_oauth2(
     )
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="用户名或密码错误",
@@ -81,6 +92,8 @@ async def login_oauth2(
             detail="用户已被禁用"
         )
 
+    await _upgrade_password_hash(db, user, form_data.password)
+
     access_token = create_access_token(data={"sub": str(user.id)})
 
     return Token(access_token=access_token, token_type="bearer")
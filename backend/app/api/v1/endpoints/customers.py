@@ -2,13 +2,14 @@
 客户管理路由 - CRUD + 统计分析 + Excel导入导出
 """
 from typing import List, Optional
-from io import BytesIO
 from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import get_db
+from app.core.executor import run_render
+from app.core.cache import cached, invalidate_tags, TAG_CUSTOMERS, TAG_ORDERS, TAG_PAYMENTS
 from app.schemas.customer import (
     CustomerCreate,
     CustomerUpdate,
@@ -18,8 +19,9 @@ from app.schemas.customer import (
 )
 from app.schemas.order import OrderListResponse
 from app.schemas.response import success_response, error_response
-from app.services import customer_service
+from app.services import customer_service, import_service, export_service
 from app.utils.excel_handler import ExcelHandler
+from app.utils.data_export import export_response, EXPORT_FORMAT_PATTERN
 
 router = APIRouter()
 
@@ -38,6 +40,7 @@ async def create_customer(
     """
     try:
         customer = await customer_service.create_customer(db, customer_in)
+        await invalidate_tags(TAG_CUSTOMERS)
         return success_response(
             data=CustomerResponse.model_validate(customer).model_dump(),
             msg="客户创建成功"
@@ -119,6 +122,7 @@ async def update_customer(
     """
     try:
         customer = await customer_service.update_customer(db, customer_id, customer_in)
+        await invalidate_tags(TAG_CUSTOMERS)
         return success_response(
             data=CustomerResponse.model_validate(customer).model_dump(),
             msg="客户信息更新成功"
@@ -142,6 +146,7 @@ async def delete_customer(
     """
     try:
         await customer_service.delete_customer(db, customer_id)
+        await invalidate_tags(TAG_CUSTOMERS)
         return success_response(msg="客户已删除")
     except ValueError as e:
         return error_response(str(e), code=400)
@@ -150,6 +155,7 @@ async def delete_customer(
 
 
 @router.get("/{customer_id}/statistics", response_model=dict, summary="获取客户统计信息")
+@cached("customers:statistics", tags=[TAG_CUSTOMERS, TAG_ORDERS, TAG_PAYMENTS])
 async def get_customer_statistics(
     customer_id: int,
     db: AsyncSession = Depends(get_db)
@@ -246,7 +252,8 @@ async def download_customer_template() -> StreamingResponse:
         ]
 
         # 生成模板
-        excel_file = ExcelHandler.create_template(
+        excel_file = await run_render(
+            ExcelHandler.create_template,
             columns=columns,
             sheet_name='客户导入模板',
             title='客户数据导入模板',
@@ -275,7 +282,7 @@ async def export_customers_to_excel(
     keyword: Optional[str] = Query(None, description="搜索关键词"),
     status: Optional[str] = Query(None, description="客户状态筛选"),
     customer_level: Optional[str] = Query(None, description="客户等级筛选"),
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet")
 ) -> StreamingResponse:
     """
     导出客户数据到Excel
@@ -284,62 +291,24 @@ async def export_customers_to_excel(
     - 按条件筛选导出
     - 包含客户统计信息
     - 自动格式化数据
+    - 流式导出，不限制导出条数
+    - 支持 xlsx/csv/parquet 格式
+    - 数据量大时可改用后台任务 customers.export（见 /jobs）
     """
-    try:
-        # 获取客户数据（不分页，导出所有符合条件的数据）
-        customers = await customer_service.get_customers(
-            db=db,
-            keyword=keyword,
-            status=status,
-            customer_level=customer_level,
-            skip=0,
-            limit=10000  # 导出最多10000条
-        )
-
-        # 转换为字典列表
-        customer_data = []
-        for customer in customers:
-            customer_dict = CustomerListItem.model_validate(customer).model_dump()
-            customer_data.append(customer_dict)
-
-        # 定义导出列
-        columns = {
-            'customer_no': '客户编号',
-            'name': '客户名称',
-            'contact_person': '联系人',
-            'contact_phone': '联系电话',
-            'contact_address': '联系地址',
-            'customer_level': '客户等级',
-            'status': '状态',
-            'total_orders': '订单总数',
-            'total_amount': '交易总额',
-            'created_at': '创建时间',
-            'remark': '备注'
-        }
-
-        # 生成Excel
-        excel_file = ExcelHandler.export_to_excel(
-            data=customer_data,
-            columns=columns,
-            sheet_name='客户数据',
-            title='客户信息列表'
-        )
-
-        # 生成文件名
-        from urllib.parse import quote
-        filename = f"客户数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+    spec = export_service.build_customer_export(
+        keyword=keyword,
+        status=status,
+        customer_level=customer_level
+    )
+
+    return export_response(
+        spec.row_chunks(),
+        columns=spec.columns,
+        filename=spec.filename,
+        export_format=format,
+        sheet_name=spec.sheet_name,
+        title=spec.title
+    )
 
 
 @router.post("/excel/import", response_model=dict, summary="从Excel批量导入客户")
@@ -357,7 +326,8 @@ async def import_customers_from_excel(
     - 返回导入结果统计
 
     注意：
-    - 重复的客户名称将被跳过
+    - 按批读取和写入，单批内一次查询 + 一次批量写入
+    - 已存在的客户名称将更新联系信息（Excel中为空的字段不覆盖）
     - 无效数据将被记录在错误列表中
     """
     try:
@@ -365,123 +335,26 @@ async def import_customers_from_excel(
         if not file.filename.endswith(('.xlsx', '.xls')):
             return error_response("仅支持Excel文件（.xlsx, .xls）", code=400)
 
-        # 读取文件内容
-        content = await file.read()
-        file_stream = BytesIO(content)
-
-        # 定义列映射
-        columns = {
-            'name': '客户名称*',
-            'contact_person': '联系人',
-            'contact_phone': '联系电话',
-            'contact_address': '联系地址',
-            'customer_level': '客户等级(A/B/C/D)',
-            'remark': '备注'
-        }
-
-        # 解析Excel
         try:
-            imported_data = ExcelHandler.import_from_excel(
-                file=file_stream,
-                columns=columns,
-                start_row=2  # 第1行是标题，第2行是表头
-            )
+            result = await import_service.import_customers(db, file.file)
         except ValueError as e:
             return error_response(f"Excel格式错误: {str(e)}", code=400)
 
-        if not imported_data:
+        if result['total'] == 0:
             return error_response("Excel文件为空或格式不正确", code=400)
 
-        # 数据验证
-        def validate_phone(value):
-            """验证电话号码"""
-            if not value:
-                return True  # 可选字段
-            value = str(value).strip()
-            return len(value) >= 7  # 简单验证长度
-
-        def validate_level(value):
-            """验证客户等级"""
-            if not value:
-                return True  # 可选字段
-            return str(value).upper() in ['A', 'B', 'C', 'D']
-
-        validators = {
-            'contact_phone': validate_phone,
-            'customer_level': validate_level
-        }
-
-        is_valid, validation_errors = ExcelHandler.validate_data(
-            data=imported_data,
-            required_fields=['name'],
-            validators=validators
-        )
-
-        if not is_valid:
-            return error_response(
-                msg="数据验证失败",
-                code=400,
-                data={"errors": validation_errors[:10]}  # 只返回前10个错误
-            )
-
-        # 批量创建客户
-        success_count = 0
-        error_count = 0
-        error_details = []
-
-        for idx, row_data in enumerate(imported_data, 1):
-            try:
-                # 清理和转换数据
-                customer_dict = {
-                    'name': row_data.get('name', '').strip(),
-                    'contact_person': row_data.get('contact_person', '').strip() or None,
-                    'contact_phone': row_data.get('contact_phone', '').strip() or None,
-                    'contact_address': row_data.get('contact_address', '').strip() or None,
-                    'customer_level': row_data.get('customer_level', 'D').strip().upper(),
-                    'remark': row_data.get('remark', '').strip() or None
-                }
-
-                # 创建Pydantic模型
-                customer_in = CustomerCreate(**customer_dict)
-
-                # 保存到数据库
-                await customer_service.create_customer(db, customer_in)
-                success_count += 1
-
-            except ValueError as e:
-                # 业务逻辑错误（如客户名重复）
-                error_count += 1
-                error_details.append({
-                    'row': idx,
-                    'name': row_data.get('name', ''),
-                    'error': str(e)
-                })
-            except Exception as e:
-                # 其他错误
-                error_count += 1
-                error_details.append({
-                    'row': idx,
-                    'name': row_data.get('name', ''),
-                    'error': f"导入失败: {str(e)}"
-                })
-
-        # 返回导入结果
-        result = {
-            'total': len(imported_data),
-            'success': success_count,
-            'failed': error_count,
-            'errors': error_details[:20]  # 最多返回20个错误详情
-        }
+        if result['success'] > 0:
+            await invalidate_tags(TAG_CUSTOMERS)
 
-        if error_count > 0:
+        if result['failed'] > 0:
             return success_response(
                 data=result,
-                msg=f"导入完成：成功{success_count}条，失败{error_count}条"
+                msg=f"导入完成：成功{result['success']}条，失败{result['failed']}条"
             )
         else:
             return success_response(
                 data=result,
-                msg=f"导入成功：共{success_count}条客户数据"
+                msg=f"导入成功：共{result['success']}条客户数据"
             )
 
     except Exception as e:
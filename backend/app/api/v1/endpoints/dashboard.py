@@ -2,9 +2,9 @@
 仪表盘API端点
 """
 from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_current_user
+from app.core.cache import cached, TAG_ORDERS, TAG_PAYMENTS, TAG_PRODUCTION, TAG_MATERIALS
 from app.models.user import User
 from app.services import dashboard_service
 
@@ -12,8 +12,8 @@ router = APIRouter()
 
 
 @router.get("/stats", summary="获取仪表盘统计数据")
+@cached("dashboard:stats", ttl=10, tags=[TAG_ORDERS, TAG_PAYMENTS, TAG_PRODUCTION, TAG_MATERIALS])
 async def get_dashboard_stats(
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> dict:
     """
@@ -25,8 +25,10 @@ async def get_dashboard_stats(
     - 库存统计（预警数量）
     - 财务统计（本月收款、回款率、应收账款）
     - 最近订单列表
+
+    统计结果短时缓存（约10秒），多个页面同时轮询只触发一次统计查询
     """
-    dashboard_data = await dashboard_service.get_dashboard_stats(db)
+    dashboard_data = await dashboard_service.get_dashboard_stats()
 
     return {
         "code": 200,
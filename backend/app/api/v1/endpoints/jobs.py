@@ -0,0 +1,147 @@
+"""
+后台任务API端点 - 提交任务、查询状态/进度、下载结果
+"""
+import os
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import FileResponse
+
+from app.api.deps import get_current_user
+from app.core.config import settings
+from app.core.jobs import jobs, job_dir, JobStatus, JOB_HANDLERS, UPLOAD_FILENAME, UPLOAD_JOB_TYPES
+from app.models.user import User, UserRole
+from app.schemas.job import JobSubmit, JobInfo
+from app.schemas.response import success_response, error_response
+from app.utils.excel_handler import STREAM_READ_SIZE
+
+# 注册任务处理函数
+import app.services.job_tasks  # noqa: F401
+
+router = APIRouter()
+
+
+def _job_info(job: Dict[str, Any]) -> dict:
+    """任务记录转换为接口返回数据"""
+    info = JobInfo(**{key: value for key, value in job.items() if key in JobInfo.model_fields})
+    if job["status"] == JobStatus.SUCCESS.value and job.get("result_file"):
+        info.download_url = f"{settings.API_V1_PREFIX}/jobs/{job['id']}/download"
+    return info.model_dump()
+
+
+async def _get_own_job(job_id: str, current_user: User) -> Dict[str, Any]:
+    """查询任务，只允许提交人或管理员访问"""
+    job = await jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="任务不存在或已过期")
+    if job.get("created_by") != current_user.id and current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="无权访问该任务")
+    return job
+
+
+@router.get("/types", summary="获取可提交的任务类型")
+async def list_job_types(current_user: User = Depends(get_current_user)) -> dict:
+    """
+    获取已注册的任务类型
+    requires_upload 为 true 的任务需通过 /jobs/upload 上传文件提交
+    """
+    data = [
+        {"type": job_type, "requires_upload": job_type in UPLOAD_JOB_TYPES}
+        for job_type in sorted(JOB_HANDLERS)
+    ]
+    return success_response(data=data)
+
+
+@router.post("/", summary="提交后台任务")
+async def submit_job(
+    job_in: JobSubmit,
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    提交后台任务，立即返回任务ID
+
+    示例：
+    - {"type": "orders.export", "params": {"status": "CONFIRMED", "format": "xlsx"}}
+    - {"type": "pdf.production", "params": {"production_id": 12}}
+    """
+    if job_in.type in UPLOAD_JOB_TYPES:
+        return error_response(f"任务 {job_in.type} 需要上传文件，请使用 /jobs/upload", code=400)
+
+    try:
+        job = await jobs.submit(job_in.type, job_in.params, user_id=current_user.id)
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+    return success_response(data=_job_info(job), msg="任务已提交")
+
+
+@router.post("/upload", summary="上传文件并提交后台任务")
+async def submit_upload_job(
+    type: str = Query(..., description="任务类型，如 materials.import / customers.import"),
+    file: UploadFile = File(..., description="Excel文件"),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    上传Excel文件并提交导入任务，立即返回任务ID
+    """
+    if type not in UPLOAD_JOB_TYPES:
+        return error_response(f"任务 {type} 不需要上传文件", code=400)
+
+    if not file.filename.endswith(('.xlsx', '.xls')):
+        return error_response("仅支持Excel文件（.xlsx, .xls）", code=400)
+
+    try:
+        job = await jobs.create(type, user_id=current_user.id)
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+    # 分块写入任务目录，不在内存中保留整个文件
+    with open(os.path.join(job_dir(job["id"]), UPLOAD_FILENAME), 'wb') as f:
+        while True:
+            data = await file.read(STREAM_READ_SIZE)
+            if not data:
+                break
+            f.write(data)
+
+    await jobs.start(job)
+    return success_response(data=_job_info(job), msg="任务已提交")
+
+
+@router.get("/", summary="获取我的后台任务")
+async def list_my_jobs(
+    limit: int = Query(20, ge=1, le=100, description="返回条数"),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """获取当前用户最近提交的任务"""
+    job_list = await jobs.list_by_user(current_user.id, limit)
+    return success_response(data=[_job_info(job) for job in job_list])
+
+
+@router.get("/{job_id}", summary="查询后台任务状态")
+async def get_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """查询任务状态、进度和结果"""
+    job = await _get_own_job(job_id, current_user)
+    return success_response(data=_job_info(job))
+
+
+@router.get("/{job_id}/download", summary="下载后台任务结果文件")
+async def download_job_result(
+    job_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """下载任务结果文件（任务完成后可用）"""
+    job = await _get_own_job(job_id, current_user)
+
+    if job["status"] != JobStatus.SUCCESS.value:
+        raise HTTPException(status_code=409, detail="任务尚未完成")
+    if not job.get("result_file") or not os.path.exists(job["result_file"]):
+        raise HTTPException(status_code=404, detail="结果文件不存在或已过期")
+
+    return FileResponse(
+        job["result_file"],
+        filename=job.get("result_name") or os.path.basename(job["result_file"]),
+        headers={"Access-Control-Expose-Headers": "Content-Disposition"}
+    )
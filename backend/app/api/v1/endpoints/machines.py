@@ -0,0 +1,131 @@
+"""
+生产设备路由 - CRUD + 产能日历
+"""
+from typing import Optional
+from datetime import date, datetime
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, get_current_user
+from app.core.cache import invalidate_tags, TAG_PRODUCTION
+from app.models.user import User
+from app.schemas.machine import MachineCreate, MachineUpdate, MachineResponse
+from app.schemas.response import success_response, error_response
+from app.services import machine_service
+from app.services.capacity_service import MAX_CALENDAR_DAYS
+
+router = APIRouter()
+
+
+@router.post("/", response_model=dict, summary="创建设备")
+async def create_machine(
+    machine_in: MachineCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """创建生产设备（设备名称与生产工单的 machine_name 对应）"""
+    try:
+        machine = await machine_service.create_machine(db, machine_in)
+        return success_response(
+            data=MachineResponse.model_validate(machine).model_dump(),
+            msg="设备创建成功"
+        )
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+
+@router.get("/", response_model=dict, summary="获取设备列表")
+async def list_machines(
+    status: Optional[str] = Query(None, description="设备状态筛选（ACTIVE/MAINTENANCE/INACTIVE）"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """获取设备列表"""
+    machines = await machine_service.get_machines(db, status)
+    return success_response(
+        data=[MachineResponse.model_validate(m).model_dump() for m in machines]
+    )
+
+
+@router.get("/capacity", response_model=dict, summary="设备产能日历")
+async def get_capacity(
+    start_date: Optional[date] = Query(None, description="开始日期，默认今天"),
+    days: int = Query(7, ge=1, le=MAX_CALENDAR_DAYS, description="天数"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """
+    各设备负荷（已排程分钟数）、班次产能、利用率，以及存在重复占用或班次外占用的日期
+    负荷按待生产/生产中工单的计划时间计算
+    """
+    try:
+        data = await machine_service.get_capacity(db, start_date or date.today(), days)
+        return success_response(data=data)
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+
+@router.get("/{machine_id}", response_model=dict, summary="获取设备详情")
+async def get_machine(
+    machine_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """获取设备详情"""
+    machine = await machine_service.get_machine(db, machine_id)
+    if not machine:
+        return error_response(f"设备 ID {machine_id} 不存在", code=404)
+    return success_response(data=MachineResponse.model_validate(machine).model_dump())
+
+
+@router.put("/{machine_id}", response_model=dict, summary="更新设备")
+async def update_machine(
+    machine_id: int,
+    machine_in: MachineUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """更新设备（修改名称时同步更新未完成工单的设备名称）"""
+    try:
+        machine = await machine_service.update_machine(db, machine_id, machine_in)
+        if machine_in.machine_name is not None:
+            await invalidate_tags(TAG_PRODUCTION)
+        return success_response(
+            data=MachineResponse.model_validate(machine).model_dump(),
+            msg="设备更新成功"
+        )
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+
+@router.delete("/{machine_id}", response_model=dict, summary="删除设备")
+async def delete_machine(
+    machine_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """删除设备"""
+    try:
+        await machine_service.delete_machine(db, machine_id)
+        return success_response(msg="设备删除成功")
+    except ValueError as e:
+        return error_response(str(e), code=400)
+
+
+@router.get("/{machine_id}/free-slot", response_model=dict, summary="查找设备空闲时段")
+async def find_free_slot(
+    machine_id: int,
+    duration_minutes: int = Query(..., gt=0, description="所需时长（分钟）"),
+    earliest: Optional[datetime] = Query(None, description="最早开始时间，默认当前时间"),
+    days: int = Query(30, ge=1, le=MAX_CALENDAR_DAYS, description="查找范围（天）"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> dict:
+    """查找第一段可容纳指定时长的连续空闲时段（班次内且未被工单占用，可跨越相连班次）"""
+    try:
+        slot = await machine_service.find_free_slot(db, machine_id, duration_minutes, earliest, days)
+        if slot is None:
+            return error_response(f"{days} 天内没有满足条件的空闲时段", code=404)
+        return success_response(data=slot)
+    except ValueError as e:
+        return error_response(str(e), code=400)
@@ -2,17 +2,17 @@
 物料管理路由 - CRUD操作 + Excel导入导出
 """
 from typing import List, Optional
-from io import BytesIO
 from datetime import datetime
 from urllib.parse import quote
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from decimal import Decimal
 
 from app.db.session import get_db
-from app.models.material import Material, MaterialCategory
+from app.core.executor import run_render
+from app.core.cache import cached, invalidate_tags, TAG_MATERIALS
+from app.models.material import Material
 from app.schemas.material import (
     MaterialCreate,
     MaterialUpdate,
@@ -22,7 +22,9 @@ from app.schemas.material import (
 )
 from app.schemas.response import success_response, error_response
 from app.services.inventory_service import InventoryService
+from app.services import import_service, export_service
 from app.utils.excel_handler import ExcelHandler
+from app.utils.data_export import export_response, EXPORT_FORMAT_PATTERN
 
 router = APIRouter()
 
@@ -47,6 +49,7 @@ async def create_material(
     db.add(material)
     await db.commit()
     await db.refresh(material)
+    await invalidate_tags(TAG_MATERIALS)
 
     return success_response(
         data=MaterialResponse.model_validate(material).model_dump(),
@@ -55,6 +58,7 @@ async def create_material(
 
 
 @router.get("/", response_model=dict, summary="获取物料列表")
+@cached("materials:list", tags=[TAG_MATERIALS])
 async def list_materials(
     skip: int = 0,
     limit: int = 100,
@@ -173,6 +177,7 @@ async def update_material(
 
     await db.commit()
     await db.refresh(material)
+    await invalidate_tags(TAG_MATERIALS)
 
     return success_response(
         data=MaterialResponse.model_validate(material).model_dump(),
@@ -196,6 +201,7 @@ async def stock_in(
         result = await InventoryService.stock_in(
             db, request.material_id, request.quantity, request.unit
         )
+        await invalidate_tags(TAG_MATERIALS)
         return success_response(data=result, msg="入库成功")
     except ValueError as e:
         return error_response(str(e), code=400)
@@ -217,6 +223,7 @@ async def stock_out(
         result = await InventoryService.stock_out(
             db, request.material_id, request.quantity, request.unit
         )
+        await invalidate_tags(TAG_MATERIALS)
         return success_response(data=result, msg="出库成功")
     except ValueError as e:
         return error_response(str(e), code=400)
@@ -277,7 +284,8 @@ async def download_material_template() -> StreamingResponse:
         ]
 
         # 生成模板
-        excel_file = ExcelHandler.create_template(
+        excel_file = await run_render(
+            ExcelHandler.create_template,
             columns=columns,
             sheet_name='物料导入模板',
             title='物料数据导入模板',
@@ -302,7 +310,7 @@ async def download_material_template() -> StreamingResponse:
 @router.get("/excel/export", summary="导出物料数据到Excel")
 async def export_materials_to_excel(
     category: Optional[str] = Query(None, description="物料分类筛选"),
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet")
 ) -> StreamingResponse:
     """
     导出物料数据到Excel
@@ -311,79 +319,20 @@ async def export_materials_to_excel(
     - 按分类筛选导出
     - 包含库存信息
     - 自动格式化数据
+    - 流式导出，不限制导出条数
+    - 支持 xlsx/csv/parquet 格式
+    - 数据量大时可改用后台任务 materials.export（见 /jobs）
     """
-    try:
-        # 获取物料数据
-        query = select(Material)
-        if category:
-            query = query.where(Material.category == category)
-
-        query = query.limit(10000)  # 导出最多10000条
-        result = await db.execute(query)
-        materials = result.scalars().all()
-
-        # 转换为字典列表并格式化
-        material_data = []
-        for material in materials:
-            material_dict = MaterialResponse.model_validate(material).model_dump()
-
-            # 转换分类枚举为中文标签
-            category_map = {
-                'PAPER': '纸张',
-                'INK': '油墨',
-                'AUX': '辅料'
-            }
-            if isinstance(material_dict['category'], str):
-                # 处理 "MaterialCategory.PAPER" 格式
-                category_value = material_dict['category'].split('.')[-1] if '.' in material_dict['category'] else material_dict['category']
-                material_dict['category'] = category_map.get(category_value, category_value)
-
-            # 格式化规格字段（纸张显示完整规格）
-            if material.category == MaterialCategory.PAPER and material.spec_width and material.spec_length:
-                material_dict['specification'] = f"{material.spec_width}×{material.spec_length}mm {material.gram_weight}g"
-            else:
-                material_dict['specification'] = '-'
-
-            # 映射字段名到实际存在的字段
-            material_dict['unit'] = material_dict.get('stock_unit', '张')
-            material_dict['unit_price'] = material_dict.get('cost_price', 0)
-            material_dict['stock_quantity'] = material_dict.get('current_stock', 0)
-
-            material_data.append(material_dict)
-
-        # 定义导出列
-        columns = {
-            'code': '物料编码',
-            'name': '物料名称',
-            'category': '物料分类',
-            'specification': '规格',
-            'unit': '单位',
-            'unit_price': '单价',
-            'stock_quantity': '库存数量',
-            'created_at': '创建时间'
-        }
-
-        # 生成Excel
-        excel_file = ExcelHandler.export_to_excel(
-            data=material_data,
-            columns=columns,
-            sheet_name='物料数据',
-            title='物料信息列表'
-        )
-
-        filename = f"物料数据_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+    spec = export_service.build_material_export(category)
+
+    return export_response(
+        spec.row_chunks(),
+        columns=spec.columns,
+        filename=spec.filename,
+        export_format=format,
+        sheet_name=spec.sheet_name,
+        title=spec.title
+    )
 
 
 @router.post("/excel/import", response_model=dict, summary="从Excel批量导入物料")
@@ -396,12 +345,13 @@ async def import_materials_from_excel(
 
     要求：
     - 使用标准模板（可通过 /excel/template 下载）
-    - 物料编码和名称必填
+    - 物料编码、名称、分类必填
     - 支持数据验证
     - 返回导入结果统计
 
     注意：
-    - 重复的物料编码将被跳过
+    - 按批读取和写入，单批内一次查询 + 一次批量写入
+    - 已存在的物料编码将更新物料信息（不修改库存）
     - 无效数据将被记录在错误列表中
     """
     try:
@@ -409,163 +359,26 @@ async def import_materials_from_excel(
         if not file.filename.endswith(('.xlsx', '.xls')):
             return error_response("仅支持Excel文件（.xlsx, .xls）", code=400)
 
-        # 读取文件内容
-        content = await file.read()
-        file_stream = BytesIO(content)
-
-        # 定义列映射
-        columns = {
-            'code': '物料编码*',
-            'name': '物料名称*',
-            'category': '物料分类*(纸张/油墨/其他)',
-            'specification': '规格',
-            'unit': '单位',
-            'unit_price': '单价',
-            'min_stock': '最小库存量',
-            'remark': '备注'
-        }
-
-        # 解析Excel
         try:
-            imported_data = ExcelHandler.import_from_excel(
-                file=file_stream,
-                columns=columns,
-                start_row=2
-            )
+            result = await import_service.import_materials(db, file.file)
         except ValueError as e:
             return error_response(f"Excel格式错误: {str(e)}", code=400)
 
-        if not imported_data:
+        if result['total'] == 0:
             return error_response("Excel文件为空或格式不正确", code=400)
 
-        # 数据验证
-        def validate_category(value):
-            """验证物料分类"""
-            if not value:
-                return False  # 必填字段
-            return str(value).strip() in ['纸张', '油墨', '其他']
-
-        def validate_price(value):
-            """验证价格"""
-            if value is None:
-                return True  # 可选字段
-            try:
-                price = float(value)
-                return price >= 0
-            except:
-                return False
-
-        def validate_quantity(value):
-            """验证库存数量"""
-            if value is None:
-                return True  # 可选字段
-            try:
-                qty = float(value)
-                return qty >= 0
-            except:
-                return False
-
-        validators = {
-            'category': validate_category,
-            'unit_price': validate_price,
-            'min_stock': validate_quantity
-        }
-
-        is_valid, validation_errors = ExcelHandler.validate_data(
-            data=imported_data,
-            required_fields=['code', 'name', 'category'],
-            validators=validators
-        )
-
-        if not is_valid:
-            return error_response(
-                msg="数据验证失败",
-                code=400,
-                data={"errors": validation_errors[:10]}
-            )
-
-        # 批量创建物料
-        success_count = 0
-        error_count = 0
-        error_details = []
-
-        for idx, row_data in enumerate(imported_data, 1):
-            try:
-                # 清理和转换数据
-                material_dict = {
-                    'code': row_data.get('code', '').strip(),
-                    'name': row_data.get('name', '').strip(),
-                    'category': row_data.get('category', '').strip(),
-                    'specification': row_data.get('specification', '').strip() or None,
-                    'unit': row_data.get('unit', '').strip() or '个',
-                    'remark': row_data.get('remark', '').strip() or None
-                }
-
-                # 处理数值字段
-                if row_data.get('unit_price'):
-                    material_dict['unit_price'] = Decimal(str(row_data.get('unit_price')))
-
-                if row_data.get('min_stock'):
-                    material_dict['min_stock'] = Decimal(str(row_data.get('min_stock')))
-
-                # 检查编码是否重复
-                result = await db.execute(
-                    select(Material).where(Material.code == material_dict['code'])
-                )
-                existing = result.scalar_one_or_none()
-
-                if existing:
-                    error_count += 1
-                    error_details.append({
-                        'row': idx,
-                        'code': material_dict['code'],
-                        'error': f"物料编码已存在"
-                    })
-                    continue
-
-                # 创建Pydantic模型
-                material_in = MaterialCreate(**material_dict)
-
-                # 保存到数据库
-                material = Material(**material_in.model_dump())
-                db.add(material)
-                await db.commit()
-                await db.refresh(material)
-
-                success_count += 1
-
-            except ValueError as e:
-                error_count += 1
-                error_details.append({
-                    'row': idx,
-                    'code': row_data.get('code', ''),
-                    'error': str(e)
-                })
-            except Exception as e:
-                error_count += 1
-                error_details.append({
-                    'row': idx,
-                    'code': row_data.get('code', ''),
-                    'error': f"导入失败: {str(e)}"
-                })
-
-        # 返回导入结果
-        result = {
-            'total': len(imported_data),
-            'success': success_count,
-            'failed': error_count,
-            'errors': error_details[:20]
-        }
+        if result['success'] > 0:
+            await invalidate_tags(TAG_MATERIALS)
 
-        if error_count > 0:
+        if result['failed'] > 0:
             return success_response(
                 data=result,
-                msg=f"导入完成：成功{success_count}条，失败{error_count}条"
+                msg=f"导入完成：成功{result['success']}条，失败{result['failed']}条"
             )
         else:
             return success_response(
                 data=result,
-                msg=f"导入成功：共{success_count}条物料数据"
+                msg=f"导入成功：共{result['success']}条物料数据"
             )
 
     except Exception as e:
@@ -5,7 +5,6 @@ from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from io import BytesIO
-from urllib.parse import quote
 from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +12,7 @@ from sqlalchemy import select, func
 from sqlalchemy.orm import selectinload
 
 from app.db.session import get_db
+from app.core.cache import invalidate_tags, TAG_ORDERS
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.material import Material
 from app.schemas.order import (
@@ -23,7 +23,9 @@ from app.schemas.order import (
 )
 from app.schemas.response import success_response, error_response
 from app.services.calculation_service import CalculationService
-from app.utils.excel_handler import ExcelHandler
+from app.services import rollup_service, export_service
+from app.services.status_service import check_order_transition
+from app.utils.data_export import export_response, EXPORT_FORMAT_PATTERN
 
 router = APIRouter()
 
@@ -117,8 +119,13 @@ async def create_order(
 
         # 更新订单总金额
         order.total_amount = total_amount
+
+        # 更新订单日汇总
+        await rollup_service.record_order(db, order)
+
         await db.commit()
         await db.refresh(order)
+        await invalidate_tags(TAG_ORDERS)
 
         # 加载关联数据
         result = await db.execute(
@@ -217,6 +224,7 @@ async def update_order(
 
     await db.commit()
     await db.refresh(order)
+    await invalidate_tags(TAG_ORDERS)
 
     return success_response(
         data=OrderResponse.model_validate(order).model_dump(),
@@ -238,11 +246,14 @@ async def confirm_order(
     if not order:
         return error_response(f"订单ID {order_id} 不存在", code=404)
 
-    if order.status != OrderStatus.DRAFT:
-        return error_response(f"订单状态为 {order.status.value}，无法确认", code=400)
+    try:
+        check_order_transition(order.status, OrderStatus.CONFIRMED, f"订单状态为 {order.status.value}，无法确认")
+    except ValueError as e:
+        return error_response(str(e), code=400)
 
     order.status = OrderStatus.CONFIRMED
     await db.commit()
+    await invalidate_tags(TAG_ORDERS)
 
     return success_response(msg="订单已确认")
 
@@ -264,8 +275,12 @@ async def delete_order(
     if order.status != OrderStatus.DRAFT:
         return error_response("仅草稿状态的订单可删除", code=400)
 
+    # 从订单日汇总中扣除
+    await rollup_service.record_order(db, order, sign=-1)
+
     await db.delete(order)
     await db.commit()
+    await invalidate_tags(TAG_ORDERS)
 
     return success_response(msg="订单已删除")
 
@@ -278,7 +293,7 @@ async def export_orders_to_excel(
     customer_name: Optional[str] = Query(None, description="客户名称搜索"),
     start_date: Optional[str] = Query(None, description="开始日期(YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="结束日期(YYYY-MM-DD)"),
-    db: AsyncSession = Depends(get_db)
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet")
 ) -> StreamingResponse:
     """
     导出订单数据到Excel
@@ -288,100 +303,20 @@ async def export_orders_to_excel(
     - 按客户名称搜索
     - 按日期范围筛选
     - 包含订单明细统计
+    - 流式导出，不限制导出条数
+    - 支持 xlsx/csv/parquet 格式
+    - 数据量大时可改用后台任务 orders.export（见 /jobs）
     """
     try:
-        # 构建查询
-        query = select(
-            Order,
-            func.count(OrderItem.id).label("items_count")
-        ).outerjoin(
-            OrderItem, Order.id == OrderItem.order_id
-        ).group_by(Order.id)
-
-        # 应用筛选条件
-        if status:
-            query = query.where(Order.status == status)
-
-        if customer_name:
-            query = query.where(Order.customer_name.like(f"%{customer_name}%"))
-
-        if start_date:
-            try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                query = query.where(Order.created_at >= start_dt)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="开始日期格式错误，应为YYYY-MM-DD")
-
-        if end_date:
-            try:
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                # 包含当天的所有时间
-                end_dt = end_dt.replace(hour=23, minute=59, second=59)
-                query = query.where(Order.created_at <= end_dt)
-            except ValueError:
-                raise HTTPException(status_code=400, detail="结束日期格式错误，应为YYYY-MM-DD")
-
-        query = query.order_by(Order.created_at.desc()).limit(10000)
-
-        result = await db.execute(query)
-        rows = result.all()
-
-        # 转换为字典列表
-        order_data = []
-        for order, items_count in rows:
-            order_dict = {
-                'order_no': order.order_no,
-                'customer_name': order.customer_name,
-                'contact_person': order.contact_person or '',
-                'contact_phone': order.contact_phone or '',
-                'status': order.status.value if hasattr(order.status, 'value') else str(order.status),
-                'total_amount': float(order.total_amount) if order.total_amount else 0.0,
-                'items_count': items_count or 0,
-                'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else '',
-                'remark': order.remark or ''
-            }
-            order_data.append(order_dict)
-
-        # 定义导出列
-        columns = {
-            'order_no': '订单编号',
-            'customer_name': '客户名称',
-            'contact_person': '联系人',
-            'contact_phone': '联系电话',
-            'status': '订单状态',
-            'total_amount': '订单总额',
-            'items_count': '明细数量',
-            'created_at': '创建时间',
-            'remark': '备注'
-        }
-
-        # 生成Excel
-        excel_file = ExcelHandler.export_to_excel(
-            data=order_data,
-            columns=columns,
-            sheet_name='订单数据',
-            title='订单信息列表'
-        )
-
-        # 生成文件名
-        filename_parts = ['订单数据']
-        if status:
-            filename_parts.append(f'{status}')
-        if customer_name:
-            filename_parts.append(f'{customer_name}')
-        filename_parts.append(datetime.now().strftime('%Y%m%d_%H%M%S'))
-        filename = '_'.join(filename_parts) + '.xlsx'
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
+        spec = export_service.build_order_export(status, customer_name, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return export_response(
+        spec.row_chunks(),
+        columns=spec.columns,
+        filename=spec.filename,
+        export_format=format,
+        sheet_name=spec.sheet_name,
+        title=spec.title
+    )
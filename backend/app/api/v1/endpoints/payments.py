@@ -1,11 +1,18 @@
 """
 收款管理API端点
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+import os
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
 from typing import Optional
+from urllib.parse import quote
 
 from app.api.deps import get_db, get_current_user
+from app.core.cache import invalidate_tags, TAG_ORDERS, TAG_PAYMENTS
+from app.core.executor import run_render
+from app.core.jobs import jobs, job_dir, UPLOAD_FILENAME
 from app.models.user import User
 from app.schemas.payment import (
     OrderPaymentCreate,
@@ -13,7 +20,12 @@ from app.schemas.payment import (
     OrderPaymentResponse,
     OrderPaymentSummary
 )
-from app.services import payment_service
+from app.services import payment_service, export_service, reconciliation_service
+from app.utils.data_export import export_response, EXPORT_FORMAT_PATTERN
+from app.utils.excel_handler import ExcelHandler, STREAM_READ_SIZE
+
+# 注册后台任务处理函数（对账单导入）
+import app.services.job_tasks  # noqa: F401
 
 
 router = APIRouter()
@@ -32,6 +44,7 @@ async def create_payment(
     """
     try:
         payment = await payment_service.create_order_payment(db, data)
+        await invalidate_tags(TAG_PAYMENTS)
         return {
             "code": 200,
             "msg": "收款记录创建成功",
@@ -73,6 +86,185 @@ async def get_payments(
         raise HTTPException(status_code=500, detail=f"查询收款记录失败: {str(e)}")
 
 
+@router.get("/excel/export", summary="导出收款记录")
+async def export_payments(
+    status: Optional[str] = Query(None, description="收款状态筛选"),
+    start_date: Optional[date] = Query(None, description="收款开始日期"),
+    end_date: Optional[date] = Query(None, description="收款结束日期"),
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet"),
+    current_user: User = Depends(get_current_user)
+) -> StreamingResponse:
+    """
+    导出收款记录
+    - 支持按状态、收款日期范围筛选
+    - 流式导出，不限制导出条数
+    - 支持 xlsx/csv/parquet 格式
+    - 数据量大时可改用后台任务 payments.export（见 /jobs）
+    """
+    spec = export_service.build_payment_export(status, start_date, end_date)
+
+    return export_response(
+        spec.row_chunks(),
+        columns=spec.columns,
+        filename=spec.filename,
+        export_format=format,
+        sheet_name=spec.sheet_name,
+        title=spec.title
+    )
+
+
+# ==================== 对账单导入与对账 ====================
+
+@router.get("/reconciliation/template", summary="下载银行流水导入模板")
+async def download_statement_template() -> StreamingResponse:
+    """
+    下载银行流水导入模板（来源 BANK）
+    支付宝、微信账单直接上传平台导出的CSV，无需模板
+    """
+    try:
+        sample_data = [
+            {
+                'txn_time': '2025-12-22 10:30:00',
+                'amount': 5000.00,
+                'payer': '示例印务有限公司',
+                'reference': 'B202512220001',
+                'memo': '货款 SO20251222000705'
+            }
+        ]
+
+        excel_file = await run_render(
+            ExcelHandler.create_template,
+            columns=reconciliation_service.BANK_STATEMENT_COLUMNS,
+            sheet_name='银行流水',
+            title='银行流水导入模板',
+            sample_data=sample_data
+        )
+
+        filename = f"银行流水导入模板_{datetime.now().strftime('%Y%m%d')}.xlsx"
+
+        return StreamingResponse(
+            excel_file,
+            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            headers={
+                "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+                "Access-Control-Expose-Headers": "Content-Disposition"
+            }
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"生成模板失败: {str(e)}")
+
+
+@router.post("/reconciliation/import", summary="导入对账单")
+async def import_statement(
+    source: str = Query(..., pattern="^(BANK|ALIPAY|WECHAT)$", description="对账单来源：BANK/ALIPAY/WECHAT"),
+    file: UploadFile = File(..., description="对账单文件（.csv/.xlsx）"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    上传对账单并提交后台任务 payments.reconcile，立即返回任务ID（进度见 /jobs/{job_id}）
+    - 只导入收入流水，按订单号、付款方、金额自动匹配订单并生成收款记录
+    - 同一流水重复导入自动跳过
+    - 仅金额匹配或未匹配的流水在 /reconciliation/lines 中人工处理
+    """
+    extension = os.path.splitext(file.filename or '')[1].lower()
+    if extension not in ('.csv', '.xlsx'):
+        raise HTTPException(status_code=400, detail="仅支持CSV或Excel文件（.csv, .xlsx）")
+
+    try:
+        job = await jobs.create(
+            "payments.reconcile",
+            params={"source": source, "file_format": extension[1:], "received_by": current_user.username},
+            user_id=current_user.id
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 分块写入任务目录（文件名固定，格式由 file_format 参数区分）
+    with open(os.path.join(job_dir(job["id"]), UPLOAD_FILENAME), 'wb') as f:
+        while True:
+            data = await file.read(STREAM_READ_SIZE)
+            if not data:
+                break
+            f.write(data)
+
+    await jobs.start(job)
+    return {
+        "code": 200,
+        "msg": "对账单已提交导入",
+        "data": {"job_id": job["id"], "status": job["status"]}
+    }
+
+
+@router.get("/reconciliation/lines", summary="获取对账流水列表")
+async def get_statement_lines(
+    status: Optional[str] = Query(None, description="匹配状态筛选：MATCHED/SUGGESTED/UNMATCHED/IGNORED"),
+    source: Optional[str] = Query(None, description="对账单来源筛选"),
+    skip: int = Query(0, ge=0, description="跳过记录数"),
+    limit: int = Query(100, ge=1, le=500, description="返回记录数"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    获取对账流水列表
+    - SUGGESTED 流水的 order_id 为建议订单
+    """
+    try:
+        lines = await reconciliation_service.get_statement_lines(db, status, source, skip, limit)
+        return {
+            "code": 200,
+            "msg": "success",
+            "data": lines
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询对账流水失败: {str(e)}")
+
+
+@router.post("/reconciliation/lines/{line_id}/match", summary="确认对账流水")
+async def match_statement_line(
+    line_id: int,
+    order_id: Optional[int] = Query(None, description="订单ID（不传则使用建议订单）"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    人工确认流水对应的订单，生成已确认的收款记录
+    """
+    try:
+        line = await reconciliation_service.match_statement_line(db, line_id, order_id, current_user.username)
+        await invalidate_tags(TAG_PAYMENTS, TAG_ORDERS)
+        return {
+            "code": 200,
+            "msg": "对账流水已确认",
+            "data": {"id": line.id, "order_id": line.order_id, "payment_id": line.payment_id}
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"确认对账流水失败: {str(e)}")
+
+
+@router.post("/reconciliation/lines/{line_id}/ignore", summary="忽略对账流水")
+async def ignore_statement_line(
+    line_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    忽略非订单收款的流水（如退款、内部转账）
+    """
+    try:
+        await reconciliation_service.ignore_statement_line(db, line_id)
+        return {
+            "code": 200,
+            "msg": "对账流水已忽略",
+            "data": None
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"忽略对账流水失败: {str(e)}")
+
+
 @router.get("/{payment_id}", summary="获取收款记录详情")
 async def get_payment_detail(
     payment_id: int,
@@ -126,6 +318,7 @@ async def update_payment(
     """
     try:
         payment = await payment_service.update_order_payment(db, payment_id, data)
+        await invalidate_tags(TAG_PAYMENTS)
         return {
             "code": 200,
             "msg": "收款记录更新成功",
@@ -150,6 +343,7 @@ async def cancel_payment(
     """
     try:
         payment = await payment_service.cancel_order_payment(db, payment_id, reason)
+        await invalidate_tags(TAG_PAYMENTS)
         return {
             "code": 200,
             "msg": "收款记录已取消",
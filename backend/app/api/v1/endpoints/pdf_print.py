@@ -1,13 +1,18 @@
 """
 PDF打印API端点
 """
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_db, get_current_user
+from app.core.executor import ExecutorBusyError
+from app.core.pdf_cache import pdf_response
 from app.models.user import User
-from app.services.pdf_service import PrintService
+from app.schemas.production import ProductionPdfBatch
+from app.services.pdf_service import PrintService, PDF_BATCH_FORMATS
 
 router = APIRouter()
 
@@ -15,6 +20,7 @@ router = APIRouter()
 @router.get("/order/{order_id}", summary="下载销售订单PDF")
 async def download_order_pdf(
     order_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -28,17 +34,55 @@ async def download_order_pdf(
         PDF文件流
     """
     try:
-        pdf_buffer = await PrintService.generate_order_pdf(db, order_id)
+        document = await PrintService.order_document(db, order_id)
+        return await pdf_response(request, document, f"order_{order_id}.pdf")
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
+
+
+@router.post("/production/batch", summary="批量下载生产工单PDF")
+async def download_production_batch_pdf(
+    data: ProductionPdfBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量下载生产工单PDF（如下一班次的全部工单）
+
+    指定 ids 时按ID顺序输出，否则按状态/计划开始日期筛选；
+    format=pdf 合并为一个PDF文件，format=zip 每张工单一个PDF打包下载。
+    工单较多时可改用后台任务 pdf.production_batch
+
+    Returns:
+        PDF或ZIP文件流
+    """
+    try:
+        content = await PrintService.generate_production_batch(
+            db,
+            production_ids=data.ids,
+            status=data.status,
+            start_date=data.start_date,
+            end_date=data.end_date,
+            output_format=data.format
+        )
+        media_type, extension = PDF_BATCH_FORMATS[data.format]
+        filename = f"production_batch_{datetime.now().strftime('%Y%m%d%H%M%S')}.{extension}"
 
         return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
+            content,
+            media_type=media_type,
             headers={
-                "Content-Disposition": f"attachment; filename=order_{order_id}.pdf"
+                "Content-Disposition": f"attachment; filename={filename}"
             }
         )
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+        raise HTTPException(status_code=400, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -46,6 +90,7 @@ async def download_order_pdf(
 @router.get("/production/{production_id}", summary="下载生产工单PDF")
 async def download_production_pdf(
     production_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -59,17 +104,12 @@ async def download_production_pdf(
         PDF文件流
     """
     try:
-        pdf_buffer = await PrintService.generate_production_pdf(db, production_id)
-
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=production_{production_id}.pdf"
-            }
-        )
+        document = await PrintService.production_document(db, production_id)
+        return await pdf_response(request, document, f"production_{production_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -77,6 +117,7 @@ async def download_production_pdf(
 @router.get("/delivery/{order_id}", summary="下载送货单PDF")
 async def download_delivery_pdf(
     order_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -90,17 +131,12 @@ async def download_delivery_pdf(
         PDF文件流
     """
     try:
-        pdf_buffer = await PrintService.generate_delivery_pdf(db, order_id)
-
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=delivery_{order_id}.pdf"
-            }
-        )
+        document = await PrintService.delivery_document(db, order_id)
+        return await pdf_response(request, document, f"delivery_{order_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -108,6 +144,7 @@ async def download_delivery_pdf(
 @router.get("/payment/{payment_id}", summary="下载收款凭证PDF")
 async def download_payment_receipt_pdf(
     payment_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -121,16 +158,11 @@ async def download_payment_receipt_pdf(
         PDF文件流
     """
     try:
-        pdf_buffer = await PrintService.generate_payment_receipt_pdf(db, payment_id)
-
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=payment_{payment_id}.pdf"
-            }
-        )
+        document = await PrintService.payment_document(db, payment_id)
+        return await pdf_response(request, document, f"payment_{payment_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
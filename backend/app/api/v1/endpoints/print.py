@@ -1,14 +1,15 @@
 """
 打印功能API端点 - 生成各种PDF单据
+与 /pdf 接口共用同一套单据渲染（PrintService），保留本组路由供前端打印按钮使用
 """
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from io import BytesIO
 
 from app.api.deps import get_db, get_current_user
+from app.core.executor import ExecutorBusyError
+from app.core.pdf_cache import pdf_response
 from app.models.user import User
-from app.services import print_service
+from app.services.pdf_service import PrintService
 
 router = APIRouter()
 
@@ -16,6 +17,7 @@ router = APIRouter()
 @router.get("/order/{order_id}", summary="打印销售订单")
 async def print_order(
     order_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -23,17 +25,12 @@ async def print_order(
     生成销售订单PDF
     """
     try:
-        pdf_buffer = await print_service.generate_order_pdf(db, order_id)
-
-        return StreamingResponse(
-            BytesIO(pdf_buffer),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=order_{order_id}.pdf"
-            }
-        )
+        document = await PrintService.order_document(db, order_id)
+        return await pdf_response(request, document, f"order_{order_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -41,6 +38,7 @@ async def print_order(
 @router.get("/production/{production_id}", summary="打印生产工单")
 async def print_production(
     production_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -48,17 +46,12 @@ async def print_production(
     生成生产工单PDF
     """
     try:
-        pdf_buffer = await print_service.generate_production_pdf(db, production_id)
-
-        return StreamingResponse(
-            BytesIO(pdf_buffer),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=production_{production_id}.pdf"
-            }
-        )
+        document = await PrintService.production_document(db, production_id)
+        return await pdf_response(request, document, f"production_{production_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -66,6 +59,7 @@ async def print_production(
 @router.get("/delivery/{order_id}", summary="打印送货单")
 async def print_delivery(
     order_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -73,17 +67,12 @@ async def print_delivery(
     生成送货单PDF
     """
     try:
-        pdf_buffer = await print_service.generate_delivery_pdf(db, order_id)
-
-        return StreamingResponse(
-            BytesIO(pdf_buffer),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=delivery_{order_id}.pdf"
-            }
-        )
+        document = await PrintService.delivery_document(db, order_id)
+        return await pdf_response(request, document, f"delivery_{order_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
 
@@ -91,6 +80,7 @@ async def print_delivery(
 @router.get("/payment/{payment_id}", summary="打印收款凭证")
 async def print_payment_receipt(
     payment_id: int,
+    request: Request,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -98,16 +88,11 @@ async def print_payment_receipt(
     生成收款凭证PDF
     """
     try:
-        pdf_buffer = await print_service.generate_payment_receipt_pdf(db, payment_id)
-
-        return StreamingResponse(
-            BytesIO(pdf_buffer),
-            media_type="application/pdf",
-            headers={
-                "Content-Disposition": f"attachment; filename=payment_{payment_id}.pdf"
-            }
-        )
+        document = await PrintService.payment_document(db, payment_id)
+        return await pdf_response(request, document, f"payment_{payment_id}.pdf")
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except ExecutorBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"生成PDF失败: {str(e)}")
@@ -1,11 +1,21 @@
 """
 生产工单API端点
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, timedelta
 from typing import Optional
 
 from app.api.deps import get_db, get_current_user
+from app.core.cache import cached, invalidate_tags, TAG_PRODUCTION, TAG_ORDERS
+from app.core.config import settings
+from app.core.events import subscribe, CHANNEL_PRODUCTION
+from app.core.security import decode_access_token
+from app.core.user_cache import get_cached_user
+from app.db.session import AsyncSessionLocal
 from app.models.user import User
 from app.schemas.production import (
     ProductionOrderCreate,
@@ -13,14 +23,19 @@ from app.schemas.production import (
     ProductionOrderListItem,
     ProductionOrderDetail,
     ProductionReportCreate,
+    ProductionReportBatch,
     ProductionReportResponse,
-    ProductionStatistics
+    ProductionStatistics,
+    ProductionScheduleRequest
 )
-from app.services import production_service
+from app.services import production_service, production_analytics_service, scheduling_service
 
 
 router = APIRouter()
 
+# 生产分析单次查询的最大天数
+ANALYTICS_MAX_DAYS = 366
+
 
 @router.post("/", summary="创建生产工单")
 async def create_production_order(
@@ -36,6 +51,7 @@ async def create_production_order(
     """
     try:
         production_order = await production_service.create_production_order(db, data)
+        await invalidate_tags(TAG_PRODUCTION, TAG_ORDERS)
         return {
             "code": 200,
             "msg": "生产工单创建成功",
@@ -76,6 +92,57 @@ async def get_production_orders(
         raise HTTPException(status_code=500, detail=f"查询生产工单失败: {str(e)}")
 
 
+@router.get("/events", summary="生产进度实时推送（SSE）")
+async def production_events(
+    request: Request,
+    token: Optional[str] = Query(None, description="访问令牌（EventSource 无法设置请求头时使用）")
+):
+    """
+    生产进度事件流（text/event-stream），车间看板订阅后无需轮询工单列表
+    - production.report: 单条报工（含工单最新完成数量与进度）
+    - production.progress: 批量报工后每个工单的最新进度
+    - production.status: 开工/完工/取消导致的工单状态变化
+    - order.status: 工单结束后订单随之完成
+    - resync: 连接消费过慢丢失了事件，客户端应重新加载列表
+    - 无事件时每 EVENTS_HEARTBEAT_SECONDS 秒发送一条注释行作为心跳
+
+    认证: Authorization: Bearer <token> 请求头或 token 查询参数
+    """
+    if not token:
+        authorization = request.headers.get("Authorization", "")
+        if authorization.lower().startswith("bearer "):
+            token = authorization[7:]
+    user_id = decode_access_token(token) if token else None
+    if user_id is None:
+        raise HTTPException(status_code=401, detail="无效的认证凭据")
+    # 只在建立连接时校验用户，不在整个连接期间占用数据库会话
+    async with AsyncSessionLocal() as db:
+        user = await get_cached_user(db, int(user_id))
+    if not user or not user.is_active:
+        raise HTTPException(status_code=403, detail="用户不存在或已被禁用")
+
+    async def event_stream():
+        async with subscribe(CHANNEL_PRODUCTION) as subscription:
+            # 断线重连等待时间（毫秒）
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                event = await subscription.get(timeout=settings.EVENTS_HEARTBEAT_SECONDS)
+                if event is None:
+                    yield ": ping\n\n"
+                    continue
+                data = json.dumps(event, ensure_ascii=False)
+                yield f"event: {event['type']}\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # 关闭 Nginx 代理缓冲
+        }
+    )
+
+
 @router.get("/{production_id}", summary="获取生产工单详情")
 async def get_production_order_detail(
     production_id: int,
@@ -102,6 +169,9 @@ async def get_production_order_detail(
             "contact_phone": production_order.order.contact_phone,
             "status": production_order.status.value,
             "priority": production_order.priority,
+            "total_plan_quantity": production_order.total_plan_quantity,
+            "total_completed_quantity": production_order.total_completed_quantity,
+            "progress_percent": float(production_order.progress_percent or 0),
             "plan_start_date": production_order.plan_start_date,
             "plan_end_date": production_order.plan_end_date,
             "actual_start_date": production_order.actual_start_date,
@@ -156,6 +226,7 @@ async def update_production_order(
     """
     try:
         production_order = await production_service.update_production_order(db, production_id, data)
+        await invalidate_tags(TAG_PRODUCTION, TAG_ORDERS)
         return {
             "code": 200,
             "msg": "生产工单更新成功",
@@ -182,6 +253,7 @@ async def start_production(
     """
     try:
         production_order = await production_service.start_production(db, production_id, operator_name)
+        await invalidate_tags(TAG_PRODUCTION, TAG_ORDERS)
         return {
             "code": 200,
             "msg": "生产已开始",
@@ -205,10 +277,11 @@ async def complete_production(
     - 状态从IN_PROGRESS变为COMPLETED
     - 记录实际完成时间
     - 创建完工报工记录
-    - 如果订单的所有工单都完成，更新订单状态为已完成
+    - 订单下的工单均已完成或取消时，更新订单状态为已完成
     """
     try:
         production_order = await production_service.complete_production(db, production_id, operator_name)
+        await invalidate_tags(TAG_PRODUCTION, TAG_ORDERS)
         return {
             "code": 200,
             "msg": "生产已完成",
@@ -235,6 +308,7 @@ async def cancel_production(
     """
     try:
         production_order = await production_service.cancel_production(db, production_id, reason)
+        await invalidate_tags(TAG_PRODUCTION, TAG_ORDERS)
         return {
             "code": 200,
             "msg": "生产工单已取消",
@@ -255,10 +329,11 @@ async def create_production_report(
     """
     创建生产报工记录
     - 报工类型: START/PROGRESS/COMPLETE/REJECT
-    - 记录完成数量和报废数量
+    - 记录完成数量和报废数量，累加到指定的生产工单明细（工单只有一条明细时可不指定）
     """
     try:
         report = await production_service.create_production_report(db, data)
+        await invalidate_tags(TAG_PRODUCTION)
         return {
             "code": 200,
             "msg": "报工成功",
@@ -274,6 +349,33 @@ async def create_production_report(
         raise HTTPException(status_code=500, detail=f"报工失败: {str(e)}")
 
 
+@router.post("/reports/batch", summary="批量生产报工")
+async def create_production_reports_batch(
+    data: ProductionReportBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    批量创建生产报工（车间终端使用）
+    - 每条报工可携带 idempotency_key，重试时已提交的报工返回 duplicate，不会重复累加数量
+    - 工单不存在的报工返回 failed，其余报工正常提交
+    - 返回每条报工的处理结果与更新后的工单进度
+    """
+    try:
+        result = await production_service.create_production_reports_batch(db, data.reports, current_user.id)
+        if result["created_count"]:
+            await invalidate_tags(TAG_PRODUCTION)
+        return {
+            "code": 200,
+            "msg": f"报工成功 {result['created_count']} 条",
+            "data": result
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"批量报工失败: {str(e)}")
+
+
 @router.get("/{production_id}/reports/", summary="获取生产报工记录")
 async def get_production_reports(
     production_id: int,
@@ -292,6 +394,7 @@ async def get_production_reports(
                 {
                     "id": report.id,
                     "production_order_id": report.production_order_id,
+                    "production_order_item_id": report.production_order_item_id,
                     "report_type": report.report_type,
                     "completed_quantity": report.completed_quantity,
                     "rejected_quantity": report.rejected_quantity,
@@ -309,6 +412,7 @@ async def get_production_reports(
 
 
 @router.get("/statistics/summary", summary="获取生产统计")
+@cached("production:statistics", tags=[TAG_PRODUCTION])
 async def get_production_statistics(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -319,6 +423,8 @@ async def get_production_statistics(
     - 各状态数量
     - 今日完成数
     - 平均完成率
+
+    统计结果缓存，开工/完工/取消、报工、排程等写操作后失效（TAG_PRODUCTION）
     """
     try:
         stats = await production_service.get_production_statistics(db)
@@ -329,3 +435,100 @@ async def get_production_statistics(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"查询生产统计失败: {str(e)}")
+
+
+@router.get("/analytics/daily", summary="生产分析日报")
+async def get_production_analytics_daily(
+    start_date: Optional[date] = Query(None, description="开始日期（默认最近7天）"),
+    end_date: Optional[date] = Query(None, description="结束日期（默认今天）"),
+    group_by: str = Query("machine", pattern="^(machine|operator|machine_operator)$", description="分组方式"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    按日统计各设备/操作员的产量、每小时产量、报废率与平均生产周期
+    - 只读取生产小时汇总表（每小时刷新，最近一小时的报工可能尚未计入）
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=6)
+    return await _production_analytics(db, start_date, end_date, "day", group_by)
+
+
+@router.get("/analytics/weekly", summary="生产分析周报")
+async def get_production_analytics_weekly(
+    start_date: Optional[date] = Query(None, description="开始日期（默认最近8周）"),
+    end_date: Optional[date] = Query(None, description="结束日期（默认今天）"),
+    group_by: str = Query("machine", pattern="^(machine|operator|machine_operator)$", description="分组方式"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    按周（周一开始）统计各设备/操作员的产量、每小时产量、报废率与平均生产周期
+    - 只读取生产小时汇总表
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=end_date.weekday() + 7 * 7)
+    return await _production_analytics(db, start_date, end_date, "week", group_by)
+
+
+async def _production_analytics(db: AsyncSession, start_date: date, end_date: date, period: str, group_by: str):
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="开始日期不能晚于结束日期")
+    if (end_date - start_date).days > ANALYTICS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"查询范围不能超过 {ANALYTICS_MAX_DAYS} 天")
+    try:
+        items = await production_analytics_service.get_production_analytics(
+            db, start_date, end_date, period=period, group_by=group_by
+        )
+        return {
+            "code": 200,
+            "msg": "success",
+            "data": {
+                "period": period,
+                "group_by": group_by,
+                "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat(),
+                "items": items
+            }
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"查询生产分析失败: {str(e)}")
+
+
+@router.post("/schedule", summary="生成生产排程")
+async def schedule_production(
+    data: ProductionScheduleRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    生成有限产能生产排程
+    - 对待生产/生产中的工单按优先级排程，考虑设备速度与换纸时间
+    - 生产中的工单固定在原设备
+    - apply=true 时写回工单的计划开始/完成时间与设备
+    """
+    try:
+        presses = None
+        if data.machines is not None:
+            presses = [
+                scheduling_service.Press(name=machine.name, sheets_per_hour=machine.sheets_per_hour)
+                for machine in data.machines
+            ]
+        schedule = await scheduling_service.schedule_production(
+            db,
+            presses=presses,
+            start_time=data.start_time,
+            keep_assignment=data.keep_assignment,
+            apply=data.apply
+        )
+        if data.apply:
+            await invalidate_tags(TAG_PRODUCTION)
+        return {
+            "code": 200,
+            "msg": "排程已保存" if data.apply else "success",
+            "data": schedule
+        }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"生成生产排程失败: {str(e)}")
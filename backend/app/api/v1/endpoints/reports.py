@@ -5,13 +5,14 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
-from typing import List
+from typing import List, Optional
 from io import BytesIO
 from urllib.parse import quote
 
 from app.db.session import get_db
 from app.models.user import User
 from app.api.deps import get_current_user
+from app.core.cache import cached, TAG_ORDERS, TAG_PAYMENTS, TAG_CUSTOMERS
 from app.schemas.report import (
     DailyPaymentReport,
     MonthlyPaymentReport,
@@ -21,13 +22,18 @@ from app.schemas.report import (
     FinancialOverview
 )
 from app.services import report_service
-from app.utils.excel_handler import ExcelHandler, DataFrameExporter
+from app.utils.excel_handler import DataFrameExporter
+from app.utils.data_export import export_response, iter_single_chunk, EXPORT_FORMAT_PATTERN
 
 
 router = APIRouter()
 
+# 报表数据随订单、收款、客户变更失效
+REPORT_CACHE_TAGS = [TAG_ORDERS, TAG_PAYMENTS, TAG_CUSTOMERS]
+
 
 @router.get("/payments/daily", summary="收款日报")
+@cached("reports:payments_daily", tags=REPORT_CACHE_TAGS)
 async def get_daily_payment_report(
     start_date: date = Query(..., description="开始日期"),
     end_date: date = Query(..., description="结束日期"),
@@ -50,6 +56,7 @@ async def get_daily_payment_report(
 
 
 @router.get("/payments/monthly", summary="收款月报")
+@cached("reports:payments_monthly", tags=REPORT_CACHE_TAGS)
 async def get_monthly_payment_report(
     year: int = Query(..., description="年份", ge=2000, le=2100),
     month: int = Query(..., description="月份", ge=1, le=12),
@@ -72,6 +79,7 @@ async def get_monthly_payment_report(
 
 
 @router.get("/receivables/customers", summary="客户欠款统计")
+@cached("reports:customer_receivables", tags=REPORT_CACHE_TAGS)
 async def get_customer_receivables(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -92,6 +100,7 @@ async def get_customer_receivables(
 
 
 @router.get("/trends/sales-payment", summary="销售收款趋势")
+@cached("reports:sales_payment_trend", tags=REPORT_CACHE_TAGS)
 async def get_sales_payment_trend(
     days: int = Query(30, description="天数", ge=1, le=365),
     db: AsyncSession = Depends(get_db),
@@ -113,7 +122,9 @@ async def get_sales_payment_trend(
 
 
 @router.get("/receivables/aging", summary="应收账款账龄分析")
+@cached("reports:receivables_aging", tags=REPORT_CACHE_TAGS)
 async def get_receivables_aging_analysis(
+    as_of_date: Optional[date] = Query(None, description="统计截止日期（默认今天）"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> dict:
@@ -122,8 +133,10 @@ async def get_receivables_aging_analysis(
     - 按账龄区间统计（0-7天、8-30天、31-60天、61-90天、90天+）
     - 返回各区间金额和订单数
     - 计算占比百分比
+    - 返回各客户的分区间欠款明细
+    - 可指定统计截止日期
     """
-    analysis = await report_service.get_receivables_aging_analysis(db)
+    analysis = await report_service.get_receivables_aging_analysis(db, as_of_date)
 
     return {
         "code": 200,
@@ -133,6 +146,7 @@ async def get_receivables_aging_analysis(
 
 
 @router.get("/overview", summary="财务概览")
+@cached("reports:overview", tags=REPORT_CACHE_TAGS)
 async def get_financial_overview(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -159,11 +173,12 @@ async def get_financial_overview(
 async def export_daily_payment_report(
     start_date: date = Query(..., description="开始日期"),
     end_date: date = Query(..., description="结束日期"),
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> StreamingResponse:
     """
-    导出收款日报到Excel
+    导出收款日报（xlsx/csv/parquet）
 
     包含：
     - 每日收款汇总
@@ -187,44 +202,35 @@ async def export_daily_payment_report(
         columns = {
             'date': '日期',
             'total_amount': '总收款金额',
-            'cash': '现金',
-            'bank_transfer': '银行转账',
-            'alipay': '支付宝',
-            'wechat': '微信支付',
-            'other': '其他',
+            'cash_amount': '现金',
+            'bank_transfer_amount': '银行转账',
+            'alipay_amount': '支付宝',
+            'wechat_amount': '微信支付',
+            'check_amount': '支票',
+            'other_amount': '其他',
             'payment_count': '收款笔数'
         }
 
-        # 生成Excel
-        excel_file = ExcelHandler.export_to_excel(
-            data=report_data,
+        return export_response(
+            iter_single_chunk(report_data),
             columns=columns,
+            filename=f"收款日报_{start_date}至{end_date}",
+            export_format=format,
             sheet_name='收款日报',
             title=f'收款日报 ({start_date} 至 {end_date})'
         )
-
-        filename = f"收款日报_{start_date}至{end_date}.xlsx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
 
 
 @router.get("/excel/customer-receivables", summary="导出客户欠款统计")
 async def export_customer_receivables(
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> StreamingResponse:
     """
-    导出客户欠款统计到Excel
+    导出客户欠款统计（xlsx/csv/parquet）
 
     包含：
     - 客户欠款明细
@@ -235,51 +241,40 @@ async def export_customer_receivables(
         summary = await report_service.get_customer_receivables(db)
 
         # 转换为字典列表
-        report_data = []
-        for customer in summary.customers:
-            customer_dict = customer.model_dump()
-            report_data.append(customer_dict)
+        report_data = [customer.model_dump() for customer in summary.customers]
 
         # 定义导出列
         columns = {
             'customer_name': '客户名称',
-            'total_orders': '订单数',
-            'total_amount': '订单总额',
+            'order_count': '订单数',
+            'total_order_amount': '订单总额',
             'paid_amount': '已收金额',
             'unpaid_amount': '未收金额',
-            'payment_rate': '回款率(%)'
+            'unpaid_order_count': '欠款订单数',
+            'earliest_unpaid_date': '最早欠款日期'
         }
 
-        # 生成Excel (添加汇总数据)
-        excel_file = ExcelHandler.export_to_excel(
-            data=report_data,
+        return export_response(
+            iter_single_chunk(report_data),
             columns=columns,
+            filename=f"客户欠款统计_{datetime.now().strftime('%Y%m%d')}",
+            export_format=format,
             sheet_name='客户欠款统计',
             title='客户欠款统计表'
         )
-
-        filename = f"客户欠款统计_{datetime.now().strftime('%Y%m%d')}.xlsx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
-        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
 
 
 @router.get("/excel/receivables-aging", summary="导出应收账款账龄分析")
 async def export_receivables_aging(
+    as_of_date: Optional[date] = Query(None, description="统计截止日期（默认今天）"),
+    format: str = Query("xlsx", pattern=EXPORT_FORMAT_PATTERN, description="导出格式：xlsx/csv/parquet"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> StreamingResponse:
     """
-    导出应收账款账龄分析到Excel
+    导出应收账款账龄分析（xlsx/csv/parquet）
 
     包含：
     - 各账龄区间统计
@@ -288,40 +283,26 @@ async def export_receivables_aging(
     """
     try:
         # 获取报表数据
-        analysis = await report_service.get_receivables_aging_analysis(db)
+        analysis = await report_service.get_receivables_aging_analysis(db, as_of_date)
 
         # 转换为字典列表
-        aging_data = []
-        for aging in analysis.aging_distribution:
-            aging_dict = aging.model_dump()
-            aging_data.append(aging_dict)
+        aging_data = [aging.model_dump() for aging in analysis.aging_brackets]
 
         # 定义导出列
         columns = {
-            'age_range': '账龄区间',
+            'bracket_name': '账龄区间',
             'amount': '欠款金额',
             'order_count': '订单数',
             'percentage': '占比(%)'
         }
 
-        # 生成Excel
-        excel_file = ExcelHandler.export_to_excel(
-            data=aging_data,
+        return export_response(
+            iter_single_chunk(aging_data),
             columns=columns,
+            filename=f"应收账款账龄分析_{analysis.as_of_date.strftime('%Y%m%d')}",
+            export_format=format,
             sheet_name='账龄分析',
-            title='应收账款账龄分析表'
-        )
-
-        filename = f"应收账款账龄分析_{datetime.now().strftime('%Y%m%d')}.xlsx"
-        encoded_filename = quote(filename)
-
-        return StreamingResponse(
-            excel_file,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
-                "Access-Control-Expose-Headers": "Content-Disposition"
-            }
+            title=f'应收账款账龄分析表（截至 {analysis.as_of_date}）'
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败: {str(e)}")
@@ -17,7 +17,8 @@ from app.schemas.user import (
     UserListResponse,
     UserChangePassword
 )
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
+from app.core.user_cache import invalidate_user
 
 
 router = APIRouter()
@@ -81,7 +82,7 @@ async def create_user(
     # 创建新用户
     new_user = User(
         username=user_data.username,
-        hashed_password=get_password_hash(user_data.password),
+        hashed_password=await get_password_hash_async(user_data.password),
         role=user_data.role,
         is_active=user_data.is_active
     )
@@ -161,7 +162,7 @@ async def update_user(
 
     # 更新字段
     if user_data.password is not None:
-        user.hashed_password = get_password_hash(user_data.password)
+        user.hashed_password = await get_password_hash_async(user_data.password)
     if user_data.role is not None:
         user.role = user_data.role
     if user_data.is_active is not None:
@@ -169,6 +170,7 @@ async def update_user(
 
     await db.commit()
     await db.refresh(user)
+    await invalidate_user(user.id)
 
     return {
         "code": 200,
@@ -214,6 +216,7 @@ async def delete_user(
 
     await db.delete(user)
     await db.commit()
+    await invalidate_user(user_id)
 
     return {
         "code": 200,
@@ -232,16 +235,25 @@ async def change_password(
 
     - 需要提供原密码验证
     """
+    # current_user 来自用户缓存（不含密码哈希），修改前从数据库重新加载
+    user = await db.get(User, current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="用户不存在"
+        )
+
     # 验证原密码
-    if not verify_password(password_data.old_password, current_user.hashed_password):
+    if not await verify_password_async(password_data.old_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="原密码错误"
         )
 
     # 更新密码
-    current_user.hashed_password = get_password_hash(password_data.new_password)
+    user.hashed_password = await get_password_hash_async(password_data.new_password)
     await db.commit()
+    await invalidate_user(user.id)
 
     return {
         "code": 200,
@@ -0,0 +1,328 @@
+"""
+缓存子系统
+- 优先使用 Redis（REDIS_HOST/PORT/DB），不可用时自动降级为进程内 LRU 缓存
+- 缓存键按命名空间划分，支持 TTL 与按标签失效（写操作后调用 invalidate_tags）
+- cached 装饰器用于只读接口，同一进程内并发未命中时只计算一次
+
+使用示例:
+    @router.get("/overview")
+    @cached("reports:overview", ttl=60, tags=[TAG_ORDERS, TAG_PAYMENTS])
+    async def get_financial_overview(db: AsyncSession = Depends(get_db)) -> dict:
+        ...
+
+    # 写操作提交后
+    await invalidate_tags(TAG_ORDERS)
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 缓存标签：写操作按影响的数据范围失效对应标签
+TAG_ORDERS = "orders"
+TAG_PAYMENTS = "payments"
+TAG_CUSTOMERS = "customers"
+TAG_MATERIALS = "materials"
+TAG_PRODUCTION = "production"
+
+# 参与生成缓存键的参数类型（数据库会话、当前用户等依赖对象不参与）
+_KEY_PARAM_TYPES = (str, int, float, bool, Decimal, date, datetime, Enum)
+
+
+class MemoryBackend:
+    """进程内 LRU 缓存（Redis 不可用或未启用时使用）"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+        # 缓存键所属标签，淘汰/过期/删除时同步清理标签集合
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+
+    def _discard(self, key: str) -> None:
+        """删除缓存条目并从所属标签中移除，标签集合为空时一并删除"""
+        self._data.pop(key, None)
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    async def get(self, key: str) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        self._discard(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        tags = tuple(tags)
+        if tags:
+            self._key_tags[key] = tags
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        # 超出容量时淘汰最久未使用的条目
+        while len(self._data) > self.max_entries:
+            self._discard(next(iter(self._data)))
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._discard(key)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            for key in list(self._tags.get(tag, ())):
+                self._discard(key)
+
+    async def clear(self) -> None:
+        self._data.clear()
+        self._tags.clear()
+        self._key_tags.clear()
+
+
+class RedisBackend:
+    """Redis 缓存，值以 JSON 存储，标签以 Set 记录所属缓存键"""
+
+    def __init__(self, prefix: str):
+        from redis import asyncio as aioredis
+
+        self.prefix = prefix
+        self.client = aioredis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+            socket_timeout=settings.CACHE_REDIS_TIMEOUT
+        )
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self.prefix}:tag:{tag}"
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(key, json.dumps(value, ensure_ascii=False), ex=ttl)
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                pipe.sadd(tag_key, key)
+                # 标签集合的过期时间不短于其中的缓存条目
+                pipe.expire(tag_key, max(ttl, settings.CACHE_DEFAULT_TTL) * 2)
+            await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*keys)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = await self.client.smembers(tag_key)
+            await self.client.delete(tag_key, *keys)
+
+    async def clear(self) -> None:
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}:*")]
+        if keys:
+            await self.client.delete(*keys)
+
+
+class CacheManager:
+    """
+    缓存管理器
+    Redis 出错时记录日志并在 CACHE_REDIS_RETRY_SECONDS 内改用进程内缓存，之后再尝试 Redis
+    """
+
+    def __init__(self):
+        self.prefix = settings.CACHE_PREFIX
+        self.memory = MemoryBackend(settings.CACHE_LOCAL_MAX_ENTRIES)
+        self._redis: Optional[RedisBackend] = None
+        self._redis_down_until = 0.0
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+        if settings.CACHE_BACKEND == "redis":
+            try:
+                self._redis = RedisBackend(self.prefix)
+            except ImportError:
+                logger.warning("未安装 redis 客户端，缓存使用进程内存")
+
+    def build_key(self, namespace: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """生成缓存键：前缀:命名空间[:参数摘要]"""
+        key = f"{self.prefix}:{namespace}"
+        if params:
+            raw = json.dumps(params, sort_keys=True, default=str, ensure_ascii=False)
+            key = f"{key}:{hashlib.md5(raw.encode('utf-8')).hexdigest()}"
+        return key
+
+    def _backend(self):
+        if self._redis is not None and time.monotonic() >= self._redis_down_until:
+            return self._redis
+        return self.memory
+
+    def _mark_redis_down(self, exc: Exception) -> None:
+        logger.warning("Redis 缓存不可用，暂时改用进程内存: %s", exc)
+        self._redis_down_until = time.monotonic() + settings.CACHE_REDIS_RETRY_SECONDS
+
+    async def get(self, key: str) -> Any:
+        if not settings.CACHE_ENABLED:
+            return None
+        backend = self._backend()
+        try:
+            return await backend.get(key)
+        except Exception as e:
+            if backend is self.memory:
+                raise
+            self._mark_redis_down(e)
+            return await self.memory.get(key)
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Iterable[str] = ()) -> None:
+        if not settings.CACHE_ENABLED:
+            return
+        ttl = ttl or settings.CACHE_DEFAULT_TTL
+        tags = list(tags)
+        backend = self._backend()
+        try:
+            await backend.set(key, value, ttl, tags)
+        except Exception as e:
+            if backend is self.memory:
+                raise
+            self._mark_redis_down(e)
+            await self.memory.set(key, value, ttl, tags)
+
+    async def delete(self, *keys: str) -> None:
+        """删除指定缓存键（进程内缓存与 Redis 都清理）"""
+        await self.memory.delete(*keys)
+        if self._redis is not None:
+            try:
+                await self._redis.delete(*keys)
+            except Exception as e:
+                self._mark_redis_down(e)
+
+    async def invalidate_tags(self, *tags: str) -> None:
+        """按标签失效缓存（进程内缓存与 Redis 都清理，避免降级期间残留旧数据）"""
+        await self.memory.invalidate_tags(*tags)
+        if self._redis is not None:
+            try:
+                await self._redis.invalidate_tags(*tags)
+            except Exception as e:
+                self._mark_redis_down(e)
+
+    async def clear(self) -> None:
+        """清空全部缓存"""
+        await self.memory.clear()
+        if self._redis is not None:
+            try:
+                await self._redis.clear()
+            except Exception as e:
+                self._mark_redis_down(e)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        tags: Iterable[str] = (),
+        should_cache: Optional[Callable[[Any], bool]] = None
+    ) -> Any:
+        """
+        读取缓存，未命中时调用 loader 加载并写入缓存
+        同一进程内同一个key只有一个协程执行加载（single-flight），其余协程等待并复用结果
+        loader 的返回值需可 JSON 序列化；should_cache 返回 False 时结果不写入缓存
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value
+
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                value = await self.get(key)
+                if value is not None:
+                    return value
+
+                value = await loader()
+                if should_cache is None or should_cache(value):
+                    await self.set(key, value, ttl, tags)
+                return value
+        finally:
+            # 没有协程持有或等待时删除锁，避免每个缓存键永久保留一个锁
+            if not lock.locked() and self._locks.get(key) is lock:
+                self._locks.pop(key, None)
+
+
+# 全局缓存实例
+cache = CacheManager()
+
+
+def _is_success_response(value: Any) -> bool:
+    """仅缓存成功响应（统一响应格式中 code 为 200）"""
+    if isinstance(value, dict) and "code" in value:
+        return value["code"] == 200
+    return True
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """写操作提交后调用，失效相关缓存"""
+    await cache.invalidate_tags(*tags)
+
+
+def cached(namespace: str, ttl: Optional[int] = None, tags: Iterable[str] = ()):
+    """
+    只读接口缓存装饰器
+
+    缓存键由命名空间和基础类型参数（查询参数、路径参数）生成，
+    响应经 jsonable_encoder 转换后存储，命中与未命中时返回的数据格式一致；
+    错误响应（code 不为 200）不缓存
+
+    Args:
+        namespace: 缓存命名空间
+        ttl: 过期时间（秒），默认 CACHE_DEFAULT_TTL
+        tags: 缓存标签，写操作通过 invalidate_tags 失效
+    """
+    tags = tuple(tags)
+
+    def decorator(func: Callable[..., Awaitable[Any]]):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            params = {
+                name: value for name, value in kwargs.items()
+                if value is None or isinstance(value, _KEY_PARAM_TYPES)
+            }
+            key = cache.build_key(namespace, params)
+
+            async def loader():
+                return jsonable_encoder(await func(*args, **kwargs))
+
+            return await cache.get_or_load(
+                key, loader, ttl=ttl, tags=tags, should_cache=_is_success_response
+            )
+
+        return wrapper
+
+    return decorator
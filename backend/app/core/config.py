@@ -28,6 +28,63 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
 
+    # 缓存配置
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "redis"  # redis: Redis优先（不可用时降级为进程内存）; memory: 仅进程内存
+    CACHE_PREFIX: str = "erp:cache"
+    CACHE_DEFAULT_TTL: int = 60  # 默认过期时间（秒）
+    CACHE_LOCAL_MAX_ENTRIES: int = 1024  # 进程内LRU缓存最大条目数
+    CACHE_REDIS_TIMEOUT: float = 0.5  # Redis连接/读写超时（秒）
+    CACHE_REDIS_RETRY_SECONDS: int = 30  # Redis出错后改用进程内存的时长（秒）
+    USER_CACHE_TTL: int = 60  # 登录用户信息缓存时长（秒，Redis/共享缓存）
+    USER_CACHE_LOCAL_TTL: int = 5  # 登录用户信息进程内缓存时长（秒，其他进程修改后最多延迟该时长生效）
+
+    # 后台任务配置
+    JOB_BACKEND: str = "local"  # local: 当前进程内执行; celery: 投递到Celery worker（任务状态保存在Redis）
+    JOB_LOCAL_CONCURRENCY: int = 2  # local 后端同时执行的任务数
+    JOB_RESULT_DIR: str = "storage/jobs"  # 上传文件与结果文件目录（celery 后端需与worker共享）
+    JOB_RESULT_TTL: int = 86400  # 任务记录与结果文件保留时长（秒）
+    CELERY_BROKER_URL: Optional[str] = None  # 默认使用 REDIS_HOST/PORT/DB
+
+    # 实时事件推送配置（生产进度 SSE）
+    EVENTS_BACKEND: str = "local"  # local: 仅推送给当前进程的连接; redis: 经Redis发布/订阅转发（多worker部署）
+    EVENTS_PREFIX: str = "erp:events"
+    EVENTS_QUEUE_SIZE: int = 100  # 每个连接最多缓存的未发送事件数，超出时丢弃最早的事件并通知客户端重新加载
+    EVENTS_HEARTBEAT_SECONDS: float = 15  # 无事件时发送心跳的间隔（秒），防止代理断开空闲连接
+    EVENTS_REDIS_RETRY_SECONDS: int = 5  # Redis出错后改为进程内推送/重新订阅的等待时长（秒）
+
+    # CPU密集任务执行器配置
+    RENDER_PROCESS_WORKERS: int = 2  # PDF/Excel渲染进程数（0 表示改用线程）
+    RENDER_QUEUE_SIZE: int = 8  # 渲染任务最大排队数
+    RENDER_QUEUE_TIMEOUT: float = 10.0  # 排队已满时的最长等待时间（秒），超时返回503
+    CRYPTO_THREAD_WORKERS: int = 4  # bcrypt线程数
+    CRYPTO_QUEUE_SIZE: int = 32  # bcrypt任务最大排队数
+    CRYPTO_QUEUE_TIMEOUT: float = 5.0  # 排队已满时的最长等待时间（秒）
+    BCRYPT_ROUNDS: int = 12  # bcrypt成本因子（4-31，每加1耗时翻倍），修改后已有用户在下次登录时按新成本重新哈希
+
+    # PDF字体配置（按顺序查找第一个存在的字体文件，均不存在时使用常见系统字体，最后使用内置字体 STSong-Light）
+    PDF_FONT_PATHS: list[str] = []
+    PDF_BOLD_FONT_PATHS: list[str] = []
+
+    # PDF单据缓存配置（按数据快照内容缓存渲染结果，多进程共享目录）
+    PDF_CACHE_ENABLED: bool = True
+    PDF_CACHE_DIR: str = "storage/pdf_cache"
+    PDF_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 缓存目录大小上限，超出时淘汰最久未访问的文件
+    PDF_BATCH_MAX_DOCUMENTS: int = 200  # 批量打印单次最多单据数
+
+    # 生产排程配置
+    SCHEDULE_MACHINES: dict[str, int] = {}  # 未建立设备档案时使用：设备名称 -> 每小时印张数，如 {"海德堡XL106": 12000}
+    SCHEDULE_DEFAULT_SHEETS_PER_HOUR: int = 5000  # 工单上出现但未配置的设备使用的速度
+    SCHEDULE_CHANGEOVER_MINUTES: float = 30  # 换纸耗时（不同克重）
+    SCHEDULE_MINOR_CHANGEOVER_MINUTES: float = 10  # 换纸耗时（克重相同的不同纸张）
+    SCHEDULE_SEARCH_WINDOW: int = 4  # 局部搜索时工单前后移动的最大位置数
+    SCHEDULE_SEARCH_SECONDS: float = 0.5  # 局部搜索时间上限（秒）
+
+    # 生产分析配置（小时汇总）
+    ANALYTICS_MAX_GAP_MINUTES: int = 120  # 同一工单相邻报工间隔超过该值视为停机，不计入生产时长
+    ANALYTICS_REFRESH_OVERLAP_MINUTES: int = 5  # 增量刷新时多回看的时长（覆盖上次刷新时尚未提交的报工）
+    ANALYTICS_REBUILD_CHUNK_DAYS: int = 7  # 全量重建时每段计算的天数
+
     # CORS配置
     BACKEND_CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:5174", "http://localhost:3000"]
 
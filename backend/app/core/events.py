@@ -0,0 +1,191 @@
+"""
+实时事件推送（发布/订阅）
+生产报工、工单状态变化等写操作提交后发布事件，车间看板等客户端通过 SSE 接口订阅，替代定时轮询列表
+
+- 发布端: await publish_event(CHANNEL_PRODUCTION, "production.report", {...})，发布失败只记录日志，不影响业务
+- 订阅端: async with subscribe(CHANNEL_PRODUCTION) as subscription: event = await subscription.get(timeout)
+- 后端可切换（EVENTS_BACKEND）:
+    local: 仅推送给当前进程内的订阅者（单进程部署/测试）
+    redis: 通过 Redis 发布/订阅转发，多个 worker 进程的订阅者都能收到；
+           每个进程只建立一个 Redis 订阅连接，再分发给进程内的订阅者；Redis 出错时降级为进程内推送
+- 每个订阅者有独立的有界队列（EVENTS_QUEUE_SIZE），消费过慢时丢弃最早的事件，
+  并在下一次读取时收到 resync 事件，客户端应重新加载列表
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 事件频道
+CHANNEL_PRODUCTION = "production"
+
+# 订阅者丢失事件后收到的事件类型
+EVENT_RESYNC = "resync"
+
+
+def _json_default(value: Any) -> Any:
+    """事件数据中的日期转为 ISO 字符串，Decimal 转为数值"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+class Subscription:
+    """单个订阅者（一个 SSE 连接）"""
+
+    def __init__(self, channel: str, maxsize: int):
+        self.channel = channel
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def put(self, event: Dict[str, Any]) -> None:
+        """放入事件，队列已满时丢弃最早的事件"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        读取下一个事件，超时返回 None
+        之前有事件被丢弃时先返回一个 resync 事件
+        """
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"type": EVENT_RESYNC, "data": {"dropped": dropped}, "time": datetime.now().isoformat()}
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """
+    事件代理
+    Redis 发布出错时在 EVENTS_REDIS_RETRY_SECONDS 内改为只推送给当前进程，之后再尝试 Redis
+    """
+
+    def __init__(self):
+        self.prefix = settings.EVENTS_PREFIX
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+        self._redis = None
+        self._redis_down_until = 0.0
+        self._listener: Optional[asyncio.Task] = None
+
+        if settings.EVENTS_BACKEND == "redis":
+            try:
+                from redis import asyncio as aioredis
+
+                self._redis = aioredis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    db=settings.REDIS_DB,
+                    decode_responses=True,
+                    socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+                    health_check_interval=30
+                )
+            except ImportError:
+                logger.warning("未安装 redis 客户端，事件仅推送给当前进程")
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def _redis_channel(self, channel: str) -> str:
+        return f"{self.prefix}:{channel}"
+
+    def _dispatch(self, channel: str, event: Dict[str, Any]) -> None:
+        """分发给当前进程内该频道的订阅者"""
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.put(event)
+
+    async def publish(self, channel: str, event_type: str, data: Dict[str, Any]) -> None:
+        """发布事件（不抛出异常）"""
+        event = {"type": event_type, "data": data, "time": datetime.now().isoformat()}
+        payload = json.dumps(event, ensure_ascii=False, default=_json_default)
+        if self._redis is not None and time.monotonic() >= self._redis_down_until:
+            try:
+                await self._redis.publish(self._redis_channel(channel), payload)
+                # 本进程的订阅者由监听任务从 Redis 收到
+                return
+            except Exception as e:
+                logger.warning("Redis 事件发布失败，改为进程内推送: %s", e)
+                self._redis_down_until = time.monotonic() + settings.EVENTS_REDIS_RETRY_SECONDS
+        self._dispatch(channel, json.loads(payload))
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        """订阅频道，退出上下文时取消订阅"""
+        subscription = Subscription(channel, settings.EVENTS_QUEUE_SIZE)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        if self._redis is not None and (self._listener is None or self._listener.done()):
+            self._listener = asyncio.create_task(self._listen())
+        try:
+            yield subscription
+        finally:
+            subs = self._subscribers.get(channel)
+            if subs is not None:
+                subs.discard(subscription)
+                if not subs:
+                    del self._subscribers[channel]
+
+    async def _listen(self) -> None:
+        """Redis 订阅任务：接收所有频道的事件并分发给进程内订阅者，连接断开后重试"""
+        pattern = self._redis_channel("*")
+        offset = len(self.prefix) + 1
+        while self._subscribers:
+            pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(pattern)
+                while self._subscribers:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None or message["type"] != "pmessage":
+                        continue
+                    try:
+                        event = json.loads(message["data"])
+                    except ValueError:
+                        continue
+                    self._dispatch(message["channel"][offset:], event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Redis 事件订阅中断，%s 秒后重试: %s", settings.EVENTS_REDIS_RETRY_SECONDS, e)
+                await asyncio.sleep(settings.EVENTS_REDIS_RETRY_SECONDS)
+            finally:
+                with contextlib.suppress(Exception):
+                    await pubsub.aclose()
+
+    async def close(self) -> None:
+        """停止订阅任务并关闭 Redis 连接"""
+        if self._listener is not None and not self._listener.done():
+            self._listener.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await self._listener
+        if self._redis is not None:
+            with contextlib.suppress(Exception):
+                await self._redis.aclose()
+
+
+# 全局事件代理
+broker = EventBroker()
+
+
+async def publish_event(channel: str, event_type: str, data: Dict[str, Any]) -> None:
+    """发布事件（写操作提交后调用）"""
+    await broker.publish(channel, event_type, data)
+
+
+def subscribe(channel: str):
+    """订阅频道（异步上下文管理器）"""
+    return broker.subscribe(channel)
@@ -0,0 +1,199 @@
+"""
+CPU密集型任务执行器
+async 接口中直接执行 reportlab/openpyxl 渲染或 bcrypt 计算会阻塞事件循环，期间所有请求都得不到处理，
+这类计算统一交给执行器：
+
+- render 进程池: PDF/Excel 渲染（纯 Python 计算，线程受 GIL 限制，需要多进程）
+  传给渲染函数的参数必须是可 pickle 的普通数据（dict/list/str/Decimal/datetime），不能是 ORM 对象
+- crypto 线程池: bcrypt 哈希/校验（C 实现会释放 GIL，线程即可）
+
+每个执行器限制排队数量：执行中 + 排队中的任务数达到 workers + queue_size 后，
+新任务最多等待 queue_timeout 秒，仍无空位则抛出 ExecutorBusyError（接口返回 503）
+
+每个任务记录排队时间（提交到开始执行）与执行时间，最近 METRICS_WINDOW 个任务的统计见 stats()，
+可通过 /health/executors 查看
+
+使用示例:
+    pdf_bytes = await run_render(render_order_pdf, snapshot)
+    ok = await run_crypto(bcrypt.checkpw, password, hashed)
+"""
+import asyncio
+import logging
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 统计最近多少个任务的排队/执行时间
+METRICS_WINDOW = 1000
+
+# 排队时间超过该值（秒）时记录警告日志
+SLOW_QUEUE_WARNING_SECONDS = 1.0
+
+
+class ExecutorBusyError(Exception):
+    """执行器排队已满"""
+    pass
+
+
+def _timed_call(func: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any]) -> Tuple[float, Any]:
+    """在工作线程/进程中执行，返回（开始执行时间, 结果），用于计算排队时间"""
+    return time.time(), func(*args, **kwargs)
+
+
+def _summary(values: Deque[float]) -> Dict[str, float]:
+    """耗时统计（毫秒）"""
+    if not values:
+        return {"avg": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "avg": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p95": round(ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2)
+    }
+
+
+class BoundedExecutor:
+    """带排队上限的执行器（进程池或线程池）"""
+
+    def __init__(
+        self,
+        name: str,
+        use_processes: bool,
+        max_workers: int,
+        queue_size: int,
+        queue_timeout: float
+    ):
+        self.name = name
+        self.use_processes = use_processes
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self._executor: Optional[Executor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._completed = 0
+        self._queue_times: Deque[float] = deque(maxlen=METRICS_WINDOW)
+        self._run_times: Deque[float] = deque(maxlen=METRICS_WINDOW)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes and self.max_workers > 0:
+                # spawn: 子进程不继承父进程的事件循环、数据库连接池等状态
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                # 进程数配置为 0 时退化为线程池（如调试环境）
+                self._executor = ThreadPoolExecutor(
+                    max_workers=max(self.max_workers, 1),
+                    thread_name_prefix=f"erp-{self.name}"
+                )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        在执行器中运行函数并等待结果
+
+        Raises:
+            ExecutorBusyError: 排队已满且等待超时
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(max(self.max_workers, 1) + self.queue_size)
+
+        submitted_at = time.time()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise ExecutorBusyError(f"{self.name} 执行器繁忙，请稍后重试")
+
+        self._in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _timed_call, func, args, kwargs
+            )
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+        self._record(submitted_at, started_at, time.time())
+        return result
+
+    def _record(self, submitted_at: float, started_at: float, finished_at: float) -> None:
+        queue_time = max(started_at - submitted_at, 0.0)
+        self._completed += 1
+        self._queue_times.append(queue_time)
+        self._run_times.append(max(finished_at - started_at, 0.0))
+        if queue_time > SLOW_QUEUE_WARNING_SECONDS:
+            logger.warning("%s 执行器排队 %.2f 秒（执行中+排队 %d）", self.name, queue_time, self._in_flight)
+
+    def stats(self) -> Dict[str, Any]:
+        """执行器状态（执行中+排队中的任务数、累计完成/拒绝数、最近任务的排队与执行耗时）"""
+        return {
+            "name": self.name,
+            "workers": self.max_workers,
+            "queue_size": self.queue_size,
+            "in_flight": self._in_flight,
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "queue_time_ms": _summary(self._queue_times),
+            "run_time_ms": _summary(self._run_times)
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# PDF/Excel 渲染进程池
+render_executor = BoundedExecutor(
+    "render",
+    use_processes=True,
+    max_workers=settings.RENDER_PROCESS_WORKERS,
+    queue_size=settings.RENDER_QUEUE_SIZE,
+    queue_timeout=settings.RENDER_QUEUE_TIMEOUT
+)
+
+# bcrypt 线程池
+crypto_executor = BoundedExecutor(
+    "crypto",
+    use_processes=False,
+    max_workers=settings.CRYPTO_THREAD_WORKERS,
+    queue_size=settings.CRYPTO_QUEUE_SIZE,
+    queue_timeout=settings.CRYPTO_QUEUE_TIMEOUT
+)
+
+
+async def run_render(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """在渲染进程池中执行（函数需为模块级函数，参数和返回值需可 pickle）"""
+    return await render_executor.run(func, *args, **kwargs)
+
+
+async def run_crypto(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """在 bcrypt 线程池中执行"""
+    return await crypto_executor.run(func, *args, **kwargs)
+
+
+def executor_stats() -> Dict[str, Any]:
+    """全部执行器的状态"""
+    return {
+        executor.name: executor.stats()
+        for executor in (render_executor, crypto_executor)
+    }
+
+
+def shutdown_executors() -> None:
+    """应用关闭时释放进程池/线程池"""
+    render_executor.shutdown()
+    crypto_executor.shutdown()
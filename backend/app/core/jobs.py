@@ -0,0 +1,421 @@
+"""
+后台任务子系统
+耗时的导出、导入、PDF批量生成等操作以任务形式提交，接口立即返回任务ID，
+客户端轮询任务状态/进度，完成后下载结果文件
+
+- 任务类型通过 job_handler 装饰器注册（见 app/services/job_tasks.py）
+- 执行后端可插拔（JOB_BACKEND）:
+    local: 在当前进程内以 asyncio 任务执行，并发数受 JOB_LOCAL_CONCURRENCY 限制（单机部署/测试）
+    celery: 投递到 Celery（Redis作为broker），由独立 worker 进程执行（见 app/worker.py）
+- 任务状态: local 后端保存在进程内存中；celery 后端保存在 Redis 中（API进程与worker共享）
+- 结果文件写入 JOB_RESULT_DIR/<任务ID>/ 目录，celery 后端要求 API 与 worker 共享该目录
+
+使用示例:
+    @job_handler("orders.export")
+    async def export_orders(ctx: JobContext, status: str = None) -> dict:
+        path = ctx.result_path("订单数据.xlsx")
+        ...
+        await ctx.set_progress(50, "已导出5000条")
+        return {"file": path}
+
+    job = await jobs.submit("orders.export", {"status": "CONFIRMED"}, user_id=1)
+"""
+import asyncio
+import enum
+import inspect
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, enum.Enum):
+    """任务状态枚举"""
+    PENDING = "PENDING"      # 排队中
+    RUNNING = "RUNNING"      # 执行中
+    SUCCESS = "SUCCESS"      # 已完成
+    FAILED = "FAILED"        # 失败
+
+
+# Redis 中任务记录的键前缀
+JOB_KEY_PREFIX = "erp:jobs"
+
+# 上传文件在任务目录中的文件名
+UPLOAD_FILENAME = "upload.xlsx"
+
+# 已注册的任务处理函数：任务类型 -> 处理函数
+JOB_HANDLERS: Dict[str, Callable[..., Awaitable[Optional[Dict[str, Any]]]]] = {}
+
+# 需要上传文件的任务类型（只能通过上传接口提交）
+UPLOAD_JOB_TYPES: Set[str] = set()
+
+
+def job_handler(job_type: str, requires_upload: bool = False):
+    """
+    注册任务处理函数
+
+    处理函数签名为 async def handler(ctx: JobContext, **params) -> Optional[dict]，
+    返回值中的 file 为结果文件路径（可选），data 为结果数据（可选，需可JSON序列化）；
+    抛出 ValueError 时任务失败并将异常信息作为错误原因返回给客户端
+
+    Args:
+        job_type: 任务类型
+        requires_upload: 是否需要上传文件（文件保存为任务目录下的 UPLOAD_FILENAME）
+    """
+    def decorator(func):
+        JOB_HANDLERS[job_type] = func
+        if requires_upload:
+            UPLOAD_JOB_TYPES.add(job_type)
+        return func
+
+    return decorator
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def job_dir(job_id: str) -> str:
+    """任务工作目录（上传文件与结果文件）"""
+    return os.path.join(settings.JOB_RESULT_DIR, job_id)
+
+
+# ==================== 任务状态存储 ====================
+
+class MemoryJobStore:
+    """进程内任务状态存储（local 后端）"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        self._jobs[job["id"]] = dict(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        if job_id in self._jobs:
+            self._jobs[job_id].update(fields)
+
+    async def list_by_user(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        jobs = [dict(job) for job in self._jobs.values() if job.get("created_by") == user_id]
+        jobs.sort(key=lambda job: job["created_at"], reverse=True)
+        return jobs[:limit]
+
+    async def purge_expired(self) -> List[str]:
+        """删除过期任务记录，返回被删除的任务ID"""
+        deadline = time.time() - settings.JOB_RESULT_TTL
+        expired = [job_id for job_id, job in self._jobs.items() if job.get("submitted_ts", 0) < deadline]
+        for job_id in expired:
+            self._jobs.pop(job_id, None)
+        return expired
+
+
+class RedisJobStore:
+    """
+    Redis 任务状态存储（celery 后端）
+    使用同步客户端并放到线程中执行，连接不绑定事件循环，API进程与worker通用
+    """
+
+    def __init__(self):
+        import redis
+
+        self.prefix = JOB_KEY_PREFIX
+        self.client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            decode_responses=True
+        )
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.prefix}:{job_id}"
+
+    def _user_key(self, user_id: int) -> str:
+        return f"{self.prefix}:user:{user_id}"
+
+    def _save(self, job: Dict[str, Any]) -> None:
+        with self.client.pipeline() as pipe:
+            pipe.set(self._key(job["id"]), json.dumps(job, ensure_ascii=False), ex=settings.JOB_RESULT_TTL)
+            if job.get("created_by") is not None:
+                user_key = self._user_key(job["created_by"])
+                pipe.zadd(user_key, {job["id"]: job["submitted_ts"]})
+                pipe.expire(user_key, settings.JOB_RESULT_TTL)
+            pipe.execute()
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raw = self.client.get(self._key(job_id))
+        return json.loads(raw) if raw else None
+
+    def _update(self, job_id: str, fields: Dict[str, Any]) -> None:
+        job = self._get(job_id)
+        if job is not None:
+            job.update(fields)
+            self.client.set(self._key(job_id), json.dumps(job, ensure_ascii=False), keepttl=True)
+
+    def _list_by_user(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        job_ids = self.client.zrevrange(self._user_key(user_id), 0, limit - 1)
+        if not job_ids:
+            return []
+        raws = self.client.mget([self._key(job_id) for job_id in job_ids])
+        return [json.loads(raw) for raw in raws if raw]
+
+    async def save(self, job: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self._save, job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._get, job_id)
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await asyncio.to_thread(self._update, job_id, fields)
+
+    async def list_by_user(self, user_id: int, limit: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._list_by_user, user_id, limit)
+
+    @staticmethod
+    def _expired_dirs() -> List[str]:
+        """任务目录最后修改时间早于 JOB_RESULT_TTL 的任务ID（对应的任务记录已过期）"""
+        deadline = time.time() - settings.JOB_RESULT_TTL
+        try:
+            entries = list(os.scandir(settings.JOB_RESULT_DIR))
+        except FileNotFoundError:
+            return []
+        expired = []
+        for entry in entries:
+            try:
+                if entry.is_dir() and entry.stat().st_mtime < deadline:
+                    expired.append(entry.name)
+            except FileNotFoundError:
+                continue
+        return expired
+
+    async def purge_expired(self) -> List[str]:
+        """
+        任务记录由 Redis 过期时间自动清理，这里只找出过期的任务目录
+        返回的任务ID由调用方删除目录（上传文件与结果文件）
+        """
+        return await asyncio.to_thread(self._expired_dirs)
+
+
+# ==================== 执行后端 ====================
+
+class LocalJobBackend:
+    """进程内执行：asyncio 任务 + 信号量限制并发"""
+
+    def __init__(self):
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    async def submit(self, manager: "JobManager", job_id: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(settings.JOB_LOCAL_CONCURRENCY)
+
+        async def runner():
+            async with self._semaphore:
+                await manager.run(job_id)
+
+        task = asyncio.create_task(runner())
+        self._tasks[job_id] = task
+        # 持有任务引用直到完成，避免被垃圾回收
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+
+class CeleryJobBackend:
+    """投递到 Celery worker 执行"""
+
+    async def submit(self, manager: "JobManager", job_id: str) -> None:
+        from app.worker import celery_app, RUN_JOB_TASK
+
+        await asyncio.to_thread(celery_app.send_task, RUN_JOB_TASK, args=[job_id])
+
+
+# ==================== 任务上下文与管理器 ====================
+
+class JobContext:
+    """任务执行上下文，传给任务处理函数"""
+
+    def __init__(self, manager: "JobManager", job: Dict[str, Any]):
+        self.manager = manager
+        self.job_id = job["id"]
+        self.job_type = job["type"]
+        self.user_id = job.get("created_by")
+        self.workdir = job_dir(self.job_id)
+        self._last_progress_at = 0.0
+
+    def result_path(self, filename: str) -> str:
+        """结果文件路径（任务目录下）"""
+        return os.path.join(self.workdir, filename)
+
+    def upload_path(self) -> str:
+        """
+        上传文件路径
+
+        Raises:
+            ValueError: 未上传文件
+        """
+        path = os.path.join(self.workdir, UPLOAD_FILENAME)
+        if not os.path.exists(path):
+            raise ValueError("未找到上传的文件")
+        return path
+
+    async def set_progress(
+        self,
+        progress: Optional[int],
+        message: Optional[str] = None,
+        force: bool = False
+    ) -> None:
+        """
+        更新任务进度（0-100，无法预知总量时传 None 只更新进度说明）
+        频繁调用时每秒最多写入一次状态存储
+        """
+        now = time.monotonic()
+        if not force and now - self._last_progress_at < 1:
+            return
+        self._last_progress_at = now
+        fields: Dict[str, Any] = {}
+        if progress is not None:
+            fields["progress"] = max(0, min(100, int(progress)))
+        if message is not None:
+            fields["message"] = message
+        await self.manager.store.update(self.job_id, **fields)
+
+
+class JobManager:
+    """任务管理器：提交、执行、查询"""
+
+    def __init__(self):
+        if settings.JOB_BACKEND == "celery":
+            self.store = RedisJobStore()
+            self.backend = CeleryJobBackend()
+        else:
+            self.store = MemoryJobStore()
+            self.backend = LocalJobBackend()
+
+    async def create(
+        self,
+        job_type: str,
+        params: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        创建任务记录与任务目录（尚未开始执行）
+        需要上传文件的任务可先创建，将文件写入 job_dir 后再调用 start
+
+        Raises:
+            ValueError: 任务类型未注册或参数不匹配
+        """
+        if job_type not in JOB_HANDLERS:
+            raise ValueError(f"不支持的任务类型: {job_type}")
+
+        params = params or {}
+        try:
+            inspect.signature(JOB_HANDLERS[job_type]).bind(None, **params)
+        except TypeError as e:
+            raise ValueError(f"任务参数错误: {str(e)}")
+
+        for job_id in await self.store.purge_expired():
+            shutil.rmtree(job_dir(job_id), ignore_errors=True)
+
+        job = {
+            "id": uuid.uuid4().hex,
+            "type": job_type,
+            "status": JobStatus.PENDING.value,
+            "progress": 0,
+            "message": None,
+            "error": None,
+            "params": params,
+            "result_file": None,
+            "result_name": None,
+            "result_data": None,
+            "created_by": user_id,
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "submitted_ts": time.time()
+        }
+        os.makedirs(job_dir(job["id"]), exist_ok=True)
+        await self.store.save(job)
+        return job
+
+    async def start(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """将任务交给执行后端"""
+        await self.backend.submit(self, job["id"])
+        return job
+
+    async def submit(
+        self,
+        job_type: str,
+        params: Optional[Dict[str, Any]] = None,
+        user_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        提交任务
+
+        Raises:
+            ValueError: 任务类型未注册或参数不匹配
+        """
+        job = await self.create(job_type, params, user_id)
+        return await self.start(job)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """查询任务"""
+        return await self.store.get(job_id)
+
+    async def list_by_user(self, user_id: int, limit: int = 20) -> List[Dict[str, Any]]:
+        """查询用户最近提交的任务"""
+        return await self.store.list_by_user(user_id, limit)
+
+    async def run(self, job_id: str) -> None:
+        """执行任务（由执行后端调用）"""
+        job = await self.store.get(job_id)
+        if job is None:
+            logger.warning("任务不存在或已过期: %s", job_id)
+            return
+
+        handler = JOB_HANDLERS.get(job["type"])
+        if handler is None:
+            await self.store.update(
+                job_id, status=JobStatus.FAILED.value, error=f"不支持的任务类型: {job['type']}",
+                finished_at=_now()
+            )
+            return
+
+        await self.store.update(job_id, status=JobStatus.RUNNING.value, started_at=_now())
+        ctx = JobContext(self, job)
+        try:
+            result = await handler(ctx, **job["params"]) or {}
+        except ValueError as e:
+            await self.store.update(job_id, status=JobStatus.FAILED.value, error=str(e), finished_at=_now())
+            return
+        except Exception as e:
+            logger.exception("任务执行失败: %s (%s)", job_id, job["type"])
+            await self.store.update(
+                job_id, status=JobStatus.FAILED.value, error=f"任务执行失败: {str(e)}", finished_at=_now()
+            )
+            return
+
+        result_file = result.get("file")
+        await self.store.update(
+            job_id,
+            status=JobStatus.SUCCESS.value,
+            progress=100,
+            result_file=result_file,
+            result_name=result.get("filename") or (os.path.basename(result_file) if result_file else None),
+            result_data=result.get("data"),
+            finished_at=_now()
+        )
+
+
+# 全局任务管理器
+jobs = JobManager()
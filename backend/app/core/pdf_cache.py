@@ -0,0 +1,234 @@
+"""
+PDF单据缓存
+- 缓存键由单据类型与数据快照内容摘要生成（内容寻址），数据变化后自动生成新键，无需主动失效
+- PDF文件保存在 PDF_CACHE_DIR 目录，总大小超过 PDF_CACHE_MAX_BYTES 时按最近访问时间淘汰
+- 缓存键同时作为 ETag，客户端携带 If-None-Match 命中时返回 304，不再传输文件
+
+使用示例:
+    document = await PrintService.order_document(db, order_id)
+    return await pdf_response(request, document, f"order_{order_id}.pdf")
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from app.core.config import settings
+from app.core.executor import run_render
+
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式版本：修改单据模板（app/services/pdf_render.py）后递增，使旧缓存失效
+CACHE_VERSION = 2
+
+PDF_SUFFIX = ".pdf"
+
+# 每写入多少个文件做一次完整扫描，校正估算的缓存总大小（其他进程的写入/淘汰不计入本进程的估算）
+EVICT_SCAN_INTERVAL = 100
+
+
+class PDFCache:
+    """
+    磁盘PDF缓存（多进程共享同一目录）
+    文件按 <键前两位>/<键>.pdf 存放，读取时更新修改时间，淘汰时删除修改时间最早的文件
+    写入时只累加估算的总大小，超出上限或每 EVICT_SCAN_INTERVAL 次写入才扫描目录
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 估算的缓存总大小（None 表示尚未扫描）与上次扫描后的写入次数
+        self._approx_bytes: Optional[int] = None
+        self._writes_since_scan = 0
+
+    def build_key(self, doc_type: str, snapshot: Dict[str, Any]) -> str:
+        """生成缓存键：单据类型 + 模板版本 + 快照内容的 SHA-256 摘要"""
+        raw = json.dumps(
+            {"type": doc_type, "version": CACHE_VERSION, "data": snapshot},
+            sort_keys=True, default=str, ensure_ascii=False
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{PDF_SUFFIX}")
+
+    def _read(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            os.utime(path)
+            return content
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, content: bytes) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # 先写临时文件再改名，避免其他进程读到不完整的文件
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._writes_since_scan += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += len(content)
+            need_scan = (
+                self._approx_bytes is None
+                or self._approx_bytes > self.max_bytes
+                or self._writes_since_scan >= EVICT_SCAN_INTERVAL
+            )
+            if need_scan:
+                self._writes_since_scan = 0
+        if need_scan:
+            total = self._evict()
+            with self._lock:
+                self._approx_bytes = total
+
+    def _evict(self) -> int:
+        """
+        扫描缓存目录，总大小超出上限时删除最久未访问的文件直到低于上限的 90%
+        返回扫描（淘汰）后的总大小
+        """
+        files = []
+        total = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_dir():
+                continue
+            for item in os.scandir(entry.path):
+                if not item.name.endswith(PDF_SUFFIX):
+                    continue
+                try:
+                    stat = item.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+
+        if total <= self.max_bytes:
+            return total
+
+        target = self.max_bytes * 0.9
+        files.sort()
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+        return total
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if not settings.PDF_CACHE_ENABLED:
+            return None
+        try:
+            return await asyncio.to_thread(self._read, key)
+        except OSError as e:
+            logger.warning("读取PDF缓存失败 %s: %s", key, e)
+            return None
+
+    async def set(self, key: str, content: bytes) -> None:
+        if not settings.PDF_CACHE_ENABLED:
+            return
+        try:
+            await asyncio.to_thread(self._write, key, content)
+        except OSError as e:
+            logger.warning("写入PDF缓存失败 %s: %s", key, e)
+
+
+pdf_cache = PDFCache(settings.PDF_CACHE_DIR, settings.PDF_CACHE_MAX_BYTES)
+
+# 同一进程内同一单据并发未命中时只渲染一次
+_render_locks: Dict[str, asyncio.Lock] = {}
+
+
+class PDFDocument:
+    """
+    待输出的PDF单据
+    创建时即可得到 ETag（不需要渲染），调用 content() 时才读取缓存或渲染
+    """
+
+    def __init__(self, doc_type: str, snapshot: Dict[str, Any], render: Callable[[Dict[str, Any]], bytes]):
+        self.doc_type = doc_type
+        self.snapshot = snapshot
+        self.render = render
+        self.key = pdf_cache.build_key(doc_type, snapshot)
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.key}"'
+
+    async def content(self) -> bytes:
+        """
+        获取PDF内容，未命中缓存时在渲染进程池中生成并写入缓存
+
+        Raises:
+            ExecutorBusyError: 渲染进程池繁忙
+        """
+        content = await pdf_cache.get(self.key)
+        if content is not None:
+            return content
+
+        lock = _render_locks.setdefault(self.key, asyncio.Lock())
+        try:
+            async with lock:
+                content = await pdf_cache.get(self.key)
+                if content is None:
+                    content = await run_render(self.render, self.snapshot)
+                    await pdf_cache.set(self.key, content)
+        finally:
+            if not lock.locked():
+                _render_locks.pop(self.key, None)
+        return content
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """检查请求的 If-None-Match 是否包含指定 ETag"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    for value in header.split(","):
+        value = value.strip()
+        if value.startswith("W/"):
+            value = value[2:]
+        if value == "*" or value == etag:
+            return True
+    return False
+
+
+async def pdf_response(request: Request, document: PDFDocument, filename: str) -> Response:
+    """
+    生成PDF下载响应，If-None-Match 命中时返回 304
+
+    Raises:
+        ExecutorBusyError: 渲染进程池繁忙
+    """
+    headers = {
+        "ETag": document.etag,
+        # 允许浏览器缓存，但每次使用前需携带 ETag 向服务端确认
+        "Cache-Control": "private, no-cache",
+        "Access-Control-Expose-Headers": "Content-Disposition, ETag"
+    }
+    if etag_matches(request, document.etag):
+        return Response(status_code=304, headers=headers)
+
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return Response(
+        content=await document.content(),
+        media_type="application/pdf",
+        headers=headers
+    )
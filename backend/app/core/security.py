@@ -6,6 +6,7 @@ from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from app.core.config import settings
+from app.core.executor import run_crypto
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -17,12 +18,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash"""
-    salt = bcrypt.gensalt()
+    """Generate password hash (cost factor: settings.BCRYPT_ROUNDS)"""
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether the hash was generated with a cost factor other than settings.BCRYPT_ROUNDS"""
+    # bcrypt hash format: $2b$<rounds>$<salt+hash>
+    parts = hashed_password.split('$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) != settings.BCRYPT_ROUNDS
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password in the crypto thread pool (does not block the event loop)"""
+    return await run_crypto(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash in the crypto thread pool (does not block the event loop)"""
+    return await run_crypto(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create JWT access token
@@ -0,0 +1,84 @@
+"""
+登录用户缓存
+get_current_user 每个请求都需要用户信息，按用户ID缓存后认证与 require_role 权限检查不再查询数据库
+
+- 两级缓存: 进程内（USER_CACHE_LOCAL_TTL，默认5秒）+ 共享缓存（Redis，USER_CACHE_TTL，默认60秒）
+- 缓存内容不含密码哈希；需要修改用户数据时应重新从数据库加载
+- 修改用户角色/状态/密码、删除用户后调用 invalidate_user
+  （本进程立即生效，其他进程最多延迟 USER_CACHE_LOCAL_TTL 秒）
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache, MemoryBackend
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+USER_CACHE_NAMESPACE = "auth:user"
+
+_local = MemoryBackend(settings.CACHE_LOCAL_MAX_ENTRIES)
+
+
+def _cache_key(user_id: int) -> str:
+    return cache.build_key(f"{USER_CACHE_NAMESPACE}:{user_id}")
+
+
+def _dump_user(user: User) -> Dict[str, Any]:
+    return {
+        'id': user.id,
+        'username': user.username,
+        'role': user.role.value if hasattr(user.role, 'value') else user.role,
+        'is_active': user.is_active,
+        'created_at': user.created_at.isoformat() if user.created_at else None,
+        'updated_at': user.updated_at.isoformat() if user.updated_at else None
+    }
+
+
+def _load_user(data: Dict[str, Any]) -> User:
+    """缓存数据还原为 User 对象（未关联数据库会话，仅用于读取）"""
+    return User(
+        id=data['id'],
+        username=data['username'],
+        role=UserRole(data['role']),
+        is_active=data['is_active'],
+        created_at=datetime.fromisoformat(data['created_at']) if data['created_at'] else None,
+        updated_at=datetime.fromisoformat(data['updated_at']) if data['updated_at'] else None
+    )
+
+
+async def get_cached_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    按ID获取用户（优先读缓存），用户不存在时返回 None
+    返回的 User 对象不在数据库会话中，不含密码哈希
+    """
+    key = _cache_key(user_id)
+    if settings.CACHE_ENABLED:
+        data = await _local.get(key)
+        if data is not None:
+            return _load_user(data)
+
+    async def loader() -> Optional[Dict[str, Any]]:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
+        return _dump_user(user) if user else None
+
+    data = await cache.get_or_load(
+        key, loader, ttl=settings.USER_CACHE_TTL, should_cache=lambda value: value is not None
+    )
+    if data is None:
+        return None
+
+    if settings.CACHE_ENABLED:
+        await _local.set(key, data, settings.USER_CACHE_LOCAL_TTL)
+    return _load_user(data)
+
+
+async def invalidate_user(user_id: int) -> None:
+    """用户信息变更后调用，清除该用户的缓存"""
+    key = _cache_key(user_id)
+    await _local.delete(key)
+    await cache.delete(key)
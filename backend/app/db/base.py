@@ -12,5 +12,8 @@ from app.models.customer import Customer
 from app.models.order import Order, OrderItem
 from app.models.production import ProductionOrder, ProductionOrderItem, ProductionReport
 from app.models.payment import OrderPayment
+from app.models.report_rollup import DailyOrderRollup, DailyPaymentRollup, ProductionHourlyRollup
+from app.models.machine import Machine
+from app.models.reconciliation import StatementLine
 
-__all__ = ["Base", "User", "Material", "StockRecord", "Customer", "Order", "OrderItem", "ProductionOrder", "ProductionOrderItem", "ProductionReport", "OrderPayment"]
+__all__ = ["Base", "User", "Material", "StockRecord", "Customer", "Order", "OrderItem", "ProductionOrder", "ProductionOrderItem", "ProductionReport", "OrderPayment", "DailyOrderRollup", "DailyPaymentRollup", "ProductionHourlyRollup", "Machine", "StatementLine"]
@@ -2,6 +2,10 @@
 数据库异步会话配置
 使用 SQLAlchemy 2.0 Async Engine
 """
+from typing import AsyncIterator, List
+
+from sqlalchemy import Select
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from app.core.config import settings
@@ -50,3 +54,20 @@ async def get_db() -> AsyncSession:
             raise
         finally:
             await session.close()
+
+
+async def stream_query(stmt: Select, chunk_size: int = 1000) -> AsyncIterator[List[Row]]:
+    """
+    使用服务端游标分批读取查询结果（用于大数据量导出）
+
+    使用独立会话：StreamingResponse 发送数据时请求依赖（get_db）已经结束，
+    不能复用请求中的会话
+
+    使用示例:
+        async for rows in stream_query(select(Order.order_no, Order.total_amount)):
+            ...
+    """
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions(chunk_size):
+            yield rows
@@ -1,9 +1,12 @@
 """
 Print-ERP 主应用入口
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.events import broker
+from app.core.executor import ExecutorBusyError, executor_stats, shutdown_executors
 
 
 def create_application() -> FastAPI:
@@ -31,6 +34,17 @@ def create_application() -> FastAPI:
     from app.api.v1.api import api_router
     app.include_router(api_router, prefix=settings.API_V1_PREFIX)
 
+    @app.exception_handler(ExecutorBusyError)
+    async def executor_busy_handler(request: Request, exc: ExecutorBusyError) -> JSONResponse:
+        """渲染/加密执行器排队已满"""
+        return JSONResponse(status_code=503, content={"detail": str(exc)})
+
+    @app.on_event("shutdown")
+    async def shutdown_event() -> None:
+        """释放渲染进程池、bcrypt线程池与事件订阅连接"""
+        shutdown_executors()
+        await broker.close()
+
     @app.get("/")
     async def root() -> dict:
         """根路径健康检查"""
@@ -45,6 +59,11 @@ def create_application() -> FastAPI:
         """健康检查端点"""
         return {"status": "ok"}
 
+    @app.get("/health/executors")
+    async def executors_health() -> dict:
+        """渲染进程池/bcrypt线程池状态（执行中、排队耗时、执行耗时、拒绝数）"""
+        return executor_stats()
+
     return app
 
 
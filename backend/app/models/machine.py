@@ -0,0 +1,94 @@
+"""
+生产设备模型
+表名: erp_machines
+说明: 印刷机等生产设备，生产工单通过 machine_name 关联（与 ProductionOrder.machine_name 一致）
+"""
+from sqlalchemy import String, Integer, Text, JSON, DateTime, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from datetime import datetime
+from typing import Optional
+import enum
+
+from app.db.session import Base
+
+
+class MachineStatus(str, enum.Enum):
+    """设备状态"""
+    ACTIVE = "ACTIVE"  # 可用
+    MAINTENANCE = "MAINTENANCE"  # 维修保养（不参与排程）
+    INACTIVE = "INACTIVE"  # 停用
+
+
+# 默认班次：周一至周六 08:00-20:00
+DEFAULT_SHIFTS = [{"weekdays": [0, 1, 2, 3, 4, 5], "start": "08:00", "end": "20:00"}]
+
+
+def sheet_fits(
+    length: Optional[int],
+    width: Optional[int],
+    max_length: Optional[int],
+    max_width: Optional[int],
+    min_length: Optional[int],
+    min_width: Optional[int]
+) -> bool:
+    """纸张尺寸是否在设备支持范围内（按长边/短边比较，未设置的限制不检查）"""
+    if not length or not width:
+        return True
+    long_side, short_side = max(length, width), min(length, width)
+    if max_length and long_side > max_length:
+        return False
+    if max_width and short_side > max_width:
+        return False
+    if min_length and long_side < min_length:
+        return False
+    if min_width and short_side < min_width:
+        return False
+    return True
+
+
+class Machine(Base):
+    """生产设备表"""
+    __tablename__ = "erp_machines"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    machine_code: Mapped[str] = mapped_column(String(30), unique=True, index=True, comment="设备编码")
+    machine_name: Mapped[str] = mapped_column(String(50), unique=True, index=True, comment="设备名称（生产工单按名称关联）")
+
+    # 产能
+    sheets_per_hour: Mapped[int] = mapped_column(Integer, comment="额定速度（印张/小时）")
+
+    # 支持的纸张尺寸（mm，长边/短边，不限制时为空）
+    max_sheet_length: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="最大纸张长边 mm")
+    max_sheet_width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="最大纸张短边 mm")
+    min_sheet_length: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="最小纸张长边 mm")
+    min_sheet_width: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, comment="最小纸张短边 mm")
+
+    # 班次日历（每周模板），如 [{"weekdays": [0,1,2,3,4], "start": "08:00", "end": "20:00"}]
+    # weekdays: 0=周一 ... 6=周日；end 不晚于 start 时表示跨夜班次
+    shifts: Mapped[list] = mapped_column(JSON, default=lambda: list(DEFAULT_SHIFTS), comment="班次日历JSON")
+
+    status: Mapped[MachineStatus] = mapped_column(
+        SQLEnum(MachineStatus),
+        default=MachineStatus.ACTIVE,
+        comment="设备状态"
+    )
+    remark: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="备注")
+
+    # 时间戳
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, comment="创建时间")
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime,
+        default=datetime.now,
+        onupdate=datetime.now,
+        comment="更新时间"
+    )
+
+    def supports_sheet(self, length: Optional[int], width: Optional[int]) -> bool:
+        """是否支持该尺寸的纸张（尺寸未知时视为支持）"""
+        return sheet_fits(
+            length, width,
+            self.max_sheet_length, self.max_sheet_width, self.min_sheet_length, self.min_sheet_width
+        )
+
+    def __repr__(self) -> str:
+        return f"<Machine {self.machine_code} {self.machine_name}>"
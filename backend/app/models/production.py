@@ -1,10 +1,11 @@
 """
 生产工单数据模型
 """
-from sqlalchemy import String, Integer, ForeignKey, Enum as SQLEnum, DECIMAL, DateTime, Text
+from sqlalchemy import String, Integer, ForeignKey, Enum as SQLEnum, DECIMAL, DateTime, Text, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from typing import Optional
+from decimal import Decimal
 import enum
 
 from app.db.session import Base
@@ -44,6 +45,14 @@ class ProductionOrder(Base):
     )
     priority: Mapped[int] = mapped_column(Integer, default=5, comment="优先级 1-10，数字越小优先级越高")
 
+    # 数量汇总（冗余字段：创建工单、报工时在同一事务内维护，列表查询无需汇总明细表）
+    # 与明细不一致时执行 scripts/rebuild_production_totals.py 重算
+    total_plan_quantity: Mapped[int] = mapped_column(Integer, default=0, server_default="0", comment="计划总数量")
+    total_completed_quantity: Mapped[int] = mapped_column(Integer, default=0, server_default="0", comment="已完成总数量")
+    progress_percent: Mapped[Decimal] = mapped_column(
+        DECIMAL(6, 2), default=Decimal("0.00"), server_default="0", comment="完成进度百分比"
+    )
+
     # 生产人员
     operator_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, comment="操作员姓名")
     machine_name: Mapped[Optional[str]] = mapped_column(String(50), nullable=True, comment="设备名称")
@@ -74,6 +83,16 @@ class ProductionOrder(Base):
     )
 
 
+# 列表查询: WHERE status = ? ORDER BY priority, created_at DESC
+# 最后一列按降序建索引，与排序方向一致，避免 filesort（MySQL 8.0 起支持降序索引）
+Index(
+    "ix_erp_production_orders_status_priority_created",
+    ProductionOrder.status,
+    ProductionOrder.priority,
+    ProductionOrder.created_at.desc()
+)
+
+
 class ProductionOrderItem(Base):
     """生产工单明细表"""
     __tablename__ = "erp_production_order_items"
@@ -112,11 +131,21 @@ class ProductionOrderItem(Base):
 class ProductionReport(Base):
     """生产报工记录表"""
     __tablename__ = "erp_production_reports"
+    __table_args__ = (
+        # 生产分析: 按工单分区、报工时间排序计算相邻报工间隔；按报工时间范围汇总
+        Index("ix_erp_production_reports_order_time", "production_order_id", "report_time"),
+        Index("ix_erp_production_reports_report_time", "report_time"),
+        # 小时汇总增量刷新: 查找上次刷新后新增的报工
+        Index("ix_erp_production_reports_created_at", "created_at"),
+    )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     # 关联
     production_order_id: Mapped[int] = mapped_column(Integer, ForeignKey("erp_production_orders.id"), comment="生产工单ID")
+    production_order_item_id: Mapped[Optional[int]] = mapped_column(
+        Integer, ForeignKey("erp_production_order_items.id"), nullable=True, comment="生产工单明细ID（报工针对的明细）"
+    )
 
     # 报工信息
     report_type: Mapped[str] = mapped_column(
@@ -133,10 +162,16 @@ class ProductionReport(Base):
     # 报工说明
     remark: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="报工说明")
 
+    # 幂等键（终端重试时携带相同的键，不会重复报工）
+    idempotency_key: Mapped[Optional[str]] = mapped_column(
+        String(64), unique=True, index=True, nullable=True, comment="幂等键"
+    )
+
     # 时间戳
     report_time: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, comment="报工时间")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, comment="创建时间")
 
     # 关联关系
     production_order: Mapped["ProductionOrder"] = relationship("ProductionOrder", back_populates="reports")
+    production_order_item: Mapped[Optional["ProductionOrderItem"]] = relationship("ProductionOrderItem")
     operator: Mapped[Optional["User"]] = relationship("User")
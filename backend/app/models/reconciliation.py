@@ -0,0 +1,90 @@
+"""
+收款对账模型
+表名: erp_statement_lines
+说明: 银行/支付宝/微信对账单导入后的收入流水，自动匹配到订单并生成收款记录；
+      (来源, 流水号) 唯一，同一对账单重复导入不会重复入账
+"""
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import String, Numeric, Text, ForeignKey, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+import enum
+
+
+class StatementSource(str, enum.Enum):
+    """对账单来源"""
+    BANK = "BANK"       # 银行流水（标准导入模板）
+    ALIPAY = "ALIPAY"   # 支付宝账单
+    WECHAT = "WECHAT"   # 微信支付账单
+
+
+class StatementLineStatus(str, enum.Enum):
+    """流水匹配状态"""
+    MATCHED = "MATCHED"       # 已匹配并生成收款记录
+    SUGGESTED = "SUGGESTED"   # 仅金额唯一匹配，待人工确认
+    UNMATCHED = "UNMATCHED"   # 未匹配
+    IGNORED = "IGNORED"       # 已忽略（非订单收款）
+
+
+class StatementLine(Base):
+    """对账单流水表（只保存收入流水）"""
+    __tablename__ = "erp_statement_lines"
+    __table_args__ = (
+        UniqueConstraint("source", "reference", name="uq_statement_line_reference"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True, index=True)
+
+    # 流水信息
+    source: Mapped[StatementSource] = mapped_column(
+        SQLEnum(StatementSource),
+        comment="对账单来源"
+    )
+    reference: Mapped[str] = mapped_column(
+        String(64),
+        comment="流水号（银行流水号/支付宝交易号/微信交易单号）"
+    )
+    txn_time: Mapped[datetime] = mapped_column(index=True, comment="交易时间")
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), comment="收入金额")
+    payer: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, comment="付款方")
+    memo: Mapped[Optional[str]] = mapped_column(Text, nullable=True, comment="摘要/备注")
+
+    # 匹配结果
+    status: Mapped[StatementLineStatus] = mapped_column(
+        SQLEnum(StatementLineStatus),
+        default=StatementLineStatus.UNMATCHED,
+        index=True,
+        comment="匹配状态"
+    )
+    match_rule: Mapped[Optional[str]] = mapped_column(
+        String(20),
+        nullable=True,
+        comment="匹配规则（ORDER_NO/CUSTOMER/AMOUNT/MANUAL）"
+    )
+    order_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("erp_orders.id"),
+        nullable=True,
+        index=True,
+        comment="匹配的订单ID（SUGGESTED 时为建议订单）"
+    )
+    payment_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("erp_order_payments.id"),
+        nullable=True,
+        comment="生成的收款记录ID"
+    )
+
+    # 时间戳
+    created_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow,
+        comment="创建时间"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        comment="更新时间"
+    )
+
+    def __repr__(self) -> str:
+        return f"<StatementLine(source={self.source}, reference='{self.reference}', status={self.status})>"
@@ -0,0 +1,112 @@
+"""
+报表汇总模型 - 预聚合的订单/收款/生产数据
+表名: erp_daily_order_rollups, erp_daily_payment_rollups, erp_production_hourly_rollups
+说明: 订单、收款日汇总在写入时增量维护；生产小时汇总由定时任务每小时增量刷新（见 production_analytics_service）
+      报表直接读取汇总表，避免扫描明细表
+"""
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import Date, DateTime, Integer, Numeric, String, Enum as SQLEnum, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+from app.models.payment import PaymentMethod
+
+
+class DailyOrderRollup(Base):
+    """订单日汇总表（按日期+客户）"""
+    __tablename__ = "erp_daily_order_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "customer_id", name="uq_daily_order_rollup"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stat_date: Mapped[date] = mapped_column(Date, index=True, comment="统计日期")
+    customer_id: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        comment="客户ID（0表示未关联客户）"
+    )
+    order_count: Mapped[int] = mapped_column(Integer, default=0, comment="订单数")
+    order_amount: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2),
+        default=Decimal("0.00"),
+        comment="订单金额"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        comment="更新时间"
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyOrderRollup(date={self.stat_date}, customer={self.customer_id}, count={self.order_count})>"
+
+
+class DailyPaymentRollup(Base):
+    """收款日汇总表（按日期+客户+收款方式，仅统计已确认收款）"""
+    __tablename__ = "erp_daily_payment_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_date", "customer_id", "payment_method", name="uq_daily_payment_rollup"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stat_date: Mapped[date] = mapped_column(Date, index=True, comment="统计日期")
+    customer_id: Mapped[int] = mapped_column(
+        Integer,
+        default=0,
+        comment="客户ID（0表示未关联客户）"
+    )
+    payment_method: Mapped[PaymentMethod] = mapped_column(
+        SQLEnum(PaymentMethod),
+        comment="收款方式"
+    )
+    payment_count: Mapped[int] = mapped_column(Integer, default=0, comment="收款笔数")
+    payment_amount: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2),
+        default=Decimal("0.00"),
+        comment="收款金额"
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        comment="更新时间"
+    )
+
+    def __repr__(self) -> str:
+        return f"<DailyPaymentRollup(date={self.stat_date}, method={self.payment_method}, amount={self.payment_amount})>"
+
+
+class ProductionHourlyRollup(Base):
+    """生产小时汇总表（按小时+设备+操作员）"""
+    __tablename__ = "erp_production_hourly_rollups"
+    __table_args__ = (
+        UniqueConstraint("stat_hour", "machine_name", "operator_name", name="uq_production_hourly_rollup"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    stat_hour: Mapped[datetime] = mapped_column(DateTime, index=True, comment="统计小时（整点）")
+    machine_name: Mapped[str] = mapped_column(String(50), default="", comment="设备名称（空字符串表示未指定设备）")
+    operator_name: Mapped[str] = mapped_column(String(50), default="", comment="操作员（报工人，完工工单取工单操作员）")
+    report_count: Mapped[int] = mapped_column(Integer, default=0, comment="报工次数")
+    completed_quantity: Mapped[int] = mapped_column(Integer, default=0, comment="完成数量")
+    rejected_quantity: Mapped[int] = mapped_column(Integer, default=0, comment="报废数量")
+    run_minutes: Mapped[Decimal] = mapped_column(
+        Numeric(10, 2),
+        default=Decimal("0.00"),
+        comment="生产时长（分钟，相邻报工间隔落在本小时内的部分）"
+    )
+    completed_orders: Mapped[int] = mapped_column(Integer, default=0, comment="本小时完工的工单数")
+    lead_time_minutes: Mapped[Decimal] = mapped_column(
+        Numeric(14, 2),
+        default=Decimal("0.00"),
+        comment="完工工单的生产周期合计（分钟，实际开始至实际完成）"
+    )
+    # 本地时间：与报工创建时间比较，作为下次增量刷新的起点
+    updated_at: Mapped[datetime] = mapped_column(
+        default=datetime.now,
+        onupdate=datetime.now,
+        comment="更新时间"
+    )
+
+    def __repr__(self) -> str:
+        return f"<ProductionHourlyRollup(hour={self.stat_hour}, machine={self.machine_name}, completed={self.completed_quantity})>"
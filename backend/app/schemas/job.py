@@ -0,0 +1,28 @@
+"""
+后台任务Schema
+"""
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+
+
+class JobSubmit(BaseModel):
+    """提交后台任务"""
+    type: str = Field(..., description="任务类型，如 orders.export / pdf.production")
+    params: Dict[str, Any] = Field(default_factory=dict, description="任务参数")
+
+
+class JobInfo(BaseModel):
+    """后台任务状态"""
+    id: str = Field(..., description="任务ID")
+    type: str = Field(..., description="任务类型")
+    status: str = Field(..., description="任务状态 PENDING/RUNNING/SUCCESS/FAILED")
+    progress: int = Field(0, description="进度（0-100）")
+    message: Optional[str] = Field(None, description="进度说明")
+    error: Optional[str] = Field(None, description="失败原因")
+    params: Dict[str, Any] = Field(default_factory=dict, description="任务参数")
+    result_name: Optional[str] = Field(None, description="结果文件名")
+    result_data: Optional[Dict[str, Any]] = Field(None, description="结果数据（如导入统计）")
+    download_url: Optional[str] = Field(None, description="结果文件下载地址")
+    created_at: str = Field(..., description="提交时间")
+    started_at: Optional[str] = Field(None, description="开始时间")
+    finished_at: Optional[str] = Field(None, description="完成时间")
@@ -0,0 +1,66 @@
+"""
+生产设备相关Schema
+"""
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, field_validator
+from app.models.machine import MachineStatus, DEFAULT_SHIFTS
+
+
+class MachineShift(BaseModel):
+    """班次（每周模板）"""
+    weekdays: List[int] = Field(..., description="星期 0=周一 ... 6=周日")
+    start: str = Field(..., pattern=r"^([01]\d|2[0-4]):[0-5]\d$", description="开始时间 HH:MM")
+    end: str = Field(..., pattern=r"^([01]\d|2[0-4]):[0-5]\d$", description="结束时间 HH:MM（不晚于开始时间表示跨夜）")
+
+    @field_validator("weekdays")
+    @classmethod
+    def check_weekdays(cls, value: List[int]) -> List[int]:
+        if not value or any(day < 0 or day > 6 for day in value):
+            raise ValueError("星期应为 0-6")
+        return sorted(set(value))
+
+
+class MachineBase(BaseModel):
+    """设备基础Schema"""
+    machine_code: str = Field(..., max_length=30, description="设备编码")
+    machine_name: str = Field(..., max_length=50, description="设备名称")
+    sheets_per_hour: int = Field(..., gt=0, description="额定速度（印张/小时）")
+    max_sheet_length: Optional[int] = Field(None, gt=0, description="最大纸张长边 mm")
+    max_sheet_width: Optional[int] = Field(None, gt=0, description="最大纸张短边 mm")
+    min_sheet_length: Optional[int] = Field(None, gt=0, description="最小纸张长边 mm")
+    min_sheet_width: Optional[int] = Field(None, gt=0, description="最小纸张短边 mm")
+    shifts: List[MachineShift] = Field(
+        default_factory=lambda: [MachineShift(**shift) for shift in DEFAULT_SHIFTS],
+        description="班次日历"
+    )
+    status: MachineStatus = Field(MachineStatus.ACTIVE, description="设备状态")
+    remark: Optional[str] = Field(None, description="备注")
+
+
+class MachineCreate(MachineBase):
+    """创建设备Schema"""
+    pass
+
+
+class MachineUpdate(BaseModel):
+    """更新设备Schema（所有字段可选）"""
+    machine_name: Optional[str] = Field(None, max_length=50)
+    sheets_per_hour: Optional[int] = Field(None, gt=0)
+    max_sheet_length: Optional[int] = Field(None, gt=0)
+    max_sheet_width: Optional[int] = Field(None, gt=0)
+    min_sheet_length: Optional[int] = Field(None, gt=0)
+    min_sheet_width: Optional[int] = Field(None, gt=0)
+    shifts: Optional[List[MachineShift]] = None
+    status: Optional[MachineStatus] = None
+    remark: Optional[str] = None
+
+
+class MachineResponse(MachineBase):
+    """设备响应Schema"""
+    id: int
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -3,7 +3,7 @@
 """
 from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 
 
@@ -107,23 +107,37 @@ class ProductionOrderDetail(BaseModel):
 class ProductionReportCreate(BaseModel):
     """创建生产报工请求"""
     production_order_id: int = Field(..., description="生产工单ID")
+    production_order_item_id: Optional[int] = Field(None, description="生产工单明细ID（工单有多条明细时必填）")
     report_type: str = Field(..., description="报工类型: START/PROGRESS/COMPLETE/REJECT")
     completed_quantity: int = Field(0, ge=0, description="本次完成数量")
     rejected_quantity: int = Field(0, ge=0, description="本次报废数量")
     operator_name: str = Field(..., description="操作员姓名")
     remark: Optional[str] = Field(None, description="报工说明")
+    idempotency_key: Optional[str] = Field(None, max_length=64, description="幂等键（重试时使用相同的键）")
+
+
+class ProductionReportBatchItem(ProductionReportCreate):
+    """批量报工中的一条记录"""
+    report_time: Optional[datetime] = Field(None, description="报工时间（终端离线缓存时传入），默认服务器当前时间")
+
+
+class ProductionReportBatch(BaseModel):
+    """批量报工请求"""
+    reports: List[ProductionReportBatchItem] = Field(..., min_length=1, max_length=500, description="报工记录")
 
 
 class ProductionReportResponse(BaseModel):
     """生产报工响应"""
     id: int
     production_order_id: int
+    production_order_item_id: Optional[int] = None
     report_type: str
     completed_quantity: int
     rejected_quantity: int
     operator_name: str
     operator_id: Optional[int]
     remark: Optional[str]
+    idempotency_key: Optional[str] = None
     report_time: datetime
     created_at: datetime
 
@@ -140,3 +154,30 @@ class ProductionStatistics(BaseModel):
     completed_count: int = Field(description="已完成数量")
     today_completed_count: int = Field(description="今日完成数量")
     avg_completion_rate: float = Field(description="平均完成率")
+
+
+# ========== 批量打印 Schemas ==========
+
+class ProductionPdfBatch(BaseModel):
+    """批量打印生产工单（指定ID列表，或按状态/计划开始日期筛选）"""
+    ids: Optional[List[int]] = Field(None, description="生产工单ID列表")
+    status: Optional[str] = Field(None, description="生产状态筛选")
+    start_date: Optional[str] = Field(None, description="计划开始日期起（YYYY-MM-DD）")
+    end_date: Optional[str] = Field(None, description="计划开始日期止（YYYY-MM-DD）")
+    format: str = Field("pdf", description="输出格式: pdf（合并为一个文件）/ zip")
+
+
+# ========== 生产排程 Schemas ==========
+
+class ScheduleMachine(BaseModel):
+    """排程设备"""
+    name: str = Field(..., description="设备名称")
+    sheets_per_hour: int = Field(..., gt=0, description="每小时印张数")
+
+
+class ProductionScheduleRequest(BaseModel):
+    """生成生产排程请求"""
+    start_time: Optional[datetime] = Field(None, description="排程开始时间，默认当前时间")
+    machines: Optional[List[ScheduleMachine]] = Field(None, description="设备列表，默认使用系统配置")
+    keep_assignment: bool = Field(True, description="待生产工单已指定设备时是否保持")
+    apply: bool = Field(False, description="是否将排程结果写入工单计划时间与设备")
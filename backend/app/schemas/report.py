@@ -104,10 +104,26 @@ class AgingBracket(BaseModel):
     percentage: Decimal = Field(..., description="占比（%）")
 
 
+class CustomerAging(BaseModel):
+    """客户账龄明细"""
+    model_config = ConfigDict(from_attributes=True)
+
+    customer_id: Optional[int] = Field(None, description="客户ID")
+    customer_name: Optional[str] = Field(None, description="客户名称")
+    total_unpaid: Decimal = Field(..., description="欠款总额")
+    unpaid_order_count: int = Field(..., description="欠款订单数")
+    amount_0_7: Decimal = Field(..., description="0-7天欠款")
+    amount_8_30: Decimal = Field(..., description="8-30天欠款")
+    amount_31_60: Decimal = Field(..., description="31-60天欠款")
+    amount_61_90: Decimal = Field(..., description="61-90天欠款")
+    amount_90_plus: Decimal = Field(..., description="90天以上欠款")
+
+
 class ReceivablesAgingAnalysis(BaseModel):
     """应收账款账龄分析"""
     model_config = ConfigDict(from_attributes=True)
 
+    as_of_date: DateType = Field(..., description="统计截止日期")
     total_receivable: Decimal = Field(..., description="总应收金额")
     aging_brackets: List[AgingBracket] = Field(default_factory=list, description="账龄区间列表")
 
@@ -118,6 +134,8 @@ class ReceivablesAgingAnalysis(BaseModel):
     bracket_61_90: AgingBracket = Field(..., description="61-90天")
     bracket_90_plus: AgingBracket = Field(..., description="90天以上")
 
+    customers: List[CustomerAging] = Field(default_factory=list, description="客户账龄明细")
+
 
 # ==================== 综合财务报表 ====================
 
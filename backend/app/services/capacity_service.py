@@ -0,0 +1,331 @@
+"""
+核心算法：设备产能日历
+在内存中按设备维护排程窗口内每天的可用/占用时段，设备负荷、空闲时段查找、超负荷检测不再扫描全部生产工单
+
+数据结构（每台设备）:
+- 每天一个位图（int），每位代表 SLOT_MINUTES 分钟: 班次可用位图（由每周班次模板生成）、已占用位图、重复占用位图
+- 按天的已占用时段数保存在树状数组（Fenwick）中，任意日期区间的负荷查询 O(log D)
+- 班次可用时段数使用前缀和，任意日期区间的产能查询 O(1)
+- 单日占用/冲突检查为位运算 O(1)，空闲时段查找按天跳过已满的日期
+
+使用示例:
+    calendar = await load_capacity_calendar(db, date.today(), days=30)
+    machine = calendar.machines["海德堡XL106"]
+    machine.load_minutes(date.today(), date.today() + timedelta(days=6))
+    machine.find_free_slot(datetime.now(), minutes=240)
+"""
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.machine import Machine, MachineStatus, DEFAULT_SHIFTS
+from app.models.production import ProductionOrder, ProductionStatus
+
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# 产能日历最长天数
+MAX_CALENDAR_DAYS = 366
+
+
+def _parse_time(value: str) -> int:
+    """'HH:MM' 转换为当天的时段序号"""
+    hour, minute = value.split(":")
+    minutes = int(hour) * 60 + int(minute)
+    if not 0 <= minutes <= 24 * 60:
+        raise ValueError(f"无效的时间: {value}")
+    return minutes // SLOT_MINUTES
+
+
+def _range_mask(start_slot: int, end_slot: int) -> int:
+    """[start_slot, end_slot) 的位图"""
+    if end_slot <= start_slot:
+        return 0
+    return ((1 << (end_slot - start_slot)) - 1) << start_slot
+
+
+def build_weekly_masks(shifts: Optional[List[Dict[str, Any]]]) -> List[int]:
+    """
+    班次模板转换为周一至周日的可用位图
+    跨夜班次（end 不晚于 start）拆分为当天 start-24:00 与次日 00:00-end
+
+    Raises:
+        ValueError: 班次格式错误
+    """
+    masks = [0] * 7
+    for shift in shifts if shifts is not None else DEFAULT_SHIFTS:
+        try:
+            weekdays = shift["weekdays"]
+            start_slot = _parse_time(shift["start"])
+            end_slot = _parse_time(shift["end"])
+        except (KeyError, TypeError, AttributeError):
+            raise ValueError("班次格式错误，应为 {\"weekdays\": [0-6], \"start\": \"HH:MM\", \"end\": \"HH:MM\"}")
+        for weekday in weekdays:
+            if not 0 <= weekday <= 6:
+                raise ValueError(f"无效的星期: {weekday}（0=周一 ... 6=周日）")
+            if end_slot > start_slot:
+                masks[weekday] |= _range_mask(start_slot, end_slot)
+            else:
+                masks[weekday] |= _range_mask(start_slot, SLOTS_PER_DAY)
+                masks[(weekday + 1) % 7] |= _range_mask(0, end_slot)
+    return masks
+
+
+class _Fenwick:
+    """树状数组：单点累加、前缀和查询均为 O(log n)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tree = [0] * (size + 1)
+
+    def add(self, index: int, value: int) -> None:
+        index += 1
+        while index <= self.size:
+            self.tree[index] += value
+            index += index & -index
+
+    def prefix(self, index: int) -> int:
+        """[0, index) 的和"""
+        total = 0
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+
+@dataclass
+class Booking:
+    """设备上的一个占用时段"""
+    ref: Any  # 生产工单ID等
+    start: datetime
+    end: datetime
+
+
+@dataclass
+class MachineCalendar:
+    """单台设备的产能日历（窗口: origin 起 days 天）"""
+    name: str
+    origin: date
+    days: int
+    weekly_masks: List[int]
+    sheets_per_hour: int = 0
+    bookings: List[Booking] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.available = [self.weekly_masks[(self.origin + timedelta(days=d)).weekday()] for d in range(self.days)]
+        self.booked = [0] * self.days
+        self.overlapped = [0] * self.days  # 重复占用的时段
+        self._load = _Fenwick(self.days)
+        self._capacity_prefix = [0]
+        for mask in self.available:
+            self._capacity_prefix.append(self._capacity_prefix[-1] + bin(mask).count("1"))
+        # 存在重复占用或班次外占用的日期
+        self.overloaded_days: set = set()
+
+    # ==================== 时间换算 ====================
+
+    def _slot_of(self, moment: datetime, round_up: bool = False) -> int:
+        """时间点转换为窗口内的全局时段序号（按 SLOT_MINUTES 取整）"""
+        delta = moment - datetime.combine(self.origin, time.min)
+        minutes = delta.total_seconds() / 60
+        slot = int(minutes // SLOT_MINUTES)
+        if round_up and minutes % SLOT_MINUTES:
+            slot += 1
+        return slot
+
+    def _time_of(self, slot: int) -> datetime:
+        return datetime.combine(self.origin, time.min) + timedelta(minutes=slot * SLOT_MINUTES)
+
+    def _day_index(self, day: date) -> int:
+        return min(max((day - self.origin).days, 0), self.days)
+
+    # ==================== 占用 ====================
+
+    def book(self, start: datetime, end: datetime, ref: Any = None) -> bool:
+        """
+        占用时段 [start, end)（超出窗口的部分忽略）
+        返回是否产生冲突（与已有占用重叠或超出班次时间）
+        """
+        self.bookings.append(Booking(ref=ref, start=start, end=end))
+        first = max(self._slot_of(start), 0)
+        last = min(self._slot_of(end, round_up=True), self.days * SLOTS_PER_DAY)
+        conflict = False
+        slot = first
+        while slot < last:
+            day, offset = divmod(slot, SLOTS_PER_DAY)
+            count = min(last - slot, SLOTS_PER_DAY - offset)
+            mask = _range_mask(offset, offset + count)
+
+            overlap = self.booked[day] & mask
+            if overlap:
+                self.overlapped[day] |= overlap
+            if overlap or mask & ~self.available[day]:
+                self.overloaded_days.add(day)
+                conflict = True
+
+            added = mask & ~self.booked[day]
+            if added:
+                self.booked[day] |= added
+                self._load.add(day, bin(added).count("1"))
+            slot += count
+        return conflict
+
+    # ==================== 查询 ====================
+
+    def load_minutes(self, start_day: date, end_day: date) -> int:
+        """日期区间 [start_day, end_day] 内的已占用分钟数，O(log D)"""
+        lo, hi = self._day_index(start_day), self._day_index(end_day + timedelta(days=1))
+        if hi <= lo:
+            return 0
+        return (self._load.prefix(hi) - self._load.prefix(lo)) * SLOT_MINUTES
+
+    def capacity_minutes(self, start_day: date, end_day: date) -> int:
+        """日期区间 [start_day, end_day] 内的班次可用分钟数，O(1)"""
+        lo, hi = self._day_index(start_day), self._day_index(end_day + timedelta(days=1))
+        if hi <= lo:
+            return 0
+        return (self._capacity_prefix[hi] - self._capacity_prefix[lo]) * SLOT_MINUTES
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """时段 [start, end) 是否全部在班次内且未被占用"""
+        first = self._slot_of(start)
+        last = self._slot_of(end, round_up=True)
+        if first < 0 or last > self.days * SLOTS_PER_DAY:
+            return False
+        slot = first
+        while slot < last:
+            day, offset = divmod(slot, SLOTS_PER_DAY)
+            count = min(last - slot, SLOTS_PER_DAY - offset)
+            mask = _range_mask(offset, offset + count)
+            if (self.available[day] & ~self.booked[day]) & mask != mask:
+                return False
+            slot += count
+        return True
+
+    def find_free_slot(self, earliest: datetime, minutes: int) -> Optional[Tuple[datetime, datetime]]:
+        """
+        查找 earliest 之后第一段连续空闲（班次内且未占用）的时段，可跨越相连的班次
+        没有满足条件的时段时返回 None
+        """
+        need = max(-(-minutes // SLOT_MINUTES), 1)
+        slot = max(self._slot_of(earliest, round_up=True), 0)
+        run_start, run_end = -1, -1  # 当前连续空闲段 [run_start, run_end)
+
+        day, offset = divmod(slot, SLOTS_PER_DAY)
+        while day < self.days:
+            free = (self.available[day] & ~self.booked[day]) >> offset << offset
+            while free:
+                low = (free & -free).bit_length() - 1  # 下一段空闲的起点
+                shifted = free >> low
+                length = (~shifted & (shifted + 1)).bit_length() - 1  # 该段长度
+                free &= ~_range_mask(low, low + length)
+
+                begin = day * SLOTS_PER_DAY + low
+                if begin != run_end:
+                    run_start = begin
+                run_end = begin + length
+                if run_end - run_start >= need:
+                    start = self._time_of(run_start)
+                    return start, start + timedelta(minutes=minutes)
+            day, offset = day + 1, 0
+        return None
+
+    def overloads(self) -> List[Dict[str, Any]]:
+        """超负荷日期：存在重复占用或在班次外占用的时段"""
+        result = []
+        for day in sorted(self.overloaded_days):
+            overlap_minutes = bin(self.overlapped[day]).count("1") * SLOT_MINUTES
+            outside_minutes = bin(self.booked[day] & ~self.available[day]).count("1") * SLOT_MINUTES
+            result.append({
+                "date": self.origin + timedelta(days=day),
+                "overlap_minutes": overlap_minutes,
+                "outside_shift_minutes": outside_minutes
+            })
+        return result
+
+    def summary(self, start_day: Optional[date] = None, end_day: Optional[date] = None) -> Dict[str, Any]:
+        """设备负荷汇总"""
+        start_day = start_day or self.origin
+        end_day = end_day or self.origin + timedelta(days=self.days - 1)
+        load = self.load_minutes(start_day, end_day)
+        capacity = self.capacity_minutes(start_day, end_day)
+        return {
+            "machine_name": self.name,
+            "sheets_per_hour": self.sheets_per_hour,
+            "load_minutes": load,
+            "capacity_minutes": capacity,
+            "utilization": round(load * 100 / capacity, 2) if capacity else None,
+            "booking_count": len(self.bookings),
+            "overloads": self.overloads()
+        }
+
+
+@dataclass
+class CapacityCalendar:
+    """全部设备的产能日历"""
+    origin: date
+    days: int
+    machines: Dict[str, MachineCalendar] = field(default_factory=dict)
+
+    def add_machine(self, name: str, shifts: Optional[List[Dict[str, Any]]], sheets_per_hour: int = 0) -> MachineCalendar:
+        calendar = MachineCalendar(
+            name=name,
+            origin=self.origin,
+            days=self.days,
+            weekly_masks=build_weekly_masks(shifts),
+            sheets_per_hour=sheets_per_hour
+        )
+        self.machines[name] = calendar
+        return calendar
+
+    def book_orders(self, rows: Iterable[Any]) -> None:
+        """按生产工单的计划时间占用设备（未建档的设备使用默认班次）"""
+        for row in rows:
+            calendar = self.machines.get(row.machine_name)
+            if calendar is None:
+                calendar = self.add_machine(row.machine_name, None)
+            calendar.book(row.plan_start_date, row.plan_end_date, ref=row.id)
+
+
+async def load_capacity_calendar(db: AsyncSession, start_day: date, days: int) -> CapacityCalendar:
+    """
+    构建产能日历：已建档的可用设备 + 窗口内有计划时间的待生产/生产中工单（共两次查询）
+
+    Raises:
+        ValueError: 天数超出范围
+    """
+    if not 1 <= days <= MAX_CALENDAR_DAYS:
+        raise ValueError(f"天数应在 1-{MAX_CALENDAR_DAYS} 之间")
+
+    calendar = CapacityCalendar(origin=start_day, days=days)
+    machines = (await db.execute(
+        select(Machine).where(Machine.status == MachineStatus.ACTIVE).order_by(Machine.machine_name)
+    )).scalars().all()
+    for machine in machines:
+        calendar.add_machine(machine.machine_name, machine.shifts, machine.sheets_per_hour)
+
+    window_start = datetime.combine(start_day, time.min)
+    window_end = window_start + timedelta(days=days)
+    rows = (await db.execute(
+        select(
+            ProductionOrder.id,
+            ProductionOrder.machine_name,
+            ProductionOrder.plan_start_date,
+            ProductionOrder.plan_end_date
+        ).where(
+            and_(
+                ProductionOrder.status.in_([ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS]),
+                ProductionOrder.machine_name.isnot(None),
+                ProductionOrder.plan_start_date.isnot(None),
+                ProductionOrder.plan_end_date.isnot(None),
+                ProductionOrder.plan_start_date < window_end,
+                ProductionOrder.plan_end_date > window_start
+            )
+        ).order_by(ProductionOrder.plan_start_date)
+    )).all()
+    calendar.book_orders(rows)
+    return calendar
@@ -13,29 +13,42 @@ from app.models.order import Order, OrderStatus
 from app.schemas.customer import CustomerCreate, CustomerUpdate, CustomerStatistics
 
 
-async def generate_customer_code(db: AsyncSession) -> str:
+async def _next_customer_seq(db: AsyncSession, prefix: str) -> int:
     """
-    生成客户编号
-    格式: CUS + YYYYMMDD + 3位序号
-    示例: CUS20251223001
+    查询指定日期前缀下的下一个序号
+    序号超过999后位数会增加，按编码长度、编码倒序取最大值，避免字符串比较出错
     """
-    today = date.today()
-    prefix = f"CUS{today.strftime('%Y%m%d')}"
-
-    # 查询今天已有的最大序号
-    stmt = select(func.max(Customer.customer_code)).where(
+    stmt = select(Customer.customer_code).where(
         Customer.customer_code.like(f"{prefix}%")
-    )
+    ).order_by(
+        func.length(Customer.customer_code).desc(),
+        Customer.customer_code.desc()
+    ).limit(1)
     result = await db.execute(stmt)
     max_code = result.scalar()
 
     if max_code:
         # 提取序号并加1
-        seq = int(max_code[-3:]) + 1
-    else:
-        seq = 1
+        return int(max_code[len(prefix):]) + 1
+    return 1
 
-    return f"{prefix}{seq:03d}"
+
+async def generate_customer_code(db: AsyncSession) -> str:
+    """
+    生成客户编号
+    格式: CUS + YYYYMMDD + 3位序号
+    示例: CUS20251223001
+    """
+    return (await generate_customer_codes(db, 1))[0]
+
+
+async def generate_customer_codes(db: AsyncSession, count: int) -> List[str]:
+    """
+    批量生成连续的客户编号（用于批量导入）
+    """
+    prefix = f"CUS{date.today().strftime('%Y%m%d')}"
+    seq = await _next_customer_seq(db, prefix)
+    return [f"{prefix}{seq + i:03d}" for i in range(count)]
 
 
 async def create_customer(db: AsyncSession, customer_data: CustomerCreate) -> Customer:
@@ -83,8 +96,28 @@ async def get_customers(
     获取客户列表
     支持搜索、筛选、分页
     """
-    stmt = select(Customer)
+    stmt = _apply_customer_filters(select(Customer), keyword, status, customer_level)
+
+    # 排序：等级升序，创建时间降序
+    stmt = stmt.order_by(
+        Customer.customer_level.asc(),
+        Customer.created_at.desc()
+    )
+
+    # 分页
+    stmt = stmt.offset(skip).limit(limit)
 
+    result = await db.execute(stmt)
+    return result.scalars().all()
+
+
+def _apply_customer_filters(
+    stmt,
+    keyword: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_level: Optional[str] = None
+):
+    """应用客户列表的搜索和筛选条件"""
     # 搜索条件
     if keyword:
         search_filter = or_(
@@ -103,17 +136,50 @@ async def get_customers(
     if customer_level:
         stmt = stmt.where(Customer.customer_level == customer_level)
 
-    # 排序：等级升序，创建时间降序
-    stmt = stmt.order_by(
-        Customer.customer_level.asc(),
-        Customer.created_at.desc()
+    return stmt
+
+
+def build_customer_export_query(
+    keyword: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_level: Optional[str] = None
+):
+    """
+    构建客户导出查询
+    只查询导出需要的列，并附带每个客户的订单数和交易总额
+    """
+    order_stats = select(
+        Order.customer_id,
+        func.count(Order.id).label('total_orders'),
+        func.sum(Order.total_amount).label('total_amount')
+    ).where(
+        Order.customer_id.is_not(None)
+    ).group_by(
+        Order.customer_id
+    ).subquery()
+
+    stmt = select(
+        Customer.customer_code,
+        Customer.customer_name,
+        Customer.contact_person,
+        Customer.contact_phone,
+        Customer.address,
+        Customer.customer_level,
+        Customer.status,
+        func.coalesce(order_stats.c.total_orders, 0).label('total_orders'),
+        func.coalesce(order_stats.c.total_amount, 0).label('total_amount'),
+        Customer.created_at,
+        Customer.remark
+    ).outerjoin(
+        order_stats, Customer.id == order_stats.c.customer_id
     )
 
-    # 分页
-    stmt = stmt.offset(skip).limit(limit)
+    stmt = _apply_customer_filters(stmt, keyword, status, customer_level)
 
-    result = await db.execute(stmt)
-    return result.scalars().all()
+    return stmt.order_by(
+        Customer.customer_level.asc(),
+        Customer.created_at.desc()
+    )
 
 
 async def update_customer(
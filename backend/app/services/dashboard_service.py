@@ -1,11 +1,12 @@
 """
 仪表盘统计Service
 """
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_, or_
+import asyncio
+from sqlalchemy import select, func, and_, case
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 
+from app.db.session import AsyncSessionLocal
 from app.models.order import Order, OrderStatus
 from app.models.production import ProductionOrder, ProductionStatus
 from app.models.material import Material
@@ -13,78 +14,109 @@ from app.models.payment import OrderPayment, PaymentStatus
 from app.schemas.dashboard import DashboardStats, RecentOrder, DashboardData
 
 
-async def get_dashboard_stats(db: AsyncSession) -> DashboardData:
-    """
-    获取仪表盘统计数据
-    """
-    today = date.today()
-    month_start = date(today.year, today.month, 1)
-
-    # 1. 今日订单统计
-    stmt_today_orders = select(
-        func.count(Order.id).label('count'),
-        func.coalesce(func.sum(Order.total_amount), 0).label('amount')
-    ).where(
-        func.date(Order.created_at) == today
+async def _query_order_stats(today_start: datetime, tomorrow_start: datetime, month_start: datetime):
+    """订单统计：今日订单、总订单、本月订单金额、有效订单总金额"""
+    stmt = select(
+        func.count(Order.id).label('total_count'),
+        func.coalesce(func.sum(case(
+            (and_(Order.created_at >= today_start, Order.created_at < tomorrow_start), 1),
+            else_=0
+        )), 0).label('today_count'),
+        func.coalesce(func.sum(case(
+            (and_(Order.created_at >= today_start, Order.created_at < tomorrow_start), Order.total_amount),
+            else_=0
+        )), 0).label('today_amount'),
+        func.coalesce(func.sum(case(
+            (Order.created_at >= month_start, Order.total_amount),
+            else_=0
+        )), 0).label('month_amount'),
+        func.coalesce(func.sum(case(
+            (Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.PRODUCTION, OrderStatus.COMPLETED]),
+             Order.total_amount),
+            else_=0
+        )), 0).label('effective_amount')
+    )
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).one()
+
+
+async def _query_production_stats(today_start: datetime, tomorrow_start: datetime):
+    """生产统计：生产中、待生产、今日完成"""
+    stmt = select(
+        func.coalesce(func.sum(case(
+            (ProductionOrder.status == ProductionStatus.IN_PROGRESS, 1), else_=0
+        )), 0).label('in_progress'),
+        func.coalesce(func.sum(case(
+            (ProductionOrder.status == ProductionStatus.PENDING, 1), else_=0
+        )), 0).label('pending'),
+        func.coalesce(func.sum(case(
+            (and_(
+                ProductionOrder.status == ProductionStatus.COMPLETED,
+                ProductionOrder.actual_end_date >= today_start,
+                ProductionOrder.actual_end_date < tomorrow_start
+            ), 1),
+            else_=0
+        )), 0).label('completed_today')
     )
-    result = await db.execute(stmt_today_orders)
-    today_orders = result.one()
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).one()
 
-    # 2. 总订单数
-    stmt_total_orders = select(func.count(Order.id))
-    total_orders = await db.scalar(stmt_total_orders) or 0
 
-    # 3. 生产统计
-    # 生产中
-    stmt_production_in_progress = select(func.count(ProductionOrder.id)).where(
-        ProductionOrder.status == ProductionStatus.IN_PROGRESS
+async def _query_material_stats():
+    """库存统计：物料总数、库存预警数（低于阈值，暂时设为 < 100）"""
+    stmt = select(
+        func.count(Material.id).label('total_count'),
+        func.coalesce(func.sum(case((Material.current_stock < 100, 1), else_=0)), 0).label('low_stock_count')
     )
-    production_in_progress = await db.scalar(stmt_production_in_progress) or 0
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).one()
 
-    # 待生产
-    stmt_production_pending = select(func.count(ProductionOrder.id)).where(
-        ProductionOrder.status == ProductionStatus.PENDING
-    )
-    production_pending = await db.scalar(stmt_production_pending) or 0
 
-    # 今日完成
-    stmt_production_completed_today = select(func.count(ProductionOrder.id)).where(
-        and_(
-            ProductionOrder.status == ProductionStatus.COMPLETED,
-            func.date(ProductionOrder.actual_end_date) == today
-        )
+async def _query_payment_stats(month_start: datetime):
+    """收款统计：本月收款金额、累计收款金额"""
+    stmt = select(
+        func.coalesce(func.sum(OrderPayment.payment_amount), 0).label('total_amount'),
+        func.coalesce(func.sum(case(
+            (OrderPayment.payment_date >= month_start, OrderPayment.payment_amount), else_=0
+        )), 0).label('month_amount')
+    ).where(
+        OrderPayment.status == PaymentStatus.CONFIRMED
     )
-    production_completed_today = await db.scalar(stmt_production_completed_today) or 0
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).one()
+
 
-    # 4. 库存预警（低于阈值，暂时设为 < 100）
-    stmt_low_stock = select(func.count(Material.id)).where(
-        Material.current_stock < 100
+async def _query_recent_orders():
+    """最近订单（最新10条）"""
+    stmt = (
+        select(Order)
+        .order_by(Order.created_at.desc())
+        .limit(10)
     )
-    low_stock_count = await db.scalar(stmt_low_stock) or 0
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(stmt)).scalars().all()
 
-    # 总物料数
-    stmt_total_materials = select(func.count(Material.id))
-    total_materials_count = await db.scalar(stmt_total_materials) or 0
 
-    # 5. 财务统计
-    # 本月收款金额
-    stmt_month_payment = select(
-        func.coalesce(func.sum(OrderPayment.payment_amount), 0)
-    ).where(
-        and_(
-            OrderPayment.status == PaymentStatus.CONFIRMED,
-            OrderPayment.payment_date >= month_start
-        )
+async def get_dashboard_stats() -> DashboardData:
+    """
+    获取仪表盘统计数据
+    各统计项合并为少量条件聚合查询，彼此独立，分别使用连接池中的独立会话并发执行
+    """
+    today = date.today()
+    today_start = datetime.combine(today, datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+    month_start = datetime(today.year, today.month, 1)
+
+    order_row, production_row, material_row, payment_row, recent_orders_data = await asyncio.gather(
+        _query_order_stats(today_start, tomorrow_start, month_start),
+        _query_production_stats(today_start, tomorrow_start),
+        _query_material_stats(),
+        _query_payment_stats(month_start),
+        _query_recent_orders()
     )
-    month_payment_amount = await db.scalar(stmt_month_payment) or Decimal("0.00")
 
-    # 本月订单金额
-    stmt_month_order = select(
-        func.coalesce(func.sum(Order.total_amount), 0)
-    ).where(
-        func.date(Order.created_at) >= month_start
-    )
-    month_order_amount = await db.scalar(stmt_month_order) or Decimal("0.00")
+    month_payment_amount = Decimal(payment_row.month_amount or 0)
+    month_order_amount = Decimal(order_row.month_amount or 0)
 
     # 计算回款率
     if month_order_amount > 0:
@@ -92,42 +124,19 @@ async def get_dashboard_stats(db: AsyncSession) -> DashboardData:
     else:
         payment_rate = Decimal("0.00")
 
-    # 总应收账款（总订单金额 - 总收款金额）
-    stmt_total_order_amount = select(
-        func.coalesce(func.sum(Order.total_amount), 0)
-    ).where(
-        Order.status.in_([OrderStatus.CONFIRMED, OrderStatus.PRODUCTION, OrderStatus.COMPLETED])
-    )
-    total_order_amount = await db.scalar(stmt_total_order_amount) or Decimal("0.00")
-
-    stmt_total_payment = select(
-        func.coalesce(func.sum(OrderPayment.payment_amount), 0)
-    ).where(
-        OrderPayment.status == PaymentStatus.CONFIRMED
-    )
-    total_payment = await db.scalar(stmt_total_payment) or Decimal("0.00")
-
-    total_receivable = total_order_amount - total_payment
-
-    # 6. 最近订单（最新10条）
-    stmt_recent_orders = (
-        select(Order)
-        .order_by(Order.created_at.desc())
-        .limit(10)
-    )
-    result = await db.execute(stmt_recent_orders)
-    recent_orders_data = result.scalars().all()
+    # 总应收账款（有效订单总金额 - 总收款金额）
+    total_receivable = Decimal(order_row.effective_amount or 0) - Decimal(payment_row.total_amount or 0)
 
     # 构建返回数据
     stats = DashboardStats(
-        today_orders_count=today_orders.count,
-        today_orders_amount=today_orders.amount,
-        total_orders_count=total_orders,
-        production_in_progress=production_in_progress,
-        production_pending=production_pending,
-        production_completed_today=production_completed_today,
-        low_stock_count=low_stock_count,
-        total_materials_count=total_materials_count,
+        today_orders_count=int(order_row.today_count or 0),
+        today_orders_amount=order_row.today_amount,
+        total_orders_count=order_row.total_count or 0,
+        production_in_progress=int(production_row.in_progress or 0),
+        production_pending=int(production_row.pending or 0),
+        production_completed_today=int(production_row.completed_today or 0),
+        low_stock_count=int(material_row.low_stock_count or 0),
+        total_materials_count=material_row.total_count or 0,
         month_payment_amount=month_payment_amount,
         month_order_amount=month_order_amount,
         payment_rate=payment_rate,
@@ -150,3 +159,4 @@ async def get_dashboard_stats(db: AsyncSession) -> DashboardData:
         stats=stats,
         recent_orders=recent_orders
     )
+
@@ -0,0 +1,333 @@
+"""
+数据导出Service层
+集中定义订单、客户、物料、收款记录的导出查询、列定义和行转换，
+供导出接口（流式下载）和后台任务（生成结果文件）共用
+"""
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from sqlalchemy import Select, select, func
+
+from app.db.session import stream_query
+from app.models.material import Material, MaterialCategory
+from app.models.order import Order, OrderItem
+from app.services import customer_service, payment_service
+
+
+class ExportSpec:
+    """
+    一次导出的定义
+
+    Attributes:
+        query: 导出查询（只查询导出需要的列）
+        columns: 列定义，key是数据字段名，value是列标题
+        to_row: 将查询行转换为导出字典
+        filename: 文件名（不含扩展名）
+        sheet_name: 工作表名称
+        title: 标题行
+    """
+
+    def __init__(
+        self,
+        query: Select,
+        columns: Dict[str, str],
+        to_row: Callable[[Any], Dict[str, Any]],
+        filename: str,
+        sheet_name: str,
+        title: str
+    ):
+        self.query = query
+        self.columns = columns
+        self.to_row = to_row
+        self.filename = filename
+        self.sheet_name = sheet_name
+        self.title = title
+
+    async def row_chunks(self) -> AsyncIterator[List[Dict[str, Any]]]:
+        """分批读取查询结果并转换为字典列表"""
+        async for rows in stream_query(self.query):
+            yield [self.to_row(row) for row in rows]
+
+    def count_query(self) -> Select:
+        """导出总行数查询（用于后台任务的进度计算）"""
+        return select(func.count()).select_from(self.query.order_by(None).subquery())
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime('%Y%m%d_%H%M%S')
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, 'value') else value
+
+
+# ==================== 订单 ====================
+
+ORDER_EXPORT_COLUMNS = {
+    'order_no': '订单编号',
+    'customer_name': '客户名称',
+    'contact_person': '联系人',
+    'contact_phone': '联系电话',
+    'status': '订单状态',
+    'total_amount': '订单总额',
+    'items_count': '明细数量',
+    'created_at': '创建时间',
+    'remark': '备注'
+}
+
+
+def _order_row(row) -> Dict[str, Any]:
+    return {
+        'order_no': row.order_no,
+        'customer_name': row.customer_name,
+        'contact_person': row.contact_person or '',
+        'contact_phone': row.contact_phone or '',
+        'status': row.status.value if hasattr(row.status, 'value') else str(row.status),
+        'total_amount': float(row.total_amount) if row.total_amount else 0.0,
+        'items_count': row.items_count or 0,
+        'created_at': row.created_at.strftime('%Y-%m-%d %H:%M:%S') if row.created_at else '',
+        'remark': row.remark or ''
+    }
+
+
+def build_order_export(
+    status: Optional[str] = None,
+    customer_name: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> ExportSpec:
+    """
+    订单导出定义
+
+    Raises:
+        ValueError: 日期格式错误
+    """
+    # 明细数量（相关子查询，避免对订单主表分组）
+    items_count = select(
+        func.count(OrderItem.id)
+    ).where(
+        OrderItem.order_id == Order.id
+    ).correlate(Order).scalar_subquery()
+
+    query = select(
+        Order.order_no,
+        Order.customer_name,
+        Order.contact_person,
+        Order.contact_phone,
+        Order.status,
+        Order.total_amount,
+        items_count.label("items_count"),
+        Order.created_at,
+        Order.remark
+    )
+
+    if status:
+        query = query.where(Order.status == status)
+
+    if customer_name:
+        query = query.where(Order.customer_name.like(f"%{customer_name}%"))
+
+    if start_date:
+        try:
+            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("开始日期格式错误，应为YYYY-MM-DD")
+        query = query.where(Order.created_at >= start_dt)
+
+    if end_date:
+        try:
+            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+        except ValueError:
+            raise ValueError("结束日期格式错误，应为YYYY-MM-DD")
+        # 包含当天的所有时间
+        query = query.where(Order.created_at < end_dt + timedelta(days=1))
+
+    query = query.order_by(Order.created_at.desc())
+
+    filename_parts = ['订单数据']
+    if status:
+        filename_parts.append(f'{status}')
+    if customer_name:
+        filename_parts.append(f'{customer_name}')
+    filename_parts.append(_timestamp())
+
+    return ExportSpec(
+        query=query,
+        columns=ORDER_EXPORT_COLUMNS,
+        to_row=_order_row,
+        filename='_'.join(filename_parts),
+        sheet_name='订单数据',
+        title='订单信息列表'
+    )
+
+
+# ==================== 客户 ====================
+
+CUSTOMER_EXPORT_COLUMNS = {
+    'customer_code': '客户编号',
+    'customer_name': '客户名称',
+    'contact_person': '联系人',
+    'contact_phone': '联系电话',
+    'address': '联系地址',
+    'customer_level': '客户等级',
+    'status': '状态',
+    'total_orders': '订单总数',
+    'total_amount': '交易总额',
+    'created_at': '创建时间',
+    'remark': '备注'
+}
+
+
+def _customer_row(row) -> Dict[str, Any]:
+    return {
+        'customer_code': row.customer_code,
+        'customer_name': row.customer_name,
+        'contact_person': row.contact_person,
+        'contact_phone': row.contact_phone,
+        'address': row.address,
+        'customer_level': _enum_value(row.customer_level),
+        'status': _enum_value(row.status),
+        'total_orders': row.total_orders,
+        'total_amount': row.total_amount,
+        'created_at': row.created_at,
+        'remark': row.remark
+    }
+
+
+def build_customer_export(
+    keyword: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_level: Optional[str] = None
+) -> ExportSpec:
+    """客户导出定义"""
+    return ExportSpec(
+        query=customer_service.build_customer_export_query(
+            keyword=keyword,
+            status=status,
+            customer_level=customer_level
+        ),
+        columns=CUSTOMER_EXPORT_COLUMNS,
+        to_row=_customer_row,
+        filename=f"客户数据_{_timestamp()}",
+        sheet_name='客户数据',
+        title='客户信息列表'
+    )
+
+
+# ==================== 物料 ====================
+
+MATERIAL_EXPORT_COLUMNS = {
+    'code': '物料编码',
+    'name': '物料名称',
+    'category': '物料分类',
+    'specification': '规格',
+    'unit': '单位',
+    'unit_price': '单价',
+    'stock_quantity': '库存数量',
+    'created_at': '创建时间'
+}
+
+# 分类枚举转换为中文标签
+MATERIAL_CATEGORY_LABELS = {
+    'PAPER': '纸张',
+    'INK': '油墨',
+    'AUX': '辅料'
+}
+
+
+def _material_row(row) -> Dict[str, Any]:
+    category_value = row.category.value if hasattr(row.category, 'value') else str(row.category)
+
+    # 格式化规格字段（纸张显示完整规格）
+    if row.category == MaterialCategory.PAPER and row.spec_width and row.spec_length:
+        specification = f"{row.spec_width}×{row.spec_length}mm {row.gram_weight}g"
+    else:
+        specification = '-'
+
+    return {
+        'code': row.code,
+        'name': row.name,
+        'category': MATERIAL_CATEGORY_LABELS.get(category_value, category_value),
+        'specification': specification,
+        'unit': row.stock_unit or '张',
+        'unit_price': row.cost_price,
+        'stock_quantity': row.current_stock,
+        'created_at': row.created_at
+    }
+
+
+def build_material_export(category: Optional[str] = None) -> ExportSpec:
+    """物料导出定义"""
+    query = select(
+        Material.code,
+        Material.name,
+        Material.category,
+        Material.spec_width,
+        Material.spec_length,
+        Material.gram_weight,
+        Material.stock_unit,
+        Material.cost_price,
+        Material.current_stock,
+        Material.created_at
+    )
+    if category:
+        query = query.where(Material.category == category)
+    query = query.order_by(Material.id)
+
+    return ExportSpec(
+        query=query,
+        columns=MATERIAL_EXPORT_COLUMNS,
+        to_row=_material_row,
+        filename=f"物料数据_{_timestamp()}",
+        sheet_name='物料数据',
+        title='物料信息列表'
+    )
+
+
+# ==================== 收款记录 ====================
+
+PAYMENT_EXPORT_COLUMNS = {
+    'payment_no': '收款单号',
+    'order_no': '订单编号',
+    'customer_name': '客户名称',
+    'payment_amount': '收款金额',
+    'payment_method': '收款方式',
+    'payment_date': '收款日期',
+    'status': '收款状态',
+    'received_by': '收款人',
+    'voucher_no': '凭证号',
+    'remark': '备注',
+    'created_at': '创建时间'
+}
+
+
+def _payment_row(row) -> Dict[str, Any]:
+    return {
+        'payment_no': row.payment_no,
+        'order_no': row.order_no,
+        'customer_name': row.customer_name,
+        'payment_amount': row.payment_amount,
+        'payment_method': _enum_value(row.payment_method),
+        'payment_date': row.payment_date,
+        'status': _enum_value(row.status),
+        'received_by': row.received_by,
+        'voucher_no': row.voucher_no,
+        'remark': row.remark,
+        'created_at': row.created_at
+    }
+
+
+def build_payment_export(
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> ExportSpec:
+    """收款记录导出定义"""
+    return ExportSpec(
+        query=payment_service.build_payment_export_query(status, start_date, end_date),
+        columns=PAYMENT_EXPORT_COLUMNS,
+        to_row=_payment_row,
+        filename=f"收款记录_{_timestamp()}",
+        sheet_name='收款记录',
+        title='收款记录列表'
+    )
@@ -0,0 +1,362 @@
+"""
+Excel批量导入Service层
+只读模式逐批读取Excel，每批数据：校验 -> 一次查询已存在记录 -> 一条 INSERT ... ON DUPLICATE KEY UPDATE -> 提交
+"""
+import asyncio
+import re
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.customer import Customer, CustomerLevel, CustomerStatus
+from app.models.material import Material, MaterialCategory
+from app.services.customer_service import generate_customer_codes
+from app.utils.excel_handler import ExcelHandler
+
+
+# 每批导入行数
+IMPORT_CHUNK_SIZE = 1000
+
+# 导入结果中最多返回的错误明细数
+MAX_ERROR_DETAILS = 20
+
+# 物料导入模板列定义
+MATERIAL_IMPORT_COLUMNS = {
+    'code': '物料编码*',
+    'name': '物料名称*',
+    'category': '物料分类*(纸张/油墨/其他)',
+    'specification': '规格',
+    'unit': '单位',
+    'unit_price': '单价',
+    'min_stock': '最小库存量',
+    'remark': '备注'
+}
+
+# 客户导入模板列定义
+CUSTOMER_IMPORT_COLUMNS = {
+    'name': '客户名称*',
+    'contact_person': '联系人',
+    'contact_phone': '联系电话',
+    'contact_address': '联系地址',
+    'customer_level': '客户等级(A/B/C/D)',
+    'remark': '备注'
+}
+
+# 物料编码最大长度（与 Material.code 列一致）
+MATERIAL_CODE_MAX_LENGTH = 50
+
+# 物料分类中文名称映射
+MATERIAL_CATEGORY_MAP = {
+    '纸张': MaterialCategory.PAPER,
+    '油墨': MaterialCategory.INK,
+    '其他': MaterialCategory.AUX,
+    '辅料': MaterialCategory.AUX,
+}
+
+# 规格中的纸张尺寸，如 787*1092mm
+PAPER_SIZE_PATTERN = re.compile(r'(\d+)\s*[*×xX]\s*(\d+)')
+
+
+class ImportResult:
+    """导入结果统计"""
+
+    def __init__(self, key_field: str):
+        self.key_field = key_field
+        self.total = 0
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def add_error(self, row_number: int, key: Any, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_ERROR_DETAILS:
+            self.errors.append({'row': row_number, self.key_field: key or '', 'error': error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total': self.total,
+            'success': self.created + self.updated,
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors
+        }
+
+
+async def _iter_chunks(
+    file: BinaryIO,
+    columns: Dict[str, str]
+) -> AsyncIterator[List[Tuple[int, Dict[str, Any]]]]:
+    """在线程中逐批解析Excel，避免阻塞事件循环"""
+    iterator = ExcelHandler.iter_import_chunks(file, columns, chunk_size=IMPORT_CHUNK_SIZE)
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def _to_decimal(value: Any, field_name: str) -> Optional[Decimal]:
+    """转换非负数值，空值返回 None"""
+    if value is None:
+        return None
+    try:
+        number = Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"{field_name}格式不正确")
+    if number < 0:
+        raise ValueError(f"{field_name}不能为负数")
+    return number
+
+
+def _to_text(value: Any) -> Optional[str]:
+    """转换为去除首尾空格的字符串，空值返回 None"""
+    if value is None:
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+# ==================== 物料导入 ====================
+
+def _parse_material_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """校验并转换物料行数据，校验失败抛出 ValueError"""
+    code = _to_text(row.get('code'))
+    name = _to_text(row.get('name'))
+    category_name = _to_text(row.get('category'))
+
+    if not code:
+        raise ValueError("物料编码不能为空")
+    if len(code) > MATERIAL_CODE_MAX_LENGTH:
+        raise ValueError(f"物料编码不能超过{MATERIAL_CODE_MAX_LENGTH}个字符")
+    if not name:
+        raise ValueError("物料名称不能为空")
+    if category_name not in MATERIAL_CATEGORY_MAP:
+        raise ValueError("物料分类必须为 纸张/油墨/其他")
+
+    category = MATERIAL_CATEGORY_MAP[category_name]
+
+    # 纸张规格解析为宽×长
+    spec_width = spec_length = None
+    specification = _to_text(row.get('specification'))
+    if category == MaterialCategory.PAPER and specification:
+        match = PAPER_SIZE_PATTERN.search(specification)
+        if match:
+            spec_width, spec_length = int(match.group(1)), int(match.group(2))
+
+    return {
+        'code': code,
+        'name': name[:100],
+        'category': category,
+        'spec_width': spec_width,
+        'spec_length': spec_length,
+        'purchase_unit': (_to_text(row.get('unit')) or '个')[:10],
+        'cost_price': _to_decimal(row.get('unit_price'), '单价') or Decimal("0.00"),
+        'min_stock': _to_decimal(row.get('min_stock'), '最小库存量') or Decimal("0.00"),
+    }
+
+
+async def _import_material_chunk(
+    db: AsyncSession,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    result: ImportResult
+) -> None:
+    """导入一批物料：编码已存在则更新，否则新增"""
+    valid: Dict[str, Dict[str, Any]] = {}
+    for row_number, row in chunk:
+        try:
+            values = _parse_material_row(row)
+        except ValueError as e:
+            result.add_error(row_number, row.get('code'), str(e))
+            continue
+        # 同一批内编码重复时以最后一行为准，前面的行计为更新
+        if values['code'] in valid:
+            result.updated += 1
+        valid[values['code']] = values
+
+    if not valid:
+        return
+
+    # 一次查询本批已存在的物料编码
+    existing = set((await db.execute(
+        select(Material.code).where(Material.code.in_(list(valid)))
+    )).scalars().all())
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            **values,
+            'stock_unit': '张',
+            'unit_rate': Decimal("1"),
+            'current_stock': Decimal("0.00"),
+            'safety_stock': Decimal("0.00"),
+            'created_at': now,
+            'updated_at': now,
+        }
+        for values in valid.values()
+    ]
+
+    stmt = mysql_insert(Material).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+        name=stmt.inserted.name,
+        category=stmt.inserted.category,
+        purchase_unit=stmt.inserted.purchase_unit,
+        cost_price=stmt.inserted.cost_price,
+        min_stock=stmt.inserted.min_stock,
+        spec_width=func.coalesce(stmt.inserted.spec_width, Material.spec_width),
+        spec_length=func.coalesce(stmt.inserted.spec_length, Material.spec_length),
+        updated_at=stmt.inserted.updated_at
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+    result.updated += len(existing)
+    result.created += len(valid) - len(existing)
+
+
+async def import_materials(
+    db: AsyncSession,
+    file: BinaryIO,
+    on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """
+    从Excel批量导入物料
+    物料编码已存在时更新名称、分类、单位、单价、最小库存，不修改当前库存
+
+    Args:
+        on_progress: 每批处理完成后的回调，参数为当前的导入结果统计（后台任务用于更新进度）
+
+    Raises:
+        ValueError: Excel格式不正确
+    """
+    result = ImportResult(key_field='code')
+    async for chunk in _iter_chunks(file, MATERIAL_IMPORT_COLUMNS):
+        result.total += len(chunk)
+        await _import_material_chunk(db, chunk, result)
+        if on_progress is not None:
+            await on_progress(result.to_dict())
+    return result.to_dict()
+
+
+# ==================== 客户导入 ====================
+
+def _parse_customer_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """校验并转换客户行数据，校验失败抛出 ValueError"""
+    name = _to_text(row.get('name'))
+    if not name:
+        raise ValueError("客户名称不能为空")
+
+    phone = _to_text(row.get('contact_phone'))
+    if phone and len(phone) < 7:
+        raise ValueError("联系电话格式不正确")
+
+    # 等级为空时不修改已有客户的等级，新客户默认 D
+    level = _to_text(row.get('customer_level'))
+    if level is not None:
+        level = level.upper()
+        if level not in CustomerLevel.__members__:
+            raise ValueError("客户等级必须为 A/B/C/D")
+
+    return {
+        'customer_name': name[:100],
+        'contact_person': (_to_text(row.get('contact_person')) or '')[:50] or None,
+        'contact_phone': phone[:20] if phone else None,
+        'address': _to_text(row.get('contact_address')),
+        'customer_level': CustomerLevel(level) if level else None,
+        'remark': _to_text(row.get('remark')),
+    }
+
+
+async def _import_customer_chunk(
+    db: AsyncSession,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    result: ImportResult
+) -> None:
+    """
+    导入一批客户：客户名称已存在则更新联系信息，否则新增
+    客户名称没有唯一索引，先按名称查出已有客户编号，再以客户编号（唯一）做 upsert
+    """
+    valid: Dict[str, Dict[str, Any]] = {}
+    for row_number, row in chunk:
+        try:
+            values = _parse_customer_row(row)
+        except ValueError as e:
+            result.add_error(row_number, row.get('name'), str(e))
+            continue
+        # 同一批内名称重复时以最后一行为准，前面的行计为更新
+        if values['customer_name'] in valid:
+            result.updated += 1
+        valid[values['customer_name']] = values
+
+    if not valid:
+        return
+
+    # 一次查询本批已存在的客户
+    existing_rows = (await db.execute(
+        select(Customer.customer_name, Customer.customer_code, Customer.customer_level).where(
+            Customer.customer_name.in_(list(valid))
+        )
+    )).all()
+    existing = {row.customer_name: row.customer_code for row in existing_rows}
+    existing_levels = {row.customer_name: row.customer_level for row in existing_rows}
+
+    # 为新客户批量分配编号
+    new_names = [name for name in valid if name not in existing]
+    new_codes = dict(zip(new_names, await generate_customer_codes(db, len(new_names))))
+
+    rows = [
+        {
+            **values,
+            'customer_code': existing.get(name) or new_codes[name],
+            # 等级列不允许为空，空值时写入原等级（新客户写入默认等级 D）
+            'customer_level': values['customer_level'] or existing_levels.get(name) or CustomerLevel.D,
+            'credit_limit': Decimal("0.00"),
+            'balance': Decimal("0.00"),
+            'status': CustomerStatus.ACTIVE,
+        }
+        for name, values in valid.items()
+    ]
+
+    stmt = mysql_insert(Customer).values(rows)
+    stmt = stmt.on_duplicate_key_update(
+        contact_person=func.coalesce(stmt.inserted.contact_person, Customer.contact_person),
+        contact_phone=func.coalesce(stmt.inserted.contact_phone, Customer.contact_phone),
+        address=func.coalesce(stmt.inserted.address, Customer.address),
+        customer_level=func.coalesce(stmt.inserted.customer_level, Customer.customer_level),
+        remark=func.coalesce(stmt.inserted.remark, Customer.remark),
+        updated_at=func.now()
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+    result.updated += len(existing)
+    result.created += len(new_names)
+
+
+async def import_customers(
+    db: AsyncSession,
+    file: BinaryIO,
+    on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """
+    从Excel批量导入客户
+    客户名称已存在时更新联系人、电话、地址、等级、备注（空值不覆盖原有数据）
+
+    Args:
+        on_progress: 每批处理完成后的回调，参数为当前的导入结果统计（后台任务用于更新进度）
+
+    Raises:
+        ValueError: Excel格式不正确
+    """
+    result = ImportResult(key_field='name')
+    async for chunk in _iter_chunks(file, CUSTOMER_IMPORT_COLUMNS):
+        result.total += len(chunk)
+        await _import_customer_chunk(db, chunk, result)
+        if on_progress is not None:
+            await on_progress(result.to_dict())
+    return result.to_dict()
@@ -0,0 +1,254 @@
+"""
+后台任务处理函数注册
+导入本模块即注册以下任务类型（见 app/core/jobs.py）:
+
+- orders.export / customers.export / materials.export / payments.export: 数据导出（xlsx/csv/parquet）
+- materials.import / customers.import: Excel批量导入（上传文件由 /jobs/upload 保存到任务目录）
+- payments.reconcile: 对账单导入并自动匹配入账（由 /payments/reconciliation/import 上传CSV/Excel）
+- pdf.order / pdf.production / pdf.delivery / pdf.payment: 单据PDF生成
+- pdf.production_batch: 生产工单批量打印（合并PDF或ZIP）
+"""
+from datetime import date
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.cache import invalidate_tags, TAG_CUSTOMERS, TAG_MATERIALS, TAG_ORDERS, TAG_PAYMENTS
+from app.core.jobs import JobContext, job_handler
+from app.db.session import AsyncSessionLocal
+from app.services import export_service, import_service, reconciliation_service
+from app.services.export_service import ExportSpec
+from app.services.pdf_service import PrintService, PDF_BATCH_FORMATS
+from app.utils.data_export import EXPORT_FORMATS, write_export_file
+
+
+# ==================== 数据导出 ====================
+
+async def _run_export(ctx: JobContext, spec: ExportSpec, export_format: str) -> Dict[str, Any]:
+    """按导出定义生成结果文件，按已导出行数更新进度"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+
+    async with AsyncSessionLocal() as db:
+        total = (await db.execute(spec.count_query())).scalar() or 0
+
+    exported = 0
+
+    async def tracked_chunks() -> AsyncIterator[List[Dict[str, Any]]]:
+        nonlocal exported
+        async for rows in spec.row_chunks():
+            yield rows
+            exported += len(rows)
+            # 写文件收尾阶段保留1%
+            progress = exported * 99 // total if total else 99
+            await ctx.set_progress(progress, f"已导出{exported}/{total}条")
+
+    _, extension = EXPORT_FORMATS[export_format]
+    filename = f"{spec.filename}.{extension}"
+    await write_export_file(
+        ctx.result_path(filename),
+        tracked_chunks(),
+        spec.columns,
+        export_format,
+        sheet_name=spec.sheet_name,
+        title=spec.title
+    )
+
+    return {"file": ctx.result_path(filename), "filename": filename, "data": {"rows": exported}}
+
+
+@job_handler("orders.export")
+async def export_orders(
+    ctx: JobContext,
+    status: Optional[str] = None,
+    customer_name: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "xlsx"
+) -> Dict[str, Any]:
+    """导出订单数据"""
+    spec = export_service.build_order_export(status, customer_name, start_date, end_date)
+    return await _run_export(ctx, spec, format)
+
+
+@job_handler("customers.export")
+async def export_customers(
+    ctx: JobContext,
+    keyword: Optional[str] = None,
+    status: Optional[str] = None,
+    customer_level: Optional[str] = None,
+    format: str = "xlsx"
+) -> Dict[str, Any]:
+    """导出客户数据"""
+    spec = export_service.build_customer_export(keyword, status, customer_level)
+    return await _run_export(ctx, spec, format)
+
+
+@job_handler("materials.export")
+async def export_materials(
+    ctx: JobContext,
+    category: Optional[str] = None,
+    format: str = "xlsx"
+) -> Dict[str, Any]:
+    """导出物料数据"""
+    spec = export_service.build_material_export(category)
+    return await _run_export(ctx, spec, format)
+
+
+def _parse_date(value: Optional[str], field_name: str) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{field_name}格式错误，应为YYYY-MM-DD")
+
+
+@job_handler("payments.export")
+async def export_payments(
+    ctx: JobContext,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = "xlsx"
+) -> Dict[str, Any]:
+    """导出收款记录"""
+    spec = export_service.build_payment_export(
+        status,
+        _parse_date(start_date, "开始日期"),
+        _parse_date(end_date, "结束日期")
+    )
+    return await _run_export(ctx, spec, format)
+
+
+# ==================== Excel导入 ====================
+
+async def _import_progress(ctx: JobContext, result: Dict[str, Any]) -> None:
+    # 只读模式无法预知总行数，只更新进度说明
+    await ctx.set_progress(
+        None, f"已处理{result['total']}行：成功{result['success']}条，失败{result['failed']}条"
+    )
+
+
+@job_handler("materials.import", requires_upload=True)
+async def import_materials(ctx: JobContext) -> Dict[str, Any]:
+    """从上传的Excel批量导入物料"""
+    async def on_progress(result: Dict[str, Any]) -> None:
+        await _import_progress(ctx, result)
+
+    async with AsyncSessionLocal() as db:
+        with open(ctx.upload_path(), 'rb') as f:
+            result = await import_service.import_materials(db, f, on_progress=on_progress)
+
+    if result['success'] > 0:
+        await invalidate_tags(TAG_MATERIALS)
+    return {"data": result}
+
+
+@job_handler("customers.import", requires_upload=True)
+async def import_customers(ctx: JobContext) -> Dict[str, Any]:
+    """从上传的Excel批量导入客户"""
+    async def on_progress(result: Dict[str, Any]) -> None:
+        await _import_progress(ctx, result)
+
+    async with AsyncSessionLocal() as db:
+        with open(ctx.upload_path(), 'rb') as f:
+            result = await import_service.import_customers(db, f, on_progress=on_progress)
+
+    if result['success'] > 0:
+        await invalidate_tags(TAG_CUSTOMERS)
+    return {"data": result}
+
+
+@job_handler("payments.reconcile", requires_upload=True)
+async def reconcile_payments(
+    ctx: JobContext,
+    source: str = "BANK",
+    file_format: str = "xlsx",
+    received_by: str = "对账导入"
+) -> Dict[str, Any]:
+    """从上传的对账单导入收入流水，自动匹配订单并生成收款记录"""
+    async def on_progress(result: Dict[str, Any]) -> None:
+        await _import_progress(ctx, result)
+
+    async with AsyncSessionLocal() as db:
+        with open(ctx.upload_path(), 'rb') as f:
+            result = await reconciliation_service.import_statement(
+                db, f, source, file_format=file_format, received_by=received_by, on_progress=on_progress
+            )
+
+    if result['matched'] > 0:
+        await invalidate_tags(TAG_PAYMENTS, TAG_ORDERS)
+    return {"data": result}
+
+
+# ==================== PDF生成 ====================
+
+async def _run_pdf(ctx: JobContext, generate, record_id: int, filename: str) -> Dict[str, Any]:
+    """生成单据PDF并写入结果文件"""
+    async with AsyncSessionLocal() as db:
+        pdf_buffer = await generate(db, record_id)
+
+    with open(ctx.result_path(filename), 'wb') as f:
+        f.write(pdf_buffer.getvalue())
+    return {"file": ctx.result_path(filename), "filename": filename}
+
+
+@job_handler("pdf.order")
+async def pdf_order(ctx: JobContext, order_id: int) -> Dict[str, Any]:
+    """销售订单PDF"""
+    return await _run_pdf(ctx, PrintService.generate_order_pdf, order_id, f"order_{order_id}.pdf")
+
+
+@job_handler("pdf.production")
+async def pdf_production(ctx: JobContext, production_id: int) -> Dict[str, Any]:
+    """生产工单PDF"""
+    return await _run_pdf(
+        ctx, PrintService.generate_production_pdf, production_id, f"production_{production_id}.pdf"
+    )
+
+
+@job_handler("pdf.delivery")
+async def pdf_delivery(ctx: JobContext, order_id: int) -> Dict[str, Any]:
+    """送货单PDF"""
+    return await _run_pdf(ctx, PrintService.generate_delivery_pdf, order_id, f"delivery_{order_id}.pdf")
+
+
+@job_handler("pdf.payment")
+async def pdf_payment(ctx: JobContext, payment_id: int) -> Dict[str, Any]:
+    """收款凭证PDF"""
+    return await _run_pdf(
+        ctx, PrintService.generate_payment_receipt_pdf, payment_id, f"payment_{payment_id}.pdf"
+    )
+
+
+@job_handler("pdf.production_batch")
+async def pdf_production_batch(
+    ctx: JobContext,
+    ids: Optional[List[int]] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    format: str = 'pdf'
+) -> Dict[str, Any]:
+    """生产工单批量打印"""
+    if format not in PDF_BATCH_FORMATS:
+        raise ValueError(f"不支持的输出格式: {format}")
+
+    async def on_progress(done: int, total: int) -> None:
+        # 合并/打包阶段保留1%
+        await ctx.set_progress(done * 99 // total, f"已生成{done}/{total}张")
+
+    async with AsyncSessionLocal() as db:
+        content = await PrintService.generate_production_batch(
+            db,
+            production_ids=ids,
+            status=status,
+            start_date=start_date,
+            end_date=end_date,
+            output_format=format,
+            on_progress=on_progress
+        )
+
+    filename = f"production_batch_{date.today().strftime('%Y%m%d')}.{PDF_BATCH_FORMATS[format][1]}"
+    with open(ctx.result_path(filename), 'wb') as f:
+        f.write(content.getvalue())
+    return {"file": ctx.result_path(filename), "filename": filename}
@@ -0,0 +1,142 @@
+"""
+生产设备业务逻辑Service层
+"""
+from typing import List, Optional
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import select, func, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.machine import Machine, MachineStatus
+from app.models.production import ProductionOrder, ProductionStatus
+from app.schemas.machine import MachineCreate, MachineUpdate
+from app.services.capacity_service import load_capacity_calendar
+
+
+async def get_machine(db: AsyncSession, machine_id: int) -> Optional[Machine]:
+    """获取设备详情"""
+    result = await db.execute(select(Machine).where(Machine.id == machine_id))
+    return result.scalar_one_or_none()
+
+
+async def get_machines(db: AsyncSession, status: Optional[str] = None) -> List[Machine]:
+    """获取设备列表（按名称排序）"""
+    stmt = select(Machine)
+    if status:
+        stmt = stmt.where(Machine.status == status)
+    result = await db.execute(stmt.order_by(Machine.machine_name))
+    return result.scalars().all()
+
+
+async def _check_unique(db: AsyncSession, field, value: str, label: str, exclude_id: Optional[int] = None) -> None:
+    stmt = select(Machine.id).where(field == value)
+    if exclude_id is not None:
+        stmt = stmt.where(Machine.id != exclude_id)
+    if (await db.execute(stmt)).first():
+        raise ValueError(f"{label} '{value}' 已存在")
+
+
+async def create_machine(db: AsyncSession, data: MachineCreate) -> Machine:
+    """创建设备"""
+    await _check_unique(db, Machine.machine_code, data.machine_code, "设备编码")
+    await _check_unique(db, Machine.machine_name, data.machine_name, "设备名称")
+
+    machine = Machine(**data.model_dump())
+    db.add(machine)
+    await db.commit()
+    await db.refresh(machine)
+    return machine
+
+
+async def update_machine(db: AsyncSession, machine_id: int, data: MachineUpdate) -> Machine:
+    """
+    更新设备
+    修改设备名称时同步更新待生产/生产中工单的 machine_name
+    """
+    machine = await get_machine(db, machine_id)
+    if not machine:
+        raise ValueError(f"设备 ID {machine_id} 不存在")
+
+    update_data = data.model_dump(exclude_unset=True)
+    new_name = update_data.get("machine_name")
+    old_name = machine.machine_name
+    if new_name and new_name != old_name:
+        await _check_unique(db, Machine.machine_name, new_name, "设备名称", exclude_id=machine_id)
+        await db.execute(
+            update(ProductionOrder)
+            .where(
+                ProductionOrder.machine_name == old_name,
+                ProductionOrder.status.in_([ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS])
+            )
+            .values(machine_name=new_name)
+        )
+
+    for field, value in update_data.items():
+        setattr(machine, field, value)
+
+    await db.commit()
+    await db.refresh(machine)
+    return machine
+
+
+async def delete_machine(db: AsyncSession, machine_id: int) -> None:
+    """删除设备（有未完成的生产工单时不允许删除）"""
+    machine = await get_machine(db, machine_id)
+    if not machine:
+        raise ValueError(f"设备 ID {machine_id} 不存在")
+
+    stmt = select(func.count(ProductionOrder.id)).where(
+        ProductionOrder.machine_name == machine.machine_name,
+        ProductionOrder.status.in_([ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS])
+    )
+    count = (await db.execute(stmt)).scalar() or 0
+    if count > 0:
+        raise ValueError(f"该设备有 {count} 个未完成的生产工单，无法删除")
+
+    await db.delete(machine)
+    await db.commit()
+
+
+async def get_capacity(db: AsyncSession, start_date: date, days: int) -> dict:
+    """
+    各设备在 [start_date, start_date + days) 内的负荷、产能、利用率与超负荷日期
+
+    Raises:
+        ValueError: 天数超出范围
+    """
+    calendar = await load_capacity_calendar(db, start_date, days)
+    return {
+        "start_date": start_date,
+        "end_date": start_date + timedelta(days=days - 1),
+        "machines": [machine.summary() for machine in calendar.machines.values()]
+    }
+
+
+async def find_free_slot(
+    db: AsyncSession,
+    machine_id: int,
+    duration_minutes: int,
+    earliest: Optional[datetime] = None,
+    days: int = 30
+) -> Optional[dict]:
+    """
+    查找设备在 earliest 之后第一段可容纳 duration_minutes 的连续空闲时段（班次内、未被工单占用）
+
+    Raises:
+        ValueError: 设备不存在或不可用
+    """
+    machine = await get_machine(db, machine_id)
+    if not machine:
+        raise ValueError(f"设备 ID {machine_id} 不存在")
+    if machine.status != MachineStatus.ACTIVE:
+        raise ValueError(f"设备 {machine.machine_name} 当前不可用")
+
+    earliest = earliest or datetime.now()
+    if earliest.tzinfo is not None:
+        # 排程时间均为本地时间（不带时区），带时区的参数（如 ...Z）先换算为本地时间
+        earliest = earliest.astimezone().replace(tzinfo=None)
+    calendar = await load_capacity_calendar(db, earliest.date(), days)
+    slot = calendar.machines[machine.machine_name].find_free_slot(earliest, duration_minutes)
+    if slot is None:
+        return None
+    return {"machine_name": machine.machine_name, "start": slot[0], "end": slot[1]}
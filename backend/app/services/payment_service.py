@@ -4,19 +4,22 @@
 from sqlalchemy import select, func, and_
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from typing import Optional, List
 from decimal import Decimal
 
 from app.models.payment import OrderPayment, PaymentMethod, PaymentStatus
 from app.models.order import Order
 from app.schemas.payment import OrderPaymentCreate, OrderPaymentUpdate, OrderPaymentSummary
+from app.services import rollup_service
 
 
-async def generate_payment_no(db: AsyncSession) -> str:
+async def generate_payment_nos(db: AsyncSession, count: int) -> List[str]:
     """
-    生成收款单号
-    格式: PAY+YYYYMMDD+001
+    批量生成连续的收款单号（用于对账单批量入账）
+    格式: PAY+YYYYMMDD+000001
+    序号补零为固定位数，按单号倒序取第一条即当天最大单号
+    （payment_no 唯一索引反向扫描，不扫描当天全部收款）
     """
     today_str = datetime.now().strftime("%Y%m%d")
     prefix = f"PAY{today_str}"
@@ -24,18 +27,23 @@ async def generate_payment_no(db: AsyncSession) -> str:
     # 查询今天已有的最大序号
     stmt = select(OrderPayment.payment_no).where(
         OrderPayment.payment_no.like(f"{prefix}%")
-    ).order_by(OrderPayment.payment_no.desc())
+    ).order_by(OrderPayment.payment_no.desc()).limit(1)
 
     result = await db.execute(stmt)
     last_no = result.scalar()
 
-    if last_no:
-        # 提取序号并+1
-        seq = int(last_no[-6:]) + 1
-    else:
-        seq = 1
+    # 提取序号并+1
+    seq = int(last_no[len(prefix):]) + 1 if last_no else 1
 
-    return f"{prefix}{seq:06d}"
+    return [f"{prefix}{seq + i:06d}" for i in range(count)]
+
+
+async def generate_payment_no(db: AsyncSession) -> str:
+    """
+    生成收款单号
+    格式: PAY+YYYYMMDD+000001
+    """
+    return (await generate_payment_nos(db, 1))[0]
 
 
 async def create_order_payment(db: AsyncSession, data: OrderPaymentCreate) -> OrderPayment:
@@ -71,6 +79,9 @@ async def create_order_payment(db: AsyncSession, data: OrderPaymentCreate) -> Or
     )
     db.add(payment)
 
+    # 4. 更新收款日汇总
+    await rollup_service.record_payment(db, payment, customer_id=order.customer_id)
+
     await db.commit()
     await db.refresh(payment)
 
@@ -130,6 +141,45 @@ async def get_order_payments(
     return payment_list
 
 
+def build_payment_export_query(
+    status: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+):
+    """
+    构建收款记录导出查询
+    只查询导出需要的列，按收款日期范围筛选（包含结束日期当天）
+    """
+    stmt = select(
+        OrderPayment.payment_no,
+        Order.order_no,
+        Order.customer_name,
+        OrderPayment.payment_amount,
+        OrderPayment.payment_method,
+        OrderPayment.payment_date,
+        OrderPayment.status,
+        OrderPayment.received_by,
+        OrderPayment.voucher_no,
+        OrderPayment.remark,
+        OrderPayment.created_at
+    ).join(
+        Order, OrderPayment.order_id == Order.id
+    )
+
+    if status:
+        stmt = stmt.where(OrderPayment.status == status)
+
+    if start_date:
+        stmt = stmt.where(OrderPayment.payment_date >= datetime.combine(start_date, datetime.min.time()))
+
+    if end_date:
+        stmt = stmt.where(
+            OrderPayment.payment_date < datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        )
+
+    return stmt.order_by(OrderPayment.payment_date.desc())
+
+
 async def get_order_payment_detail(db: AsyncSession, payment_id: int) -> OrderPayment:
     """
     获取收款记录详情
@@ -167,6 +217,8 @@ async def update_order_payment(
     if payment.status == PaymentStatus.CANCELLED:
         raise ValueError("已取消的收款记录不能修改")
 
+    old_snapshot = rollup_service.payment_snapshot(payment)
+
     # 更新字段
     update_data = data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -177,6 +229,9 @@ async def update_order_payment(
 
     payment.updated_at = datetime.now()
 
+    # 冲销旧值并累加新值到收款日汇总
+    await rollup_service.record_payment_change(db, old_snapshot, payment)
+
     await db.commit()
     await db.refresh(payment)
 
@@ -197,6 +252,7 @@ async def cancel_order_payment(db: AsyncSession, payment_id: int, reason: str):
     if payment.status == PaymentStatus.CANCELLED:
         raise ValueError("收款记录已经是取消状态")
 
+    old_snapshot = rollup_service.payment_snapshot(payment)
     payment.status = PaymentStatus.CANCELLED
     payment.updated_at = datetime.now()
 
@@ -206,6 +262,9 @@ async def cancel_order_payment(db: AsyncSession, payment_id: int, reason: str):
     else:
         payment.remark = f"取消原因: {reason}"
 
+    # 从收款日汇总中扣除
+    await rollup_service.record_payment_change(db, old_snapshot, payment)
+
     await db.commit()
     await db.refresh(payment)
 
@@ -0,0 +1,228 @@
+"""
+PDF单据模板（纯函数）
+输入为普通数据快照（dict），输出PDF字节，不访问数据库，
+在渲染进程池中执行（见 app/core/executor.py），本模块只依赖 reportlab，子进程导入开销小
+
+快照由 app/services/pdf_service.py 中的 load_*_snapshot 生成，
+单据类型与模板的对应关系见 TEMPLATES
+"""
+from typing import Any, Callable, Dict
+
+from reportlab.lib.units import cm
+
+from app.utils.pdf_generator import PDFGenerator
+
+
+ORDER_STATUS_LABELS = {
+    'DRAFT': '草稿',
+    'CONFIRMED': '已确认',
+    'PRODUCTION': '生产中',
+    'COMPLETED': '已完成'
+}
+
+PRODUCTION_STATUS_LABELS = {
+    'PENDING': '待生产',
+    'IN_PROGRESS': '生产中',
+    'COMPLETED': '已完成',
+    'CANCELLED': '已取消'
+}
+
+PAYMENT_METHOD_LABELS = {
+    'CASH': '现金',
+    'BANK_TRANSFER': '银行转账',
+    'ALIPAY': '支付宝',
+    'WECHAT': '微信支付',
+    'OTHER': '其他'
+}
+
+PAYMENT_STATUS_LABELS = {
+    'PENDING': '待确认',
+    'CONFIRMED': '已确认',
+    'CANCELLED': '已取消'
+}
+
+
+def _draw_remark(generator: PDFGenerator, remark: str) -> None:
+    if remark:
+        generator.add_space(0.5*cm)
+        generator.draw_text(f"备注: {remark}")
+
+
+def render_order_pdf(order: Dict[str, Any]) -> bytes:
+    """渲染销售订单PDF"""
+    generator = PDFGenerator()
+    generator.draw_title("销售订单")
+
+    # 订单基本信息
+    generator.draw_info_table({
+        "订单编号:": order['order_no'],
+        "客户名称:": order['customer_name'] or "未知",
+        "联系人:": order['contact_person'] or "未填写",
+        "联系电话:": order['contact_phone'] or "未填写",
+        "订单日期:": generator.format_date(order['created_at']),
+        "订单状态:": ORDER_STATUS_LABELS.get(order['status'], order['status']),
+    })
+    generator.add_space(0.8*cm)
+
+    # 产品明细表
+    generator.draw_subtitle("产品明细")
+    headers = ['序号', '产品名称', '规格', '数量', '单价', '金额']
+    table_data = []
+    for idx, item in enumerate(order['items'], 1):
+        table_data.append([
+            str(idx),
+            item['product_name'],
+            f"{item['finished_size_w']}x{item['finished_size_h']}mm",
+            str(item['quantity']),
+            generator.format_money(item['item_amount'] / item['quantity'] if item['quantity'] > 0 else 0),
+            generator.format_money(item['item_amount'])
+        ])
+
+    col_widths = [1.5*cm, 5*cm, 4*cm, 2*cm, 2.5*cm, 2.5*cm]
+    generator.draw_data_table(headers, table_data, col_widths)
+    generator.add_space(0.3*cm)
+
+    # 合计信息（与表格右边对齐）
+    table_right = (generator.width + sum(col_widths)) / 2
+    generator.draw_summary("订单金额:", generator.format_money(order['total_amount']), right=table_right)
+
+    _draw_remark(generator, order['remark'])
+    return generator.build_pdf()
+
+
+def render_production_pdf(production: Dict[str, Any]) -> bytes:
+    """渲染生产工单PDF"""
+    generator = PDFGenerator()
+    generator.draw_title("生产工单")
+
+    # 工单基本信息
+    production_info = {
+        "工单编号:": production['production_no'],
+        "关联订单:": production['order_no'] or "无",
+        "客户名称:": production['customer_name'] or "无",
+        "优先级:": f"P{production['priority']}",
+        "计划开始:": generator.format_date(production['plan_start_date']),
+        "计划完成:": generator.format_date(production['plan_end_date']),
+        "工单状态:": PRODUCTION_STATUS_LABELS.get(production['status'], production['status']),
+    }
+    if production['operator_name']:
+        production_info["操作员:"] = production['operator_name']
+    if production['machine_name']:
+        production_info["设备:"] = production['machine_name']
+
+    generator.draw_info_table(production_info)
+    generator.add_space(0.8*cm)
+
+    # 生产明细表
+    items = production['items']
+    if items:
+        generator.draw_subtitle("生产明细")
+        headers = ['序号', '产品名称', '规格尺寸', '计划数量', '已完成', '报废数', '纸张用量']
+        table_data = []
+        for idx, item in enumerate(items, 1):
+            table_data.append([
+                str(idx),
+                item['product_name'],
+                f"{item['finished_size_w']}x{item['finished_size_h']}mm",
+                str(item['plan_quantity']),
+                str(item['completed_quantity']),
+                str(item['rejected_quantity']),
+                f"{item['paper_usage']}张"
+            ])
+
+        col_widths = [1.5*cm, 4*cm, 3*cm, 2*cm, 2*cm, 2*cm, 2.5*cm]
+        generator.draw_data_table(headers, table_data, col_widths)
+        generator.add_space(0.5*cm)
+
+    # 实际执行情况（如果已开始）
+    if production['actual_start_date']:
+        generator.draw_subtitle("执行记录")
+        generator.draw_info_table({
+            "实际开始:": generator.format_date(production['actual_start_date']),
+            "实际完成:": (
+                generator.format_date(production['actual_end_date'])
+                if production['actual_end_date'] else "进行中"
+            ),
+            "完成数量:": str(sum(item['completed_quantity'] for item in items)),
+            "报废数量:": str(sum(item['rejected_quantity'] for item in items)),
+        })
+
+    _draw_remark(generator, production['remark'])
+    return generator.build_pdf()
+
+
+def render_delivery_pdf(order: Dict[str, Any]) -> bytes:
+    """渲染送货单PDF（使用订单快照，delivery_date 为送货日期）"""
+    generator = PDFGenerator()
+    generator.draw_title("送货单")
+
+    # 送货基本信息
+    generator.draw_info_table({
+        "送货单号:": f"SH{order['order_no'][2:]}",
+        "订单编号:": order['order_no'],
+        "客户名称:": order['customer_name'] or "未知",
+        "联系人:": order['contact_person'] or "未填写",
+        "联系电话:": order['contact_phone'] or "未填写",
+        "送货日期:": generator.format_date(order['delivery_date']),
+    })
+    generator.add_space(0.8*cm)
+
+    # 货物明细表
+    generator.draw_subtitle("货物明细")
+    headers = ['序号', '产品名称', '规格', '数量', '单位']
+    table_data = []
+    for idx, item in enumerate(order['items'], 1):
+        table_data.append([
+            str(idx),
+            item['product_name'],
+            f"{item['finished_size_w']}x{item['finished_size_h']}mm",
+            str(item['quantity']),
+            '件'
+        ])
+
+    col_widths = [2*cm, 6*cm, 5*cm, 2*cm, 2*cm]
+    generator.draw_data_table(headers, table_data, col_widths)
+    generator.add_space(1*cm)
+
+    # 签收栏
+    generator.draw_text("收货人签字: _______________    日期: _______________")
+    return generator.build_pdf()
+
+
+def render_payment_receipt_pdf(payment: Dict[str, Any]) -> bytes:
+    """渲染收款凭证PDF"""
+    generator = PDFGenerator()
+    generator.draw_title("收款凭证")
+
+    # 收款基本信息
+    generator.draw_info_table({
+        "凭证编号:": payment['payment_no'],
+        "关联订单:": payment['order_no'] or "无",
+        "客户名称:": payment['customer_name'] or "未知",
+        "收款日期:": generator.format_date(payment['payment_date']),
+        "收款方式:": PAYMENT_METHOD_LABELS.get(payment['payment_method'], payment['payment_method']),
+        "收款状态:": PAYMENT_STATUS_LABELS.get(payment['status'], payment['status']),
+    })
+    generator.add_space(0.8*cm)
+
+    # 金额信息
+    generator.draw_subtitle("收款金额")
+    amount_data = [
+        ['本次收款', generator.format_money(payment['payment_amount'])],
+    ]
+    if payment['order_total_amount'] is not None:
+        amount_data.append(['订单总额', generator.format_money(payment['order_total_amount'])])
+
+    generator.draw_data_table(['项目', '金额'], amount_data, [8*cm, 8*cm])
+
+    _draw_remark(generator, payment['remark'])
+    return generator.build_pdf()
+
+
+# 单据模板注册表: 单据类型 -> 渲染函数
+TEMPLATES: Dict[str, Callable[[Dict[str, Any]], bytes]] = {
+    'order': render_order_pdf,
+    'production': render_production_pdf,
+    'delivery': render_delivery_pdf,
+    'payment': render_payment_receipt_pdf,
+}
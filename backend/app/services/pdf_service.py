@@ -1,27 +1,338 @@
 """
-PDF打印服务
+PDF打印服务（/pdf 与 /print 两组接口共用）
+每张单据: 数据加载（DOCUMENT_LOADERS，一次查询计划生成数据快照）-> 缓存查找（app/core/pdf_cache.py）
+-> 模板渲染（app/services/pdf_render.py 中的 TEMPLATES，在渲染进程池中执行，不阻塞其他请求）
 """
+import asyncio
+import zipfile
+from datetime import date, datetime, timedelta
 from io import BytesIO
-from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
 
-from reportlab.platypus import Paragraph, Spacer
-from reportlab.lib.units import cm
-
-from app.utils.pdf_generator import PDFGenerator
-from app.models.user import User
-from app.models.order import Order, OrderItem
-from app.models.production import ProductionOrder, ProductionOrderItem, ProductionReport
+from app.core.config import settings
+from app.core.pdf_cache import PDFDocument
+from app.models.order import Order
+from app.models.production import ProductionOrder, ProductionStatus
 from app.models.payment import OrderPayment
-from app.models.customer import Customer
-from app.models.material import Material
+from app.services.pdf_render import TEMPLATES
+
+
+def _enum_value(value: Any) -> Any:
+    return value.value if hasattr(value, 'value') else value
+
+
+async def load_order_snapshot(db: AsyncSession, order_id: int) -> Dict[str, Any]:
+    """
+    查询订单及明细，生成渲染用数据快照
+
+    Raises:
+        ValueError: 订单不存在
+    """
+    stmt = (
+        select(Order)
+        .where(Order.id == order_id)
+        .options(selectinload(Order.items))
+    )
+    result = await db.execute(stmt)
+    order = result.scalar_one_or_none()
+
+    if not order:
+        raise ValueError(f"订单不存在: {order_id}")
+
+    return {
+        'id': order.id,
+        'order_no': order.order_no,
+        'customer_name': order.customer_name,
+        'contact_person': order.contact_person,
+        'contact_phone': order.contact_phone,
+        'status': _enum_value(order.status),
+        'total_amount': order.total_amount,
+        'remark': order.remark,
+        'created_at': order.created_at,
+        'items': [
+            {
+                'product_name': item.product_name,
+                'finished_size_w': item.finished_size_w,
+                'finished_size_h': item.finished_size_h,
+                'page_count': item.page_count,
+                'quantity': item.quantity,
+                'item_amount': item.item_amount
+            }
+            for item in order.items or []
+        ]
+    }
+
+
+def _production_snapshot(production: ProductionOrder) -> Dict[str, Any]:
+    """生产工单（已加载关联订单及明细）转换为渲染用数据快照"""
+    order = production.order
+    return {
+        'id': production.id,
+        'production_no': production.production_no,
+        'order_no': order.order_no if order else None,
+        'customer_name': order.customer_name if order else None,
+        'contact_person': order.contact_person if order else None,
+        'contact_phone': order.contact_phone if order else None,
+        'priority': production.priority,
+        'status': _enum_value(production.status),
+        'plan_start_date': production.plan_start_date,
+        'plan_end_date': production.plan_end_date,
+        'actual_start_date': production.actual_start_date,
+        'actual_end_date': production.actual_end_date,
+        'operator_name': production.operator_name,
+        'machine_name': production.machine_name,
+        'remark': production.remark,
+        'items': [
+            {
+                'product_name': item.product_name,
+                'finished_size_w': item.finished_size_w,
+                'finished_size_h': item.finished_size_h,
+                'page_count': item.page_count,
+                'plan_quantity': item.plan_quantity,
+                'completed_quantity': item.completed_quantity,
+                'rejected_quantity': item.rejected_quantity,
+                'paper_usage': item.paper_usage
+            }
+            for item in production.items
+        ]
+    }
+
+
+async def load_production_snapshot(db: AsyncSession, production_id: int) -> Dict[str, Any]:
+    """
+    查询生产工单、关联订单及明细，生成渲染用数据快照
+
+    Raises:
+        ValueError: 生产工单不存在
+    """
+    stmt = (
+        select(ProductionOrder)
+        .where(ProductionOrder.id == production_id)
+        .options(
+            selectinload(ProductionOrder.order),
+            selectinload(ProductionOrder.items)
+        )
+    )
+    result = await db.execute(stmt)
+    production = result.scalar_one_or_none()
+
+    if not production:
+        raise ValueError(f"生产工单不存在: {production_id}")
+
+    return _production_snapshot(production)
+
+
+def _parse_date(value: str, label: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise ValueError(f"{label}格式错误，应为YYYY-MM-DD")
+
+
+async def load_production_snapshots(
+    db: AsyncSession,
+    production_ids: Optional[List[int]] = None,
+    status: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    批量查询生产工单（工单、关联订单、明细共3次查询），生成渲染用数据快照
+    指定ID时按ID顺序返回，否则按计划开始时间、优先级排序
+
+    Args:
+        production_ids: 生产工单ID列表
+        status: 生产状态筛选
+        start_date: 计划开始日期起（YYYY-MM-DD）
+        end_date: 计划开始日期止（YYYY-MM-DD，含当天）
+
+    Raises:
+        ValueError: 未指定条件、日期格式错误、工单不存在或数量超过 PDF_BATCH_MAX_DOCUMENTS
+    """
+    if not production_ids and not (status or start_date or end_date):
+        raise ValueError("请指定生产工单ID或筛选条件")
+
+    stmt = select(ProductionOrder).options(
+        selectinload(ProductionOrder.order),
+        selectinload(ProductionOrder.items)
+    )
+    if production_ids:
+        stmt = stmt.where(ProductionOrder.id.in_(production_ids))
+    if status:
+        try:
+            stmt = stmt.where(ProductionOrder.status == ProductionStatus(status))
+        except ValueError:
+            raise ValueError(f"无效的生产状态: {status}")
+    if start_date:
+        stmt = stmt.where(ProductionOrder.plan_start_date >= _parse_date(start_date, "开始日期"))
+    if end_date:
+        stmt = stmt.where(
+            ProductionOrder.plan_start_date < _parse_date(end_date, "结束日期") + timedelta(days=1)
+        )
+
+    max_documents = settings.PDF_BATCH_MAX_DOCUMENTS
+    stmt = stmt.order_by(
+        ProductionOrder.plan_start_date, ProductionOrder.priority, ProductionOrder.id
+    ).limit(max_documents + 1)
+
+    result = await db.execute(stmt)
+    productions = list(result.scalars().all())
+
+    if len(productions) > max_documents:
+        raise ValueError(f"单次最多打印{max_documents}张工单，请缩小筛选范围")
+
+    if production_ids:
+        by_id = {production.id: production for production in productions}
+        missing = [pid for pid in production_ids if pid not in by_id]
+        if missing:
+            raise ValueError(f"生产工单不存在: {', '.join(str(pid) for pid in missing)}")
+        productions = [by_id[pid] for pid in dict.fromkeys(production_ids)]
+
+    return [_production_snapshot(production) for production in productions]
+
+
+def merge_pdfs(contents: List[bytes]) -> bytes:
+    """
+    合并多个PDF为一个文件
+
+    Raises:
+        ValueError: 未安装 pypdf
+    """
+    try:
+        from pypdf import PdfReader, PdfWriter
+    except ImportError:
+        raise ValueError("未安装 pypdf，无法合并PDF，请使用 zip 格式")
+
+    writer = PdfWriter()
+    for content in contents:
+        writer.append(PdfReader(BytesIO(content)))
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def zip_pdfs(files: List[Tuple[str, bytes]]) -> bytes:
+    """打包多个PDF为ZIP（PDF已压缩，ZIP内不再压缩）"""
+    output = BytesIO()
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_STORED) as zf:
+        for filename, content in files:
+            zf.writestr(filename, content)
+    return output.getvalue()
+
+
+async def load_payment_snapshot(db: AsyncSession, payment_id: int) -> Dict[str, Any]:
+    """
+    查询收款记录及关联订单，生成渲染用数据快照
+
+    Raises:
+        ValueError: 收款记录不存在
+    """
+    stmt = (
+        select(OrderPayment)
+        .where(OrderPayment.id == payment_id)
+        .options(selectinload(OrderPayment.order))
+    )
+    result = await db.execute(stmt)
+    payment = result.scalar_one_or_none()
+
+    if not payment:
+        raise ValueError(f"收款记录不存在: {payment_id}")
+
+    order = payment.order
+    return {
+        'id': payment.id,
+        'payment_no': payment.payment_no,
+        'order_no': order.order_no if order else None,
+        'customer_name': order.customer_name if order else None,
+        'order_total_amount': order.total_amount if order else None,
+        'payment_date': payment.payment_date,
+        'payment_method': _enum_value(payment.payment_method),
+        'status': _enum_value(payment.status),
+        'payment_amount': payment.payment_amount,
+        'remark': payment.remark
+    }
+
+
+async def load_delivery_snapshot(db: AsyncSession, order_id: int) -> Dict[str, Any]:
+    """
+    送货单数据快照（订单快照 + 送货日期，送货日期为当天，缓存按天区分）
+
+    Raises:
+        ValueError: 订单不存在
+    """
+    snapshot = await load_order_snapshot(db, order_id)
+    snapshot['delivery_date'] = date.today()
+    return snapshot
+
+
+# 单据数据加载注册表: 单据类型 -> 数据快照加载函数（与 pdf_render.TEMPLATES 一一对应）
+DOCUMENT_LOADERS: Dict[str, Callable[[AsyncSession, int], Awaitable[Dict[str, Any]]]] = {
+    'order': load_order_snapshot,
+    'production': load_production_snapshot,
+    'delivery': load_delivery_snapshot,
+    'payment': load_payment_snapshot,
+}
+
+
+def build_document(doc_type: str, snapshot: Dict[str, Any]) -> PDFDocument:
+    """由数据快照创建待输出单据"""
+    return PDFDocument(doc_type, snapshot, TEMPLATES[doc_type])
+
+
+# 批量打印输出格式: 格式 -> (媒体类型, 扩展名)
+PDF_BATCH_FORMATS = {
+    'pdf': ('application/pdf', 'pdf'),
+    'zip': ('application/zip', 'zip')
+}
 
 
 class PrintService:
     """打印服务类"""
 
+    @staticmethod
+    async def document(db: AsyncSession, doc_type: str, record_id: int) -> PDFDocument:
+        """
+        加载单据数据快照，创建待输出单据（渲染在调用 content() 时进行）
+
+        Args:
+            db: 数据库会话
+            doc_type: 单据类型 order/production/delivery/payment
+            record_id: 单据记录ID
+
+        Raises:
+            ValueError: 单据类型不支持或记录不存在
+        """
+        loader = DOCUMENT_LOADERS.get(doc_type)
+        if loader is None:
+            raise ValueError(f"不支持的单据类型: {doc_type}")
+        snapshot = await loader(db, record_id)
+        return build_document(doc_type, snapshot)
+
+    @staticmethod
+    async def order_document(db: AsyncSession, order_id: int) -> PDFDocument:
+        """销售订单PDF单据"""
+        return await PrintService.document(db, 'order', order_id)
+
+    @staticmethod
+    async def production_document(db: AsyncSession, production_id: int) -> PDFDocument:
+        """生产工单PDF单据"""
+        return await PrintService.document(db, 'production', production_id)
+
+    @staticmethod
+    async def delivery_document(db: AsyncSession, order_id: int) -> PDFDocument:
+        """送货单PDF单据"""
+        return await PrintService.document(db, 'delivery', order_id)
+
+    @staticmethod
+    async def payment_document(db: AsyncSession, payment_id: int) -> PDFDocument:
+        """收款凭证PDF单据"""
+        return await PrintService.document(db, 'payment', payment_id)
+
     @staticmethod
     async def generate_order_pdf(db: AsyncSession, order_id: int) -> BytesIO:
         """
@@ -33,89 +344,13 @@ class PrintService:
 
         Returns:
             PDF文件的BytesIO对象
-        """
-        # 查询订单信息
-        stmt = (
-            select(Order)
-            .where(Order.id == order_id)
-            .options(selectinload(Order.items))
-        )
-        result = await db.execute(stmt)
-        order = result.scalar_one_or_none()
-
-        if not order:
-            raise ValueError(f"订单不存在: {order_id}")
-
-        # 创建PDF生成器
-        generator = PDFGenerator()
-        elements = []
-
-        # 标题
-        title = Paragraph("销售订单", generator.styles['ChineseTitle'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # 订单基本信息
-        order_info = {
-            "订单编号:": order.order_no,
-            "客户名称:": order.customer_name or "未知",
-            "联系人:": order.contact_person or "未填写",
-            "联系电话:": order.contact_phone or "未填写",
-            "订单日期:": generator.format_date(order.created_at),
-            "订单状态:": {
-                'DRAFT': '草稿',
-                'CONFIRMED': '已确认',
-                'PRODUCTION': '生产中',
-                'COMPLETED': '已完成'
-            }.get(order.status, order.status),
-        }
-
-        info_table = generator.create_header_table(order_info)
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.8*cm))
-
-        # 产品明细表
-        detail_subtitle = Paragraph("产品明细", generator.styles['ChineseSubTitle'])
-        elements.append(detail_subtitle)
-        elements.append(Spacer(1, 0.3*cm))
-
-        # 表头
-        headers = ['序号', '产品名称', '规格', '数量', '单价', '金额']
-
-        # 表格数据
-        table_data = []
-        for idx, item in enumerate(order.items or [], 1):
-            specifications = f"{item.finished_size_w}x{item.finished_size_h}mm"
-            table_data.append([
-                str(idx),
-                item.product_name,
-                specifications,
-                str(item.quantity),
-                generator.format_money(item.item_amount / item.quantity if item.quantity > 0 else 0),
-                generator.format_money(item.item_amount)
-            ])
-
-        # 列宽
-        col_widths = [1.5*cm, 5*cm, 4*cm, 2*cm, 2.5*cm, 2.5*cm]
-        detail_table = generator.create_data_table(headers, table_data, col_widths)
-        elements.append(detail_table)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # 合计信息
-        summary_data = [
-            ['', '', '', '', '订单金额:', generator.format_money(order.total_amount)],
-        ]
-        summary_table = generator.create_data_table([], summary_data, col_widths)
-        elements.append(summary_table)
-        elements.append(Spacer(1, 0.5*cm))
 
-        # 备注
-        if order.remark:
-            notes = Paragraph(f"<b>备注:</b> {order.remark}", generator.styles['ChineseBody'])
-            elements.append(notes)
-
-        # 生成PDF
-        return generator.build_pdf(elements)
+        Raises:
+            ValueError: 订单不存在
+            ExecutorBusyError: 渲染进程池繁忙
+        """
+        document = await PrintService.order_document(db, order_id)
+        return BytesIO(await document.content())
 
     @staticmethod
     async def generate_production_pdf(db: AsyncSession, production_id: int) -> BytesIO:
@@ -128,110 +363,13 @@ class PrintService:
 
         Returns:
             PDF文件的BytesIO对象
-        """
-        # 查询生产工单信息，包括关联的items和order
-        stmt = (
-            select(ProductionOrder)
-            .where(ProductionOrder.id == production_id)
-            .options(
-                selectinload(ProductionOrder.order),
-                selectinload(ProductionOrder.items)
-            )
-        )
-        result = await db.execute(stmt)
-        production = result.scalar_one_or_none()
-
-        if not production:
-            raise ValueError(f"生产工单不存在: {production_id}")
-
-        # 创建PDF生成器
-        generator = PDFGenerator()
-        elements = []
-
-        # 标题
-        title = Paragraph("生产工单", generator.styles['ChineseTitle'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # 工单基本信息
-        production_info = {
-            "工单编号:": production.production_no,
-            "关联订单:": production.order.order_no if production.order else "无",
-            "客户名称:": production.order.customer_name if production.order else "无",
-            "优先级:": f"P{production.priority}",
-            "计划开始:": generator.format_date(production.plan_start_date),
-            "计划完成:": generator.format_date(production.plan_end_date),
-            "工单状态:": {
-                'PENDING': '待生产',
-                'IN_PROGRESS': '生产中',
-                'COMPLETED': '已完成',
-                'CANCELLED': '已取消'
-            }.get(production.status, production.status),
-        }
-
-        if production.operator_name:
-            production_info["操作员:"] = production.operator_name
-        if production.machine_name:
-            production_info["设备:"] = production.machine_name
-
-        info_table = generator.create_header_table(production_info)
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.8*cm))
-
-        # 生产明细表
-        if production.items:
-            items_subtitle = Paragraph("生产明细", generator.styles['ChineseSubTitle'])
-            elements.append(items_subtitle)
-            elements.append(Spacer(1, 0.3*cm))
-
-            headers = ['序号', '产品名称', '规格尺寸', '计划数量', '已完成', '报废数', '纸张用量']
-            table_data = []
-
-            for idx, item in enumerate(production.items, 1):
-                specifications = f"{item.finished_size_w}x{item.finished_size_h}mm"
-                table_data.append([
-                    str(idx),
-                    item.product_name,
-                    specifications,
-                    str(item.plan_quantity),
-                    str(item.completed_quantity),
-                    str(item.rejected_quantity),
-                    f"{item.paper_usage}张"
-                ])
-
-            col_widths = [1.5*cm, 4*cm, 3*cm, 2*cm, 2*cm, 2*cm, 2.5*cm]
-            items_table = generator.create_data_table(headers, table_data, col_widths)
-            elements.append(items_table)
-            elements.append(Spacer(1, 0.5*cm))
-
-        # 实际执行情况（如果已开始）
-        if production.actual_start_date:
-            actual_subtitle = Paragraph("执行记录", generator.styles['ChineseSubTitle'])
-            elements.append(actual_subtitle)
-            elements.append(Spacer(1, 0.3*cm))
-
-            # 计算总完成数量
-            total_completed = sum(item.completed_quantity for item in production.items)
-            total_rejected = sum(item.rejected_quantity for item in production.items)
-
-            actual_info = {
-                "实际开始:": generator.format_date(production.actual_start_date),
-                "实际完成:": generator.format_date(production.actual_end_date) if production.actual_end_date else "进行中",
-                "完成数量:": str(total_completed),
-                "报废数量:": str(total_rejected),
-            }
-
-            actual_table = generator.create_header_table(actual_info)
-            elements.append(actual_table)
-
-        # 备注
-        if production.remark:
-            elements.append(Spacer(1, 0.5*cm))
-            notes = Paragraph(f"<b>备注:</b> {production.remark}", generator.styles['ChineseBody'])
-            elements.append(notes)
 
-        # 生成PDF
-        return generator.build_pdf(elements)
+        Raises:
+            ValueError: 生产工单不存在
+            ExecutorBusyError: 渲染进程池繁忙
+        """
+        document = await PrintService.production_document(db, production_id)
+        return BytesIO(await document.content())
 
     @staticmethod
     async def generate_delivery_pdf(db: AsyncSession, order_id: int) -> BytesIO:
@@ -244,77 +382,13 @@ class PrintService:
 
         Returns:
             PDF文件的BytesIO对象
-        """
-        # 查询订单信息
-        stmt = (
-            select(Order)
-            .where(Order.id == order_id)
-            .options(selectinload(Order.items))
-        )
-        result = await db.execute(stmt)
-        order = result.scalar_one_or_none()
-
-        if not order:
-            raise ValueError(f"订单不存在: {order_id}")
-
-        # 创建PDF生成器
-        generator = PDFGenerator()
-        elements = []
-
-        # 标题
-        title = Paragraph("送货单", generator.styles['ChineseTitle'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # 送货基本信息
-        delivery_info = {
-            "送货单号:": f"SH{order.order_no[2:]}",
-            "订单编号:": order.order_no,
-            "客户名称:": order.customer_name or "未知",
-            "联系人:": order.contact_person or "未填写",
-            "联系电话:": order.contact_phone or "未填写",
-            "送货日期:": generator.format_date(datetime.now()),
-        }
-
-        info_table = generator.create_header_table(delivery_info)
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.8*cm))
-
-        # 货物明细表
-        detail_subtitle = Paragraph("货物明细", generator.styles['ChineseSubTitle'])
-        elements.append(detail_subtitle)
-        elements.append(Spacer(1, 0.3*cm))
-
-        # 表头
-        headers = ['序号', '产品名称', '规格', '数量', '单位']
-
-        # 表格数据
-        table_data = []
-        for idx, item in enumerate(order.items or [], 1):
-            specifications = f"{item.finished_size_w}x{item.finished_size_h}mm"
-            table_data.append([
-                str(idx),
-                item.product_name,
-                specifications,
-                str(item.quantity),
-                '件'
-            ])
-
-        # 列宽
-        col_widths = [2*cm, 6*cm, 5*cm, 2*cm, 2*cm]
-        detail_table = generator.create_data_table(headers, table_data, col_widths)
-        elements.append(detail_table)
-        elements.append(Spacer(1, 1*cm))
-
-        # 签收栏
-        signature_text = Paragraph(
-            "收货人签字: _______________    日期: _______________",
-            generator.styles['ChineseBody']
-        )
-        elements.append(signature_text)
 
-        # 生成PDF
-        return generator.build_pdf(elements)
+        Raises:
+            ValueError: 订单不存在
+            ExecutorBusyError: 渲染进程池繁忙
+        """
+        document = await PrintService.delivery_document(db, order_id)
+        return BytesIO(await document.content())
 
     @staticmethod
     async def generate_payment_receipt_pdf(db: AsyncSession, payment_id: int) -> BytesIO:
@@ -327,75 +401,70 @@ class PrintService:
 
         Returns:
             PDF文件的BytesIO对象
+
+        Raises:
+            ValueError: 收款记录不存在
+            ExecutorBusyError: 渲染进程池繁忙
         """
-        # 查询收款记录
-        stmt = (
-            select(OrderPayment)
-            .where(OrderPayment.id == payment_id)
-            .options(selectinload(OrderPayment.order))
-        )
-        result = await db.execute(stmt)
-        payment = result.scalar_one_or_none()
-
-        if not payment:
-            raise ValueError(f"收款记录不存在: {payment_id}")
-
-        # 创建PDF生成器
-        generator = PDFGenerator()
-        elements = []
-
-        # 标题
-        title = Paragraph("收款凭证", generator.styles['ChineseTitle'])
-        elements.append(title)
-        elements.append(Spacer(1, 0.5*cm))
-
-        # 收款基本信息
-        payment_info = {
-            "凭证编号:": payment.payment_no,
-            "关联订单:": payment.order.order_no if payment.order else "无",
-            "客户名称:": payment.order.customer_name if payment.order else "未知",
-            "收款日期:": generator.format_date(payment.payment_date),
-            "收款方式:": {
-                'CASH': '现金',
-                'BANK_TRANSFER': '银行转账',
-                'ALIPAY': '支付宝',
-                'WECHAT': '微信支付',
-                'OTHER': '其他'
-            }.get(payment.payment_method, payment.payment_method),
-            "收款状态:": {
-                'PENDING': '待确认',
-                'CONFIRMED': '已确认',
-                'CANCELLED': '已取消'
-            }.get(payment.status, payment.status),
-        }
-
-        info_table = generator.create_header_table(payment_info)
-        elements.append(info_table)
-        elements.append(Spacer(1, 0.8*cm))
-
-        # 金额信息
-        amount_subtitle = Paragraph("收款金额", generator.styles['ChineseSubTitle'])
-        elements.append(amount_subtitle)
-        elements.append(Spacer(1, 0.3*cm))
-
-        # 金额表格
-        amount_headers = ['项目', '金额']
-        amount_data = [
-            ['本次收款', generator.format_money(payment.payment_amount)],
-        ]
+        document = await PrintService.payment_document(db, payment_id)
+        return BytesIO(await document.content())
+
+    @staticmethod
+    async def generate_production_batch(
+        db: AsyncSession,
+        production_ids: Optional[List[int]] = None,
+        status: Optional[str] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        output_format: str = 'pdf',
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> BytesIO:
+        """
+        批量生成生产工单PDF，合并为一个PDF或打包为ZIP
+        各工单并行渲染（并发数不超过渲染进程数，避免占满渲染队列），已缓存的工单直接复用
+
+        Args:
+            db: 数据库会话
+            production_ids: 生产工单ID列表
+            status: 生产状态筛选
+            start_date: 计划开始日期起（YYYY-MM-DD）
+            end_date: 计划开始日期止（YYYY-MM-DD）
+            output_format: pdf（合并为一个文件）或 zip
+            on_progress: 每张工单渲染完成后的回调，参数为（已完成数, 总数）
 
-        if payment.order:
-            amount_data.append(['订单总额', generator.format_money(payment.order.total_amount)])
+        Returns:
+            合并后的文件BytesIO对象
+
+        Raises:
+            ValueError: 参数错误或工单不存在
+            ExecutorBusyError: 渲染进程池繁忙
+        """
+        if output_format not in PDF_BATCH_FORMATS:
+            raise ValueError(f"不支持的输出格式: {output_format}")
+
+        snapshots = await load_production_snapshots(db, production_ids, status, start_date, end_date)
+        if not snapshots:
+            raise ValueError("没有符合条件的生产工单")
 
-        col_widths = [8*cm, 8*cm]
-        amount_table = generator.create_data_table(amount_headers, amount_data, col_widths)
-        elements.append(amount_table)
+        semaphore = asyncio.Semaphore(max(settings.RENDER_PROCESS_WORKERS, 1))
+        done = 0
 
-        # 备注
-        if payment.remark:
-            elements.append(Spacer(1, 0.5*cm))
-            notes = Paragraph(f"<b>备注:</b> {payment.remark}", generator.styles['ChineseBody'])
-            elements.append(notes)
+        async def render(snapshot: Dict[str, Any]) -> bytes:
+            nonlocal done
+            async with semaphore:
+                content = await build_document('production', snapshot).content()
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(snapshots))
+            return content
 
-        # 生成PDF
-        return generator.build_pdf(elements)
+        contents = await asyncio.gather(*(render(snapshot) for snapshot in snapshots))
+
+        if output_format == 'pdf':
+            return BytesIO(await asyncio.to_thread(merge_pdfs, list(contents)))
+
+        files = [
+            (f"{snapshot['production_no']}.pdf", content)
+            for snapshot, content in zip(snapshots, contents)
+        ]
+        return BytesIO(await asyncio.to_thread(zip_pdfs, files))
@@ -0,0 +1,372 @@
+"""
+生产分析Service层（产能、报废率、生产周期）
+数据来源: 生产报工（完成/报废数量、报工时间）与生产工单（设备、实际开始/完成时间）
+
+1. 小时汇总 erp_production_hourly_rollups（按小时+设备+操作员）
+   - 生产时长: 窗口函数 LAG(report_time) OVER (PARTITION BY 工单 ORDER BY 报工时间) 取同一工单上一次报工的时间，
+     相邻两次报工的间隔视为生产时间（超过 ANALYTICS_MAX_GAP_MINUTES 的间隔视为停机，不计入），
+     再由 pandas/numpy 向量化地将每个间隔按整点拆分到各小时
+   - 完成/报废数量: PROGRESS/COMPLETE 报工按报工时间所在小时汇总（与工单明细的累加规则一致）
+   - 生产周期: 已完成工单按实际完成时间所在小时汇总（实际开始至实际完成）
+2. 增量刷新: refresh_hourly_rollups 每小时执行一次（Celery beat 或 cron 执行 scripts/refresh_production_analytics.py），
+   只重算上次刷新后新增报工影响的小时；首次执行或需要全量重算时使用 rebuild_hourly_rollups
+3. 日报/周报只读取小时汇总表，按日/周合并后计算指标
+"""
+from sqlalchemy import select, func, delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.models.production import ProductionOrder, ProductionReport, ProductionStatus
+from app.models.report_rollup import ProductionHourlyRollup
+from app.services.production_service import REPORT_TYPES_WITH_QUANTITY
+
+
+# 汇总维度
+ROLLUP_KEYS = ["stat_hour", "machine_name", "operator_name"]
+
+# 报表分组方式 -> 分组字段
+GROUP_BY_FIELDS = {
+    "machine": ["machine_name"],
+    "operator": ["operator_name"],
+    "machine_operator": ["machine_name", "operator_name"],
+}
+
+# 可累加的汇总字段
+_SUM_FIELDS = [
+    "report_count", "completed_quantity", "rejected_quantity", "run_minutes", "completed_orders", "lead_time_minutes"
+]
+
+_HOUR = np.timedelta64(1, "h")
+
+
+def _floor_hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _floor_hours(values: pd.Series) -> np.ndarray:
+    """时间列向下取整到整点（datetime64[ns] 数组）"""
+    return values.to_numpy(dtype="datetime64[ns]").astype("datetime64[h]").astype("datetime64[ns]")
+
+
+def _max_gap() -> timedelta:
+    return timedelta(minutes=settings.ANALYTICS_MAX_GAP_MINUTES)
+
+
+# ==================== 小时汇总计算 ====================
+
+async def _load_reports(db: AsyncSession, start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    加载 [start, end + 最大间隔) 内的报工及同一工单上一次报工时间
+    报工时间早于 start - 最大间隔 的上一次报工不会被取到，此时间隔超过最大间隔，本就不计入生产时长
+    """
+    max_gap = _max_gap()
+    prev_time = func.lag(ProductionReport.report_time).over(
+        partition_by=ProductionReport.production_order_id,
+        order_by=(ProductionReport.report_time, ProductionReport.id)
+    )
+    windowed = (
+        select(
+            ProductionReport.report_time,
+            prev_time.label("prev_time"),
+            ProductionReport.report_type,
+            ProductionReport.completed_quantity,
+            ProductionReport.rejected_quantity,
+            ProductionReport.operator_name,
+            ProductionOrder.machine_name
+        )
+        .join(ProductionOrder, ProductionReport.production_order_id == ProductionOrder.id)
+        .where(
+            ProductionReport.report_time >= start - max_gap,
+            ProductionReport.report_time < end + max_gap
+        )
+        .subquery()
+    )
+    result = await db.execute(select(windowed).where(windowed.c.report_time >= start))
+    df = pd.DataFrame(result.all(), columns=[
+        "report_time", "prev_time", "report_type", "completed_quantity", "rejected_quantity",
+        "operator_name", "machine_name"
+    ])
+    df["report_time"] = pd.to_datetime(df["report_time"])
+    df["prev_time"] = pd.to_datetime(df["prev_time"])
+    df["machine_name"] = df["machine_name"].fillna("")
+    df["operator_name"] = df["operator_name"].fillna("")
+    return df
+
+
+def split_run_minutes(df: pd.DataFrame, start: datetime, end: datetime) -> pd.DataFrame:
+    """
+    将相邻报工间隔 [prev_time, report_time) 按整点拆分，汇总 [start, end) 内各小时的生产分钟数
+
+    向量化实现: 每个间隔按跨越的小时数重复（np.repeat），再与所在小时的起止时间取交集
+    """
+    gap = df["report_time"] - df["prev_time"]
+    valid = df["prev_time"].notna() & (gap > pd.Timedelta(0)) & (gap <= pd.Timedelta(_max_gap()))
+    intervals = df.loc[valid]
+    if intervals.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ["run_minutes"])
+
+    starts = intervals["prev_time"].to_numpy(dtype="datetime64[ns]")
+    ends = intervals["report_time"].to_numpy(dtype="datetime64[ns]")
+    first_hour = _floor_hours(intervals["prev_time"])
+    # 间隔跨越的小时数（向上取整）
+    counts = -((first_hour - ends) // _HOUR)
+
+    index = np.repeat(np.arange(len(intervals)), counts)
+    offsets = np.arange(len(index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    buckets = first_hour[index] + offsets * _HOUR
+    minutes = (np.minimum(ends[index], buckets + _HOUR) - np.maximum(starts[index], buckets)) / np.timedelta64(1, "m")
+
+    parts = pd.DataFrame({
+        "stat_hour": buckets,
+        "machine_name": intervals["machine_name"].to_numpy()[index],
+        "operator_name": intervals["operator_name"].to_numpy()[index],
+        "run_minutes": minutes
+    })
+    parts = parts[(parts["stat_hour"] >= start) & (parts["stat_hour"] < end)]
+    return parts.groupby(ROLLUP_KEYS, as_index=False)["run_minutes"].sum()
+
+
+def _sum_quantities(df: pd.DataFrame, end: datetime) -> pd.DataFrame:
+    """按报工时间所在小时汇总报工次数与完成/报废数量"""
+    reports = df[df["report_time"] < end]
+    with_quantity = reports["report_type"].isin(REPORT_TYPES_WITH_QUANTITY)
+    reports = pd.DataFrame({
+        "stat_hour": _floor_hours(reports["report_time"]),
+        "machine_name": reports["machine_name"],
+        "operator_name": reports["operator_name"],
+        "report_count": 1,
+        "completed_quantity": reports["completed_quantity"].where(with_quantity, 0),
+        "rejected_quantity": reports["rejected_quantity"].where(with_quantity, 0)
+    })
+    return reports.groupby(ROLLUP_KEYS, as_index=False).sum()
+
+
+async def _load_lead_times(db: AsyncSession, start: datetime, end: datetime) -> pd.DataFrame:
+    """按实际完成时间所在小时汇总完工工单数与生产周期"""
+    result = await db.execute(
+        select(
+            ProductionOrder.machine_name,
+            ProductionOrder.operator_name,
+            ProductionOrder.actual_start_date,
+            ProductionOrder.actual_end_date
+        ).where(
+            ProductionOrder.status == ProductionStatus.COMPLETED,
+            ProductionOrder.actual_end_date >= start,
+            ProductionOrder.actual_end_date < end,
+            ProductionOrder.actual_start_date.isnot(None)
+        )
+    )
+    df = pd.DataFrame(result.all(), columns=["machine_name", "operator_name", "actual_start_date", "actual_end_date"])
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ["completed_orders", "lead_time_minutes"])
+    df["actual_start_date"] = pd.to_datetime(df["actual_start_date"])
+    df["actual_end_date"] = pd.to_datetime(df["actual_end_date"])
+    orders = pd.DataFrame({
+        "stat_hour": _floor_hours(df["actual_end_date"]),
+        "machine_name": df["machine_name"].fillna(""),
+        "operator_name": df["operator_name"].fillna(""),
+        "completed_orders": 1,
+        "lead_time_minutes": (df["actual_end_date"] - df["actual_start_date"]).dt.total_seconds() / 60
+    })
+    return orders.groupby(ROLLUP_KEYS, as_index=False).sum()
+
+
+async def compute_hourly_rollups(db: AsyncSession, start: datetime, end: datetime) -> pd.DataFrame:
+    """计算 [start, end) 内各小时的汇总（start/end 为整点）"""
+    reports = await _load_reports(db, start, end)
+    frames = [
+        split_run_minutes(reports, start, end),
+        _sum_quantities(reports, end),
+        await _load_lead_times(db, start, end)
+    ]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=ROLLUP_KEYS + _SUM_FIELDS)
+    combined = pd.concat(frames, ignore_index=True)
+    for field in _SUM_FIELDS:
+        if field not in combined:
+            combined[field] = 0
+    return combined.groupby(ROLLUP_KEYS, as_index=False)[_SUM_FIELDS].sum()
+
+
+async def _replace_hours(db: AsyncSession, start: datetime, end: datetime, computed_at: datetime) -> int:
+    """重算 [start, end) 的小时汇总：删除旧数据后批量插入（调用方负责提交）"""
+    frame = await compute_hourly_rollups(db, start, end)
+    await db.execute(
+        delete(ProductionHourlyRollup).where(
+            ProductionHourlyRollup.stat_hour >= start,
+            ProductionHourlyRollup.stat_hour < end
+        )
+    )
+    rows = [
+        {
+            "stat_hour": pd.Timestamp(row.stat_hour).to_pydatetime(),
+            "machine_name": row.machine_name,
+            "operator_name": row.operator_name,
+            "report_count": int(row.report_count),
+            "completed_quantity": int(row.completed_quantity),
+            "rejected_quantity": int(row.rejected_quantity),
+            "run_minutes": Decimal(str(round(float(row.run_minutes), 2))),
+            "completed_orders": int(row.completed_orders),
+            "lead_time_minutes": Decimal(str(round(float(row.lead_time_minutes), 2))),
+            "updated_at": computed_at
+        }
+        for row in frame.itertuples(index=False)
+    ]
+    if rows:
+        await db.execute(insert(ProductionHourlyRollup), rows)
+    return len(rows)
+
+
+# ==================== 刷新与重建 ====================
+
+async def rebuild_hourly_rollups(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """
+    全量重建小时汇总（按 ANALYTICS_REBUILD_CHUNK_DAYS 天分段计算并提交）
+
+    Args:
+        start_date: 开始日期（为空时从最早的报工/完工时间开始）
+        end_date: 结束日期（为空时到最近的报工/完工时间，包含当天）
+    """
+    computed_at = datetime.now()
+    if start_date is None or end_date is None:
+        report_bounds = (await db.execute(
+            select(func.min(ProductionReport.report_time), func.max(ProductionReport.report_time))
+        )).one()
+        order_bounds = (await db.execute(
+            select(func.min(ProductionOrder.actual_end_date), func.max(ProductionOrder.actual_end_date))
+        )).one()
+        lows = [value for value in (report_bounds[0], order_bounds[0]) if value is not None]
+        highs = [value for value in (report_bounds[1], order_bounds[1]) if value is not None]
+        if not lows:
+            return {"start": None, "end": None, "rows": 0}
+
+    start = datetime.combine(start_date, datetime.min.time()) if start_date else _floor_hour(min(lows))
+    end = (
+        datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        if end_date else _floor_hour(max(highs)) + timedelta(hours=1)
+    )
+
+    rows = 0
+    chunk = timedelta(days=settings.ANALYTICS_REBUILD_CHUNK_DAYS)
+    chunk_start = start
+    while chunk_start < end:
+        chunk_end = min(chunk_start + chunk, end)
+        rows += await _replace_hours(db, chunk_start, chunk_end, computed_at)
+        await db.commit()
+        chunk_start = chunk_end
+
+    return {"start": start, "end": end, "rows": rows}
+
+
+async def refresh_hourly_rollups(db: AsyncSession) -> dict:
+    """
+    增量刷新小时汇总
+    上次刷新时间取汇总表最大的 updated_at（汇总表为空时全量重建），
+    找出此后新增报工（多回看 ANALYTICS_REFRESH_OVERLAP_MINUTES 分钟，覆盖刷新时尚未提交的报工）的报工时间范围，
+    前后各扩展一个最大间隔（新报工会改变自身及同工单下一次报工的间隔）后重算这些小时
+    """
+    computed_at = datetime.now()
+    watermark = await db.scalar(select(func.max(ProductionHourlyRollup.updated_at)))
+    if watermark is None:
+        return await rebuild_hourly_rollups(db)
+
+    since = watermark - timedelta(minutes=settings.ANALYTICS_REFRESH_OVERLAP_MINUTES)
+    changed = (await db.execute(
+        select(func.min(ProductionReport.report_time), func.max(ProductionReport.report_time))
+        .where(ProductionReport.created_at >= since)
+    )).one()
+    if changed[0] is None:
+        return {"start": None, "end": None, "rows": 0}
+
+    start = _floor_hour(changed[0] - _max_gap())
+    end = _floor_hour(changed[1] + _max_gap()) + timedelta(hours=1)
+    rows = await _replace_hours(db, start, end, computed_at)
+    await db.commit()
+    return {"start": start, "end": end, "rows": rows}
+
+
+# ==================== 日报/周报 ====================
+
+async def get_production_analytics(
+    db: AsyncSession,
+    start_date: date,
+    end_date: date,
+    period: str = "day",
+    group_by: str = "machine"
+) -> List[Dict[str, Any]]:
+    """
+    按日/周汇总生产指标（只读取小时汇总表）
+
+    Args:
+        start_date: 开始日期
+        end_date: 结束日期（包含当天）
+        period: day 按日，week 按周（周一开始）
+        group_by: machine 按设备，operator 按操作员，machine_operator 按设备+操作员
+
+    Returns:
+        每个周期、分组一行: 完成/报废数量、生产时长、每小时产量、报废率(%)、完工工单数、平均生产周期(小时)
+    """
+    fields = GROUP_BY_FIELDS[group_by]
+    result = await db.execute(
+        select(
+            ProductionHourlyRollup.stat_hour,
+            ProductionHourlyRollup.machine_name,
+            ProductionHourlyRollup.operator_name,
+            *[getattr(ProductionHourlyRollup, field) for field in _SUM_FIELDS]
+        ).where(
+            ProductionHourlyRollup.stat_hour >= datetime.combine(start_date, datetime.min.time()),
+            ProductionHourlyRollup.stat_hour < datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        )
+    )
+    df = pd.DataFrame(result.all(), columns=ROLLUP_KEYS + _SUM_FIELDS)
+    if df.empty:
+        return []
+
+    for field in ("run_minutes", "lead_time_minutes"):
+        df[field] = df[field].astype(float)
+    days = pd.to_datetime(df["stat_hour"]).to_numpy(dtype="datetime64[D]")
+    if period == "week":
+        # 1970-01-01 为周四，换算为所在周的周一
+        days = days - ((days.astype(np.int64) + 3) % 7).astype("timedelta64[D]")
+    df["period_start"] = days
+
+    grouped = df.groupby(["period_start", *fields], as_index=False)[_SUM_FIELDS].sum()
+    run_hours = grouped["run_minutes"] / 60
+    produced = grouped["completed_quantity"] + grouped["rejected_quantity"]
+    grouped["run_hours"] = run_hours.round(2)
+    grouped["throughput_per_hour"] = np.where(
+        run_hours > 0, grouped["completed_quantity"] / run_hours.where(run_hours > 0, 1), 0
+    ).round(1)
+    grouped["scrap_rate"] = np.where(
+        produced > 0, grouped["rejected_quantity"] * 100 / produced.where(produced > 0, 1), 0
+    ).round(2)
+    grouped["avg_lead_time_hours"] = np.where(
+        grouped["completed_orders"] > 0,
+        grouped["lead_time_minutes"] / 60 / grouped["completed_orders"].where(grouped["completed_orders"] > 0, 1),
+        0
+    ).round(2)
+    grouped = grouped.sort_values(["period_start", *fields])
+
+    columns = [
+        *fields, "report_count", "completed_quantity", "rejected_quantity", "run_hours",
+        "throughput_per_hour", "scrap_rate", "completed_orders", "avg_lead_time_hours"
+    ]
+    items = []
+    for record in grouped.to_dict("records"):
+        item = {"period_start": pd.Timestamp(record["period_start"]).date().isoformat()}
+        for column in columns:
+            value = record[column]
+            item[column] = value.item() if hasattr(value, "item") else value
+        items.append(item)
+    return items
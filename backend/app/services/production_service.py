@@ -1,16 +1,21 @@
 """
 生产工单业务逻辑Service层
 """
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, func, and_, or_, insert, update, case
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime, date
-from typing import Optional
+from datetime import datetime, date, timedelta
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 
+from app.core.events import publish_event, CHANNEL_PRODUCTION
 from app.models.production import ProductionOrder, ProductionOrderItem, ProductionReport, ProductionStatus
 from app.models.order import Order, OrderItem, OrderStatus
-from app.schemas.production import ProductionOrderCreate, ProductionOrderUpdate, ProductionReportCreate
+from app.schemas.production import (
+    ProductionOrderCreate, ProductionOrderUpdate, ProductionReportCreate, ProductionReportBatchItem
+)
+from app.services import status_service
 
 
 async def generate_production_no(db: AsyncSession) -> str:
@@ -54,8 +59,9 @@ async def create_production_order(db: AsyncSession, data: ProductionOrderCreate)
     if not order:
         raise ValueError("订单不存在")
 
-    if order.status != OrderStatus.CONFIRMED:
-        raise ValueError("只能对已确认的订单创建生产工单")
+    status_service.check_order_transition(
+        order.status, OrderStatus.PRODUCTION, "只能对已确认的订单创建生产工单"
+    )
 
     if not order.items:
         raise ValueError("订单没有明细，无法创建生产工单")
@@ -73,7 +79,10 @@ async def create_production_order(db: AsyncSession, data: ProductionOrderCreate)
         operator_name=data.operator_name,
         machine_name=data.machine_name,
         remark=data.remark,
-        status=ProductionStatus.PENDING
+        status=ProductionStatus.PENDING,
+        total_plan_quantity=sum(order_item.quantity for order_item in order.items),
+        total_completed_quantity=0,
+        progress_percent=Decimal("0.00")
     )
     db.add(production_order)
     await db.flush()  # 获取production_order.id
@@ -114,18 +123,12 @@ async def get_production_orders(
 ):
     """
     获取生产工单列表
+    计划/完成数量、进度读取工单上的汇总字段，不关联明细表
+    （按状态筛选时使用索引 (status, priority, created_at)）
     """
     stmt = (
-        select(
-            ProductionOrder,
-            Order.order_no,
-            Order.customer_name,
-            func.sum(ProductionOrderItem.plan_quantity).label("total_plan_quantity"),
-            func.sum(ProductionOrderItem.completed_quantity).label("total_completed_quantity")
-        )
+        select(ProductionOrder, Order.order_no, Order.customer_name)
         .join(Order, ProductionOrder.order_id == Order.id)
-        .join(ProductionOrderItem, ProductionOrder.id == ProductionOrderItem.production_order_id)
-        .group_by(ProductionOrder.id, Order.order_no, Order.customer_name)
     )
 
     if status:
@@ -145,10 +148,8 @@ async def get_production_orders(
         production_order = row[0]
         order_no = row[1]
         customer_name = row[2]
-        total_plan = row[3] or 0
-        total_completed = row[4] or 0
-
-        progress_percent = (total_completed / total_plan * 100) if total_plan > 0 else 0
+        total_plan = production_order.total_plan_quantity or 0
+        total_completed = production_order.total_completed_quantity or 0
 
         production_list.append({
             "id": production_order.id,
@@ -165,7 +166,7 @@ async def get_production_orders(
             "created_at": production_order.created_at,
             "total_plan_quantity": total_plan,
             "total_completed_quantity": total_completed,
-            "progress_percent": round(progress_percent, 2)
+            "progress_percent": float(production_order.progress_percent or 0)
         })
 
     return production_list
@@ -199,22 +200,15 @@ async def update_production_order(
     data: ProductionOrderUpdate
 ) -> ProductionOrder:
     """
-    更新生产工单
+    更新生产工单（计划、设备、人员等字段；状态变化通过开工/完工/取消接口，见 status_service）
     """
-    stmt = (
-        select(ProductionOrder)
-        .where(ProductionOrder.id == production_id)
-        .options(selectinload(ProductionOrder.order))
-    )
+    stmt = select(ProductionOrder).where(ProductionOrder.id == production_id)
     result = await db.execute(stmt)
     production_order = result.scalar_one_or_none()
 
     if not production_order:
         raise ValueError("生产工单不存在")
 
-    # 记录原始状态
-    old_status = production_order.status
-
     # 更新字段
     update_data = data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
@@ -222,26 +216,6 @@ async def update_production_order(
 
     production_order.updated_at = datetime.now()
 
-    # 刷新状态
-    await db.flush()
-
-    # 如果状态变更为已完成，检查并同步订单状态
-    if old_status != ProductionStatus.COMPLETED and production_order.status == ProductionStatus.COMPLETED:
-        # 检查该订单的所有生产工单是否都已完成
-        stmt_check = select(ProductionOrder).where(
-            and_(
-                ProductionOrder.order_id == production_order.order_id,
-                ProductionOrder.status != ProductionStatus.COMPLETED
-            )
-        )
-        result_check = await db.execute(stmt_check)
-        unfinished = result_check.scalars().all()
-
-        # 如果所有工单都完成了，更新订单状态为已完成
-        if not unfinished:
-            production_order.order.status = OrderStatus.COMPLETED
-            production_order.order.updated_at = datetime.now()
-
     await db.commit()
     await db.refresh(production_order)
 
@@ -250,133 +224,165 @@ async def update_production_order(
 
 async def start_production(db: AsyncSession, production_id: int, operator_name: str):
     """
-    开始生产
+    开始生产（PENDING -> IN_PROGRESS，记录开工报工）
     """
-    stmt = select(ProductionOrder).where(ProductionOrder.id == production_id)
-    result = await db.execute(stmt)
-    production_order = result.scalar_one_or_none()
-
-    if not production_order:
-        raise ValueError("生产工单不存在")
-
-    if production_order.status != ProductionStatus.PENDING:
-        raise ValueError("只有待生产状态的工单可以开始生产")
-
-    production_order.status = ProductionStatus.IN_PROGRESS
-    production_order.actual_start_date = datetime.now()
-    production_order.operator_name = operator_name
-    production_order.updated_at = datetime.now()
-
-    # 创建开工报工记录
-    report = ProductionReport(
-        production_order_id=production_id,
-        report_type="START",
-        completed_quantity=0,
-        rejected_quantity=0,
-        operator_name=operator_name,
-        remark="开始生产"
+    return await status_service.transition_production(
+        db, production_id, ProductionStatus.IN_PROGRESS, operator_name=operator_name
     )
-    db.add(report)
 
-    await db.commit()
-    await db.refresh(production_order)
 
-    return production_order
+async def complete_production(db: AsyncSession, production_id: int, operator_name: str):
+    """
+    完成生产（IN_PROGRESS -> COMPLETED，记录完工报工，订单下工单均已结束时订单改为已完成）
+    """
+    return await status_service.transition_production(
+        db, production_id, ProductionStatus.COMPLETED, operator_name=operator_name
+    )
 
 
-async def complete_production(db: AsyncSession, production_id: int, operator_name: str):
+async def cancel_production(db: AsyncSession, production_id: int, reason: str):
     """
-    完成生产
+    取消生产工单（待生产/生产中 -> CANCELLED，取消原因追加到备注）
     """
-    stmt = (
-        select(ProductionOrder)
-        .where(ProductionOrder.id == production_id)
-        .options(selectinload(ProductionOrder.order))
+    return await status_service.transition_production(
+        db, production_id, ProductionStatus.CANCELLED, reason=reason
     )
-    result = await db.execute(stmt)
-    production_order = result.scalar_one_or_none()
 
-    if not production_order:
-        raise ValueError("生产工单不存在")
 
-    if production_order.status != ProductionStatus.IN_PROGRESS:
-        raise ValueError("只有生产中状态的工单可以完成")
+# 计入完成/报废数量的报工类型
+REPORT_TYPES_WITH_QUANTITY = ("PROGRESS", "COMPLETE")
 
-    production_order.status = ProductionStatus.COMPLETED
-    production_order.actual_end_date = datetime.now()
-    production_order.updated_at = datetime.now()
 
-    # 创建完工报工记录
-    report = ProductionReport(
-        production_order_id=production_id,
-        report_type="COMPLETE",
-        completed_quantity=0,
-        rejected_quantity=0,
-        operator_name=operator_name,
-        remark="生产完成"
+def _progress_expression(total_plan, total_completed):
+    """完成进度百分比的SQL表达式"""
+    return case(
+        (total_plan > 0, func.round(total_completed * 100.0 / total_plan, 2)),
+        else_=0
     )
-    db.add(report)
 
-    # 刷新数据库状态，确保上面的状态更新在查询时生效
-    await db.flush()
 
-    # 检查该订单的所有生产工单是否都已完成
-    stmt = select(ProductionOrder).where(
-        and_(
-            ProductionOrder.order_id == production_order.order_id,
-            ProductionOrder.status != ProductionStatus.COMPLETED
-        )
+async def recalculate_production_totals(db: AsyncSession, production_ids: Optional[List[int]] = None) -> int:
+    """
+    按明细重算生产工单的计划/完成数量与进度（集合操作，不逐条加载）
+    production_ids 为空时重算全部工单，返回更新的工单数
+    """
+    plan_sum = (
+        select(func.coalesce(func.sum(ProductionOrderItem.plan_quantity), 0))
+        .where(ProductionOrderItem.production_order_id == ProductionOrder.id)
+        .scalar_subquery()
+    )
+    completed_sum = (
+        select(func.coalesce(func.sum(ProductionOrderItem.completed_quantity), 0))
+        .where(ProductionOrderItem.production_order_id == ProductionOrder.id)
+        .scalar_subquery()
     )
-    result = await db.execute(stmt)
-    unfinished = result.scalars().all()
 
-    # 如果所有工单都完成了，更新订单状态为已完成
-    if not unfinished:
-        production_order.order.status = OrderStatus.COMPLETED
-        production_order.order.updated_at = datetime.now()
+    totals_stmt = update(ProductionOrder).values(
+        total_plan_quantity=plan_sum,
+        total_completed_quantity=completed_sum
+    )
+    progress_stmt = update(ProductionOrder).values(
+        progress_percent=_progress_expression(
+            ProductionOrder.total_plan_quantity, ProductionOrder.total_completed_quantity
+        )
+    )
+    if production_ids is not None:
+        totals_stmt = totals_stmt.where(ProductionOrder.id.in_(production_ids))
+        progress_stmt = progress_stmt.where(ProductionOrder.id.in_(production_ids))
 
+    result = await db.execute(totals_stmt.execution_options(synchronize_session=False))
+    await db.execute(progress_stmt.execution_options(synchronize_session=False))
     await db.commit()
-    await db.refresh(production_order)
-
-    return production_order
+    return result.rowcount
 
 
-async def cancel_production(db: AsyncSession, production_id: int, reason: str):
-    """
-    取消生产工单
+def resolve_report_item(items: List[Any], item_id: Optional[int]) -> Any:
     """
-    stmt = select(ProductionOrder).where(ProductionOrder.id == production_id)
-    result = await db.execute(stmt)
-    production_order = result.scalar_one_or_none()
+    确定报工针对的生产工单明细：指定了明细ID时校验其属于该工单，未指定时工单必须只有一条明细
 
-    if not production_order:
-        raise ValueError("生产工单不存在")
-
-    if production_order.status == ProductionStatus.COMPLETED:
-        raise ValueError("已完成的工单不能取消")
-
-    if production_order.status == ProductionStatus.CANCELLED:
-        raise ValueError("工单已经是取消状态")
+    Raises:
+        ValueError: 明细不属于该工单，或多明细工单未指定明细
+    """
+    if item_id is not None:
+        for item in items:
+            if item.id == item_id:
+                return item
+        raise ValueError(f"生产工单明细 {item_id} 不属于该工单")
+    if len(items) != 1:
+        raise ValueError("工单有多条明细，报工时需指定 production_order_item_id")
+    return items[0]
 
-    production_order.status = ProductionStatus.CANCELLED
-    production_order.updated_at = datetime.now()
 
-    # 将取消原因追加到备注中
-    if production_order.remark:
-        production_order.remark = f"{production_order.remark}\n取消原因: {reason}"
-    else:
-        production_order.remark = f"取消原因: {reason}"
+async def _apply_quantity_deltas(
+    db: AsyncSession,
+    completed_delta: Dict[int, int],
+    rejected_delta: Dict[int, int],
+    order_delta: Dict[int, int]
+) -> None:
+    """
+    按增量累加明细完成/报废数量与工单完成总数，并重算工单进度（不提交）
+    使用 SET col = col + CASE id WHEN ... END 相对更新，单条报工与批量报工并发时不会互相覆盖
 
-    await db.commit()
-    await db.refresh(production_order)
+    Args:
+        completed_delta: 明细ID -> 完成数量增量
+        rejected_delta: 明细ID -> 报废数量增量
+        order_delta: 工单ID -> 完成数量增量
+    """
+    if not completed_delta:
+        return
 
-    return production_order
+    values = {
+        "completed_quantity": ProductionOrderItem.completed_quantity + case(
+            completed_delta, value=ProductionOrderItem.id, else_=0
+        )
+    }
+    if rejected_delta:
+        values["rejected_quantity"] = ProductionOrderItem.rejected_quantity + case(
+            rejected_delta, value=ProductionOrderItem.id, else_=0
+        )
+    await db.execute(
+        update(ProductionOrderItem)
+        .where(ProductionOrderItem.id.in_(completed_delta))
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(
+        update(ProductionOrder)
+        .where(ProductionOrder.id.in_(order_delta))
+        .values(
+            total_completed_quantity=ProductionOrder.total_completed_quantity + case(
+                order_delta, value=ProductionOrder.id, else_=0
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
+    # 进度用第二条 UPDATE 按已写入的完成数量重算
+    # （MySQL 单表 UPDATE 按顺序求值 SET 子句，同一条语句中引用完成数量会读到已累加的新值）
+    await db.execute(
+        update(ProductionOrder)
+        .where(ProductionOrder.id.in_(order_delta))
+        .values(
+            progress_percent=_progress_expression(
+                ProductionOrder.total_plan_quantity, ProductionOrder.total_completed_quantity
+            )
+        )
+        .execution_options(synchronize_session=False)
+    )
 
 
 async def create_production_report(db: AsyncSession, data: ProductionReportCreate):
     """
     创建生产报工记录
+    携带幂等键且已存在相同键的报工时，直接返回已有记录
     """
+    if data.idempotency_key:
+        existing = await db.execute(
+            select(ProductionReport).where(ProductionReport.idempotency_key == data.idempotency_key)
+        )
+        report = existing.scalar_one_or_none()
+        if report:
+            return report
+
     # 检查生产工单是否存在
     stmt = (
         select(ProductionOrder)
@@ -389,30 +395,236 @@ async def create_production_report(db: AsyncSession, data: ProductionReportCreat
     if not production_order:
         raise ValueError("生产工单不存在")
 
+    status_service.check_reportable(production_order.status)
+
+    item = resolve_report_item(production_order.items, data.production_order_item_id)
+
     # 创建报工记录
     report = ProductionReport(
         production_order_id=data.production_order_id,
+        production_order_item_id=item.id,
         report_type=data.report_type,
         completed_quantity=data.completed_quantity,
         rejected_quantity=data.rejected_quantity,
         operator_name=data.operator_name,
-        remark=data.remark
+        remark=data.remark,
+        idempotency_key=data.idempotency_key
     )
     db.add(report)
 
-    # 更新生产工单明细的完成数量和报废数量
-    if data.report_type in ["PROGRESS", "COMPLETE"]:
-        for item in production_order.items:
-            item.completed_quantity += data.completed_quantity
-            if data.report_type == "REJECT" or data.rejected_quantity > 0:
-                item.rejected_quantity += data.rejected_quantity
+    # 更新明细的完成数量和报废数量，同步工单汇总数量（相对更新，与批量报工并发时不丢失增量）
+    if data.report_type in REPORT_TYPES_WITH_QUANTITY:
+        await _apply_quantity_deltas(
+            db,
+            completed_delta={item.id: data.completed_quantity},
+            rejected_delta={item.id: data.rejected_quantity} if data.rejected_quantity > 0 else {},
+            order_delta={production_order.id: data.completed_quantity}
+        )
+        # 读取更新后的汇总数量与进度（包含并发报工的数量）
+        await db.refresh(production_order, attribute_names=["total_completed_quantity", "progress_percent"])
 
     await db.commit()
     await db.refresh(report)
 
+    await publish_event(CHANNEL_PRODUCTION, "production.report", {
+        "production_order_id": production_order.id,
+        "production_no": production_order.production_no,
+        "report_id": report.id,
+        "production_order_item_id": report.production_order_item_id,
+        "report_type": report.report_type,
+        "completed_quantity": report.completed_quantity,
+        "rejected_quantity": report.rejected_quantity,
+        "operator_name": report.operator_name,
+        "report_time": report.report_time,
+        "total_plan_quantity": production_order.total_plan_quantity,
+        "total_completed_quantity": production_order.total_completed_quantity,
+        "progress_percent": float(production_order.progress_percent or 0)
+    })
+
     return report
 
 
+async def create_production_reports_batch(
+    db: AsyncSession,
+    reports: List[ProductionReportBatchItem],
+    operator_id: Optional[int] = None
+) -> dict:
+    """
+    批量创建生产报工（车间终端定时上报多个工单的进度）
+
+    1. 按幂等键排除已提交过的报工（批次内重复的键只保留第一条）
+    2. 两次查询加载目标工单与明细，工单不存在、已完成/已取消或明细无法确定的报工标记为失败
+    3. 批量插入报工记录，按明细/工单汇总数量后各用一条 UPDATE 更新明细数量与工单汇总数量
+    4. 一次查询更新后的工单进度（含并发报工的数量），一次提交
+
+    数量更新规则与单条报工一致: PROGRESS/COMPLETE 报工将本次完成/报废数量累加到指定明细
+
+    并发重试导致幂等键冲突时回滚并重新执行一次（此时冲突的报工会被识别为重复）
+    """
+    for attempt in range(2):
+        try:
+            return await _apply_report_batch(db, reports, operator_id)
+        except IntegrityError:
+            await db.rollback()
+            if attempt:
+                raise
+    raise RuntimeError("unreachable")
+
+
+async def _apply_report_batch(
+    db: AsyncSession,
+    reports: List[ProductionReportBatchItem],
+    operator_id: Optional[int]
+) -> dict:
+    results: List[dict] = [{"index": i, "idempotency_key": r.idempotency_key} for i, r in enumerate(reports)]
+
+    # 1. 幂等键去重
+    keys = {r.idempotency_key for r in reports if r.idempotency_key}
+    existing: Dict[str, int] = {}
+    if keys:
+        rows = await db.execute(
+            select(ProductionReport.idempotency_key, ProductionReport.id)
+            .where(ProductionReport.idempotency_key.in_(keys))
+        )
+        existing = {key: report_id for key, report_id in rows.all()}
+
+    pending: List[int] = []
+    seen: set = set()
+    for i, report in enumerate(reports):
+        key = report.idempotency_key
+        if key and (key in existing or key in seen):
+            results[i].update(status="duplicate", report_id=existing.get(key))
+            continue
+        if key:
+            seen.add(key)
+        pending.append(i)
+
+    # 2. 加载目标工单与明细（两次查询）
+    order_ids = {reports[i].production_order_id for i in pending}
+    orders: Dict[int, Any] = {}
+    items: Dict[int, List[Any]] = {}
+    if order_ids:
+        order_rows = await db.execute(
+            select(
+                ProductionOrder.id,
+                ProductionOrder.production_no,
+                ProductionOrder.status,
+                ProductionOrder.total_plan_quantity,
+                ProductionOrder.total_completed_quantity
+            )
+            .where(ProductionOrder.id.in_(order_ids))
+        )
+        orders = {row.id: row for row in order_rows.all()}
+        item_rows = await db.execute(
+            select(
+                ProductionOrderItem.id,
+                ProductionOrderItem.production_order_id,
+                ProductionOrderItem.plan_quantity,
+                ProductionOrderItem.completed_quantity,
+                ProductionOrderItem.rejected_quantity
+            ).where(ProductionOrderItem.production_order_id.in_(order_ids))
+        )
+        for row in item_rows.all():
+            items.setdefault(row.production_order_id, []).append(row)
+
+    # 3. 汇总数量并批量写入
+    now = datetime.now()
+    new_reports = []
+    completed_delta: Dict[int, int] = {}  # 明细ID -> 完成数量增量
+    rejected_delta: Dict[int, int] = {}  # 明细ID -> 报废数量增量
+    order_delta: Dict[int, int] = {}  # 工单ID -> 完成数量增量
+    for i in pending:
+        report = reports[i]
+        if report.production_order_id not in orders:
+            results[i].update(status="failed", error="生产工单不存在")
+            continue
+        try:
+            status_service.check_reportable(orders[report.production_order_id].status)
+            item = resolve_report_item(items.get(report.production_order_id, []), report.production_order_item_id)
+        except ValueError as e:
+            results[i].update(status="failed", error=str(e))
+            continue
+
+        new_reports.append({
+            "production_order_id": report.production_order_id,
+            "production_order_item_id": item.id,
+            "report_type": report.report_type,
+            "completed_quantity": report.completed_quantity,
+            "rejected_quantity": report.rejected_quantity,
+            "operator_name": report.operator_name,
+            "operator_id": operator_id,
+            "remark": report.remark,
+            "idempotency_key": report.idempotency_key,
+            "report_time": report.report_time or now,
+            "created_at": now
+        })
+        if report.report_type in REPORT_TYPES_WITH_QUANTITY:
+            completed_delta[item.id] = completed_delta.get(item.id, 0) + report.completed_quantity
+            if report.rejected_quantity > 0:
+                rejected_delta[item.id] = rejected_delta.get(item.id, 0) + report.rejected_quantity
+            order_id = report.production_order_id
+            order_delta[order_id] = order_delta.get(order_id, 0) + report.completed_quantity
+        results[i]["status"] = "created"
+
+    if new_reports:
+        await db.execute(insert(ProductionReport), new_reports)
+
+    await _apply_quantity_deltas(db, completed_delta, rejected_delta, order_delta)
+
+    # 4. 更新后的工单进度：UPDATE 后在同一事务内查询最新值（包含其他终端并发报工的数量）
+    progress = []
+    if order_delta:
+        progress_rows = await db.execute(
+            select(
+                ProductionOrder.id.label("production_order_id"),
+                ProductionOrder.production_no,
+                ProductionOrder.total_plan_quantity,
+                ProductionOrder.total_completed_quantity,
+                ProductionOrder.progress_percent,
+                ProductionOrderItem.id.label("item_id"),
+                ProductionOrderItem.plan_quantity,
+                ProductionOrderItem.completed_quantity,
+                ProductionOrderItem.rejected_quantity
+            )
+            .join(ProductionOrderItem, ProductionOrderItem.production_order_id == ProductionOrder.id)
+            .where(ProductionOrder.id.in_(order_delta))
+            .order_by(ProductionOrder.id, ProductionOrderItem.id)
+        )
+        entries: Dict[int, Dict[str, Any]] = {}
+        for row in progress_rows.all():
+            entry = entries.get(row.production_order_id)
+            if entry is None:
+                entry = entries[row.production_order_id] = {
+                    "production_order_id": row.production_order_id,
+                    "production_no": row.production_no,
+                    "total_plan_quantity": row.total_plan_quantity,
+                    "total_completed_quantity": row.total_completed_quantity,
+                    "progress_percent": float(row.progress_percent or 0),
+                    "items": []
+                }
+                progress.append(entry)
+            entry["items"].append({
+                "id": row.item_id,
+                "plan_quantity": row.plan_quantity,
+                "completed_quantity": row.completed_quantity,
+                "rejected_quantity": row.rejected_quantity
+            })
+
+    await db.commit()
+
+    # 每个工单推送一条进度事件（不逐条推送报工）
+    for entry in progress:
+        await publish_event(CHANNEL_PRODUCTION, "production.progress", entry)
+
+    return {
+        "created_count": sum(1 for r in results if r["status"] == "created"),
+        "duplicate_count": sum(1 for r in results if r["status"] == "duplicate"),
+        "failed_count": sum(1 for r in results if r["status"] == "failed"),
+        "results": results,
+        "progress": progress
+    }
+
+
 async def get_production_reports(db: AsyncSession, production_order_id: int):
     """
     获取生产工单的报工记录
@@ -432,51 +644,35 @@ async def get_production_reports(db: AsyncSession, production_order_id: int):
 async def get_production_statistics(db: AsyncSession):
     """
     获取生产统计数据
+    一条条件聚合查询完成: 总数、各状态数量、今日完成数（按时间范围比较，不对列调用函数）、
+    平均完成率（工单冗余的完成进度，计划数量为0的工单不参与）
     """
-    # 总工单数
-    total_stmt = select(func.count(ProductionOrder.id))
-    total_result = await db.execute(total_stmt)
-    total_count = total_result.scalar() or 0
-
-    # 各状态数量
-    status_stmt = (
-        select(ProductionOrder.status, func.count(ProductionOrder.id))
-        .group_by(ProductionOrder.status)
+    today_start = datetime.combine(date.today(), datetime.min.time())
+    tomorrow_start = today_start + timedelta(days=1)
+
+    def count_if(*conditions):
+        return func.coalesce(func.sum(case((and_(*conditions), 1), else_=0)), 0)
+
+    stmt = select(
+        func.count(ProductionOrder.id),
+        count_if(ProductionOrder.status == ProductionStatus.PENDING),
+        count_if(ProductionOrder.status == ProductionStatus.IN_PROGRESS),
+        count_if(ProductionOrder.status == ProductionStatus.COMPLETED),
+        count_if(
+            ProductionOrder.status == ProductionStatus.COMPLETED,
+            ProductionOrder.actual_end_date >= today_start,
+            ProductionOrder.actual_end_date < tomorrow_start
+        ),
+        func.avg(case((ProductionOrder.total_plan_quantity > 0, ProductionOrder.progress_percent), else_=None))
     )
-    status_result = await db.execute(status_stmt)
-    status_counts = {row[0].value: row[1] for row in status_result.all()}
-
-    # 今日完成数
-    today = date.today()
-    today_stmt = (
-        select(func.count(ProductionOrder.id))
-        .where(
-            and_(
-                ProductionOrder.status == ProductionStatus.COMPLETED,
-                func.date(ProductionOrder.actual_end_date) == today
-            )
-        )
-    )
-    today_result = await db.execute(today_stmt)
-    today_completed = today_result.scalar() or 0
-
-    # 平均完成率
-    avg_stmt = (
-        select(
-            func.avg(
-                ProductionOrderItem.completed_quantity * 100.0 / ProductionOrderItem.plan_quantity
-            )
-        )
-        .where(ProductionOrderItem.plan_quantity > 0)
-    )
-    avg_result = await db.execute(avg_stmt)
-    avg_rate = avg_result.scalar() or 0.0
+    result = await db.execute(stmt)
+    total_count, pending_count, in_progress_count, completed_count, today_completed, avg_rate = result.one()
 
     return {
-        "total_production_orders": total_count,
-        "pending_count": status_counts.get("PENDING", 0),
-        "in_progress_count": status_counts.get("IN_PROGRESS", 0),
-        "completed_count": status_counts.get("COMPLETED", 0),
-        "today_completed_count": today_completed,
-        "avg_completion_rate": round(float(avg_rate), 2)
+        "total_production_orders": total_count or 0,
+        "pending_count": int(pending_count),
+        "in_progress_count": int(in_progress_count),
+        "completed_count": int(completed_count),
+        "today_completed_count": int(today_completed),
+        "avg_completion_rate": round(float(avg_rate or 0), 2)
     }
@@ -0,0 +1,609 @@
+"""
+收款对账Service层
+导入银行/支付宝/微信对账单，收入流水自动匹配到未收清的订单并批量生成收款记录
+
+流程：
+1. 一次聚合查询加载全部未收清订单，在内存中按订单号、客户名称、未收金额建立哈希索引
+2. 流式逐批读取对账单（CSV/Excel），每批：
+   校验 -> 一次查询已导入的流水号（重复导入跳过） -> 内存匹配 -> 一次生成收款单号
+   -> 批量插入收款记录和流水 -> 累加收款日汇总 -> 提交（每批一个事务）
+
+匹配规则（按顺序）：
+- ORDER_NO: 流水号/摘要中包含订单号，且金额不超过订单未收金额
+- CUSTOMER: 付款方与订单客户名称一致，且该客户有未收金额与流水金额相等的订单，
+            或该客户只有一张未收清订单且金额不超过未收金额
+- AMOUNT:   全部未收清订单中只有一张未收金额与流水金额相等，仅作为建议（SUGGESTED），需人工确认
+"""
+import asyncio
+import re
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Awaitable, BinaryIO, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import select, func, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order, OrderStatus
+from app.models.payment import OrderPayment, PaymentMethod, PaymentStatus
+from app.models.reconciliation import StatementLine, StatementLineStatus, StatementSource
+from app.services import rollup_service
+from app.services.import_service import IMPORT_CHUNK_SIZE, ImportResult
+from app.services.payment_service import generate_payment_no, generate_payment_nos
+from app.utils.excel_handler import ExcelHandler
+
+
+# 银行流水标准导入模板列定义
+BANK_STATEMENT_COLUMNS = {
+    'txn_time': '交易时间*',
+    'amount': '收入金额*',
+    'payer': '对方户名',
+    'reference': '流水号*',
+    'memo': '摘要'
+}
+
+# 支付宝账单列定义（商家版/个人版导出的CSV）
+ALIPAY_STATEMENT_COLUMNS = {
+    'reference': '交易号',
+    'created_time': '交易创建时间',
+    'txn_time': '付款时间',
+    'payer': '交易对方',
+    'product': '商品名称',
+    'amount': '金额（元）',
+    'direction': '收/支',
+    'memo': '备注'
+}
+
+# 微信支付账单列定义
+WECHAT_STATEMENT_COLUMNS = {
+    'txn_time': '交易时间',
+    'payer': '交易对方',
+    'product': '商品',
+    'direction': '收/支',
+    'amount': '金额(元)',
+    'reference': '交易单号',
+    'memo': '备注'
+}
+
+# 对账单来源 -> (列定义, 收款方式)
+STATEMENT_SOURCES = {
+    StatementSource.BANK: (BANK_STATEMENT_COLUMNS, PaymentMethod.BANK_TRANSFER),
+    StatementSource.ALIPAY: (ALIPAY_STATEMENT_COLUMNS, PaymentMethod.ALIPAY),
+    StatementSource.WECHAT: (WECHAT_STATEMENT_COLUMNS, PaymentMethod.WECHAT),
+}
+
+# 支持的对账单文件格式
+STATEMENT_FILE_FORMATS = ('csv', 'xlsx')
+
+# 流水号/摘要中的订单号，如 SO20251222000705
+ORDER_NO_PATTERN = re.compile(r'SO\d{8,}', re.IGNORECASE)
+
+# 交易时间格式
+TXN_TIME_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y/%m/%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y/%m/%d %H:%M',
+    '%Y-%m-%d',
+    '%Y/%m/%d',
+    '%Y%m%d',
+)
+
+# 匹配规则
+RULE_ORDER_NO = "ORDER_NO"
+RULE_CUSTOMER = "CUSTOMER"
+RULE_AMOUNT = "AMOUNT"
+RULE_MANUAL = "MANUAL"
+
+# 可人工处理的流水状态
+PENDING_LINE_STATUSES = (StatementLineStatus.SUGGESTED, StatementLineStatus.UNMATCHED)
+
+CENT = Decimal("0.01")
+
+
+class ReconcileResult(ImportResult):
+    """对账导入结果统计"""
+
+    def __init__(self):
+        super().__init__(key_field='reference')
+        self.matched = 0
+        self.matched_amount = Decimal("0.00")
+        self.suggested = 0
+        self.unmatched = 0
+        self.skipped = 0
+        self.duplicated = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = super().to_dict()
+        data.update({
+            'matched': self.matched,
+            'matched_amount': float(self.matched_amount),
+            'suggested': self.suggested,
+            'unmatched': self.unmatched,
+            'skipped': self.skipped,
+            'duplicated': self.duplicated
+        })
+        return data
+
+
+# ==================== 未收清订单索引 ====================
+
+class OpenOrderIndex:
+    """
+    未收清订单的内存哈希索引
+    匹配成功后立即扣减未收金额，同一对账单中后续流水按扣减后的金额继续匹配
+    """
+
+    def __init__(self, rows):
+        self.outstanding: Dict[int, Decimal] = {}
+        self.customer_ids: Dict[int, Optional[int]] = {}
+        self.by_order_no: Dict[str, int] = {}
+        self.by_customer: Dict[str, List[int]] = defaultdict(list)
+        self.by_amount: Dict[Decimal, Set[int]] = defaultdict(set)
+
+        for row in rows:
+            amount = Decimal(row.outstanding).quantize(CENT)
+            self.outstanding[row.id] = amount
+            self.customer_ids[row.id] = row.customer_id
+            self.by_order_no[row.order_no.upper()] = row.id
+            self.by_amount[amount].add(row.id)
+            if row.customer_name:
+                self.by_customer[row.customer_name.strip()].append(row.id)
+
+    def __len__(self) -> int:
+        return len(self.outstanding)
+
+    def match(self, line: Dict[str, Any]) -> Tuple[StatementLineStatus, Optional[str], Optional[int]]:
+        """按规则匹配一条流水，返回 (状态, 匹配规则, 订单ID)"""
+        amount = line['amount']
+
+        # 1. 流水号/摘要中的订单号
+        text = " ".join(filter(None, (line['reference'], line['memo'])))
+        for order_no in ORDER_NO_PATTERN.findall(text):
+            order_id = self.by_order_no.get(order_no.upper())
+            if order_id is None:
+                continue
+            if amount <= self.outstanding[order_id]:
+                return StatementLineStatus.MATCHED, RULE_ORDER_NO, order_id
+            # 金额超过未收金额（多付或重复付款），交由人工确认
+            return StatementLineStatus.SUGGESTED, RULE_ORDER_NO, order_id
+
+        # 2. 付款方 = 客户名称
+        candidates = [
+            order_id for order_id in self.by_customer.get(line['payer'] or '', [])
+            if self.outstanding[order_id] > 0
+        ]
+        for order_id in candidates:
+            if self.outstanding[order_id] == amount:
+                return StatementLineStatus.MATCHED, RULE_CUSTOMER, order_id
+        if len(candidates) == 1 and amount <= self.outstanding[candidates[0]]:
+            return StatementLineStatus.MATCHED, RULE_CUSTOMER, candidates[0]
+
+        # 3. 金额唯一
+        same_amount = self.by_amount.get(amount)
+        if same_amount and len(same_amount) == 1:
+            return StatementLineStatus.SUGGESTED, RULE_AMOUNT, next(iter(same_amount))
+
+        return StatementLineStatus.UNMATCHED, None, None
+
+    def apply(self, order_id: int, amount: Decimal) -> None:
+        """扣减订单未收金额（amount 为负数时恢复）"""
+        old = self.outstanding[order_id]
+        new = old - amount
+        self.by_amount[old].discard(order_id)
+        if new > 0:
+            self.by_amount[new].add(order_id)
+        self.outstanding[order_id] = new
+
+
+async def load_open_order_index(db: AsyncSession) -> OpenOrderIndex:
+    """一次聚合查询加载全部未收清订单（草稿订单除外）"""
+    paid = (
+        select(
+            OrderPayment.order_id,
+            func.sum(OrderPayment.payment_amount).label('paid_amount')
+        )
+        .where(OrderPayment.status == PaymentStatus.CONFIRMED)
+        .group_by(OrderPayment.order_id)
+        .subquery()
+    )
+    outstanding = Order.total_amount - func.coalesce(paid.c.paid_amount, 0)
+
+    stmt = (
+        select(
+            Order.id,
+            Order.order_no,
+            Order.customer_id,
+            Order.customer_name,
+            outstanding.label('outstanding')
+        )
+        .outerjoin(paid, paid.c.order_id == Order.id)
+        .where(Order.status != OrderStatus.DRAFT, outstanding > 0)
+        .order_by(Order.id)
+    )
+    result = await db.execute(stmt)
+    return OpenOrderIndex(result.all())
+
+
+# ==================== 对账单解析 ====================
+
+async def _iter_statement_chunks(
+    file: BinaryIO,
+    columns: Dict[str, str],
+    file_format: str
+) -> AsyncIterator[List[Tuple[int, Dict[str, Any]]]]:
+    """在线程中逐批解析对账单，避免阻塞事件循环"""
+    if file_format == 'csv':
+        iterator = ExcelHandler.iter_csv_import_chunks(file, columns, chunk_size=IMPORT_CHUNK_SIZE)
+    else:
+        iterator = ExcelHandler.iter_import_chunks(file, columns, chunk_size=IMPORT_CHUNK_SIZE, header_scan_rows=30)
+    while True:
+        chunk = await asyncio.to_thread(next, iterator, None)
+        if chunk is None:
+            break
+        yield chunk
+
+
+def _to_amount(value: Any) -> Decimal:
+    """转换收入金额（兼容 ¥1,234.50 格式）"""
+    text = str(value).replace('¥', '').replace('￥', '').replace(',', '').strip()
+    try:
+        amount = Decimal(text).quantize(CENT)
+    except InvalidOperation:
+        raise ValueError("金额格式不正确")
+    if amount <= 0:
+        raise ValueError("收入金额必须大于0")
+    return amount
+
+
+def _to_datetime(value: Any) -> datetime:
+    """转换交易时间"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    text = str(value).strip()
+    for fmt in TXN_TIME_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    raise ValueError("交易时间格式不正确")
+
+
+def _parse_statement_row(row: Dict[str, Any], check_direction: bool) -> Optional[Dict[str, Any]]:
+    """
+    校验并转换对账单行数据
+    非收入流水、账单末尾的汇总说明行返回 None；校验失败抛出 ValueError
+
+    Args:
+        check_direction: 对账单有收/支列时为 True，只导入收/支为"收入"的流水
+                         （支付宝余额宝转入转出等资金划转的收/支为空，不能当作收入）
+    """
+    if check_direction and row.get('direction') != '收入':
+        return None
+
+    txn_time = row.get('txn_time') or row.get('created_time')
+    amount = row.get('amount')
+    if txn_time is None and amount is None:
+        return None
+
+    reference = str(row.get('reference') or '').strip()
+    if not reference:
+        raise ValueError("流水号不能为空")
+    if amount is None:
+        raise ValueError("金额不能为空")
+    if txn_time is None:
+        raise ValueError("交易时间不能为空")
+
+    memo = " ".join(str(row[key]).strip() for key in ('memo', 'product') if row.get(key))
+    payer = str(row.get('payer') or '').strip()
+
+    return {
+        'reference': reference[:64],
+        'txn_time': _to_datetime(txn_time),
+        'amount': _to_amount(amount),
+        'payer': payer[:100] or None,
+        'memo': memo or None,
+    }
+
+
+# ==================== 批量入账 ====================
+
+async def _write_statement_chunk(
+    db: AsyncSession,
+    source: StatementSource,
+    payment_method: PaymentMethod,
+    lines: List[Dict[str, Any]],
+    index: OpenOrderIndex,
+    received_by: str,
+    result: ReconcileResult
+) -> List[Tuple[int, Decimal]]:
+    """
+    匹配一批流水并在一个事务中写入，返回本批扣减的 (订单ID, 金额) 以便失败时恢复索引
+    """
+    # 一次查询本批已导入过的流水号
+    existing = set((await db.execute(
+        select(StatementLine.reference).where(
+            StatementLine.source == source,
+            StatementLine.reference.in_([line['reference'] for line in lines])
+        )
+    )).scalars().all())
+
+    new_lines = [line for line in lines if line['reference'] not in existing]
+    duplicated = len(lines) - len(new_lines)
+
+    applied: List[Tuple[int, Decimal]] = []
+    matched: List[Dict[str, Any]] = []
+    for line in new_lines:
+        status, rule, order_id = index.match(line)
+        line.update(source=source, status=status, match_rule=rule, order_id=order_id, payment_id=None)
+        if status == StatementLineStatus.MATCHED:
+            index.apply(order_id, line['amount'])
+            applied.append((order_id, line['amount']))
+            matched.append(line)
+
+    if matched:
+        # 一次生成本批收款单号，批量插入收款记录
+        payment_nos = await generate_payment_nos(db, len(matched))
+        payments = []
+        for line, payment_no in zip(matched, payment_nos):
+            line['payment_no'] = payment_no
+            payments.append({
+                'order_id': line['order_id'],
+                'payment_no': payment_no,
+                'payment_amount': line['amount'],
+                'payment_method': payment_method,
+                'payment_date': line['txn_time'],
+                'status': PaymentStatus.CONFIRMED,
+                'received_by': received_by,
+                'voucher_no': line['reference'][:50],
+                'remark': f"对账导入（{line['match_rule']}）"
+            })
+        await db.execute(insert(OrderPayment), payments)
+
+        # MySQL 不支持 RETURNING，按单号取回收款记录ID
+        payment_ids = dict((await db.execute(
+            select(OrderPayment.payment_no, OrderPayment.id).where(
+                OrderPayment.payment_no.in_(payment_nos)
+            )
+        )).all())
+        for line in matched:
+            line['payment_id'] = payment_ids[line.pop('payment_no')]
+
+        # 按 日期+客户 累加收款日汇总
+        rollups: Dict[Tuple[date, Optional[int]], List] = defaultdict(lambda: [0, Decimal("0.00")])
+        for line in matched:
+            totals = rollups[(line['txn_time'].date(), index.customer_ids[line['order_id']])]
+            totals[0] += 1
+            totals[1] += line['amount']
+        for (stat_date, customer_id), (count, amount) in rollups.items():
+            await rollup_service.apply_payment_delta(
+                db,
+                stat_date=stat_date,
+                customer_id=customer_id,
+                payment_method=payment_method,
+                count_delta=count,
+                amount_delta=amount
+            )
+
+    if new_lines:
+        await db.execute(insert(StatementLine), new_lines)
+    await db.commit()
+
+    result.duplicated += duplicated
+    for line in new_lines:
+        if line['status'] == StatementLineStatus.MATCHED:
+            result.matched += 1
+            result.matched_amount += line['amount']
+        elif line['status'] == StatementLineStatus.SUGGESTED:
+            result.suggested += 1
+        else:
+            result.unmatched += 1
+    result.created += len(new_lines)
+
+    return applied
+
+
+async def _reconcile_chunk(
+    db: AsyncSession,
+    source: StatementSource,
+    payment_method: PaymentMethod,
+    chunk: List[Tuple[int, Dict[str, Any]]],
+    index: OpenOrderIndex,
+    received_by: str,
+    result: ReconcileResult
+) -> None:
+    """校验并入账一批流水"""
+    check_direction = 'direction' in STATEMENT_SOURCES[source][0]
+    lines: Dict[str, Dict[str, Any]] = {}
+    for row_number, row in chunk:
+        try:
+            line = _parse_statement_row(row, check_direction)
+        except ValueError as e:
+            result.add_error(row_number, row.get('reference'), str(e))
+            continue
+        if line is None:
+            result.skipped += 1
+        elif line['reference'] in lines:
+            result.duplicated += 1
+        else:
+            lines[line['reference']] = line
+
+    if not lines:
+        return
+
+    # 并发导入同一流水或并发生成收款单号时唯一约束冲突，回滚后重试一次
+    for attempt in range(2):
+        batch = [dict(line) for line in lines.values()]
+        try:
+            await _write_statement_chunk(db, source, payment_method, batch, index, received_by, result)
+            return
+        except IntegrityError:
+            await db.rollback()
+            for line in batch:
+                if line.get('status') == StatementLineStatus.MATCHED:
+                    index.apply(line['order_id'], -line['amount'])
+            if attempt == 1:
+                raise
+
+
+async def import_statement(
+    db: AsyncSession,
+    file: BinaryIO,
+    source: str,
+    file_format: str = 'xlsx',
+    received_by: str = '对账导入',
+    on_progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+) -> Dict[str, Any]:
+    """
+    导入对账单并自动匹配入账
+    只处理收入流水；(来源, 流水号) 已导入过的流水跳过，同一对账单可重复导入
+
+    Args:
+        source: 对账单来源 BANK/ALIPAY/WECHAT
+        file_format: 文件格式 csv/xlsx
+        received_by: 生成的收款记录的收款人
+        on_progress: 每批处理完成后的回调，参数为当前的导入结果统计（后台任务用于更新进度）
+
+    Raises:
+        ValueError: 来源/格式不支持或文件格式不正确
+    """
+    try:
+        statement_source = StatementSource(source)
+    except ValueError:
+        raise ValueError(f"不支持的对账单来源: {source}")
+    if file_format not in STATEMENT_FILE_FORMATS:
+        raise ValueError(f"不支持的文件格式: {file_format}")
+
+    columns, payment_method = STATEMENT_SOURCES[statement_source]
+    index = await load_open_order_index(db)
+
+    result = ReconcileResult()
+    async for chunk in _iter_statement_chunks(file, columns, file_format):
+        result.total += len(chunk)
+        await _reconcile_chunk(db, statement_source, payment_method, chunk, index, received_by, result)
+        if on_progress is not None:
+            await on_progress(result.to_dict())
+    return result.to_dict()
+
+
+# ==================== 人工处理 ====================
+
+async def get_statement_lines(
+    db: AsyncSession,
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[dict]:
+    """获取对账流水列表（含匹配订单号）"""
+    stmt = (
+        select(StatementLine, Order.order_no, Order.customer_name)
+        .outerjoin(Order, StatementLine.order_id == Order.id)
+    )
+
+    if status:
+        stmt = stmt.where(StatementLine.status == status)
+
+    if source:
+        stmt = stmt.where(StatementLine.source == source)
+
+    stmt = stmt.order_by(StatementLine.txn_time.desc(), StatementLine.id.desc()).offset(skip).limit(limit)
+
+    result = await db.execute(stmt)
+    return [
+        {
+            "id": line.id,
+            "source": line.source.value,
+            "reference": line.reference,
+            "txn_time": line.txn_time,
+            "amount": line.amount,
+            "payer": line.payer,
+            "memo": line.memo,
+            "status": line.status.value,
+            "match_rule": line.match_rule,
+            "order_id": line.order_id,
+            "order_no": order_no,
+            "customer_name": customer_name,
+            "payment_id": line.payment_id,
+            "created_at": line.created_at
+        }
+        for line, order_no, customer_name in result.all()
+    ]
+
+
+async def _get_pending_line(db: AsyncSession, line_id: int) -> StatementLine:
+    """加锁查询待处理的流水"""
+    stmt = select(StatementLine).where(StatementLine.id == line_id).with_for_update()
+    line = (await db.execute(stmt)).scalar_one_or_none()
+
+    if not line:
+        raise ValueError("对账流水不存在")
+
+    if line.status not in PENDING_LINE_STATUSES:
+        raise ValueError("对账流水已处理")
+
+    return line
+
+
+async def match_statement_line(
+    db: AsyncSession,
+    line_id: int,
+    order_id: Optional[int],
+    received_by: str
+) -> StatementLine:
+    """
+    人工确认流水对应的订单并生成收款记录
+    未指定订单时使用自动匹配建议的订单
+    """
+    line = await _get_pending_line(db, line_id)
+
+    order_id = order_id or line.order_id
+    if not order_id:
+        raise ValueError("请指定流水对应的订单")
+
+    order = (await db.execute(select(Order).where(Order.id == order_id))).scalar_one_or_none()
+    if not order:
+        raise ValueError("订单不存在")
+    if order.status == OrderStatus.DRAFT:
+        raise ValueError("草稿订单不能收款")
+
+    payment = OrderPayment(
+        order_id=order.id,
+        payment_no=await generate_payment_no(db),
+        payment_amount=line.amount,
+        payment_method=STATEMENT_SOURCES[line.source][1],
+        payment_date=line.txn_time,
+        status=PaymentStatus.CONFIRMED,
+        received_by=received_by,
+        voucher_no=line.reference[:50],
+        remark=f"对账导入（{RULE_MANUAL}）"
+    )
+    db.add(payment)
+    await db.flush()
+
+    await rollup_service.record_payment(db, payment, customer_id=order.customer_id)
+
+    line.status = StatementLineStatus.MATCHED
+    line.match_rule = RULE_MANUAL
+    line.order_id = order.id
+    line.payment_id = payment.id
+
+    await db.commit()
+    await db.refresh(line)
+
+    return line
+
+
+async def ignore_statement_line(db: AsyncSession, line_id: int) -> StatementLine:
+    """忽略流水（非订单收款，如退款、内部转账）"""
+    line = await _get_pending_line(db, line_id)
+
+    line.status = StatementLineStatus.IGNORED
+
+    await db.commit()
+    await db.refresh(line)
+
+    return line
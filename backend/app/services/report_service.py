@@ -1,7 +1,7 @@
 """
 财务报表业务逻辑Service层
 """
-from sqlalchemy import select, func, and_, or_, case
+from sqlalchemy import select, func, and_, or_, case, literal
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, datetime, timedelta
 from typing import List, Optional
@@ -9,6 +9,7 @@ from decimal import Decimal
 
 from app.models.payment import OrderPayment, PaymentMethod, PaymentStatus
 from app.models.order import Order
+from app.models.report_rollup import DailyOrderRollup, DailyPaymentRollup
 from app.schemas.report import (
     DailyPaymentReport,
     MonthlyPaymentReport,
@@ -17,11 +18,19 @@ from app.schemas.report import (
     DailyTrend,
     SalesPaymentTrend,
     AgingBracket,
+    CustomerAging,
     ReceivablesAgingAnalysis,
     FinancialOverview
 )
 
 
+def _rollup_method_amount(method: PaymentMethod):
+    """按收款方式汇总日汇总表金额"""
+    return func.sum(
+        case((DailyPaymentRollup.payment_method == method, DailyPaymentRollup.payment_amount), else_=0)
+    )
+
+
 # ==================== 收款日报 ====================
 
 async def get_daily_payment_report(
@@ -33,39 +42,28 @@ async def get_daily_payment_report(
     获取收款日报
     按日期范围查询，返回每日收款汇总
     """
-    # 构建查询：按日期和收款方式分组统计
+    # 从收款日汇总表按日期聚合各收款方式
     stmt = select(
-        func.date(OrderPayment.payment_date).label('date'),
-        func.count(OrderPayment.id).label('payment_count'),
-        func.sum(OrderPayment.payment_amount).label('total_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.CASH, OrderPayment.payment_amount), else_=0)
-        ).label('cash_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.BANK_TRANSFER, OrderPayment.payment_amount), else_=0)
-        ).label('bank_transfer_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.ALIPAY, OrderPayment.payment_amount), else_=0)
-        ).label('alipay_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.WECHAT, OrderPayment.payment_amount), else_=0)
-        ).label('wechat_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.CHECK, OrderPayment.payment_amount), else_=0)
-        ).label('check_amount'),
-        func.sum(
-            case((OrderPayment.payment_method == PaymentMethod.OTHER, OrderPayment.payment_amount), else_=0)
-        ).label('other_amount'),
+        DailyPaymentRollup.stat_date.label('date'),
+        func.sum(DailyPaymentRollup.payment_count).label('payment_count'),
+        func.sum(DailyPaymentRollup.payment_amount).label('total_amount'),
+        _rollup_method_amount(PaymentMethod.CASH).label('cash_amount'),
+        _rollup_method_amount(PaymentMethod.BANK_TRANSFER).label('bank_transfer_amount'),
+        _rollup_method_amount(PaymentMethod.ALIPAY).label('alipay_amount'),
+        _rollup_method_amount(PaymentMethod.WECHAT).label('wechat_amount'),
+        _rollup_method_amount(PaymentMethod.CHECK).label('check_amount'),
+        _rollup_method_amount(PaymentMethod.OTHER).label('other_amount'),
     ).where(
         and_(
-            func.date(OrderPayment.payment_date) >= start_date,
-            func.date(OrderPayment.payment_date) <= end_date,
-            OrderPayment.status == PaymentStatus.CONFIRMED
+            DailyPaymentRollup.stat_date >= start_date,
+            DailyPaymentRollup.stat_date <= end_date
         )
     ).group_by(
-        func.date(OrderPayment.payment_date)
+        DailyPaymentRollup.stat_date
+    ).having(
+        func.sum(DailyPaymentRollup.payment_count) > 0
     ).order_by(
-        func.date(OrderPayment.payment_date)
+        DailyPaymentRollup.stat_date
     )
 
     result = await db.execute(stmt)
@@ -76,7 +74,7 @@ async def get_daily_payment_report(
     for row in rows:
         reports.append(DailyPaymentReport(
             date=row.date,
-            payment_count=row.payment_count or 0,
+            payment_count=int(row.payment_count or 0),
             total_amount=row.total_amount or Decimal("0.00"),
             cash_amount=row.cash_amount or Decimal("0.00"),
             bank_transfer_amount=row.bank_transfer_amount or Decimal("0.00"),
@@ -115,19 +113,20 @@ async def get_monthly_payment_report(
             last_month_start = date(year, month - 1, 1)
             last_month_end = date(year, month, 1) - timedelta(days=1)
 
-    # 查询当月数据
+    # 查询当月数据（读取收款日汇总表）
     stmt = select(
-        func.count(OrderPayment.id).label('payment_count'),
-        func.sum(OrderPayment.payment_amount).label('total_amount'),
-        OrderPayment.payment_method
+        func.sum(DailyPaymentRollup.payment_count).label('payment_count'),
+        func.sum(DailyPaymentRollup.payment_amount).label('total_amount'),
+        DailyPaymentRollup.payment_method
     ).where(
         and_(
-            func.date(OrderPayment.payment_date) >= start_date,
-            func.date(OrderPayment.payment_date) <= end_date,
-            OrderPayment.status == PaymentStatus.CONFIRMED
+            DailyPaymentRollup.stat_date >= start_date,
+            DailyPaymentRollup.stat_date <= end_date
         )
     ).group_by(
-        OrderPayment.payment_method
+        DailyPaymentRollup.payment_method
+    ).having(
+        func.sum(DailyPaymentRollup.payment_count) > 0
     )
 
     result = await db.execute(stmt)
@@ -139,7 +138,7 @@ async def get_monthly_payment_report(
     payment_methods = {}
 
     for row in rows:
-        payment_count += row.payment_count or 0
+        payment_count += int(row.payment_count or 0)
         amount = row.total_amount or Decimal("0.00")
         total_amount += amount
         payment_methods[row.payment_method.value] = float(amount)
@@ -149,12 +148,11 @@ async def get_monthly_payment_report(
 
     # 查询上月总额用于计算环比
     stmt_last = select(
-        func.sum(OrderPayment.payment_amount)
+        func.sum(DailyPaymentRollup.payment_amount)
     ).where(
         and_(
-            func.date(OrderPayment.payment_date) >= last_month_start,
-            func.date(OrderPayment.payment_date) <= last_month_end,
-            OrderPayment.status == PaymentStatus.CONFIRMED
+            DailyPaymentRollup.stat_date >= last_month_start,
+            DailyPaymentRollup.stat_date <= last_month_end
         )
     )
 
@@ -283,32 +281,29 @@ async def get_sales_payment_trend(
     end_date = date.today()
     start_date = end_date - timedelta(days=days - 1)
 
-    # 查询每日订单数据
+    # 查询每日订单数据（读取订单日汇总表）
     stmt_orders = select(
-        func.date(Order.created_at).label('date'),
-        func.sum(Order.total_amount).label('order_amount'),
-        func.count(Order.id).label('order_count')
+        DailyOrderRollup.stat_date.label('date'),
+        func.sum(DailyOrderRollup.order_amount).label('order_amount'),
+        func.sum(DailyOrderRollup.order_count).label('order_count')
     ).where(
-        func.date(Order.created_at) >= start_date
+        DailyOrderRollup.stat_date >= start_date
     ).group_by(
-        func.date(Order.created_at)
+        DailyOrderRollup.stat_date
     )
 
     result_orders = await db.execute(stmt_orders)
     orders_dict = {row.date: row for row in result_orders.all()}
 
-    # 查询每日收款数据
+    # 查询每日收款数据（读取收款日汇总表）
     stmt_payments = select(
-        func.date(OrderPayment.payment_date).label('date'),
-        func.sum(OrderPayment.payment_amount).label('payment_amount'),
-        func.count(OrderPayment.id).label('payment_count')
+        DailyPaymentRollup.stat_date.label('date'),
+        func.sum(DailyPaymentRollup.payment_amount).label('payment_amount'),
+        func.sum(DailyPaymentRollup.payment_count).label('payment_count')
     ).where(
-        and_(
-            func.date(OrderPayment.payment_date) >= start_date,
-            OrderPayment.status == PaymentStatus.CONFIRMED
-        )
+        DailyPaymentRollup.stat_date >= start_date
     ).group_by(
-        func.date(OrderPayment.payment_date)
+        DailyPaymentRollup.stat_date
     )
 
     result_payments = await db.execute(stmt_payments)
@@ -328,8 +323,8 @@ async def get_sales_payment_trend(
 
         order_amount = order_row.order_amount if order_row else Decimal("0.00")
         payment_amount = payment_row.payment_amount if payment_row else Decimal("0.00")
-        order_count = order_row.order_count if order_row else 0
-        payment_count = payment_row.payment_count if payment_row else 0
+        order_count = int(order_row.order_count or 0) if order_row else 0
+        payment_count = int(payment_row.payment_count or 0) if payment_row else 0
 
         daily_data.append(DailyTrend(
             date=current_date,
@@ -359,93 +354,148 @@ async def get_sales_payment_trend(
 
 # ==================== 应收账款账龄分析 ====================
 
-async def get_receivables_aging_analysis(db: AsyncSession) -> ReceivablesAgingAnalysis:
+# 账龄区间定义：(区间名称, 天数范围, 区间上限天数)，最后一个区间无上限
+AGING_BRACKETS = [
+    ('0-7天', '0-7天', 7),
+    ('8-30天', '8-30天', 30),
+    ('31-60天', '31-60天', 60),
+    ('61-90天', '61-90天', 90),
+    ('90天以上', '90天+', None),
+]
+
+
+async def get_receivables_aging_analysis(
+    db: AsyncSession,
+    as_of_date: Optional[date] = None
+) -> ReceivablesAgingAnalysis:
     """
     获取应收账款账龄分析
-    按账龄区间统计未收款金额
+    按账龄区间统计未收款金额，账龄分桶与汇总均在数据库中完成，
+    只返回"客户 × 账龄区间"的聚合结果
+
+    Args:
+        as_of_date: 统计截止日期（默认今天），只计入截止日期当天及之前的订单和收款
     """
-    today = date.today()
+    as_of_date = as_of_date or date.today()
+    as_of_end = datetime.combine(as_of_date + timedelta(days=1), datetime.min.time())
 
-    # 子查询：每个订单的已收款金额
+    # 子查询：每个订单截至统计日的已收款金额
     subq_paid = select(
         OrderPayment.order_id,
         func.sum(OrderPayment.payment_amount).label('paid_amount')
     ).where(
-        OrderPayment.status == PaymentStatus.CONFIRMED
+        and_(
+            OrderPayment.status == PaymentStatus.CONFIRMED,
+            OrderPayment.payment_date < as_of_end
+        )
     ).group_by(
         OrderPayment.order_id
     ).subquery()
 
-    # 查询所有有欠款的订单
-    stmt = select(
-        Order.id,
-        Order.order_no,
-        Order.total_amount,
-        func.coalesce(subq_paid.c.paid_amount, 0).label('paid_amount'),
-        Order.created_at
+    # 子查询：有欠款的订单及其账龄区间序号
+    days_old = func.datediff(literal(as_of_date), Order.created_at)
+    bracket_index = case(
+        *[
+            (days_old <= upper, index)
+            for index, (_, _, upper) in enumerate(AGING_BRACKETS) if upper is not None
+        ],
+        else_=len(AGING_BRACKETS) - 1
+    )
+    unpaid_amount = Order.total_amount - func.coalesce(subq_paid.c.paid_amount, 0)
+
+    subq_unpaid = select(
+        Order.customer_id,
+        Order.customer_name,
+        unpaid_amount.label('unpaid_amount'),
+        bracket_index.label('bracket_index')
     ).outerjoin(
         subq_paid, Order.id == subq_paid.c.order_id
     ).where(
-        Order.total_amount > func.coalesce(subq_paid.c.paid_amount, 0)
+        and_(
+            Order.created_at < as_of_end,
+            unpaid_amount > 0
+        )
+    ).subquery()
+
+    # 按客户、账龄区间聚合
+    stmt = select(
+        subq_unpaid.c.customer_id,
+        subq_unpaid.c.customer_name,
+        subq_unpaid.c.bracket_index,
+        func.sum(subq_unpaid.c.unpaid_amount).label('amount'),
+        func.count().label('order_count')
+    ).group_by(
+        subq_unpaid.c.customer_id,
+        subq_unpaid.c.customer_name,
+        subq_unpaid.c.bracket_index
     )
 
     result = await db.execute(stmt)
     rows = result.all()
 
-    # 初始化账龄区间
-    brackets = {
-        '0-7': {'amount': Decimal("0.00"), 'count': 0, 'name': '0-7天', 'range': '0-7天'},
-        '8-30': {'amount': Decimal("0.00"), 'count': 0, 'name': '8-30天', 'range': '8-30天'},
-        '31-60': {'amount': Decimal("0.00"), 'count': 0, 'name': '31-60天', 'range': '31-60天'},
-        '61-90': {'amount': Decimal("0.00"), 'count': 0, 'name': '61-90天', 'range': '61-90天'},
-        '90+': {'amount': Decimal("0.00"), 'count': 0, 'name': '90天以上', 'range': '90天+'}
-    }
+    # 汇总各账龄区间与各客户
+    bracket_amounts = [Decimal("0.00")] * len(AGING_BRACKETS)
+    bracket_counts = [0] * len(AGING_BRACKETS)
+    customer_map = {}
 
-    total_receivable = Decimal("0.00")
-
-    # 按账龄分类统计
     for row in rows:
-        unpaid_amount = row.total_amount - (row.paid_amount or Decimal("0.00"))
-        days_old = (today - row.created_at.date()).days
-
-        total_receivable += unpaid_amount
-
-        if days_old <= 7:
-            brackets['0-7']['amount'] += unpaid_amount
-            brackets['0-7']['count'] += 1
-        elif days_old <= 30:
-            brackets['8-30']['amount'] += unpaid_amount
-            brackets['8-30']['count'] += 1
-        elif days_old <= 60:
-            brackets['31-60']['amount'] += unpaid_amount
-            brackets['31-60']['count'] += 1
-        elif days_old <= 90:
-            brackets['61-90']['amount'] += unpaid_amount
-            brackets['61-90']['count'] += 1
-        else:
-            brackets['90+']['amount'] += unpaid_amount
-            brackets['90+']['count'] += 1
+        index = int(row.bracket_index)
+        amount = row.amount or Decimal("0.00")
+
+        bracket_amounts[index] += amount
+        bracket_counts[index] += row.order_count
+
+        key = (row.customer_id, row.customer_name)
+        if key not in customer_map:
+            customer_map[key] = {
+                'amounts': [Decimal("0.00")] * len(AGING_BRACKETS),
+                'order_count': 0
+            }
+        customer_map[key]['amounts'][index] += amount
+        customer_map[key]['order_count'] += row.order_count
+
+    total_receivable = sum(bracket_amounts, Decimal("0.00"))
 
     # 计算百分比
     aging_brackets = []
-    for key, data in brackets.items():
-        percentage = (data['amount'] / total_receivable * 100).quantize(Decimal("0.01")) if total_receivable > 0 else Decimal("0.00")
+    for index, (name, days_range, _) in enumerate(AGING_BRACKETS):
+        amount = bracket_amounts[index]
+        percentage = (amount / total_receivable * 100).quantize(Decimal("0.01")) if total_receivable > 0 else Decimal("0.00")
         aging_brackets.append(AgingBracket(
-            bracket_name=data['name'],
-            days_range=data['range'],
-            amount=data['amount'],
-            order_count=data['count'],
+            bracket_name=name,
+            days_range=days_range,
+            amount=amount,
+            order_count=bracket_counts[index],
             percentage=percentage
         ))
 
+    # 客户账龄明细（按欠款金额倒序）
+    customers = [
+        CustomerAging(
+            customer_id=customer_id,
+            customer_name=customer_name,
+            total_unpaid=sum(data['amounts'], Decimal("0.00")),
+            unpaid_order_count=data['order_count'],
+            amount_0_7=data['amounts'][0],
+            amount_8_30=data['amounts'][1],
+            amount_31_60=data['amounts'][2],
+            amount_61_90=data['amounts'][3],
+            amount_90_plus=data['amounts'][4]
+        )
+        for (customer_id, customer_name), data in customer_map.items()
+    ]
+    customers.sort(key=lambda c: c.total_unpaid, reverse=True)
+
     return ReceivablesAgingAnalysis(
+        as_of_date=as_of_date,
         total_receivable=total_receivable,
         aging_brackets=aging_brackets,
         bracket_0_7=aging_brackets[0],
         bracket_8_30=aging_brackets[1],
         bracket_31_60=aging_brackets[2],
         bracket_61_90=aging_brackets[3],
-        bracket_90_plus=aging_brackets[4]
+        bracket_90_plus=aging_brackets[4],
+        customers=customers
     )
 
 
@@ -456,21 +506,36 @@ async def get_financial_overview(db: AsyncSession) -> FinancialOverview:
     获取综合财务概览
     汇总订单、收款、应收款等关键指标
     """
-    # 查询订单统计
+    month_start = date.today().replace(day=1)
+
+    # 查询订单统计（总量与本月数据均读取订单日汇总表）
     stmt_orders = select(
-        func.count(Order.id).label('total_orders'),
-        func.sum(Order.total_amount).label('total_order_amount'),
-        func.sum(case((Order.status == 'COMPLETED', 1), else_=0)).label('completed_orders')
+        func.sum(DailyOrderRollup.order_count).label('total_orders'),
+        func.sum(DailyOrderRollup.order_amount).label('total_order_amount'),
+        func.sum(
+            case((DailyOrderRollup.stat_date >= month_start, DailyOrderRollup.order_count), else_=0)
+        ).label('month_order_count'),
+        func.sum(
+            case((DailyOrderRollup.stat_date >= month_start, DailyOrderRollup.order_amount), else_=0)
+        ).label('month_order_amount')
     )
     result_orders = await db.execute(stmt_orders)
     orders_data = result_orders.first()
 
-    # 查询收款统计
+    # 已完成订单数依赖订单当前状态，不适合按日汇总，直接计数
+    stmt_completed = select(func.count(Order.id)).where(Order.status == 'COMPLETED')
+    completed_orders = (await db.execute(stmt_completed)).scalar() or 0
+
+    # 查询收款统计（读取收款日汇总表）
     stmt_payments = select(
-        func.count(OrderPayment.id).label('total_payments'),
-        func.sum(OrderPayment.payment_amount).label('total_payment_amount')
-    ).where(
-        OrderPayment.status == PaymentStatus.CONFIRMED
+        func.sum(DailyPaymentRollup.payment_count).label('total_payments'),
+        func.sum(DailyPaymentRollup.payment_amount).label('total_payment_amount'),
+        func.sum(
+            case((DailyPaymentRollup.stat_date >= month_start, DailyPaymentRollup.payment_count), else_=0)
+        ).label('month_payment_count'),
+        func.sum(
+            case((DailyPaymentRollup.stat_date >= month_start, DailyPaymentRollup.payment_amount), else_=0)
+        ).label('month_payment_amount')
     )
     result_payments = await db.execute(stmt_payments)
     payments_data = result_payments.first()
@@ -508,42 +573,18 @@ async def get_financial_overview(db: AsyncSession) -> FinancialOverview:
     result_overdue = await db.execute(stmt_overdue)
     overdue_data = result_overdue.first()
 
-    # 本月统计
-    month_start = date.today().replace(day=1)
-
-    stmt_month_orders = select(
-        func.sum(Order.total_amount).label('month_order_amount'),
-        func.count(Order.id).label('month_order_count')
-    ).where(
-        func.date(Order.created_at) >= month_start
-    )
-    result_month_orders = await db.execute(stmt_month_orders)
-    month_orders_data = result_month_orders.first()
-
-    stmt_month_payments = select(
-        func.sum(OrderPayment.payment_amount).label('month_payment_amount'),
-        func.count(OrderPayment.id).label('month_payment_count')
-    ).where(
-        and_(
-            func.date(OrderPayment.payment_date) >= month_start,
-            OrderPayment.status == PaymentStatus.CONFIRMED
-        )
-    )
-    result_month_payments = await db.execute(stmt_month_payments)
-    month_payments_data = result_month_payments.first()
-
     return FinancialOverview(
-        total_orders=orders_data.total_orders or 0,
+        total_orders=int(orders_data.total_orders or 0),
         total_order_amount=total_order_amount,
-        completed_orders=orders_data.completed_orders or 0,
-        total_payments=payments_data.total_payments or 0,
+        completed_orders=completed_orders,
+        total_payments=int(payments_data.total_payments or 0),
         total_payment_amount=total_payment_amount,
         payment_rate=payment_rate,
         total_receivable=total_receivable,
         overdue_amount=overdue_data.overdue_amount or Decimal("0.00"),
         overdue_count=overdue_data.overdue_count or 0,
-        month_order_amount=month_orders_data.month_order_amount or Decimal("0.00"),
-        month_payment_amount=month_payments_data.month_payment_amount or Decimal("0.00"),
-        month_order_count=month_orders_data.month_order_count or 0,
-        month_payment_count=month_payments_data.month_payment_count or 0
+        month_order_amount=orders_data.month_order_amount or Decimal("0.00"),
+        month_payment_amount=payments_data.month_payment_amount or Decimal("0.00"),
+        month_order_count=int(orders_data.month_order_count or 0),
+        month_payment_count=int(payments_data.month_payment_count or 0)
     )
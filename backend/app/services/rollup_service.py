@@ -0,0 +1,257 @@
+"""
+报表日汇总维护Service层
+订单、收款写入时增量更新日汇总表，并提供全量重建功能
+"""
+from sqlalchemy import select, func, delete, and_, literal, true
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime, timedelta
+from typing import Optional
+from decimal import Decimal
+
+from app.models.order import Order
+from app.models.payment import OrderPayment, PaymentMethod, PaymentStatus
+from app.models.report_rollup import DailyOrderRollup, DailyPaymentRollup
+
+
+def _to_date(value) -> date:
+    """将datetime/date统一为date"""
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+# ==================== 增量更新 ====================
+
+async def apply_order_delta(
+    db: AsyncSession,
+    stat_date: date,
+    customer_id: Optional[int],
+    count_delta: int,
+    amount_delta: Decimal
+) -> None:
+    """
+    累加订单日汇总
+    使用 INSERT ... ON DUPLICATE KEY UPDATE，一条语句完成新增或累加
+    """
+    stmt = mysql_insert(DailyOrderRollup).values(
+        stat_date=stat_date,
+        customer_id=customer_id or 0,
+        order_count=count_delta,
+        order_amount=amount_delta,
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_duplicate_key_update(
+        order_count=DailyOrderRollup.order_count + stmt.inserted.order_count,
+        order_amount=DailyOrderRollup.order_amount + stmt.inserted.order_amount,
+        updated_at=stmt.inserted.updated_at
+    )
+    await db.execute(stmt)
+
+
+async def apply_payment_delta(
+    db: AsyncSession,
+    stat_date: date,
+    customer_id: Optional[int],
+    payment_method: PaymentMethod,
+    count_delta: int,
+    amount_delta: Decimal
+) -> None:
+    """累加收款日汇总"""
+    stmt = mysql_insert(DailyPaymentRollup).values(
+        stat_date=stat_date,
+        customer_id=customer_id or 0,
+        payment_method=payment_method,
+        payment_count=count_delta,
+        payment_amount=amount_delta,
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_duplicate_key_update(
+        payment_count=DailyPaymentRollup.payment_count + stmt.inserted.payment_count,
+        payment_amount=DailyPaymentRollup.payment_amount + stmt.inserted.payment_amount,
+        updated_at=stmt.inserted.updated_at
+    )
+    await db.execute(stmt)
+
+
+async def record_order(db: AsyncSession, order: Order, sign: int = 1) -> None:
+    """
+    记录订单对日汇总的影响
+    sign=1 新增订单，sign=-1 删除订单
+    """
+    created_at = order.created_at or datetime.utcnow()
+    await apply_order_delta(
+        db,
+        stat_date=_to_date(created_at),
+        customer_id=order.customer_id,
+        count_delta=sign,
+        amount_delta=(order.total_amount or Decimal("0.00")) * sign
+    )
+
+
+def payment_snapshot(payment: OrderPayment) -> dict:
+    """
+    记录收款在变更前的汇总维度
+    更新收款前调用，变更后用 record_payment_change 冲销旧值、累加新值
+    """
+    return {
+        "status": payment.status,
+        "payment_date": payment.payment_date,
+        "payment_method": payment.payment_method,
+        "payment_amount": payment.payment_amount,
+    }
+
+
+async def _get_order_customer_id(db: AsyncSession, order_id: int) -> Optional[int]:
+    """查询订单关联的客户ID"""
+    result = await db.execute(select(Order.customer_id).where(Order.id == order_id))
+    return result.scalar_one_or_none()
+
+
+async def _apply_payment_snapshot(
+    db: AsyncSession,
+    snapshot: dict,
+    customer_id: Optional[int],
+    sign: int
+) -> None:
+    """按快照累加/冲销收款汇总（仅已确认收款计入汇总）"""
+    if snapshot["status"] != PaymentStatus.CONFIRMED:
+        return
+
+    await apply_payment_delta(
+        db,
+        stat_date=_to_date(snapshot["payment_date"]),
+        customer_id=customer_id,
+        payment_method=PaymentMethod(snapshot["payment_method"]),
+        count_delta=sign,
+        amount_delta=Decimal(snapshot["payment_amount"]) * sign
+    )
+
+
+async def record_payment(
+    db: AsyncSession,
+    payment: OrderPayment,
+    customer_id: Optional[int] = None
+) -> None:
+    """记录新增收款对日汇总的影响"""
+    if customer_id is None:
+        customer_id = await _get_order_customer_id(db, payment.order_id)
+
+    await _apply_payment_snapshot(db, payment_snapshot(payment), customer_id, sign=1)
+
+
+async def record_payment_change(
+    db: AsyncSession,
+    old_snapshot: dict,
+    payment: OrderPayment
+) -> None:
+    """
+    记录收款变更（修改金额/方式/日期，或取消）对日汇总的影响
+    先冲销旧快照，再累加新值
+    """
+    new_snapshot = payment_snapshot(payment)
+    if new_snapshot == old_snapshot:
+        return
+
+    customer_id = await _get_order_customer_id(db, payment.order_id)
+    await _apply_payment_snapshot(db, old_snapshot, customer_id, sign=-1)
+    await _apply_payment_snapshot(db, new_snapshot, customer_id, sign=1)
+
+
+# ==================== 全量重建 ====================
+
+async def rebuild_rollups(
+    db: AsyncSession,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> dict:
+    """
+    重建日汇总表
+    删除指定日期范围内的汇总数据，再用 INSERT ... SELECT 从明细表重新聚合
+
+    Args:
+        start_date: 开始日期（为空表示不限）
+        end_date: 结束日期（为空表示不限，包含当天）
+
+    Returns:
+        重建后的汇总行数
+    """
+    order_date = func.date(Order.created_at)
+    payment_date = func.date(OrderPayment.payment_date)
+
+    # 使用半开区间过滤，保证明细表上的时间索引可用
+    order_filters = []
+    payment_filters = [OrderPayment.status == PaymentStatus.CONFIRMED]
+    rollup_order_filters = []
+    rollup_payment_filters = []
+
+    if start_date:
+        start_dt = datetime.combine(start_date, datetime.min.time())
+        order_filters.append(Order.created_at >= start_dt)
+        payment_filters.append(OrderPayment.payment_date >= start_dt)
+        rollup_order_filters.append(DailyOrderRollup.stat_date >= start_date)
+        rollup_payment_filters.append(DailyPaymentRollup.stat_date >= start_date)
+
+    if end_date:
+        end_dt = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+        order_filters.append(Order.created_at < end_dt)
+        payment_filters.append(OrderPayment.payment_date < end_dt)
+        rollup_order_filters.append(DailyOrderRollup.stat_date <= end_date)
+        rollup_payment_filters.append(DailyPaymentRollup.stat_date <= end_date)
+
+    # 1. 清除旧汇总
+    await db.execute(delete(DailyOrderRollup).where(and_(true(), *rollup_order_filters)))
+    await db.execute(delete(DailyPaymentRollup).where(and_(true(), *rollup_payment_filters)))
+
+    now = datetime.utcnow()
+
+    # 2. 重建订单日汇总
+    order_select = select(
+        order_date,
+        func.coalesce(Order.customer_id, 0),
+        func.count(Order.id),
+        func.coalesce(func.sum(Order.total_amount), 0),
+        literal(now)
+    ).where(
+        and_(true(), *order_filters)
+    ).group_by(
+        order_date,
+        func.coalesce(Order.customer_id, 0)
+    )
+    order_result = await db.execute(
+        DailyOrderRollup.__table__.insert().from_select(
+            ["stat_date", "customer_id", "order_count", "order_amount", "updated_at"],
+            order_select
+        )
+    )
+
+    # 3. 重建收款日汇总（客户维度取自订单）
+    payment_select = select(
+        payment_date,
+        func.coalesce(Order.customer_id, 0),
+        OrderPayment.payment_method,
+        func.count(OrderPayment.id),
+        func.coalesce(func.sum(OrderPayment.payment_amount), 0),
+        literal(now)
+    ).join(
+        Order, OrderPayment.order_id == Order.id
+    ).where(
+        and_(*payment_filters)
+    ).group_by(
+        payment_date,
+        func.coalesce(Order.customer_id, 0),
+        OrderPayment.payment_method
+    )
+    payment_result = await db.execute(
+        DailyPaymentRollup.__table__.insert().from_select(
+            ["stat_date", "customer_id", "payment_method", "payment_count", "payment_amount", "updated_at"],
+            payment_select
+        )
+    )
+
+    await db.commit()
+
+    return {
+        "order_rollup_rows": order_result.rowcount,
+        "payment_rollup_rows": payment_result.rowcount
+    }
@@ -0,0 +1,524 @@
+"""
+核心算法：有限产能生产排程服务
+为待生产/生产中的生产工单生成每台印刷机的生产时间线
+
+算法:
+1. 优先级列表排程：按（优先级, 计划完成时间, 工单ID）排序，依次分配到完工时间最早的设备
+   （考虑设备速度、支持的纸张尺寸与换纸时间）
+2. 局部搜索：在每台设备的队列内尝试将工单前后移动（最多 SCHEDULE_SEARCH_WINDOW 个位置），
+   接受使加权完工时间下降的调整（主要效果是把相同纸张的工单排在一起，减少换纸）
+
+目标函数: Σ 权重 × 完工时间，权重 = 11 - 优先级（优先级1的工单权重为10）
+生产中的工单固定在原设备队首，不参与调整
+
+性能: 2000个工单 × 20台设备排程耗时约 0.3 秒，局部搜索最长 SCHEDULE_SEARCH_SECONDS 秒（见 scripts/benchmark_schedule.py）
+"""
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.machine import Machine, MachineStatus, sheet_fits
+from app.models.material import Material
+from app.models.production import ProductionOrder, ProductionOrderItem, ProductionStatus
+
+
+@dataclass
+class ScheduleJob:
+    """待排程工单"""
+    id: int
+    production_no: str
+    priority: int
+    sheets: int  # 剩余用纸张数
+    paper_id: Optional[int]  # 主要纸张（用量最大的明细）
+    gram_weight: Optional[int]
+    extra_changeovers: int = 0  # 工单内其他纸张的换纸次数
+    machine_name: Optional[str] = None  # 指定设备（为空时可分配到任意设备）
+    pinned: bool = False  # 生产中：固定在指定设备队首
+    due: Optional[datetime] = None  # 原计划完成时间，用于排序
+    sheet_length: Optional[int] = None  # 主要纸张尺寸 mm（用于匹配设备支持的纸张尺寸）
+    sheet_width: Optional[int] = None
+
+    @property
+    def weight(self) -> int:
+        return 11 - self.priority
+
+
+@dataclass
+class Press:
+    """印刷设备"""
+    name: str
+    sheets_per_hour: int
+    available_from: Optional[datetime] = None  # 最早可用时间（默认为排程开始时间）
+    max_sheet_length: Optional[int] = None
+    max_sheet_width: Optional[int] = None
+    min_sheet_length: Optional[int] = None
+    min_sheet_width: Optional[int] = None
+
+    def supports(self, job: "ScheduleJob") -> bool:
+        return sheet_fits(
+            job.sheet_length, job.sheet_width,
+            self.max_sheet_length, self.max_sheet_width, self.min_sheet_length, self.min_sheet_width
+        )
+
+
+@dataclass
+class ScheduleEntry:
+    """排程结果中的一个工单"""
+    job: ScheduleJob
+    start: float  # 距排程开始的小时数（含换纸）
+    end: float
+    changeover: float  # 换纸耗时（小时）
+
+
+@dataclass
+class ScheduleResult:
+    """排程结果"""
+    start_time: datetime
+    timelines: Dict[str, List[ScheduleEntry]] = field(default_factory=dict)
+    weighted_completion: float = 0.0
+    search_moves: int = 0
+    elapsed_ms: float = 0.0
+
+
+class Scheduler:
+    """
+    有限产能排程器（纯计算，不访问数据库）
+
+    使用示例:
+        scheduler = Scheduler(presses)
+        result = scheduler.schedule(jobs, datetime.now())
+    """
+
+    def __init__(
+        self,
+        presses: Sequence[Press],
+        changeover_minutes: Optional[float] = None,
+        minor_changeover_minutes: Optional[float] = None,
+        search_window: Optional[int] = None,
+        search_seconds: Optional[float] = None
+    ):
+        if not presses:
+            raise ValueError("没有可用的生产设备")
+        self.presses = list(presses)
+        self.changeover = (changeover_minutes if changeover_minutes is not None
+                           else settings.SCHEDULE_CHANGEOVER_MINUTES) / 60
+        self.minor_changeover = (minor_changeover_minutes if minor_changeover_minutes is not None
+                                 else settings.SCHEDULE_MINOR_CHANGEOVER_MINUTES) / 60
+        self.search_window = search_window if search_window is not None else settings.SCHEDULE_SEARCH_WINDOW
+        self.search_seconds = search_seconds if search_seconds is not None else settings.SCHEDULE_SEARCH_SECONDS
+
+    def changeover_hours(self, prev: Optional[ScheduleJob], job: ScheduleJob) -> float:
+        """换纸耗时：同一纸张为0，克重相同的纸张为小换纸，其他为完整换纸"""
+        if prev is None or prev.paper_id == job.paper_id:
+            return 0.0
+        if prev.gram_weight is not None and prev.gram_weight == job.gram_weight:
+            return self.minor_changeover
+        return self.changeover
+
+    def schedule(self, jobs: Sequence[ScheduleJob], start_time: datetime) -> ScheduleResult:
+        """
+        生成排程
+
+        Raises:
+            ValueError: 工单指定的设备不存在，或没有支持该纸张尺寸的设备
+        """
+        started = time.perf_counter()
+        press_index = {press.name: i for i, press in enumerate(self.presses)}
+        for job in jobs:
+            if job.machine_name is not None and job.machine_name not in press_index:
+                raise ValueError(f"工单 {job.production_no} 指定的设备 {job.machine_name} 不存在")
+            if job.machine_name is None and not any(press.supports(job) for press in self.presses):
+                raise ValueError(
+                    f"工单 {job.production_no} 的纸张尺寸 {job.sheet_length}x{job.sheet_width}mm 没有可用的设备"
+                )
+
+        offsets = [
+            max((press.available_from - start_time).total_seconds() / 3600, 0.0)
+            if press.available_from else 0.0
+            for press in self.presses
+        ]
+        sequences: List[List[ScheduleJob]] = [[] for _ in self.presses]
+        pinned_counts = [0] * len(self.presses)
+
+        # 生产中的工单固定在原设备队首
+        for job in jobs:
+            if job.pinned:
+                i = press_index[job.machine_name]
+                sequences[i].append(job)
+                pinned_counts[i] += 1
+
+        self._list_schedule(
+            sorted(
+                (job for job in jobs if not job.pinned),
+                key=lambda job: (job.priority, job.due is None, job.due or start_time, job.id)
+            ),
+            sequences, offsets, press_index
+        )
+
+        # 局部搜索时间上限按设备平均分配，避免前面的设备用完全部时间
+        search_end = started + self.search_seconds
+        moves = 0
+        for i in range(len(self.presses)):
+            now = time.perf_counter()
+            deadline = now + max(search_end - now, 0.0) / (len(self.presses) - i)
+            moves += self._improve(sequences[i], pinned_counts[i], offsets[i], self.presses[i], deadline)
+
+        result = ScheduleResult(start_time=start_time, search_moves=moves)
+        for i, press in enumerate(self.presses):
+            entries = self._timeline(sequences[i], offsets[i], press)
+            result.timelines[press.name] = entries
+            result.weighted_completion += sum(entry.job.weight * entry.end for entry in entries)
+        result.elapsed_ms = (time.perf_counter() - started) * 1000
+        return result
+
+    def _duration(self, job: ScheduleJob, press: Press) -> float:
+        return job.sheets / press.sheets_per_hour + job.extra_changeovers * self.changeover
+
+    def _list_schedule(
+        self,
+        jobs: Sequence[ScheduleJob],
+        sequences: List[List[ScheduleJob]],
+        offsets: List[float],
+        press_index: Dict[str, int]
+    ) -> None:
+        """优先级列表排程：依次将工单分配到完工时间最早的设备"""
+        free = []
+        last: List[Optional[ScheduleJob]] = []
+        for i, press in enumerate(self.presses):
+            t = offsets[i]
+            prev = None
+            for job in sequences[i]:
+                t += self.changeover_hours(prev, job) + self._duration(job, press)
+                prev = job
+            free.append(t)
+            last.append(prev)
+
+        for job in jobs:
+            if job.machine_name is not None:
+                candidates = [press_index[job.machine_name]]
+            else:
+                candidates = [i for i, press in enumerate(self.presses) if press.supports(job)]
+            best, best_end = -1, 0.0
+            for i in candidates:
+                end = free[i] + self.changeover_hours(last[i], job) + self._duration(job, self.presses[i])
+                if best < 0 or end < best_end:
+                    best, best_end = i, end
+            sequences[best].append(job)
+            free[best] = best_end
+            last[best] = job
+
+    def _completions(self, sequence: List[ScheduleJob], offset: float, press: Press) -> List[float]:
+        completions = []
+        t = offset
+        prev = None
+        for job in sequence:
+            t += self.changeover_hours(prev, job) + self._duration(job, press)
+            completions.append(t)
+            prev = job
+        return completions
+
+    def _improve(
+        self,
+        sequence: List[ScheduleJob],
+        fixed: int,
+        offset: float,
+        press: Press,
+        deadline: float
+    ) -> int:
+        """
+        设备队列内的局部搜索：把工单移动到前后 search_window 个位置内，接受使加权完工时间下降的移动
+        只重新计算受影响的区间，区间之后的工单整体平移（成本变化 = 平移量 × 后续权重之和）
+        """
+        n = len(sequence)
+        window = self.search_window
+        if n - fixed < 2 or window <= 0:
+            return 0
+
+        # 热点循环使用下标数组，避免属性访问与方法调用
+        major, minor = self.changeover, self.minor_changeover
+        order = list(range(n))
+        duration = [self._duration(job, press) for job in sequence]
+        weight = [job.weight for job in sequence]
+        paper = [job.paper_id for job in sequence]
+        gram = [job.gram_weight for job in sequence]
+
+        def changeover(a: int, b: int) -> float:
+            if paper[a] == paper[b]:
+                return 0.0
+            return minor if gram[a] is not None and gram[a] == gram[b] else major
+
+        completions = [0.0] * n
+        t = offset
+        for k in range(n):
+            if k:
+                t += changeover(order[k - 1], order[k])
+            t += duration[order[k]]
+            completions[k] = t
+        suffix_weights = [0] * (n + 1)
+        for k in range(n - 1, -1, -1):
+            suffix_weights[k] = suffix_weights[k + 1] + weight[order[k]]
+
+        moves = 0
+        improved = True
+        while improved:
+            improved = False
+            for p in range(fixed, n):
+                if time.perf_counter() >= deadline:
+                    improved = False
+                    break
+                for q in range(max(fixed, p - window), min(n - 1, p + window) + 1):
+                    if q == p:
+                        continue
+                    lo, hi = (p, q) if p < q else (q, p)
+                    # 移动后的区间 [lo, hi]，并包含 hi+1（其前一个工单发生变化）
+                    segment = order[lo:hi + 1]
+                    segment.insert(q - lo, segment.pop(p - lo))
+                    end = hi + 1 if hi + 1 < n else hi
+                    if end > hi:
+                        segment.append(order[end])
+
+                    prev = order[lo - 1] if lo > 0 else -1
+                    t = completions[lo - 1] if lo > 0 else offset
+                    delta = 0.0
+                    for k, j in enumerate(segment, lo):
+                        if prev >= 0:
+                            t += changeover(prev, j)
+                        t += duration[j]
+                        delta += weight[j] * t - weight[order[k]] * completions[k]
+                        prev = j
+                    shift = t - completions[end]
+                    delta += shift * suffix_weights[end + 1]
+
+                    if delta < -1e-9:
+                        order[lo:end + 1] = segment
+                        t = completions[lo - 1] if lo > 0 else offset
+                        for k in range(lo, end + 1):
+                            if k:
+                                t += changeover(order[k - 1], order[k])
+                            t += duration[order[k]]
+                            completions[k] = t
+                        if shift:
+                            for k in range(end + 1, n):
+                                completions[k] += shift
+                        for k in range(hi, lo - 1, -1):
+                            suffix_weights[k] = suffix_weights[k + 1] + weight[order[k]]
+                        moves += 1
+                        improved = True
+                        break
+
+        sequence[:] = [sequence[j] for j in order]
+        return moves
+
+    def _timeline(self, sequence: List[ScheduleJob], offset: float, press: Press) -> List[ScheduleEntry]:
+        entries = []
+        t = offset
+        prev = None
+        for job in sequence:
+            changeover = self.changeover_hours(prev, job)
+            start = t
+            t += changeover + self._duration(job, press)
+            entries.append(ScheduleEntry(job=job, start=start, end=t, changeover=changeover))
+            prev = job
+        return entries
+
+
+# ==================== 数据加载与保存 ====================
+
+async def load_presses(db: AsyncSession) -> List[Press]:
+    """可用设备（设备档案中状态为ACTIVE的设备，未建档时使用 SCHEDULE_MACHINES 配置）"""
+    machines = (await db.execute(
+        select(Machine).where(Machine.status == MachineStatus.ACTIVE).order_by(Machine.machine_name)
+    )).scalars().all()
+    if not machines:
+        return [Press(name=name, sheets_per_hour=speed) for name, speed in settings.SCHEDULE_MACHINES.items()]
+    return [
+        Press(
+            name=machine.machine_name,
+            sheets_per_hour=machine.sheets_per_hour,
+            max_sheet_length=machine.max_sheet_length,
+            max_sheet_width=machine.max_sheet_width,
+            min_sheet_length=machine.min_sheet_length,
+            min_sheet_width=machine.min_sheet_width
+        )
+        for machine in machines
+    ]
+
+
+async def load_schedule_jobs(db: AsyncSession) -> List[ScheduleJob]:
+    """
+    加载待排程工单（PENDING/IN_PROGRESS），剩余张数按明细未完成比例折算 paper_usage
+    两次查询：工单、明细（含纸张克重）
+    """
+    order_rows = (await db.execute(
+        select(
+            ProductionOrder.id,
+            ProductionOrder.production_no,
+            ProductionOrder.priority,
+            ProductionOrder.status,
+            ProductionOrder.machine_name,
+            ProductionOrder.plan_end_date
+        ).where(ProductionOrder.status.in_([ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS]))
+    )).all()
+    if not order_rows:
+        return []
+
+    item_rows = (await db.execute(
+        select(
+            ProductionOrderItem.production_order_id,
+            ProductionOrderItem.paper_material_id,
+            ProductionOrderItem.paper_usage,
+            ProductionOrderItem.plan_quantity,
+            ProductionOrderItem.completed_quantity,
+            Material.gram_weight,
+            Material.spec_length,
+            Material.spec_width
+        )
+        .join(Material, Material.id == ProductionOrderItem.paper_material_id, isouter=True)
+        .join(ProductionOrder, ProductionOrder.id == ProductionOrderItem.production_order_id)
+        .where(ProductionOrder.status.in_([ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS]))
+    )).all()
+
+    # 每个工单按纸张汇总剩余张数
+    papers: Dict[int, Dict[int, List[Any]]] = {}
+    for row in item_rows:
+        usage = row.paper_usage or 0
+        if row.plan_quantity:
+            remaining = max(row.plan_quantity - (row.completed_quantity or 0), 0)
+            usage = usage * remaining / row.plan_quantity
+        by_paper = papers.setdefault(row.production_order_id, {})
+        entry = by_paper.setdefault(
+            row.paper_material_id, [0.0, row.gram_weight, row.spec_length, row.spec_width]
+        )
+        entry[0] += usage
+
+    jobs = []
+    for row in order_rows:
+        by_paper = papers.get(row.id, {})
+        if by_paper:
+            paper_id, (_, gram_weight, sheet_length, sheet_width) = max(
+                by_paper.items(), key=lambda kv: kv[1][0]
+            )
+            total = sum(value[0] for value in by_paper.values())
+        else:
+            paper_id, gram_weight, sheet_length, sheet_width, total = None, None, None, None, 0.0
+        in_progress = row.status == ProductionStatus.IN_PROGRESS
+        jobs.append(ScheduleJob(
+            id=row.id,
+            production_no=row.production_no,
+            priority=row.priority or 5,
+            sheets=int(round(total)),
+            paper_id=paper_id,
+            gram_weight=gram_weight,
+            extra_changeovers=max(len(by_paper) - 1, 0),
+            machine_name=row.machine_name or None,
+            pinned=in_progress and bool(row.machine_name),
+            due=row.plan_end_date,
+            sheet_length=sheet_length,
+            sheet_width=sheet_width
+        ))
+    return jobs
+
+
+async def schedule_production(
+    db: AsyncSession,
+    presses: Optional[List[Press]] = None,
+    start_time: Optional[datetime] = None,
+    keep_assignment: bool = True,
+    apply: bool = False
+) -> Dict[str, Any]:
+    """
+    生成生产排程
+
+    Args:
+        presses: 设备列表，默认使用设备档案（未建档时使用 SCHEDULE_MACHINES 配置）；
+                 工单上出现但未建档的设备按默认速度加入
+        start_time: 排程开始时间，默认当前时间
+        keep_assignment: 待生产工单已指定设备时是否保持（生产中的工单始终保持）
+        apply: 是否将结果写回工单的计划开始/完成时间与设备
+
+    Raises:
+        ValueError: 没有可用设备
+    """
+    start_time = (start_time or datetime.now()).replace(second=0, microsecond=0)
+    jobs = await load_schedule_jobs(db)
+
+    presses = list(presses) if presses is not None else await load_presses(db)
+    known = {press.name for press in presses}
+    for job in jobs:
+        if job.machine_name and job.machine_name not in known:
+            presses.append(Press(name=job.machine_name, sheets_per_hour=settings.SCHEDULE_DEFAULT_SHEETS_PER_HOUR))
+            known.add(job.machine_name)
+        if not keep_assignment and not job.pinned:
+            job.machine_name = None
+
+    result = Scheduler(presses).schedule(jobs, start_time)
+
+    if apply and jobs:
+        values = []
+        for press_name, entries in result.timelines.items():
+            for entry in entries:
+                value = {
+                    "id": entry.job.id,
+                    "plan_end_date": start_time + timedelta(hours=entry.end),
+                    "machine_name": press_name
+                }
+                if not entry.job.pinned:
+                    value["plan_start_date"] = start_time + timedelta(hours=entry.start)
+                values.append(value)
+        # 按主键批量更新（生产中工单不修改计划开始时间，按字段分两批）
+        for batch in (
+            [v for v in values if "plan_start_date" in v],
+            [v for v in values if "plan_start_date" not in v]
+        ):
+            if batch:
+                await db.execute(update(ProductionOrder), batch)
+        await db.commit()
+
+    return format_schedule(result)
+
+
+def format_schedule(result: ScheduleResult) -> Dict[str, Any]:
+    """排程结果转换为接口返回数据"""
+    start_time = result.start_time
+    machines = []
+    makespan = 0.0
+    total_changeover = 0.0
+    for press_name, entries in result.timelines.items():
+        end = entries[-1].end if entries else 0.0
+        changeover = sum(entry.changeover for entry in entries)
+        makespan = max(makespan, end)
+        total_changeover += changeover
+        machines.append({
+            "machine_name": press_name,
+            "job_count": len(entries),
+            "finish_time": start_time + timedelta(hours=end),
+            "changeover_minutes": round(changeover * 60, 1),
+            "jobs": [
+                {
+                    "production_id": entry.job.id,
+                    "production_no": entry.job.production_no,
+                    "priority": entry.job.priority,
+                    "sheets": entry.job.sheets,
+                    "paper_material_id": entry.job.paper_id,
+                    "plan_start_date": start_time + timedelta(hours=entry.start),
+                    "plan_end_date": start_time + timedelta(hours=entry.end),
+                    "changeover_minutes": round(entry.changeover * 60, 1)
+                }
+                for entry in entries
+            ]
+        })
+
+    return {
+        "start_time": start_time,
+        "finish_time": start_time + timedelta(hours=makespan),
+        "job_count": sum(machine["job_count"] for machine in machines),
+        "changeover_minutes": round(total_changeover * 60, 1),
+        "search_moves": result.search_moves,
+        "elapsed_ms": round(result.elapsed_ms, 1),
+        "machines": machines
+    }
@@ -0,0 +1,203 @@
+"""
+生产工单/订单状态流转
+所有工单状态变化经此处执行:
+1. 加锁读取工单（SELECT ... FOR UPDATE），并发修改同一工单时串行执行
+2. 按状态流转表校验，不允许的流转抛出 ValueError
+3. 修改工单状态并记录开工/完工报工
+4. 工单完成或取消后，用一条 UPDATE ... WHERE NOT EXISTS(未结束的工单) 同步订单状态，
+   不加载同订单的其他工单；子查询在 InnoDB 中为加锁读，同一订单的两个工单同时完成时不会都漏掉同步
+5. 提交后推送 production.status / order.status 事件
+"""
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import Dict, Optional, Set
+
+from app.core.events import publish_event, CHANNEL_PRODUCTION
+from app.models.order import Order, OrderStatus
+from app.models.production import ProductionOrder, ProductionReport, ProductionStatus
+
+
+# 工单状态流转表: 当前状态 -> 允许的目标状态
+PRODUCTION_TRANSITIONS: Dict[ProductionStatus, Set[ProductionStatus]] = {
+    ProductionStatus.PENDING: {ProductionStatus.IN_PROGRESS, ProductionStatus.CANCELLED},
+    ProductionStatus.IN_PROGRESS: {ProductionStatus.COMPLETED, ProductionStatus.CANCELLED},
+    ProductionStatus.COMPLETED: set(),
+    ProductionStatus.CANCELLED: set(),
+}
+
+# 订单状态流转表
+ORDER_TRANSITIONS: Dict[OrderStatus, Set[OrderStatus]] = {
+    OrderStatus.DRAFT: {OrderStatus.CONFIRMED},
+    OrderStatus.CONFIRMED: {OrderStatus.PRODUCTION},
+    OrderStatus.PRODUCTION: {OrderStatus.COMPLETED},
+    OrderStatus.COMPLETED: set(),
+}
+
+# 不允许流转时的提示（按目标状态）
+_PRODUCTION_TRANSITION_ERRORS = {
+    ProductionStatus.IN_PROGRESS: "只有待生产状态的工单可以开始生产",
+    ProductionStatus.COMPLETED: "只有生产中状态的工单可以完成",
+}
+
+# 未结束的工单状态（存在时订单不能完成）
+OPEN_PRODUCTION_STATUSES = (ProductionStatus.PENDING, ProductionStatus.IN_PROGRESS)
+
+
+def check_production_transition(current: ProductionStatus, target: ProductionStatus) -> None:
+    """校验工单状态流转，不允许时抛出 ValueError"""
+    if target in PRODUCTION_TRANSITIONS.get(current, set()):
+        return
+    if target == ProductionStatus.CANCELLED:
+        if current == ProductionStatus.CANCELLED:
+            raise ValueError("工单已经是取消状态")
+        raise ValueError("已完成的工单不能取消")
+    raise ValueError(_PRODUCTION_TRANSITION_ERRORS.get(target, f"工单状态不能从 {current.value} 变为 {target.value}"))
+
+
+def check_reportable(current: ProductionStatus) -> None:
+    """校验工单是否可以报工（已完成、已取消的工单不能报工），不允许时抛出 ValueError"""
+    if current not in OPEN_PRODUCTION_STATUSES:
+        raise ValueError("已完成或已取消的工单不能报工")
+
+
+def check_order_transition(current: OrderStatus, target: OrderStatus, message: Optional[str] = None) -> None:
+    """校验订单状态流转，不允许时抛出 ValueError"""
+    if target not in ORDER_TRANSITIONS.get(current, set()):
+        raise ValueError(message or f"订单状态为 {current.value}，不能变为 {target.value}")
+
+
+async def sync_order_completion(db: AsyncSession, order_id: int) -> bool:
+    """
+    订单下没有未结束的工单且至少有一个工单已完成时，将订单由生产中改为已完成（已取消的工单不阻止完成）
+    只执行一条 UPDATE，返回订单状态是否变化（调用方负责提交）
+    """
+    open_exists = (
+        select(ProductionOrder.id)
+        .where(
+            ProductionOrder.order_id == order_id,
+            ProductionOrder.status.in_(OPEN_PRODUCTION_STATUSES)
+        )
+        .exists()
+    )
+    completed_exists = (
+        select(ProductionOrder.id)
+        .where(
+            ProductionOrder.order_id == order_id,
+            ProductionOrder.status == ProductionStatus.COMPLETED
+        )
+        .exists()
+    )
+    result = await db.execute(
+        update(Order)
+        .where(
+            Order.id == order_id,
+            Order.status == OrderStatus.PRODUCTION,
+            ~open_exists,
+            completed_exists
+        )
+        .values(status=OrderStatus.COMPLETED, updated_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+async def publish_production_status(
+    production_order: ProductionOrder,
+    previous_status: Optional[ProductionStatus] = None
+) -> None:
+    """推送工单状态变化事件（提交后调用）"""
+    await publish_event(CHANNEL_PRODUCTION, "production.status", {
+        "production_order_id": production_order.id,
+        "production_no": production_order.production_no,
+        "order_id": production_order.order_id,
+        "previous_status": previous_status.value if previous_status else None,
+        "status": production_order.status.value,
+        "machine_name": production_order.machine_name,
+        "operator_name": production_order.operator_name,
+        "actual_start_date": production_order.actual_start_date,
+        "actual_end_date": production_order.actual_end_date,
+        "total_plan_quantity": production_order.total_plan_quantity,
+        "total_completed_quantity": production_order.total_completed_quantity,
+        "progress_percent": float(production_order.progress_percent or 0)
+    })
+
+
+async def transition_production(
+    db: AsyncSession,
+    production_id: int,
+    target: ProductionStatus,
+    operator_name: Optional[str] = None,
+    reason: Optional[str] = None
+) -> ProductionOrder:
+    """
+    执行工单状态流转并提交
+
+    Args:
+        production_id: 生产工单ID
+        target: 目标状态
+        operator_name: 操作员（开工/完工时记录到报工）
+        reason: 取消原因（追加到备注）
+
+    Raises:
+        ValueError: 工单不存在或不允许该流转
+    """
+    result = await db.execute(
+        select(ProductionOrder).where(ProductionOrder.id == production_id).with_for_update()
+    )
+    production_order = result.scalar_one_or_none()
+
+    if not production_order:
+        raise ValueError("生产工单不存在")
+
+    previous_status = ProductionStatus(production_order.status)
+    check_production_transition(previous_status, target)
+
+    now = datetime.now()
+    production_order.status = target
+    production_order.updated_at = now
+
+    if target == ProductionStatus.IN_PROGRESS:
+        production_order.actual_start_date = now
+        production_order.operator_name = operator_name
+        db.add(ProductionReport(
+            production_order_id=production_id,
+            report_type="START",
+            completed_quantity=0,
+            rejected_quantity=0,
+            operator_name=operator_name,
+            remark="开始生产"
+        ))
+    elif target == ProductionStatus.COMPLETED:
+        production_order.actual_end_date = now
+        db.add(ProductionReport(
+            production_order_id=production_id,
+            report_type="COMPLETE",
+            completed_quantity=0,
+            rejected_quantity=0,
+            operator_name=operator_name,
+            remark="生产完成"
+        ))
+    elif target == ProductionStatus.CANCELLED and reason:
+        # 将取消原因追加到备注中
+        if production_order.remark:
+            production_order.remark = f"{production_order.remark}\n取消原因: {reason}"
+        else:
+            production_order.remark = f"取消原因: {reason}"
+
+    order_completed = False
+    if target in (ProductionStatus.COMPLETED, ProductionStatus.CANCELLED):
+        # 先写入工单状态，NOT EXISTS 子查询才能看到本工单已结束
+        await db.flush()
+        order_completed = await sync_order_completion(db, production_order.order_id)
+
+    await db.commit()
+
+    await publish_production_status(production_order, previous_status)
+    if order_completed:
+        await publish_event(CHANNEL_PRODUCTION, "order.status", {
+            "order_id": production_order.order_id,
+            "status": OrderStatus.COMPLETED.value
+        })
+
+    return production_order
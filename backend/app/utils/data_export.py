@@ -0,0 +1,256 @@
+"""
+多格式数据导出工具
+支持 xlsx / csv / parquet 三种格式，数据以批次（字典列表）的形式异步输入，流式输出
+
+- xlsx: openpyxl 只写模式（见 ExcelHandler.stream_export）
+- csv: 逐批编码后直接发送，带 UTF-8 BOM 便于 Excel 直接打开
+- parquet: pyarrow 按批写入行组（列式存储，体积小，适合BI系统拉取）
+"""
+import asyncio
+import codecs
+import csv
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from io import StringIO
+from typing import Any, AsyncIterator, Dict, List, Optional
+from urllib.parse import quote
+
+from fastapi.responses import StreamingResponse
+
+from app.utils.excel_handler import ExcelHandler, STREAM_READ_SIZE
+
+
+# 支持的导出格式：格式 -> (媒体类型, 文件扩展名)
+EXPORT_FORMATS = {
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# 接口 format 参数的校验正则
+EXPORT_FORMAT_PATTERN = '^(xlsx|csv|parquet)$'
+
+
+async def iter_single_chunk(data: List[Dict[str, Any]]) -> AsyncIterator[List[Dict[str, Any]]]:
+    """将已在内存中的数据包装为单个批次（用于报表等小数据量导出）"""
+    yield data
+
+
+def _csv_value(value: Any) -> Any:
+    """将数据值转换为写入CSV的值"""
+    if value is None:
+        return ''
+    elif isinstance(value, Enum):
+        return value.value
+    elif isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    elif isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+
+async def stream_csv(
+    row_chunks: AsyncIterator[List[Dict[str, Any]]],
+    columns: Dict[str, str]
+) -> AsyncIterator[bytes]:
+    """
+    流式导出CSV
+    首行为列标题，之后每批数据编码后立即发送
+    """
+    fields = list(columns.keys())
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(columns.values())
+    yield codecs.BOM_UTF8 + buffer.getvalue().encode('utf-8')
+
+    async for rows in row_chunks:
+        buffer.seek(0)
+        buffer.truncate(0)
+        for row_data in rows:
+            writer.writerow([_csv_value(row_data.get(field)) for field in fields])
+        yield buffer.getvalue().encode('utf-8')
+
+
+def _parquet_value(value: Any) -> Any:
+    """将数据值转换为pyarrow可识别的值"""
+    if isinstance(value, Decimal):
+        return float(value)
+    elif isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _infer_parquet_schema(rows: List[Dict[str, Any]], fields: List[str]):
+    """
+    根据首批数据推断parquet列类型（整批为空的列按字符串处理）
+    Decimal/float 列按 float64 处理；整数列中出现小数时整列提升为 float64，避免截断
+    """
+    import pyarrow as pa
+
+    arrow_fields = []
+    for field in fields:
+        values = [row.get(field) for row in rows if row.get(field) is not None]
+        sample = _parquet_value(values[0]) if values else None
+        if isinstance(sample, bool):
+            arrow_type = pa.bool_()
+        elif isinstance(sample, (int, float)) and any(
+            isinstance(value, (float, Decimal)) for value in values
+        ):
+            arrow_type = pa.float64()
+        elif isinstance(sample, int):
+            arrow_type = pa.int64()
+        elif isinstance(sample, float):
+            arrow_type = pa.float64()
+        elif isinstance(sample, datetime):
+            arrow_type = pa.timestamp('us')
+        elif isinstance(sample, date):
+            arrow_type = pa.date32()
+        else:
+            arrow_type = pa.string()
+        arrow_fields.append(pa.field(field, arrow_type))
+    return pa.schema(arrow_fields)
+
+
+def _coerce_parquet_value(value: Any, arrow_type) -> Any:
+    """按列类型转换值，保证后续批次与首批推断的类型一致"""
+    import pyarrow as pa
+
+    value = _parquet_value(value)
+    if value is None:
+        return None
+    if pa.types.is_string(arrow_type):
+        return _csv_value(value) if isinstance(value, (date, datetime)) else str(value)
+    if pa.types.is_floating(arrow_type):
+        return float(value)
+    if pa.types.is_integer(arrow_type):
+        if isinstance(value, float) and not value.is_integer():
+            raise ValueError(f"整数列中出现小数值: {value}")
+        return int(value)
+    return value
+
+
+def _write_parquet_batch(writer, schema, rows: List[Dict[str, Any]]) -> None:
+    """将一批数据写为一个行组"""
+    import pyarrow as pa
+
+    columns = {
+        field.name: [_coerce_parquet_value(row.get(field.name), field.type) for row in rows]
+        for field in schema
+    }
+    writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+
+async def stream_parquet(
+    row_chunks: AsyncIterator[List[Dict[str, Any]]],
+    columns: Dict[str, str]
+) -> AsyncIterator[bytes]:
+    """
+    流式导出Parquet
+    每批数据写为一个行组，列名使用字段名（便于程序读取）；
+    parquet 文件尾部需写入元数据，全部写完后按块读取临时文件发送
+    """
+    import pyarrow.parquet as pq
+
+    fields = list(columns.keys())
+    fd, tmp_path = tempfile.mkstemp(suffix='.parquet')
+    os.close(fd)
+
+    writer = None
+    schema = None
+    try:
+        async for rows in row_chunks:
+            if not rows:
+                continue
+            if writer is None:
+                schema = _infer_parquet_schema(rows, fields)
+                writer = pq.ParquetWriter(tmp_path, schema, compression='snappy')
+            await asyncio.to_thread(_write_parquet_batch, writer, schema, rows)
+
+        if writer is None:
+            # 无数据时输出只有列定义的空文件
+            schema = _infer_parquet_schema([], fields)
+            writer = pq.ParquetWriter(tmp_path, schema, compression='snappy')
+        writer.close()
+        writer = None
+
+        with open(tmp_path, 'rb') as f:
+            while True:
+                data = await asyncio.to_thread(f.read, STREAM_READ_SIZE)
+                if not data:
+                    break
+                yield data
+    finally:
+        if writer is not None:
+            writer.close()
+        os.remove(tmp_path)
+
+
+def export_content(
+    row_chunks: AsyncIterator[List[Dict[str, Any]]],
+    columns: Dict[str, str],
+    export_format: str = 'xlsx',
+    sheet_name: str = 'Sheet1',
+    title: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """按指定格式生成文件内容（异步字节块迭代器）"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式: {export_format}")
+
+    if export_format == 'csv':
+        return stream_csv(row_chunks, columns)
+    elif export_format == 'parquet':
+        return stream_parquet(row_chunks, columns)
+    return ExcelHandler.stream_export(row_chunks, columns, sheet_name=sheet_name, title=title)
+
+
+async def write_export_file(
+    path: str,
+    row_chunks: AsyncIterator[List[Dict[str, Any]]],
+    columns: Dict[str, str],
+    export_format: str = 'xlsx',
+    sheet_name: str = 'Sheet1',
+    title: Optional[str] = None
+) -> None:
+    """按指定格式将导出内容写入文件（后台任务生成结果文件）"""
+    content = export_content(row_chunks, columns, export_format, sheet_name=sheet_name, title=title)
+    with open(path, 'wb') as f:
+        async for data in content:
+            await asyncio.to_thread(f.write, data)
+
+
+def export_response(
+    row_chunks: AsyncIterator[List[Dict[str, Any]]],
+    columns: Dict[str, str],
+    filename: str,
+    export_format: str = 'xlsx',
+    sheet_name: str = 'Sheet1',
+    title: Optional[str] = None
+) -> StreamingResponse:
+    """
+    按指定格式生成流式下载响应
+
+    Args:
+        row_chunks: 异步迭代的数据批次，每批是字典列表
+        columns: 列定义，key是数据字段名，value是列标题
+        filename: 文件名（不含扩展名）
+        export_format: 导出格式 xlsx/csv/parquet
+        sheet_name: 工作表名称（仅xlsx）
+        title: 标题行（仅xlsx）
+    """
+    content = export_content(row_chunks, columns, export_format, sheet_name=sheet_name, title=title)
+    media_type, extension = EXPORT_FORMATS[export_format]
+
+    encoded_filename = quote(f"{filename}.{extension}")
+
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
+            "Access-Control-Expose-Headers": "Content-Disposition"
+        }
+    )
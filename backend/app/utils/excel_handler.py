@@ -2,17 +2,33 @@
 Excel导入导出工具类
 支持数据的批量导入和导出
 """
-from io import BytesIO
+import asyncio
+import codecs
+import csv
+import os
+import tempfile
+from io import BytesIO, TextIOWrapper
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Iterator, Tuple, BinaryIO
 from decimal import Decimal
 
 import pandas as pd
 from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
 
 
+# 流式导出时读取临时文件、发送给客户端的块大小（字节）
+STREAM_READ_SIZE = 64 * 1024
+
+# CSV导入的候选编码（支付宝/微信账单多为GBK，Excel另存的CSV多为带BOM的UTF-8）
+CSV_IMPORT_ENCODINGS = ('utf-8-sig', 'gb18030')
+
+# 判断CSV编码时读取的文件开头字节数
+CSV_ENCODING_SAMPLE_SIZE = 64 * 1024
+
+
 class ExcelHandler:
     """Excel处理工具类"""
 
@@ -97,16 +113,7 @@ class ExcelHandler:
                 value = row_data.get(field)
 
                 # 格式化数据
-                if value is None:
-                    cell.value = ''
-                elif isinstance(value, Decimal):
-                    cell.value = float(value)
-                elif isinstance(value, datetime):
-                    cell.value = value.strftime('%Y-%m-%d %H:%M:%S')
-                elif isinstance(value, bool):
-                    cell.value = '是' if value else '否'
-                else:
-                    cell.value = str(value)
+                cell.value = ExcelHandler.format_value(value)
 
                 cell.font = ExcelHandler.CELL_FONT
                 cell.alignment = ExcelHandler.CELL_ALIGNMENT
@@ -118,6 +125,120 @@ class ExcelHandler:
         output.seek(0)
         return output
 
+    @staticmethod
+    def format_value(value: Any) -> Any:
+        """将数据值转换为写入Excel的值"""
+        if value is None:
+            return ''
+        elif isinstance(value, Decimal):
+            return float(value)
+        elif isinstance(value, datetime):
+            return value.strftime('%Y-%m-%d %H:%M:%S')
+        elif isinstance(value, bool):
+            return '是' if value else '否'
+        return str(value)
+
+    @staticmethod
+    def _create_named_styles() -> Dict[str, NamedStyle]:
+        """创建导出用的命名样式（每个工作簿注册一次，单元格只引用样式名）"""
+        title_style = NamedStyle(name='erp_title')
+        title_style.font = Font(name='微软雅黑', size=14, bold=True)
+        title_style.alignment = Alignment(horizontal='center', vertical='center')
+
+        header_style = NamedStyle(name='erp_header')
+        header_style.font = ExcelHandler.HEADER_FONT
+        header_style.fill = ExcelHandler.HEADER_FILL
+        header_style.alignment = ExcelHandler.HEADER_ALIGNMENT
+        header_style.border = ExcelHandler.BORDER_THIN
+
+        cell_style = NamedStyle(name='erp_cell')
+        cell_style.font = ExcelHandler.CELL_FONT
+        cell_style.alignment = ExcelHandler.CELL_ALIGNMENT
+        cell_style.border = ExcelHandler.BORDER_THIN
+
+        return {'title': title_style, 'header': header_style, 'cell': cell_style}
+
+    @staticmethod
+    def _append_rows(ws, rows: List[Dict[str, Any]], fields: List[str]) -> None:
+        """向只写工作表追加一批数据行"""
+        for row_data in rows:
+            cells = []
+            for field in fields:
+                cell = WriteOnlyCell(ws, value=ExcelHandler.format_value(row_data.get(field)))
+                cell.style = 'erp_cell'
+                cells.append(cell)
+            ws.append(cells)
+
+    @staticmethod
+    async def stream_export(
+        row_chunks: AsyncIterator[List[Dict[str, Any]]],
+        columns: Dict[str, str],
+        sheet_name: str = 'Sheet1',
+        title: Optional[str] = None
+    ) -> AsyncIterator[bytes]:
+        """
+        流式导出数据到Excel（适用于大数据量导出）
+
+        使用 openpyxl 只写模式：数据行按批写入（只写工作表会边写边落盘到临时文件），
+        样式通过命名样式注册一次；xlsx 是zip格式，需在全部写完后生成文件，
+        之后按块读取临时文件发送给客户端，整个过程内存占用与总行数无关
+
+        Args:
+            row_chunks: 异步迭代的数据批次，每批是字典列表
+            columns: 列定义，key是数据字段名，value是Excel列标题
+            sheet_name: 工作表名称
+            title: 可选的标题（会添加在第一行）
+
+        Yields:
+            bytes: Excel文件内容块
+
+        Example:
+            return StreamingResponse(
+                ExcelHandler.stream_export(chunks, columns, '订单数据'),
+                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            )
+        """
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(sheet_name)
+        styles = ExcelHandler._create_named_styles()
+        for style in styles.values():
+            wb.add_named_style(style)
+
+        fields = list(columns.keys())
+
+        # 设置列宽（根据标题长度，只写模式需在写入数据前设置）
+        for col_idx, header in enumerate(columns.values(), 1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = max(15, len(header) * 2 + 2)
+
+        if title:
+            title_cell = WriteOnlyCell(ws, value=title)
+            title_cell.style = 'erp_title'
+            ws.append([title_cell])
+
+        header_cells = []
+        for header in columns.values():
+            cell = WriteOnlyCell(ws, value=header)
+            cell.style = 'erp_header'
+            header_cells.append(cell)
+        ws.append(header_cells)
+
+        # 写入数据（openpyxl为CPU密集操作，放到线程中执行，避免阻塞事件循环）
+        async for rows in row_chunks:
+            await asyncio.to_thread(ExcelHandler._append_rows, ws, rows, fields)
+
+        fd, tmp_path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            await asyncio.to_thread(wb.save, tmp_path)
+            with open(tmp_path, 'rb') as f:
+                while True:
+                    data = await asyncio.to_thread(f.read, STREAM_READ_SIZE)
+                    if not data:
+                        break
+                    yield data
+        finally:
+            os.remove(tmp_path)
+
     @staticmethod
     def import_from_excel(
         file: BytesIO,
@@ -190,6 +311,158 @@ class ExcelHandler:
         except Exception as e:
             raise ValueError(f"Excel文件解析失败: {str(e)}")
 
+    @staticmethod
+    def iter_import_chunks(
+        file: BinaryIO,
+        columns: Dict[str, str],
+        chunk_size: int = 1000,
+        sheet_name: Optional[str] = None,
+        header_scan_rows: int = 10
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        以只读模式逐批读取Excel（适用于大文件导入）
+
+        read_only 模式按行解析，不在内存中构建整个工作簿；
+        表头在前 header_scan_rows 行中自动查找（兼容带标题行的导入模板）
+
+        Args:
+            file: Excel文件对象（可seek）
+            columns: 列定义，key是数据字段名，value是Excel列标题
+            chunk_size: 每批行数
+            sheet_name: 工作表名称，如果为None则读取第一个工作表
+            header_scan_rows: 查找表头的最大行数
+
+        Yields:
+            List[Tuple[int, Dict]]: 每批数据，元素为 (Excel行号, 行数据)
+
+        Raises:
+            ValueError: 如果找不到表头
+        """
+        wb = load_workbook(file, read_only=True, data_only=True)
+        try:
+            ws = wb[sheet_name] if sheet_name else wb.active
+            yield from ExcelHandler._iter_row_chunks(
+                ws.iter_rows(values_only=True),
+                columns,
+                chunk_size,
+                header_scan_rows,
+                "Excel表头与预期格式不匹配"
+            )
+        finally:
+            wb.close()
+
+    @staticmethod
+    def iter_csv_import_chunks(
+        file: BinaryIO,
+        columns: Dict[str, str],
+        chunk_size: int = 1000,
+        header_scan_rows: int = 30,
+        encodings: Tuple[str, ...] = CSV_IMPORT_ENCODINGS
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """
+        逐批读取CSV（适用于支付宝/微信等平台导出的账单）
+
+        编码按 encodings 顺序尝试（用文件开头一段内容判断）；
+        表头在前 header_scan_rows 行中自动查找，跳过账单开头的说明行
+
+        Args:
+            file: CSV文件对象（二进制模式，可seek）
+            columns: 列定义，key是数据字段名，value是CSV列标题
+            chunk_size: 每批行数
+            header_scan_rows: 查找表头的最大行数
+            encodings: 候选编码
+
+        Yields:
+            List[Tuple[int, Dict]]: 每批数据，元素为 (CSV行号, 行数据)
+
+        Raises:
+            ValueError: 如果无法识别编码或找不到表头
+        """
+        sample = file.read(CSV_ENCODING_SAMPLE_SIZE)
+        file.seek(0)
+
+        encoding = None
+        for candidate in encodings:
+            try:
+                # 增量解码，容忍样本末尾被截断的多字节字符
+                codecs.getincrementaldecoder(candidate)().decode(sample, final=False)
+            except UnicodeDecodeError:
+                continue
+            encoding = candidate
+            break
+        if encoding is None:
+            raise ValueError("无法识别CSV文件编码")
+
+        text = TextIOWrapper(file, encoding=encoding, newline='')
+        try:
+            yield from ExcelHandler._iter_row_chunks(
+                csv.reader(text),
+                columns,
+                chunk_size,
+                header_scan_rows,
+                "CSV表头与预期格式不匹配"
+            )
+        finally:
+            # 不关闭调用方传入的文件
+            text.detach()
+
+    @staticmethod
+    def _iter_row_chunks(
+        rows: Iterator[Tuple[Any, ...]],
+        columns: Dict[str, str],
+        chunk_size: int,
+        header_scan_rows: int,
+        header_error: str
+    ) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+        """查找表头后按列定义逐批转换数据行（Excel/CSV导入共用）"""
+        header_to_field = {header: field for field, header in columns.items()}
+
+        # 查找表头行
+        headers = None
+        row_number = 0
+        for row in rows:
+            row_number += 1
+            matched = {
+                col_idx: header_to_field[str(value).strip()]
+                for col_idx, value in enumerate(row)
+                if value is not None and str(value).strip() in header_to_field
+            }
+            if matched:
+                headers = matched
+                break
+            if row_number >= header_scan_rows:
+                break
+
+        if not headers:
+            raise ValueError(header_error)
+
+        # 逐批读取数据
+        chunk = []
+        for row in rows:
+            row_number += 1
+
+            # 跳过空行
+            if all(cell is None or str(cell).strip() == '' for cell in row):
+                continue
+
+            row_data = {}
+            for col_idx, field in headers.items():
+                value = row[col_idx] if col_idx < len(row) else None
+
+                # 数据清洗
+                if isinstance(value, str):
+                    value = value.strip() or None
+
+                row_data[field] = value
+
+            chunk.append((row_number, row_data))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if chunk:
+            yield chunk
+
     @staticmethod
     def create_template(
         columns: Dict[str, str],
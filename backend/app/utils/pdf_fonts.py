@@ -0,0 +1,107 @@
+"""
+PDF中文字体注册
+字体文件解析开销大（TTC 文件数 MB），每个进程只注册一次
+
+字体查找顺序:
+1. 配置的字体文件 PDF_FONT_PATHS / PDF_BOLD_FONT_PATHS
+2. 常见系统字体路径（Linux 文泉驿/Windows 黑体雅黑宋体/macOS）
+3. reportlab 内置 CID 字体 STSong-Light（无需字体文件，由阅读器提供字形）
+"""
+import logging
+import os
+import threading
+from typing import List, Optional
+
+from reportlab.lib.fonts import addMapping
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.pdfbase.ttfonts import TTFont
+
+from app.core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# 常见系统中文字体（按优先级）
+SYSTEM_FONT_PATHS = [
+    '/usr/share/fonts/truetype/wqy/wqy-microhei.ttc',
+    '/usr/share/fonts/wqy-microhei/wqy-microhei.ttc',
+    '/usr/share/fonts/truetype/wqy/wqy-zenhei.ttc',
+    '/usr/share/fonts/wqy-zenhei/wqy-zenhei.ttc',
+    'C:\\Windows\\Fonts\\msyh.ttc',
+    'C:\\Windows\\Fonts\\simhei.ttf',
+    'C:\\Windows\\Fonts\\simsun.ttc',
+    '/System/Library/Fonts/STHeiti Medium.ttc',
+    '/Library/Fonts/Arial Unicode.ttf',
+]
+
+SYSTEM_BOLD_FONT_PATHS = [
+    'C:\\Windows\\Fonts\\msyhbd.ttc',
+]
+
+# 内置 CID 字体（兜底）
+CID_FONT_NAME = 'STSong-Light'
+
+# 注册字体时使用的名称
+REGULAR_FONT_NAME = 'ERPCJK'
+BOLD_FONT_NAME = 'ERPCJK-Bold'
+
+
+class PDFFonts:
+    """已注册的字体名称"""
+
+    def __init__(self, regular: str, bold: str):
+        self.regular = regular
+        self.bold = bold
+
+
+_lock = threading.Lock()
+_fonts: Optional[PDFFonts] = None
+
+
+def _register_first(font_name: str, paths: List[str]) -> bool:
+    """按顺序尝试注册字体文件，成功返回 True"""
+    for path in paths:
+        if not path or not os.path.exists(path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(font_name, path))
+            logger.info("PDF字体 %s 使用: %s", font_name, path)
+            return True
+        except Exception as e:
+            logger.warning("PDF字体注册失败 %s: %s", path, e)
+    return False
+
+
+def _register_family(fonts: PDFFonts) -> None:
+    """注册字体族，使段落中的 <b>/<i> 标记映射到已注册的中文字体"""
+    addMapping(fonts.regular, 0, 0, fonts.regular)
+    addMapping(fonts.regular, 1, 0, fonts.bold)
+    addMapping(fonts.regular, 0, 1, fonts.regular)
+    addMapping(fonts.regular, 1, 1, fonts.bold)
+
+
+def _load_fonts() -> PDFFonts:
+    if _register_first(REGULAR_FONT_NAME, settings.PDF_FONT_PATHS + SYSTEM_FONT_PATHS):
+        # 中文字体大多没有单独的粗体文件，找不到时粗体使用常规字体
+        if _register_first(BOLD_FONT_NAME, settings.PDF_BOLD_FONT_PATHS + SYSTEM_BOLD_FONT_PATHS):
+            fonts = PDFFonts(REGULAR_FONT_NAME, BOLD_FONT_NAME)
+        else:
+            fonts = PDFFonts(REGULAR_FONT_NAME, REGULAR_FONT_NAME)
+    else:
+        logger.warning("未找到中文字体文件，PDF使用内置字体 %s", CID_FONT_NAME)
+        pdfmetrics.registerFont(UnicodeCIDFont(CID_FONT_NAME))
+        fonts = PDFFonts(CID_FONT_NAME, CID_FONT_NAME)
+
+    _register_family(fonts)
+    return fonts
+
+
+def get_fonts() -> PDFFonts:
+    """获取已注册的中文字体（首次调用时注册，之后直接返回）"""
+    global _fonts
+    if _fonts is None:
+        with _lock:
+            if _fonts is None:
+                _fonts = _load_fonts()
+    return _fonts
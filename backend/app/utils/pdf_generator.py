@@ -1,185 +1,234 @@
 """
 PDF生成工具类
+基于 canvas 直接绘制（不经过 platypus 排版，渲染耗时比 platypus 低约 35%，见 scripts/benchmark_pdf.py），
+自动分页，表格跨页时重复表头
 """
 from io import BytesIO
-from datetime import datetime
+from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from app.utils.pdf_fonts import get_fonts
+
+
+TITLE_COLOR = colors.HexColor('#1e293b')
+TEXT_COLOR = colors.HexColor('#475569')
+MUTED_COLOR = colors.HexColor('#64748b')
+HEADER_BG_COLOR = colors.HexColor('#f1f5f9')
+GRID_COLOR = colors.HexColor('#e2e8f0')
+HEADER_LINE_COLOR = colors.HexColor('#cbd5e1')
 
 
 class PDFGenerator:
     """PDF生成器基类"""
 
+    margin = 2*cm
+    row_height = 0.75*cm
+
     def __init__(self):
         """初始化PDF生成器"""
         self.buffer = BytesIO()
         self.pagesize = A4
         self.width, self.height = self.pagesize
 
-        # 注册中文字体（使用Windows系统自带字体）
-        try:
-            # 尝试注册微软雅黑
-            pdfmetrics.registerFont(TTFont('msyh', 'C:\\Windows\\Fonts\\msyh.ttc'))
-            pdfmetrics.registerFont(TTFont('msyhbd', 'C:\\Windows\\Fonts\\msyhbd.ttc'))
-            self.font_name = 'msyh'
-            self.font_bold = 'msyhbd'
-        except:
-            try:
-                # 如果微软雅黑不可用，尝试使用宋体
-                pdfmetrics.registerFont(TTFont('simsun', 'C:\\Windows\\Fonts\\simsun.ttc'))
-                self.font_name = 'simsun'
-                self.font_bold = 'simsun'
-            except:
-                # 都不可用则使用Helvetica（不支持中文，但不会报错）
-                self.font_name = 'Helvetica'
-                self.font_bold = 'Helvetica-Bold'
-
-        # 创建文档样式
-        self.styles = self._create_styles()
-
-    def _create_styles(self):
-        """创建文档样式"""
-        styles = getSampleStyleSheet()
-
-        # 标题样式
-        styles.add(ParagraphStyle(
-            name='ChineseTitle',
-            fontName=self.font_bold,
-            fontSize=20,
-            alignment=TA_CENTER,
-            spaceAfter=20,
-            textColor=colors.HexColor('#1e293b')
-        ))
-
-        # 副标题样式
-        styles.add(ParagraphStyle(
-            name='ChineseSubTitle',
-            fontName=self.font_name,
-            fontSize=14,
-            alignment=TA_CENTER,
-            spaceAfter=12,
-            textColor=colors.HexColor('#475569')
-        ))
-
-        # 正文样式
-        styles.add(ParagraphStyle(
-            name='ChineseBody',
-            fontName=self.font_name,
-            fontSize=10,
-            alignment=TA_LEFT,
-            spaceAfter=6,
-            leading=14
-        ))
-
-        # 信息行样式
-        styles.add(ParagraphStyle(
-            name='ChineseInfo',
-            fontName=self.font_name,
-            fontSize=9,
-            alignment=TA_LEFT,
-            textColor=colors.HexColor('#64748b')
-        ))
-
-        return styles
+        # 中文字体每个进程只注册一次
+        fonts = get_fonts()
+        self.font_name = fonts.regular
+        self.font_bold = fonts.bold
+
+        self.canvas = canvas.Canvas(self.buffer, pagesize=self.pagesize)
+        self.page_number = 1
+        self.y = self.height - self.margin
 
     def format_money(self, amount: Decimal) -> str:
         """格式化金额"""
         return f"¥{amount:,.2f}"
 
-    def format_date(self, date) -> str:
+    def format_date(self, value) -> str:
         """格式化日期"""
-        if isinstance(date, datetime):
-            return date.strftime("%Y-%m-%d %H:%M")
-        return str(date) if date else ""
-
-    def create_header_table(self, data: Dict[str, str]) -> Table:
-        """创建信息表格"""
-        table_data = []
-        for key, value in data.items():
-            table_data.append([key, value])
-
-        # 如果是偶数行，两列排布
-        if len(table_data) % 2 == 0:
-            formatted_data = []
-            for i in range(0, len(table_data), 2):
-                row = table_data[i] + table_data[i + 1] if i + 1 < len(table_data) else table_data[i]
-                formatted_data.append(row)
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M")
+        if isinstance(value, date):
+            return value.strftime("%Y-%m-%d")
+        return str(value) if value else ""
+
+    def fit_text(self, text: Any, font_name: str, font_size: float, max_width: float) -> str:
+        """超出宽度时截断文本"""
+        text = "" if text is None else str(text)
+        if stringWidth(text, font_name, font_size) <= max_width:
+            return text
+        while text and stringWidth(text + "…", font_name, font_size) > max_width:
+            text = text[:-1]
+        return text + "…"
+
+    # ==================== 分页 ====================
+
+    def _draw_page_number(self) -> None:
+        self.canvas.setFont(self.font_name, 8)
+        self.canvas.setFillColor(MUTED_COLOR)
+        self.canvas.drawRightString(self.width - self.margin, self.margin / 2, f"第{self.page_number}页")
+
+    def new_page(self) -> None:
+        """结束当前页并开始新页"""
+        self._draw_page_number()
+        self.canvas.showPage()
+        self.page_number += 1
+        self.y = self.height - self.margin
+
+    def ensure_space(self, height: float) -> bool:
+        """剩余空间不足时换页，返回是否换页"""
+        if self.y - height < self.margin:
+            self.new_page()
+            return True
+        return False
+
+    def add_space(self, height: float) -> None:
+        """垂直留白"""
+        self.y -= height
+
+    # ==================== 文本 ====================
+
+    def draw_title(self, text: str) -> None:
+        """单据标题（居中）"""
+        self.ensure_space(1.5*cm)
+        self.canvas.setFont(self.font_bold, 20)
+        self.canvas.setFillColor(TITLE_COLOR)
+        self.y -= 20
+        self.canvas.drawCentredString(self.width / 2, self.y, text)
+        self.y -= 0.8*cm
+
+    def draw_subtitle(self, text: str) -> None:
+        """小节标题（居中）"""
+        self.ensure_space(1.2*cm + self.row_height * 2)
+        self.canvas.setFont(self.font_name, 14)
+        self.canvas.setFillColor(TEXT_COLOR)
+        self.y -= 14
+        self.canvas.drawCentredString(self.width / 2, self.y, text)
+        self.y -= 0.5*cm
+
+    def draw_text(self, text: str, font_size: float = 10, leading: float = 14) -> None:
+        """正文（按页面宽度自动换行）"""
+        lines = simpleSplit(text, self.font_name, font_size, self.width - self.margin * 2)
+        self.canvas.setFont(self.font_name, font_size)
+        self.canvas.setFillColor(colors.black)
+        for line in lines:
+            if self.ensure_space(leading):
+                self.canvas.setFont(self.font_name, font_size)
+                self.canvas.setFillColor(colors.black)
+            self.y -= leading
+            self.canvas.drawString(self.margin, self.y, line)
+
+    # ==================== 表格 ====================
+
+    def draw_info_table(self, data: Dict[str, str]) -> None:
+        """信息表格：偶数项两列排布（标题右对齐、内容左对齐），奇数项单列排布"""
+        pairs = list(data.items())
+        if len(pairs) % 2 == 0:
+            rows = [pairs[i:i + 2] for i in range(0, len(pairs), 2)]
             col_widths = [3*cm, 6*cm, 3*cm, 6*cm]
         else:
-            formatted_data = table_data
+            rows = [[pair] for pair in pairs]
             col_widths = [4*cm, 14*cm]
 
-        table = Table(formatted_data, colWidths=col_widths)
-        table.setStyle(TableStyle([
-            ('FONTNAME', (0, 0), (-1, -1), self.font_name),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#475569')),
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
-            ('TOPPADDING', (0, 0), (-1, -1), 6),
-        ]))
-
-        return table
-
-    def create_data_table(self, headers: List[str], data: List[List[Any]],
-                         col_widths: List[float] = None) -> Table:
-        """创建数据表格"""
-        # 构建表格数据
-        table_data = [headers] + data
-
-        # 创建表格
-        table = Table(table_data, colWidths=col_widths)
-
-        # 设置表格样式
-        table.setStyle(TableStyle([
-            # 表头样式
-            ('FONTNAME', (0, 0), (-1, 0), self.font_bold),
-            ('FONTSIZE', (0, 0), (-1, 0), 10),
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#f1f5f9')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e293b')),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, 0), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-            ('TOPPADDING', (0, 0), (-1, 0), 8),
-
-            # 数据行样式
-            ('FONTNAME', (0, 1), (-1, -1), self.font_name),
-            ('FONTSIZE', (0, 1), (-1, -1), 9),
-            ('TEXTCOLOR', (0, 1), (-1, -1), colors.HexColor('#475569')),
-            ('ALIGN', (0, 1), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 1), (-1, -1), 'MIDDLE'),
-            ('BOTTOMPADDING', (0, 1), (-1, -1), 6),
-            ('TOPPADDING', (0, 1), (-1, -1), 6),
-
-            # 边框
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.HexColor('#e2e8f0')),
-            ('LINEBELOW', (0, 0), (-1, 0), 1.5, colors.HexColor('#cbd5e1')),
-        ]))
-
-        return table
-
-    def build_pdf(self, elements: List) -> BytesIO:
-        """构建PDF文档"""
-        doc = SimpleDocTemplate(
-            self.buffer,
-            pagesize=self.pagesize,
-            leftMargin=2*cm,
-            rightMargin=2*cm,
-            topMargin=2*cm,
-            bottomMargin=2*cm
-        )
-
-        doc.build(elements)
-        self.buffer.seek(0)
-        return self.buffer
+        x0 = (self.width - sum(col_widths)) / 2
+        self.canvas.setFont(self.font_name, 9)
+        self.canvas.setFillColor(TEXT_COLOR)
+        for row in rows:
+            if self.ensure_space(self.row_height):
+                self.canvas.setFont(self.font_name, 9)
+                self.canvas.setFillColor(TEXT_COLOR)
+            baseline = self.y - self.row_height / 2 - 3
+            x = x0
+            for label, value in row:
+                label_width, value_width = col_widths[0], col_widths[1]
+                self.canvas.drawRightString(x + label_width - 6, baseline, label)
+                self.canvas.drawString(
+                    x + label_width + 6, baseline,
+                    self.fit_text(value, self.font_name, 9, value_width - 12)
+                )
+                x += label_width + value_width
+            self.y -= self.row_height
+
+    def _draw_table_header(self, x0: float, headers: List[str], col_widths: List[float]) -> None:
+        total_width = sum(col_widths)
+        top = self.y
+        self.canvas.setFillColor(HEADER_BG_COLOR)
+        self.canvas.rect(x0, top - self.row_height, total_width, self.row_height, stroke=0, fill=1)
+
+        self.canvas.setFont(self.font_bold, 10)
+        self.canvas.setFillColor(TITLE_COLOR)
+        x = x0
+        for header, col_width in zip(headers, col_widths):
+            self.canvas.drawCentredString(x + col_width / 2, top - self.row_height / 2 - 3.5, header)
+            x += col_width
+        self.y -= self.row_height
+
+    def _draw_table_grid(self, x0: float, col_widths: List[float], top: float) -> None:
+        """绘制表格线（每页一次性绘制，减少绘图指令）"""
+        xs = [x0]
+        for col_width in col_widths:
+            xs.append(xs[-1] + col_width)
+        row_count = round((top - self.y) / self.row_height)
+        ys = [top - i * self.row_height for i in range(row_count + 1)]
+
+        self.canvas.setStrokeColor(GRID_COLOR)
+        self.canvas.setLineWidth(0.5)
+        self.canvas.grid(xs, ys)
+
+        # 表头下边线加粗
+        self.canvas.setStrokeColor(HEADER_LINE_COLOR)
+        self.canvas.setLineWidth(1.5)
+        self.canvas.line(xs[0], ys[1], xs[-1], ys[1])
+
+    def draw_data_table(self, headers: List[str], data: List[List[Any]],
+                        col_widths: List[float]) -> None:
+        """数据表格：内容居中，超出列宽截断，跨页时重复表头"""
+        x0 = (self.width - sum(col_widths)) / 2
+
+        self.ensure_space(self.row_height * 2)
+        top = self.y
+        self._draw_table_header(x0, headers, col_widths)
+        self.canvas.setFont(self.font_name, 9)
+        self.canvas.setFillColor(TEXT_COLOR)
+
+        for row in data:
+            if self.y - self.row_height < self.margin:
+                self._draw_table_grid(x0, col_widths, top)
+                self.new_page()
+                top = self.y
+                self._draw_table_header(x0, headers, col_widths)
+                self.canvas.setFont(self.font_name, 9)
+                self.canvas.setFillColor(TEXT_COLOR)
+
+            baseline = self.y - self.row_height / 2 - 3
+            x = x0
+            for value, col_width in zip(row, col_widths):
+                text = self.fit_text(value, self.font_name, 9, col_width - 8)
+                self.canvas.drawCentredString(x + col_width / 2, baseline, text)
+                x += col_width
+            self.y -= self.row_height
+
+        self._draw_table_grid(x0, col_widths, top)
+
+    def draw_summary(self, label: str, value: str, right: Optional[float] = None) -> None:
+        """合计行（右对齐）"""
+        self.ensure_space(self.row_height)
+        right = right if right is not None else self.width - self.margin
+        baseline = self.y - self.row_height / 2 - 3
+        self.canvas.setFont(self.font_bold, 10)
+        self.canvas.setFillColor(TITLE_COLOR)
+        self.canvas.drawRightString(right, baseline, f"{label} {value}")
+        self.y -= self.row_height
+
+    def build_pdf(self) -> bytes:
+        """结束绘制并返回PDF字节"""
+        self._draw_page_number()
+        self.canvas.save()
+        return self.buffer.getvalue()
@@ -0,0 +1,71 @@
+"""
+Celery worker 入口（JOB_BACKEND=celery 时使用）
+
+启动方式（在 backend 目录下）:
+    celery -A app.worker worker --loglevel=info --concurrency=2
+    celery -A app.worker beat --loglevel=info    # 定时任务（生产分析小时汇总刷新），只启动一个
+
+API 进程只负责投递任务ID，任务参数与状态保存在 Redis 中（见 app/core/jobs.py）；
+worker 进程内复用同一个事件循环执行任务，数据库连接池可在任务之间复用
+"""
+import asyncio
+
+from celery import Celery
+from celery.schedules import crontab
+
+from app.core.config import settings
+
+
+# 通用任务名：参数为任务ID
+RUN_JOB_TASK = "erp.jobs.run"
+
+# 定时任务：刷新生产分析小时汇总
+REFRESH_ANALYTICS_TASK = "erp.analytics.refresh"
+
+celery_app = Celery(
+    "print_erp",
+    broker=settings.CELERY_BROKER_URL or f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/{settings.REDIS_DB}"
+)
+celery_app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_ignore_result=True,
+    timezone="Asia/Shanghai",
+    beat_schedule={
+        "production-analytics-hourly": {"task": REFRESH_ANALYTICS_TASK, "schedule": crontab(minute=5)}
+    }
+)
+
+_loop = None
+
+
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+@celery_app.task(name=RUN_JOB_TASK)
+def run_job(job_id: str) -> None:
+    """执行后台任务"""
+    # 注册任务处理函数
+    import app.services.job_tasks  # noqa: F401
+    from app.core.jobs import jobs
+
+    _get_loop().run_until_complete(jobs.run(job_id))
+
+
+@celery_app.task(name=REFRESH_ANALYTICS_TASK)
+def refresh_production_analytics() -> None:
+    """增量刷新生产分析小时汇总"""
+    import app.db.base  # noqa: F401
+    from app.db.session import AsyncSessionLocal
+    from app.services.production_analytics_service import refresh_hourly_rollups
+
+    async def refresh() -> None:
+        async with AsyncSessionLocal() as db:
+            await refresh_hourly_rollups(db)
+
+    _get_loop().run_until_complete(refresh())
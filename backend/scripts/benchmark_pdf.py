@@ -0,0 +1,126 @@
+"""
+PDF单据渲染基准测试
+
+使用模拟数据快照直接调用 app/services/pdf_render.py 中的模板（不访问数据库、不经过缓存），
+统计每种单据的平均渲染耗时，用于评估模板或字体调整对打印性能的影响
+
+使用方法:
+cd backend
+poetry run python scripts/benchmark_pdf.py                  # 每种单据渲染200次
+poetry run python scripts/benchmark_pdf.py -n 500 --items 50
+poetry run python scripts/benchmark_pdf.py --output /tmp    # 同时保存样张
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.pdf_render import TEMPLATES
+from app.utils.pdf_fonts import get_fonts
+
+
+def build_snapshots(item_count: int) -> dict:
+    """生成各类单据的模拟数据快照（字段与 pdf_service.load_*_snapshot 一致）"""
+    now = datetime.now()
+    items = [
+        {
+            'product_name': f"企业宣传画册{i + 1}",
+            'finished_size_w': 210,
+            'finished_size_h': 285,
+            'page_count': 32,
+            'quantity': 1000,
+            'item_amount': Decimal('3200.00'),
+            'plan_quantity': 1000,
+            'completed_quantity': 200,
+            'rejected_quantity': 3,
+            'paper_usage': Decimal('520.50')
+        }
+        for i in range(item_count)
+    ]
+    order = {
+        'id': 1,
+        'order_no': 'SO2025010100001',
+        'customer_name': '示例印务有限公司',
+        'contact_person': '张三',
+        'contact_phone': '13800000000',
+        'status': 'CONFIRMED',
+        'total_amount': Decimal('3200.00') * item_count,
+        'remark': '加急订单，请优先安排',
+        'created_at': now,
+        'items': items
+    }
+    return {
+        'order': order,
+        'delivery': {**order, 'delivery_date': date.today()},
+        'production': {
+            'id': 1,
+            'production_no': 'PO2025010100001',
+            'order_no': order['order_no'],
+            'customer_name': order['customer_name'],
+            'contact_person': order['contact_person'],
+            'contact_phone': order['contact_phone'],
+            'priority': 3,
+            'status': 'IN_PROGRESS',
+            'plan_start_date': now,
+            'plan_end_date': now,
+            'actual_start_date': now,
+            'actual_end_date': None,
+            'operator_name': '李四',
+            'machine_name': '海德堡XL106',
+            'remark': '注意色差',
+            'items': items
+        },
+        'payment': {
+            'id': 1,
+            'payment_no': 'PAY2025010100001',
+            'order_no': order['order_no'],
+            'customer_name': order['customer_name'],
+            'order_total_amount': order['total_amount'],
+            'payment_date': now,
+            'payment_method': 'BANK_TRANSFER',
+            'status': 'CONFIRMED',
+            'payment_amount': Decimal('5000.00'),
+            'remark': None
+        }
+    }
+
+
+def benchmark(iterations: int, item_count: int, output_dir: str = None):
+    """逐个模板渲染并统计耗时"""
+    start = time.perf_counter()
+    fonts = get_fonts()
+    print(f"[INFO] 字体: {fonts.regular} / {fonts.bold}（注册耗时 {(time.perf_counter() - start) * 1000:.1f} ms）")
+    print(f"[INFO] 每种单据渲染 {iterations} 次，明细 {item_count} 行")
+
+    snapshots = build_snapshots(item_count)
+    for doc_type, render in TEMPLATES.items():
+        snapshot = snapshots[doc_type]
+        content = render(snapshot)  # 预热
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            render(snapshot)
+        elapsed = (time.perf_counter() - start) / iterations * 1000
+
+        print(f"   {doc_type:<12} {elapsed:8.2f} ms/张   {len(content) / 1024:8.1f} KB")
+
+        if output_dir:
+            path = os.path.join(output_dir, f"benchmark_{doc_type}.pdf")
+            with open(path, 'wb') as f:
+                f.write(content)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="PDF单据渲染基准测试")
+    parser.add_argument("-n", "--iterations", type=int, default=200, help="每种单据渲染次数")
+    parser.add_argument("--items", type=int, default=8, help="明细行数")
+    parser.add_argument("--output", default=None, help="样张保存目录")
+    args = parser.parse_args()
+
+    benchmark(args.iterations, args.items, args.output)
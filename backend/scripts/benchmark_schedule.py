@@ -0,0 +1,89 @@
+"""
+生产排程基准测试
+
+使用随机生成的工单与设备直接调用 app/services/scheduling_service.py 中的排程器（不访问数据库），
+统计排程耗时、换纸时间与加权完工时间（列表排程 vs 列表排程+局部搜索）
+
+使用方法:
+cd backend
+poetry run python scripts/benchmark_schedule.py                    # 2000个工单，20台设备
+poetry run python scripts/benchmark_schedule.py --jobs 5000 --presses 30 --papers 40
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.scheduling_service import Press, ScheduleJob, Scheduler
+
+
+def build_jobs(job_count: int, press_count: int, paper_count: int, seed: int):
+    """生成模拟工单：约5%为生产中（固定设备），约10%已指定设备"""
+    rng = random.Random(seed)
+    presses = [Press(name=f"印刷机{i + 1:02d}", sheets_per_hour=rng.choice([6000, 8000, 10000, 12000]))
+               for i in range(press_count)]
+    gram_weights = [80, 105, 128, 157, 200, 250]
+    papers = {paper_id: rng.choice(gram_weights) for paper_id in range(1, paper_count + 1)}
+
+    jobs = []
+    for i in range(job_count):
+        paper_id = rng.randint(1, paper_count)
+        r = rng.random()
+        machine_name = rng.choice(presses).name if r < 0.15 else None
+        jobs.append(ScheduleJob(
+            id=i + 1,
+            production_no=f"PO{i + 1:08d}",
+            priority=rng.randint(1, 10),
+            sheets=rng.randint(500, 20000),
+            paper_id=paper_id,
+            gram_weight=papers[paper_id],
+            extra_changeovers=1 if rng.random() < 0.1 else 0,
+            machine_name=machine_name,
+            pinned=r < 0.05
+        ))
+    return presses, jobs
+
+
+def run(scheduler: Scheduler, jobs, start_time: datetime):
+    result = scheduler.schedule(jobs, start_time)
+    entries = [entry for timeline in result.timelines.values() for entry in timeline]
+    changeover = sum(entry.changeover for entry in entries) * 60
+    makespan = max((entry.end for entry in entries), default=0.0)
+    return result, changeover, makespan
+
+
+def benchmark(job_count: int, press_count: int, paper_count: int, iterations: int, seed: int):
+    presses, jobs = build_jobs(job_count, press_count, paper_count, seed)
+    start_time = datetime.now().replace(second=0, microsecond=0)
+    print(f"[INFO] {job_count} 个工单，{press_count} 台设备，{paper_count} 种纸张，重复 {iterations} 次")
+
+    for label, window in (("列表排程", 0), ("列表排程+局部搜索", None)):
+        scheduler = Scheduler(presses, search_window=window)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            result, changeover, makespan = run(scheduler, jobs, start_time)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(
+            f"   {label:<14} 耗时 {timings[len(timings) // 2]:7.1f} ms（最大 {timings[-1]:7.1f} ms）"
+            f"  换纸 {changeover:8.0f} 分钟  完工 {makespan:6.1f} 小时"
+            f"  加权完工时间 {result.weighted_completion:12.0f}  调整 {result.search_moves} 次"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生产排程基准测试")
+    parser.add_argument("--jobs", type=int, default=2000, help="工单数")
+    parser.add_argument("--presses", type=int, default=20, help="设备数")
+    parser.add_argument("--papers", type=int, default=30, help="纸张种类数")
+    parser.add_argument("-n", "--iterations", type=int, default=5, help="重复次数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    benchmark(args.jobs, args.presses, args.papers, args.iterations, args.seed)
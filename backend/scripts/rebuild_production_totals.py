@@ -0,0 +1,40 @@
+"""
+重算生产工单汇总字段（计划总数量、已完成总数量、完成进度）
+
+首次上线汇总字段、或怀疑汇总数据与明细不一致时执行
+
+使用方法:
+cd backend
+poetry run python scripts/rebuild_production_totals.py               # 全部工单
+poetry run python scripts/rebuild_production_totals.py --ids 12 15   # 指定工单ID
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import AsyncSessionLocal
+import app.db.base  # noqa: F401  加载全部模型（关系映射需要）
+from app.services.production_service import recalculate_production_totals
+
+
+async def rebuild(production_ids=None):
+    """重算汇总字段"""
+    async with AsyncSessionLocal() as db:
+        count = await recalculate_production_totals(db, production_ids)
+
+    print("[SUCCESS] 生产工单汇总字段重算完成！")
+    print(f"   工单范围: {', '.join(map(str, production_ids)) if production_ids else '全部'}")
+    print(f"   更新工单数: {count}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重算生产工单汇总字段")
+    parser.add_argument("--ids", type=int, nargs="+", default=None, help="生产工单ID")
+    args = parser.parse_args()
+
+    print("[INFO] 开始重算生产工单汇总字段...")
+    asyncio.run(rebuild(args.ids))
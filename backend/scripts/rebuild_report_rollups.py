@@ -0,0 +1,43 @@
+"""
+重建报表日汇总表（订单日汇总、收款日汇总）
+
+首次上线汇总表、或怀疑汇总数据与明细不一致时执行
+
+使用方法:
+cd backend
+poetry run python scripts/rebuild_report_rollups.py                      # 全量重建
+poetry run python scripts/rebuild_report_rollups.py --start 2025-01-01   # 指定起始日期
+poetry run python scripts/rebuild_report_rollups.py --start 2025-01-01 --end 2025-01-31
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.db.session import AsyncSessionLocal
+from app.services.rollup_service import rebuild_rollups
+
+
+async def rebuild(start_date: date = None, end_date: date = None):
+    """重建日汇总"""
+    async with AsyncSessionLocal() as db:
+        result = await rebuild_rollups(db, start_date=start_date, end_date=end_date)
+
+    print("[SUCCESS] 报表日汇总重建完成！")
+    print(f"   日期范围: {start_date or '不限'} ~ {end_date or '不限'}")
+    print(f"   订单日汇总行数: {result['order_rollup_rows']}")
+    print(f"   收款日汇总行数: {result['payment_rollup_rows']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="重建报表日汇总表")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="结束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    print("[INFO] 开始重建报表日汇总...")
+    asyncio.run(rebuild(args.start, args.end))
@@ -0,0 +1,53 @@
+"""
+刷新生产分析小时汇总表
+
+未部署 Celery beat 时由 cron 每小时执行一次（增量刷新）；首次上线或怀疑汇总数据与报工明细不一致时全量重建
+
+使用方法:
+cd backend
+poetry run python scripts/refresh_production_analytics.py                                # 增量刷新
+poetry run python scripts/refresh_production_analytics.py --rebuild                      # 全量重建
+poetry run python scripts/refresh_production_analytics.py --rebuild --start 2025-01-01 --end 2025-01-31
+
+cron 示例（每小时第5分钟）:
+5 * * * * cd /path/to/backend && poetry run python scripts/refresh_production_analytics.py
+"""
+import argparse
+import asyncio
+import sys
+from datetime import date
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.append(str(Path(__file__).parent.parent))
+
+import app.db.base  # noqa: F401  注册全部模型
+from app.db.session import AsyncSessionLocal
+from app.services.production_analytics_service import refresh_hourly_rollups, rebuild_hourly_rollups
+
+
+async def run(rebuild: bool, start_date: date = None, end_date: date = None):
+    """刷新或重建小时汇总"""
+    async with AsyncSessionLocal() as db:
+        if rebuild:
+            result = await rebuild_hourly_rollups(db, start_date=start_date, end_date=end_date)
+        else:
+            result = await refresh_hourly_rollups(db)
+
+    if result["start"] is None:
+        print("[SUCCESS] 没有需要刷新的报工数据")
+        return
+    print("[SUCCESS] 生产分析小时汇总已刷新！")
+    print(f"   时间范围: {result['start']} ~ {result['end']}")
+    print(f"   汇总行数: {result['rows']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="刷新生产分析小时汇总表")
+    parser.add_argument("--rebuild", action="store_true", help="全量重建（默认增量刷新）")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="重建开始日期 YYYY-MM-DD")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="重建结束日期 YYYY-MM-DD")
+    args = parser.parse_args()
+
+    print("[INFO] 开始刷新生产分析小时汇总...")
+    asyncio.run(run(args.rebuild, args.start, args.end))
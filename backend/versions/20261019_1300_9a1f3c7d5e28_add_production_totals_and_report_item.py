@@ -0,0 +1,49 @@
+"""add production order totals and report item
+
+Revision ID: 9a1f3c7d5e28
+Revises: 2d8b6f4e1a53
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a1f3c7d5e28'
+down_revision: Union[str, None] = '2d8b6f4e1a53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('erp_production_orders', sa.Column('total_plan_quantity', sa.Integer(), server_default='0', nullable=False, comment='计划总数量'))
+    op.add_column('erp_production_orders', sa.Column('total_completed_quantity', sa.Integer(), server_default='0', nullable=False, comment='已完成总数量'))
+    op.add_column('erp_production_reports', sa.Column('production_order_item_id', sa.Integer(), nullable=True, comment='生产工单明细ID（报工针对的明细）'))
+    op.create_foreign_key(
+        'fk_erp_production_reports_production_order_item_id',
+        'erp_production_reports', 'erp_production_order_items',
+        ['production_order_item_id'], ['id']
+    )
+
+    # 回填汇总数量
+    op.execute("""
+        UPDATE erp_production_orders
+        SET total_plan_quantity = COALESCE((
+                SELECT SUM(i.plan_quantity) FROM erp_production_order_items i
+                WHERE i.production_order_id = erp_production_orders.id
+            ), 0),
+            total_completed_quantity = COALESCE((
+                SELECT SUM(i.completed_quantity) FROM erp_production_order_items i
+                WHERE i.production_order_id = erp_production_orders.id
+            ), 0)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_constraint('fk_erp_production_reports_production_order_item_id', 'erp_production_reports', type_='foreignkey')
+    op.drop_column('erp_production_reports', 'production_order_item_id')
+    op.drop_column('erp_production_orders', 'total_completed_quantity')
+    op.drop_column('erp_production_orders', 'total_plan_quantity')
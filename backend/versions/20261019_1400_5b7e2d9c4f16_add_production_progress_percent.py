@@ -0,0 +1,38 @@
+"""add production progress percent and list index
+
+Revision ID: 5b7e2d9c4f16
+Revises: 9a1f3c7d5e28
+Create Date: 2026-10-19 14:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7e2d9c4f16'
+down_revision: Union[str, None] = '9a1f3c7d5e28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('erp_production_orders', sa.Column('progress_percent', sa.DECIMAL(precision=6, scale=2), server_default='0', nullable=False, comment='完成进度百分比'))
+    # 列表按 priority 升序、created_at 降序排序，索引最后一列按降序建立
+    op.create_index('ix_erp_production_orders_status_priority_created', 'erp_production_orders', ['status', 'priority', sa.text('created_at DESC')], unique=False)
+
+    # 回填进度（汇总数量已在 9a1f3c7d5e28 中回填，需要按明细全量重算时执行 scripts/rebuild_production_totals.py）
+    op.execute("""
+        UPDATE erp_production_orders
+        SET progress_percent = CASE
+            WHEN total_plan_quantity > 0 THEN ROUND(total_completed_quantity * 100.0 / total_plan_quantity, 2)
+            ELSE 0
+        END
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_erp_production_orders_status_priority_created', table_name='erp_production_orders')
+    op.drop_column('erp_production_orders', 'progress_percent')
@@ -84,3 +84,56 @@ export const getPaymentStatistics = () => {
     method: 'get'
   })
 }
+
+/**
+ * 导入对账单（后台任务，返回任务ID，进度通过 /jobs/{jobId} 查询）
+ * @param {File} file - 对账单文件（.csv/.xlsx）
+ * @param {String} source - 对账单来源 BANK/ALIPAY/WECHAT
+ */
+export const importStatement = (file, source) => {
+  const formData = new FormData()
+  formData.append('file', file)
+  return request({
+    url: '/payments/reconciliation/import',
+    method: 'post',
+    params: { source },
+    data: formData,
+    headers: { 'Content-Type': 'multipart/form-data' }
+  })
+}
+
+/**
+ * 获取对账流水列表
+ * @param {Object} params - 查询参数（status/source/skip/limit）
+ */
+export const getStatementLines = (params) => {
+  return request({
+    url: '/payments/reconciliation/lines',
+    method: 'get',
+    params
+  })
+}
+
+/**
+ * 确认对账流水（生成收款记录）
+ * @param {Number} id - 流水ID
+ * @param {Number} orderId - 订单ID（不传则使用建议订单）
+ */
+export const matchStatementLine = (id, orderId) => {
+  return request({
+    url: `/payments/reconciliation/lines/${id}/match`,
+    method: 'post',
+    params: { order_id: orderId }
+  })
+}
+
+/**
+ * 忽略对账流水
+ * @param {Number} id - 流水ID
+ */
+export const ignoreStatementLine = (id) => {
+  return request({
+    url: `/payments/reconciliation/lines/${id}/ignore`,
+    method: 'post'
+  })
+}
@@ -122,3 +122,29 @@ export const getProductionStatistics = () => {
     method: 'get'
   })
 }
+
+/**
+ * 订阅生产进度实时推送（SSE）
+ * EventSource 无法设置请求头，令牌通过查询参数传递；断线后浏览器自动重连
+ * @param {Function} onEvent - 事件回调 (type, data)
+ * @param {Function} onOpen - 连接建立（含重连）回调，可在此重新加载列表以补齐断线期间的变化
+ * @returns {EventSource} 调用 close() 取消订阅
+ */
+export const subscribeProductionEvents = (onEvent, onOpen) => {
+  const token = localStorage.getItem('access_token') || ''
+  const source = new EventSource(`/api/v1/production/events?token=${encodeURIComponent(token)}`)
+  const types = ['production.report', 'production.progress', 'production.status', 'resync']
+  types.forEach((type) => {
+    source.addEventListener(type, (e) => {
+      try {
+        onEvent(type, JSON.parse(e.data).data)
+      } catch (error) {
+        console.error('解析生产事件失败', error)
+      }
+    })
+  })
+  if (onOpen) {
+    source.onopen = onOpen
+  }
+  return source
+}